@@ -0,0 +1,1849 @@
+# Módulo: `benchmarks.py`
+# Descripción: Mediciones de rendimiento del modelo (`poo.py`) sobre bases de datos sintéticas.
+# Cada medición crea su propia base de datos temporal, nunca toca `data.db`.
+#
+# Uso:
+#   python benchmarks.py busqueda [cantidad_clientes]
+#   python benchmarks.py importacion [cantidad_modulos]
+#   python benchmarks.py primera_ventana [limite_ms]
+#   python benchmarks.py ventanas [repeticiones]
+#   python benchmarks.py servidor [conexiones] [profundidad] [segundos] [archivo.jsonl]
+#   python benchmarks.py escritores [ventas_por_hilo]
+#   python benchmarks.py carrito [operaciones]
+#   python benchmarks.py factura [lineas] [facturas_en_libro]
+#   python benchmarks.py stock [hilos] [unidades]
+#   python benchmarks.py vencimiento [lotes] [dias]
+#   python benchmarks.py fechas [ventas] [dias]
+#   python benchmarks.py reportes [ventas]
+#   python benchmarks.py resumenes [ventas]
+#   python benchmarks.py archivo [ventas]
+#   python benchmarks.py sucursales [ventas_por_sucursal] [sucursales]
+#   python benchmarks.py cambios [ventas] [facturas_del_dia]
+#   python benchmarks.py exportacion [ventas]
+#   python benchmarks.py ingesta [ventas]
+#   python benchmarks.py respaldo [ventas]
+#   python benchmarks.py modelo [escalas] [resultados.json] [linea_base.json]
+#   python benchmarks.py trazas [cobros]
+#   python benchmarks.py validacion [filas]
+
+import asyncio
+import re
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from poo import (Db, Cliente, Producto, Venta, Escritor, Carrito, StockInsuficiente, Cambios, Correo, Factura,
+                 TABLAS_CAMBIOS, normalizar_fecha_hora, rango_fechas)
+import reportes
+import exportacion
+import ingesta
+import respaldos
+import trazas
+import verificacion
+
+NOMBRES = ["Samuel", "Pepe", "Juan", "Sara", "Javier", "Enrique", "Laura", "Alvaro", "Maria", "Ana",
+           "Carlos", "Lucia", "Andres", "Paula", "Diego", "Camila", "Felipe", "Valentina", "Jorge", "Daniela"]
+APELLIDOS = ["Moreno", "Ardila", "Rodriguez", "Fajardo", "Vargas", "Lopez", "Torres", "Gutierrez", "Perez",
+             "Gomez", "Martinez", "Ramirez", "Castro", "Rojas", "Herrera", "Suarez", "Mendoza", "Rios"]
+DOMINIOS = ["gmail.com", "unal.edu.co", "mail.com", "hotmail.com"]
+
+
+def base_temporal():
+    """
+    Crea una base de datos vacía en un directorio temporal, apunta `Db.ruta` a ella y crea las tablas.
+    Retorna la ruta del archivo.
+    """
+    ruta = os.path.join(tempfile.mkdtemp(prefix="cerveceria_"), "bench.db")
+    Db.ruta = ruta
+    Db().iniciar_tablas()
+    return ruta
+
+
+def generar_clientes(cantidad, semilla=2006):
+    """
+    Inserta `cantidad` clientes sintéticos (deterministas para una misma semilla) en `Db.ruta`.
+    """
+    aleatorio = random.Random(semilla)
+    db = Db()
+    filas = (
+        (
+            aleatorio.choice(NOMBRES),
+            aleatorio.choice(APELLIDOS),
+            f"Calle {aleatorio.randint(1, 200)} # {aleatorio.randint(1, 99)} - {aleatorio.randint(1, 99)}",
+            3000000000 + i,
+            f"cliente{i}@{aleatorio.choice(DOMINIOS)}",
+        )
+        for i in range(cantidad)
+    )
+    db.cursor.executemany(
+        "INSERT INTO Clientes (nombre, apellido, direccion, telefono, correo) VALUES (?, ?, ?, ?, ?)", filas
+    )
+    db.conexion.commit()
+    db.cerrar()
+
+
+def generar_productos(cantidad, semilla=2006):
+    """
+    Inserta `cantidad` productos sintéticos (deterministas para una misma semilla) en `Db.ruta`.
+    """
+    aleatorio = random.Random(semilla)
+    estilos = ["Lager", "IPA", "Pale Ale", "Stout", "Porter", "Pilsner", "Red Ale", "Weiss"]
+    db = Db()
+    filas = []
+    for i in range(cantidad):
+        costo = aleatorio.randint(50, 200)
+        filas.append((
+            f"{aleatorio.choice(estilos)} {i}",
+            f"{aleatorio.choice([330, 500, 1000])} ml",
+            f"{aleatorio.randint(2025, 2028)}-{aleatorio.randint(1, 12):02d}-{aleatorio.randint(1, 28):02d}",
+            costo,
+            costo + aleatorio.randint(20, 150),
+        ))
+    db.cursor.executemany(
+        "INSERT INTO productos (NombreProducto, medida, Fechavencimiento, PrecioProduccion, PrecioVenta) VALUES (?, ?, ?, ?, ?)", filas
+    )
+    db.conexion.commit()
+    db.cerrar()
+
+
+# Líneas por carrito y unidades por línea de `generar_ventas`, con su frecuencia relativa
+LINEAS_POR_CARRITO = {1: 30, 2: 25, 3: 18, 4: 12, 5: 7, 6: 4, 8: 2, 12: 2}
+UNIDADES_POR_LINEA = {1: 40, 2: 25, 3: 12, 4: 10, 6: 8, 12: 5}
+
+
+def generar_ventas(cantidad, semilla=2006):
+    """
+    Inserta `cantidad` líneas de venta facturadas (deterministas para una misma semilla) en
+    `Db.ruta`, sobre los productos y clientes que ya existen: carritos de `LINEAS_POR_CARRITO`
+    líneas sin productos repetidos, productos con popularidad de Zipf (el n-ésimo se vende 1/n
+    veces lo que el primero) y facturas repartidas en orden a lo largo de 2024 y 2025.
+    """
+    aleatorio = random.Random(semilla)
+    db = Db()
+    db.cursor.execute("SELECT noIdProducto, NombreProducto, PrecioVenta FROM productos ORDER BY noIdProducto")
+    catalogo = db.cursor.fetchall()
+    db.cursor.execute("SELECT MAX(noIdCliente) FROM Clientes")
+    clientes = db.cursor.fetchone()[0]
+    popularidad = list(itertools.accumulate(1 / (i + 1) for i in range(len(catalogo))))
+    tamanos, pesos_tamanos = zip(*LINEAS_POR_CARRITO.items())
+    unidades, pesos_unidades = zip(*UNIDADES_POR_LINEA.items())
+    lineas_por_factura = sum(t * p for t, p in LINEAS_POR_CARRITO.items()) / sum(pesos_tamanos)
+    paso = 2 * 365 * 86400 * lineas_por_factura / cantidad
+    inicio = datetime(2024, 1, 1)
+
+    def filas():
+        producidas = 0
+        numero = 0
+        while producidas < cantidad:
+            fecha = inicio + timedelta(seconds=int(numero * paso + aleatorio.random() * paso))
+            cliente = aleatorio.randint(1, clientes)
+            tamano = min(aleatorio.choices(tamanos, pesos_tamanos)[0], cantidad - producidas, len(catalogo))
+            elegidos = set()
+            while len(elegidos) < tamano:
+                elegidos.add(aleatorio.choices(range(len(catalogo)), cum_weights=popularidad)[0])
+            factura = f"{fecha:%Y%m%d%H%M%S}{cliente}{numero:010d}"
+            for indice in sorted(elegidos):
+                id_producto, nombre, precio = catalogo[indice]
+                yield (fecha.strftime("%Y-%m-%d %H:%M:%S"), id_producto, cliente,
+                       aleatorio.choices(unidades, pesos_unidades)[0], factura, precio, nombre)
+            producidas += tamano
+            numero += 1
+
+    db.cursor.executemany(
+        "INSERT INTO Ventas (fecha, producto, cliente, cantidad, factura, precio, nombre_producto) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        filas(),
+    )
+    db.conexion.commit()
+    db.cerrar()
+
+
+def generar_datos(clientes, productos, ventas, semilla=2006):
+    """
+    Base sintética completa en `Db.ruta`: `clientes` clientes, `productos` productos con stock
+    (y un lote por vencer cada diez productos) y `ventas` líneas de venta (`generar_ventas`).
+    El registro de cambios de la carga se vacía, como si la base viniera de una migración.
+    """
+    generar_productos(productos, semilla)
+    generar_clientes(clientes, semilla)
+    generar_ventas(ventas, semilla)
+    db = Db()
+    db.cursor.execute("INSERT INTO Stock (producto, cantidad, minimo) SELECT noIdProducto, 1000000000, 10 FROM productos")
+    db.cursor.execute('''
+        INSERT INTO Lotes (producto, cantidad, vencimiento)
+        SELECT noIdProducto, 100, date('now', '+' || (noIdProducto % 60) || ' days') FROM productos WHERE noIdProducto % 10 = 0
+    ''')
+    db.cursor.execute("DELETE FROM Cambios")
+    db.conexion.commit()
+    db.cerrar()
+
+
+def percentil(valores_ordenados, p):
+    """
+    Percentil `p` (0-100) de una lista ya ordenada.
+    """
+    if not valores_ordenados:
+        return 0.0
+    return valores_ordenados[min(len(valores_ordenados) - 1, int(len(valores_ordenados) * p / 100))]
+
+
+def memoria_maxima():
+    """
+    Memoria máxima del proceso hasta ahora, como texto (`"52 MB"`). El módulo `resource` solo existe
+    en Unix: en Windows retorna `"no disponible"`.
+    """
+    try:
+        import resource
+    except ImportError:
+        return "no disponible"
+    return f"{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB"
+
+
+def cronometrar(funcion, repeticiones=20):
+    """
+    Ejecuta `funcion` varias veces y retorna la mediana en milisegundos.
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return tiempos[len(tiempos) // 2]
+
+
+def medir_busqueda_clientes(cantidad=1_000_000, limite=20):
+    """
+    Compara `Cliente.buscar_clientes` (FTS5) contra una búsqueda `LIKE '%x%'` equivalente
+    sobre `cantidad` clientes, para varias consultas típicas de la caja.
+    """
+    base_temporal()
+
+    # Carga masiva sin el índice y luego se reconstruye de una vez (igual que al migrar una base existente)
+    db = Db()
+    db.cursor.executescript('''
+        DROP TRIGGER clientes_busqueda_ai;
+        DROP TRIGGER clientes_busqueda_ad;
+        DROP TRIGGER clientes_busqueda_au;
+        DROP TABLE ClientesBusqueda;
+    ''')
+    db.cerrar()
+
+    inicio = time.perf_counter()
+    generar_clientes(cantidad)
+    Db().iniciar_tablas()
+    print(f"{cantidad} clientes generados en {time.perf_counter() - inicio:.1f} s")
+
+    def buscar_like(texto):
+        db = Db()
+        patron = f"%{texto}%"
+        db.cursor.execute('''
+            SELECT noIdCliente, nombre, apellido, direccion, telefono, correo FROM Clientes
+            WHERE nombre LIKE ? OR apellido LIKE ? OR correo LIKE ? OR telefono LIKE ? OR direccion LIKE ?
+            LIMIT ?
+        ''', (patron, patron, patron, patron, patron, limite))
+        db.cursor.fetchall()
+        db.cerrar()
+
+    print(f"{'consulta':<22}{'FTS5 (ms)':>12}{'LIKE (ms)':>12}")
+    for texto in ["sara", "mor", "laura torres", "cliente99999", "3000123456", "zzz"]:
+        fts = cronometrar(lambda: Cliente.buscar_clientes(texto, limite))
+        like = cronometrar(lambda: buscar_like(texto), repeticiones=3)
+        print(f"{texto:<22}{fts:>12.2f}{like:>12.2f}")
+
+
+def reporte_importacion(cantidad=15):
+    """
+    Reporte al estilo `python -X importtime` de lo que cuesta importar los módulos de la
+    interfaz (`poo`, `clientes`, `productos`) en un intérprete nuevo.
+
+    Muestra el tiempo total y los `cantidad` módulos con mayor tiempo acumulado.
+    """
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import poo, clientes, productos"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    modulos = []
+    for linea in resultado.stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        modulos.append((int(acumulado), int(propio), nombre.rstrip()))
+
+    # Los módulos de primer nivel no tienen sangría, su suma es el tiempo total de importación
+    total = sum(acumulado for acumulado, _, nombre in modulos if not nombre.startswith("  "))
+    print(f"Tiempo total de importación: {total / 1000:.1f} ms ({len(modulos)} módulos)")
+    print(f"{'acumulado (ms)':>15}{'propio (ms)':>13}  módulo")
+    for acumulado, propio, nombre in sorted(modulos, reverse=True)[:cantidad]:
+        print(f"{acumulado / 1000:>15.1f}{propio / 1000:>13.1f}  {nombre.strip()}")
+
+
+# Tiempo máximo aceptado para ver la ventana principal, desde que arranca el intérprete
+LIMITE_PRIMERA_VENTANA_MS = 1000
+
+def medir_primera_ventana(limite_ms=LIMITE_PRIMERA_VENTANA_MS, repeticiones=5):
+    """
+    Prueba de regresión del arranque: mide cuánto tarda un intérprete nuevo en importar
+    `main.pyw` y dibujar la ventana principal (`crear_ventana_principal` + `update`).
+
+    Termina con código 1 si la mediana supera `limite_ms`. Necesita un entorno gráfico.
+    """
+    codigo = (
+        "import runpy; "
+        "m = runpy.run_path('main.pyw', run_name='medicion'); "
+        "v = m['crear_ventana_principal'](); v.update(); v.destroy()"
+    )
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = subprocess.run(
+            [sys.executable, "-c", codigo],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        if resultado.returncode != 0:
+            print(f"No se pudo crear la ventana:\n{resultado.stderr.strip()}")
+            sys.exit(1)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    tiempos.sort()
+    mediana = tiempos[len(tiempos) // 2]
+    print(f"Primera ventana: mediana {mediana:.0f} ms (mín {tiempos[0]:.0f}, máx {tiempos[-1]:.0f}), límite {limite_ms} ms")
+    if mediana > limite_ms:
+        print("REGRESIÓN: la ventana principal tarda más que el límite")
+        sys.exit(1)
+
+
+def medir_ventanas(repeticiones=20):
+    """
+    Costo de navegar entre el menú y los módulos, antes y después de la ventana única:
+
+    - "recrear": lo que se hacía antes en cada navegación, crear un `tk.Tk` nuevo (intérprete
+      de Tcl incluido), construir el módulo y dibujarlo.
+    - "cambiar": `Aplicacion.abrir_seccion` con las vistas ya construidas.
+
+    Necesita un entorno gráfico.
+    """
+    import runpy
+    import tkinter as tk
+
+    principal = runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.pyw"), run_name="medicion")
+    from clientes import VentanaMainClientes
+    from productos import VentanaMainProductos
+
+    def recrear(clase):
+        ventana = tk.Tk()
+        clase(ventana, ventana.destroy).pack(fill="both", expand=True)
+        ventana.update()
+        ventana.destroy()
+
+    aplicacion = principal["crear_ventana_principal"]()
+    aplicacion.update()
+
+    def cambiar(seccion):
+        aplicacion.abrir_seccion(seccion)
+        aplicacion.update()
+
+    print(f"{'navegación':<26}{'recrear (ms)':>14}{'cambiar (ms)':>14}")
+    for seccion, clase in [("Clientes", VentanaMainClientes), ("Productos", VentanaMainProductos)]:
+        antes = cronometrar(lambda: recrear(clase), repeticiones)
+        cambiar(seccion)  # La primera vez construye la vista
+        despues = cronometrar(lambda: (cambiar("Principal"), cambiar(seccion)), repeticiones) / 2
+        print(f"{'Principal -> ' + seccion:<26}{antes:>14.2f}{despues:>14.2f}")
+    aplicacion.destroy()
+
+
+def peticiones_por_defecto(clientes, productos, cantidad=200, semilla=2006):
+    """
+    Mezcla de peticiones típica de una caja, en el mismo formato que los archivos de repetición:
+    `{"metodo": ..., "ruta": ..., "cuerpo": ...}`.
+    """
+    aleatorio = random.Random(semilla)
+    peticiones = []
+    for _ in range(cantidad):
+        id_cliente = aleatorio.randint(1, clientes)
+        opcion = aleatorio.random()
+        if opcion < 0.3:
+            peticiones.append({"metodo": "GET", "ruta": f"/clientes/{id_cliente}"})
+        elif opcion < 0.5:
+            peticiones.append({"metodo": "GET", "ruta": f"/clientes/{id_cliente}/carrito"})
+        elif opcion < 0.65:
+            peticiones.append({"metodo": "GET", "ruta": f"/clientes/buscar?q={aleatorio.choice(APELLIDOS)[:3]}"})
+        elif opcion < 0.75:
+            peticiones.append({"metodo": "GET", "ruta": f"/productos/{aleatorio.randint(1, productos)}"})
+        elif opcion < 0.9:
+            peticiones.append({"metodo": "POST", "ruta": f"/clientes/{id_cliente}/carrito",
+                               "cuerpo": {"producto": aleatorio.randint(1, productos), "cantidad": aleatorio.randint(1, 6)}})
+        else:
+            peticiones.append({"metodo": "DELETE", "ruta": f"/clientes/{id_cliente}/carrito"})
+    return peticiones
+
+
+def serializar_peticion(peticion):
+    cuerpo = json.dumps(peticion["cuerpo"]).encode("utf-8") if peticion.get("cuerpo") is not None else b""
+    return (
+        f"{peticion['metodo']} {peticion['ruta']} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(cuerpo)}\r\n\r\n"
+    ).encode("latin-1") + cuerpo
+
+
+async def leer_respuesta(lector):
+    """
+    Lee una respuesta HTTP completa y retorna el código de estado.
+    """
+    cabecera = await lector.readuntil(b"\r\n\r\n")
+    lineas = cabecera.decode("latin-1").split("\r\n")
+    largo = 0
+    for linea in lineas[1:]:
+        if linea.lower().startswith("content-length:"):
+            largo = int(linea.split(":", 1)[1])
+    await lector.readexactly(largo)
+    return int(lineas[0].split(" ")[1])
+
+
+async def cliente_de_carga(puerto, peticiones, profundidad, fin, latencias, estados):
+    """
+    Una caja: una conexión persistente que envía `profundidad` peticiones en tubería y luego lee
+    sus respuestas, hasta `fin`. La latencia de cada petición va desde que se envía el lote hasta
+    que llega su respuesta.
+    """
+    lector, escritor = await asyncio.open_connection("127.0.0.1", puerto)
+    indice = random.randrange(len(peticiones))
+    while time.perf_counter() < fin:
+        lote = [peticiones[(indice + i) % len(peticiones)] for i in range(profundidad)]
+        indice += profundidad
+        inicio = time.perf_counter()
+        escritor.write(b"".join(serializar_peticion(peticion) for peticion in lote))
+        await escritor.drain()
+        for _ in lote:
+            estado = await leer_respuesta(lector)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            estados[estado] = estados.get(estado, 0) + 1
+    escritor.close()
+    await escritor.wait_closed()
+
+
+def medir_servidor(conexiones=8, profundidad=4, segundos=5, archivo=None):
+    """
+    Prueba de carga de `servidor.py`: levanta el servidor en otro proceso sobre una base sintética
+    y simula `conexiones` cajas que envían peticiones en tubería de a `profundidad`.
+
+    Las peticiones salen de `archivo` (JSONL, una petición por línea con `metodo`, `ruta` y
+    opcionalmente `cuerpo`) o de una mezcla típica generada. Reporta peticiones/segundo y
+    latencias p50/p99.
+    """
+    ruta_db = base_temporal()
+    generar_clientes(2000)
+    generar_productos(100)
+
+    if archivo:
+        with open(archivo, encoding="utf-8") as entrada:
+            peticiones = [json.loads(linea) for linea in entrada if linea.strip()]
+    else:
+        peticiones = peticiones_por_defecto(2000, 100)
+
+    with socket.socket() as libre:
+        libre.bind(("127.0.0.1", 0))
+        puerto = libre.getsockname()[1]
+
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    proceso = subprocess.Popen(
+        [sys.executable, os.path.join(directorio, "servidor.py"), "--puerto", str(puerto), "--db", ruta_db],
+        cwd=directorio, stdout=subprocess.DEVNULL
+    )
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", puerto), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+
+        latencias = []
+        estados = {}
+
+        async def carga():
+            fin = time.perf_counter() + segundos
+            await asyncio.gather(*(
+                cliente_de_carga(puerto, peticiones, profundidad, fin, latencias, estados) for _ in range(conexiones)
+            ))
+
+        inicio = time.perf_counter()
+        asyncio.run(carga())
+        duracion = time.perf_counter() - inicio
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+    latencias.sort()
+    print(f"{conexiones} conexiones, tubería de {profundidad}, {len(peticiones)} peticiones distintas")
+    print(f"{len(latencias)} peticiones en {duracion:.1f} s: {len(latencias) / duracion:.0f} peticiones/s")
+    print(f"latencia p50 {percentil(latencias, 50):.1f} ms, p99 {percentil(latencias, 99):.1f} ms, máx {latencias[-1]:.1f} ms")
+    print(f"estados: {dict(sorted(estados.items()))}")
+
+
+def insertar_venta(cursor, id_cliente, id_producto):
+    cursor.execute(
+        "INSERT INTO Ventas (fecha, producto, cliente, cantidad, factura, precio) VALUES (?, ?, ?, ?, ?, ?)",
+        ("2025-01-01 00:00:00", id_producto, id_cliente, 1, f"F{id_cliente}", 100),
+    )
+
+
+def registrar_venta_directa(id_cliente, id_producto):
+    """
+    Escritura como era antes del `Escritor`: conexión propia y un commit por fila.
+    """
+    conexion = sqlite3.connect(Db.ruta, timeout=5)
+    try:
+        insertar_venta(conexion.cursor(), id_cliente, id_producto)
+        conexion.commit()
+    finally:
+        conexion.close()
+
+
+def medir_escritores(ventas_por_hilo=200, hilos=(1, 2, 4, 8, 16)):
+    """
+    Rendimiento de escrituras concurrentes contra la cantidad de hilos que escriben a la vez.
+    Compara un commit por llamada (cada hilo con su conexión) con el `Escritor` (un hilo,
+    transacciones agrupadas). Cuenta los errores "database is locked" del primer caso.
+    """
+    print(f"{ventas_por_hilo} ventas por hilo")
+    print(f"{'hilos':>5} | {'directo ventas/s':>16} {'bloqueos':>8} | {'escritor ventas/s':>17} {'errores':>7}")
+
+    for cantidad in hilos:
+        fila = [f"{cantidad:>5}"]
+        for modo in ("directo", "escritor"):
+            base_temporal()
+            generar_productos(10)
+            errores = []
+            barrera = threading.Barrier(cantidad)
+
+            def escribir(hilo):
+                barrera.wait()
+                for i in range(ventas_por_hilo):
+                    id_cliente = hilo * ventas_por_hilo + i
+                    try:
+                        if modo == "directo":
+                            registrar_venta_directa(id_cliente, i % 10 + 1)
+                        else:
+                            Escritor.ejecutar(insertar_venta, id_cliente, i % 10 + 1)
+                    except sqlite3.OperationalError as e:
+                        errores.append(str(e))
+
+            trabajadores = [threading.Thread(target=escribir, args=(hilo,)) for hilo in range(cantidad)]
+            inicio = time.perf_counter()
+            for trabajador in trabajadores:
+                trabajador.start()
+            for trabajador in trabajadores:
+                trabajador.join()
+            duracion = time.perf_counter() - inicio
+
+            exitosas = cantidad * ventas_por_hilo - len(errores)
+            if modo == "directo":
+                fila.append(f"{exitosas / duracion:>16.0f} {len(errores):>8}")
+            else:
+                fila.append(f"{exitosas / duracion:>17.0f} {len(errores):>7}")
+        print(" | ".join(fila))
+    print(f"(grupo del escritor: ventana {Escritor.VENTANA_MS} ms, máximo {Escritor.MAXIMO_GRUPO} escrituras)")
+
+
+def medir_carrito(operaciones=2000):
+    """
+    Costo de agregar y quitar líneas del carrito en memoria (`Carrito`) contra el carrito
+    anterior, que escribía y confirmaba una fila de **Ventas** por cada cambio.
+    También mide cuánto tarda facturar un carrito de 10 líneas (una transacción).
+    """
+    base_temporal()
+    generar_clientes(100)
+    generar_productos(50)
+    Carrito.RESPALDO = False
+    carrito = Carrito.obtener()  # Antes de escribir filas sin factura, que recogería como carritos anteriores
+
+    def tiempos(funcion):
+        muestras = []
+        for i in range(operaciones):
+            inicio = time.perf_counter()
+            funcion(i)
+            muestras.append((time.perf_counter() - inicio) * 1_000_000)
+        muestras.sort()
+        return muestras
+
+    def agregar_en_tabla(i):
+        conexion = sqlite3.connect(Db.ruta)
+        conexion.execute("INSERT INTO Ventas (fecha, producto, cliente, cantidad) VALUES (?, ?, ?, ?)",
+                         ("2025-01-01 00:00:00", i % 50 + 1, i % 100 + 1, 1))
+        conexion.commit()
+        conexion.close()
+
+    def agregar_en_memoria(i):
+        Cliente.accion_registrar_venta_cliente("2025-01-01 00:00:00", i % 50 + 1, i % 100 + 1, 1)
+
+    def quitar_en_memoria(i):
+        lineas = carrito.ver(i % 100 + 1)
+        if lineas:
+            carrito.quitar(lineas[0]["id"])
+
+    print(f"{operaciones} operaciones, tiempo por operación en microsegundos")
+    for nombre, funcion in [("agregar (fila + commit)", agregar_en_tabla),
+                            ("agregar (Carrito)", agregar_en_memoria),
+                            ("quitar (Carrito)", quitar_en_memoria)]:
+        muestras = tiempos(funcion)
+        print(f"{nombre:>24}: p50 {percentil(muestras, 50):8.1f}  p99 {percentil(muestras, 99):8.1f}")
+
+    # La tabla de arriba solo era para comparar: el libro de ventas empieza vacío
+    db = Db()
+    db.cursor.execute("DELETE FROM Ventas")
+    db.conexion.commit()
+    db.cerrar()
+
+    facturas = []
+    for id_cliente in range(1, 101):
+        Cliente.reiniciar_carrito(id_cliente)
+        for producto in range(1, 11):
+            Cliente.accion_registrar_venta_cliente("2025-01-01 00:00:00", producto, id_cliente, 2)
+        inicio = time.perf_counter()
+        Cliente.accion_facturar_carrito(id_cliente)
+        facturas.append((time.perf_counter() - inicio) * 1000)
+    facturas.sort()
+    print(f"facturar 10 líneas: p50 {percentil(facturas, 50):.2f} ms  p99 {percentil(facturas, 99):.2f} ms")
+
+
+def medir_factura(lineas=20, facturas_en_libro=50_000):
+    """
+    Armar una factura leyendo solo las líneas (nombre y precio guardados al vender) contra la
+    forma anterior, que consultaba **Productos** por cada línea. Se mide para el carrito
+    (`Cliente.obtener_data_factura`) y para una factura ya registrada (`Venta.obtener_factura`)
+    en un libro de ventas con `facturas_en_libro` facturas.
+    """
+    base_temporal()
+    generar_clientes(1000)
+    generar_productos(500)
+    Carrito.RESPALDO = False
+
+    # Libro de ventas sintético: `lineas` líneas por factura
+    aleatorio = random.Random(2006)
+    db = Db()
+    db.cursor.execute("SELECT noIdProducto, NombreProducto, PrecioVenta FROM productos")
+    catalogo = db.cursor.fetchall()
+    filas = []
+    for numero in range(facturas_en_libro):
+        for id_producto, nombre, precio in aleatorio.sample(catalogo, lineas):
+            filas.append(("2025-01-01 00:00:00", id_producto, numero % 1000 + 1, aleatorio.randint(1, 6),
+                          f"F{numero}", precio, nombre))
+    db.cursor.executemany(
+        "INSERT INTO Ventas (fecha, producto, cliente, cantidad, factura, precio, nombre_producto) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        filas,
+    )
+    db.conexion.commit()
+
+    def carrito_con_consultas(id_cliente):
+        # Forma anterior: una consulta a Productos por línea del carrito
+        conexion = Db()
+        productos = {}
+        for linea in Carrito.obtener().ver(id_cliente):
+            conexion.cursor.execute("SELECT NombreProducto, PrecioVenta FROM Productos WHERE noIdProducto = ?", (linea["producto"],))
+            nombre, precio = conexion.cursor.fetchone()
+            productos[linea["producto"]] = {"nombre": nombre, "precio": precio, "cantidad": linea["cantidad"]}
+        conexion.cerrar()
+        return productos
+
+    def factura_con_cruce(no_factura):
+        # Misma lectura que `Venta.obtener_factura`, pero con nombre y precio desde Productos
+        conexion = Db()
+        conexion.cursor.execute('''
+            SELECT V.cliente, V.fecha, V.producto, V.cantidad, P.PrecioVenta, P.NombreProducto
+            FROM Ventas V
+            JOIN productos P ON P.noIdProducto = V.producto
+            WHERE V.factura = ?
+        ''', (no_factura,))
+        filas = conexion.cursor.fetchall()
+        conexion.cursor.execute("SELECT * FROM Clientes WHERE noIdCliente = ?", (filas[0][0],))
+        conexion.cursor.fetchone()
+        conexion.cerrar()
+        return {producto: {"nombre": nombre, "precio": precio, "fecha_venta": fecha, "cantidad": cantidad, "total": precio * cantidad}
+                for _, fecha, producto, cantidad, precio, nombre in filas}
+
+    for id_producto, _, _ in aleatorio.sample(catalogo, lineas):
+        Cliente.accion_registrar_venta_cliente("2025-01-01 00:00:00", id_producto, 1, 2)
+
+    numeros = [f"F{aleatorio.randrange(facturas_en_libro)}" for _ in range(20)]
+    mediciones = [
+        ("carrito, consulta por línea", cronometrar(lambda: carrito_con_consultas(1))),
+        ("carrito, sin consultas", cronometrar(lambda: Cliente.obtener_data_factura(1))),
+        ("registrada, cruce con productos", cronometrar(lambda: [factura_con_cruce(n) for n in numeros])),
+        ("registrada, solo Ventas", cronometrar(lambda: [Venta.obtener_factura(n) for n in numeros])),
+    ]
+    print(f"{lineas} líneas por factura, {facturas_en_libro} facturas en el libro (las registradas: 20 por medición)")
+    for nombre, tiempos in mediciones:
+        print(f"{nombre:>32}: mediana {tiempos:.2f} ms")
+
+
+def medir_stock(hilos=16, unidades=500):
+    """
+    Ventas concurrentes de un mismo producto con `unidades` en inventario. Cada hilo factura
+    carritos de 1 a 3 unidades hasta que se agota el stock.
+
+    - "condicional": `Cliente.accion_facturar_carrito` (UPDATE ... WHERE cantidad >= ? en la
+      transacción de la venta).
+    - "leer y escribir": cada hilo lee el stock y escribe el nuevo valor con su conexión, como
+      se haría sin la sentencia condicional. Sirve para ver cuánto se sobrevende.
+
+    Después mide la consulta de stock bajo con y sin el índice `stock_faltante`.
+    """
+    print(f"{hilos} hilos, {unidades} unidades en inventario")
+    for modo in ("condicional", "leer y escribir"):
+        base_temporal()
+        generar_clientes(hilos)
+        generar_productos(1)
+        Carrito.RESPALDO = False
+        Producto.agregar_stock(1, unidades, 10)
+        vendidas = []
+        rechazadas = []
+        barrera = threading.Barrier(hilos)
+
+        def vender(id_cliente):
+            aleatorio = random.Random(id_cliente)
+            barrera.wait()
+            while True:
+                cantidad = aleatorio.randint(1, 3)
+                if modo == "condicional":
+                    Cliente.accion_registrar_venta_cliente("2025-01-01 00:00:00", 1, id_cliente, cantidad)
+                    try:
+                        Cliente.accion_facturar_carrito(id_cliente)
+                    except StockInsuficiente as e:
+                        Cliente.reiniciar_carrito(id_cliente)
+                        rechazadas.append(cantidad)
+                        if e.disponible == 0:
+                            return
+                        continue
+                else:
+                    conexion = sqlite3.connect(Db.ruta, timeout=30)
+                    disponible = conexion.execute("SELECT cantidad FROM Stock WHERE producto = 1").fetchone()[0]
+                    if disponible < cantidad:
+                        conexion.close()
+                        rechazadas.append(cantidad)
+                        if disponible == 0:
+                            return
+                        continue
+                    conexion.execute("UPDATE Stock SET cantidad = ? WHERE producto = 1", (disponible - cantidad,))
+                    conexion.commit()
+                    conexion.close()
+                vendidas.append(cantidad)
+
+        trabajadores = [threading.Thread(target=vender, args=(id_cliente,)) for id_cliente in range(1, hilos + 1)]
+        inicio = time.perf_counter()
+        # Las alertas de stock bajo que imprime el modelo no interesan aquí
+        with contextlib.redirect_stdout(io.StringIO()):
+            for trabajador in trabajadores:
+                trabajador.start()
+            for trabajador in trabajadores:
+                trabajador.join()
+        duracion = time.perf_counter() - inicio
+
+        restante = Producto.obtener_stock(1)[0]
+        total = sum(vendidas)
+        print(f"{modo:>16}: {len(vendidas)} ventas en {duracion:.2f} s, {total} unidades vendidas, "
+              f"stock final {restante}, sobrevendidas {max(0, total - unidades)}, "
+              f"{'correcto' if total + restante == unidades else 'INCORRECTO'}")
+
+    # Consulta de stock bajo sobre muchos productos
+    base_temporal()
+    aleatorio = random.Random(2006)
+    db = Db()
+    db.cursor.executemany("INSERT INTO Stock (producto, cantidad, minimo) VALUES (?, ?, ?)",
+                          ((i, aleatorio.randint(0, 1000), 20) for i in range(1, 200_001)))
+    db.conexion.commit()
+    db.cerrar()
+    consulta = "SELECT producto, cantidad, minimo FROM Stock {} WHERE cantidad - minimo <= 0 ORDER BY cantidad - minimo"
+
+    def stock_bajo(indice):
+        conexion = Db()
+        conexion.cursor.execute(consulta.format("" if indice else "NOT INDEXED"))
+        filas = conexion.cursor.fetchall()
+        conexion.cerrar()
+        return filas
+
+    print(f"stock bajo en 200000 productos ({len(stock_bajo(True))} resultados): "
+          f"con índice {cronometrar(lambda: stock_bajo(True)):.2f} ms, sin índice {cronometrar(lambda: stock_bajo(False)):.2f} ms")
+
+
+def medir_vencimiento(lotes=500_000, dias=30):
+    """
+    Consulta "lotes que vencen en los próximos `dias` días" (`Producto.lotes_por_vencer`) sobre
+    un catálogo con `lotes` lotes repartidos en cinco años, con el índice parcial
+    `lotes_vencimiento` y sin índices. También mide una venta que asigna de varios lotes (FEFO).
+    """
+    base_temporal()
+    generar_productos(5000)
+    Carrito.RESPALDO = False
+    aleatorio = random.Random(2006)
+    inicio_fechas = date.today() - timedelta(days=365)
+    db = Db()
+    db.cursor.executemany(
+        "INSERT INTO Lotes (producto, vencimiento, cantidad) VALUES (?, ?, ?)",
+        ((aleatorio.randint(1, 5000), (inicio_fechas + timedelta(days=aleatorio.randint(0, 5 * 365))).isoformat(),
+          aleatorio.choice([0, 0, 12, 24, 48])) for _ in range(lotes)),
+    )
+    db.cursor.execute("INSERT INTO Stock (producto, cantidad, minimo) SELECT producto, SUM(cantidad), 0 FROM Lotes GROUP BY producto")
+    db.conexion.commit()
+    db.cerrar()
+
+    hoy = date.today()
+    consulta = '''
+        SELECT noIdLote, producto, vencimiento, cantidad FROM Lotes NOT INDEXED
+        WHERE cantidad > 0 AND vencimiento BETWEEN ? AND ? ORDER BY vencimiento
+    '''
+
+    def sin_indice():
+        conexion = Db()
+        conexion.cursor.execute(consulta, (hoy.isoformat(), (hoy + timedelta(days=dias)).isoformat()))
+        filas = conexion.cursor.fetchall()
+        conexion.cerrar()
+        return filas
+
+    print(f"{lotes} lotes, {len(Producto.lotes_por_vencer(dias))} vencen en {dias} días")
+    print(f"  con índice: {cronometrar(lambda: Producto.lotes_por_vencer(dias)):.2f} ms")
+    print(f"  sin índice: {cronometrar(sin_indice):.2f} ms")
+
+    # Venta de un producto con muchos lotes: recorre sus lotes por (producto, vencimiento)
+    tiempos = []
+    for id_cliente in range(1, 101):
+        Cliente.accion_registrar_venta_cliente("2025-01-01 00:00:00", id_cliente, id_cliente, 30)
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                Cliente.accion_facturar_carrito(id_cliente)
+            except StockInsuficiente:
+                Cliente.reiniciar_carrito(id_cliente)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    print(f"  facturar 30 unidades asignadas por FEFO: p50 {percentil(tiempos, 50):.2f} ms, p99 {percentil(tiempos, 99):.2f} ms")
+
+
+def medir_fechas(ventas=1_000_000, dias=7):
+    """
+    Ventas de un rango de `dias` días sobre un libro de `ventas` ventas repartidas en dos años.
+    El libro se escribe con fechas `DD/MM/AAAA HH:MM:SS` (formato anterior) y se mide la
+    migración a ISO de `Db.iniciar_tablas`. Después compara `Venta.ventas_entre` (rango del
+    índice `ventas_fecha`), la misma consulta sin índice y el filtro en Python sobre el formato
+    anterior, que tenía que leer y convertir cada fila.
+    """
+    base_temporal()
+    aleatorio = random.Random(2006)
+    inicio_libro = time.mktime((date.today() - timedelta(days=730)).timetuple())
+    fechas = sorted(inicio_libro + aleatorio.random() * 730 * 86400 for _ in range(ventas))
+    db = Db()
+    db.cursor.executemany(
+        "INSERT INTO Ventas (fecha, producto, cliente, cantidad, factura, precio, nombre_producto) VALUES (?, ?, 1, 1, ?, 1000, 'Cerveza')",
+        ((time.strftime("%d/%m/%Y %H:%M:%S", time.localtime(fecha)), i % 5 + 1, str(i // 5)) for i, fecha in enumerate(fechas)),
+    )
+    db.cursor.execute("PRAGMA user_version = 0")
+    db.conexion.commit()
+    legado = db.cursor.execute("SELECT noIdVentas, fecha FROM Ventas").fetchall()
+    db.cerrar()
+
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        Db().iniciar_tablas()
+    print(f"{ventas} ventas, migración de fechas a ISO: {time.perf_counter() - inicio:.1f} s")
+
+    desde = date.today() - timedelta(days=365)
+    hasta = desde + timedelta(days=dias - 1)
+    fin = (hasta + timedelta(days=1)).isoformat()
+
+    def sin_indice():
+        conexion = Db()
+        conexion.cursor.execute(
+            "SELECT * FROM Ventas NOT INDEXED WHERE fecha >= ? AND fecha < ? AND factura IS NOT NULL ORDER BY fecha",
+            (desde.isoformat(), fin),
+        )
+        filas = conexion.cursor.fetchall()
+        conexion.cerrar()
+        return filas
+
+    def formato_anterior():
+        return [fila for fila in legado if desde <= datetime.strptime(fila[1], "%d/%m/%Y %H:%M:%S").date() <= hasta]
+
+    print(f"  {len(Venta.ventas_entre(desde, hasta))} ventas en {dias} días")
+    print(f"  con índice: {cronometrar(lambda: Venta.ventas_entre(desde, hasta)):.2f} ms")
+    print(f"  sin índice: {cronometrar(sin_indice, 5):.2f} ms")
+    print(f"  texto DD/MM/AAAA filtrado en Python: {cronometrar(formato_anterior, 1):.0f} ms")
+
+    db = Db()
+    plan = db.cursor.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM Ventas WHERE fecha >= ? AND fecha < ? AND factura IS NOT NULL ORDER BY fecha",
+        (desde.isoformat(), fin),
+    ).fetchall()
+    db.cerrar()
+    print(f"  plan: {'; '.join(fila[-1] for fila in plan)}")
+
+
+def medir_reportes(ventas=1_000_000):
+    """
+    `reportes.generar_reporte` sobre un libro de `ventas` ventas (1000 productos, 100.000 clientes,
+    dos años), con NumPy y con el respaldo de `array`. Mide el primer reporte (lee todo el libro),
+    las agrupaciones solas y el reporte siguiente tras 1000 ventas nuevas (solo lee esas). Compara
+    las sumas por producto con un GROUP BY de SQLite.
+    """
+    base_temporal()
+    generar_productos(1000)
+    db = Db()
+    # Cinco líneas por factura, cada una de un bloque distinto de 200 productos (índice único factura-producto)
+    db.cursor.execute('''
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i + 1 < ?)
+        INSERT INTO Ventas (fecha, producto, cliente, cantidad, factura, precio, nombre_producto)
+        SELECT datetime('2024-01-01', '+' || (abs(random()) % 63072000) || ' seconds'),
+               (i % 5) * 200 + abs(random()) % 200 + 1, abs(random()) % 100000 + 1, abs(random()) % 6 + 1,
+               CAST(i / 5 AS TEXT), 300, NULL
+        FROM n
+    ''', (ventas,))
+    db.conexion.commit()
+    db.cerrar()
+
+    if reportes.np is None:
+        print("NumPy no está instalado: solo se mide el respaldo con `array`")
+    modulos = [("numpy", reportes.np), ("array", None)] if reportes.np is not None else [("array", None)]
+    resultados = {}
+    for nombre, modulo in modulos:
+        anterior, reportes.np = reportes.np, modulo
+        reportes._columnas_leidas.clear()
+        try:
+            inicio = time.perf_counter()
+            resultados[nombre] = reportes.generar_reporte()
+            primero = time.perf_counter() - inicio
+            columnas = reportes.cargar_ventas()
+            inicio = time.perf_counter()
+            for clave in ("dia", "producto", "cliente"):
+                reportes.agrupar(columnas[clave], columnas["cantidad"], columnas["ingreso"], columnas["costo"])
+            agrupacion = time.perf_counter() - inicio
+
+            db = Db()
+            db.cursor.executemany(
+                "INSERT INTO Ventas (fecha, producto, cliente, cantidad, factura, precio) VALUES ('2026-01-01 12:00:00', 1, 1, 1, ?, 300)",
+                ((f"{nombre}-{i}",) for i in range(1000)),
+            )
+            db.conexion.commit()
+            db.cerrar()
+            inicio = time.perf_counter()
+            reportes.generar_reporte()
+            siguiente = time.perf_counter() - inicio
+            db = Db()
+            db.cursor.execute("DELETE FROM Ventas WHERE factura LIKE ?", (f"{nombre}-%",))
+            db.conexion.commit()
+            db.cerrar()
+        finally:
+            reportes.np = anterior
+        print(f"{ventas} ventas, {nombre}: primer reporte {primero:.1f} s, 3 agrupaciones {agrupacion:.2f} s, "
+              f"reporte con 1000 ventas nuevas {siguiente:.2f} s")
+
+    db = Db()
+    inicio = time.perf_counter()
+    db.cursor.execute('''
+        SELECT V.producto, SUM(V.cantidad), SUM(V.cantidad * V.precio), SUM(V.cantidad * (V.precio - P.PrecioProduccion))
+        FROM Ventas V JOIN productos P ON P.noIdProducto = V.producto
+        WHERE V.factura IS NOT NULL GROUP BY V.producto ORDER BY V.producto
+    ''')
+    esperado = [{"producto": p, "unidades": u, "ingreso": i, "margen": m} for p, u, i, m in db.cursor.fetchall()]
+    print(f"  GROUP BY producto en SQLite (referencia): {time.perf_counter() - inicio:.1f} s")
+    db.cerrar()
+    for nombre, reporte in resultados.items():
+        print(f"  {nombre}: por producto {'coincide' if reporte['por_producto'] == esperado else 'NO coincide'} con SQLite")
+    if len(resultados) == 2:
+        print(f"  numpy y array {'dan el mismo reporte' if resultados['numpy'] == resultados['array'] else 'NO coinciden'}")
+
+
+def medir_resumenes(ventas=1_000_000):
+    """
+    Consultas de tablero con las tablas de resumen contra agrupar el libro de ventas:
+    gasto total de un cliente (`Cliente.total_comprado`) y unidades de un producto en un mes
+    (`Producto.ventas_periodo`). También mide cuánto cuestan los triggers al facturar,
+    la reconstrucción y la verificación de los resúmenes.
+    """
+    base_temporal()
+    generar_productos(1000)
+    Carrito.RESPALDO = False
+    db = Db()
+    inicio = time.perf_counter()
+    db.cursor.execute('''
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i + 1 < ?)
+        INSERT INTO Ventas (fecha, producto, cliente, cantidad, factura, precio, nombre_producto)
+        SELECT datetime('2024-01-01', '+' || (abs(random()) % 63072000) || ' seconds'),
+               (i % 5) * 200 + abs(random()) % 200 + 1, abs(random()) % 100000 + 1, abs(random()) % 6 + 1,
+               CAST(i / 5 AS TEXT), 300, NULL
+        FROM n
+    ''', (ventas,))
+    db.conexion.commit()
+    print(f"{ventas} ventas insertadas con los triggers de resumen en {time.perf_counter() - inicio:.1f} s")
+
+    db.cerrar()
+    generar_clientes(400)
+
+    # Con una conexión por consulta, igual que los métodos del modelo
+    def gasto_agrupando(id_cliente):
+        conexion = Db()
+        conexion.cursor.execute("SELECT SUM(cantidad), SUM(cantidad * precio) FROM Ventas WHERE cliente = ? AND factura IS NOT NULL", (id_cliente,))
+        fila = conexion.cursor.fetchone()
+        conexion.cerrar()
+        return fila
+
+    def mes_agrupando(id_producto):
+        conexion = Db()
+        conexion.cursor.execute('''
+            SELECT SUM(cantidad), SUM(cantidad * precio) FROM Ventas
+            WHERE producto = ? AND fecha >= '2024-06-01' AND fecha < '2024-07-01' AND factura IS NOT NULL
+        ''', (id_producto,))
+        fila = conexion.cursor.fetchone()
+        conexion.cerrar()
+        return fila
+
+    aleatorio = random.Random(2006)
+    clientes = [aleatorio.randint(1, 100000) for _ in range(100)]
+    productos = [aleatorio.randint(1, 1000) for _ in range(100)]
+    assert all(tuple(Cliente.total_comprado(c).values()) == tuple(x or 0 for x in gasto_agrupando(c)) for c in clientes)
+    assert all(tuple(Producto.ventas_periodo(p, "2024-06-01", "2024-06-30").values()) == tuple(x or 0 for x in mes_agrupando(p)) for p in productos)
+    mediciones = [
+        ("gasto de 100 clientes, agrupando Ventas", lambda: [gasto_agrupando(c) for c in clientes]),
+        ("gasto de 100 clientes, ResumenCliente", lambda: [Cliente.total_comprado(c) for c in clientes]),
+        ("mes de 100 productos, agrupando Ventas", lambda: [mes_agrupando(p) for p in productos]),
+        ("mes de 100 productos, ResumenProductoDia", lambda: [Producto.ventas_periodo(p, "2024-06-01", "2024-06-30") for p in productos]),
+    ]
+    for nombre, funcion in mediciones:
+        print(f"  {nombre:>42}: {cronometrar(funcion, 5):.1f} ms")
+
+    # Facturar con y sin los triggers (se quitan y se vuelven a crear con iniciar_tablas)
+    def facturar(primer_cliente, cantidad_facturas):
+        tiempos = []
+        for i in range(cantidad_facturas):
+            for id_producto in range(1, 11):
+                Cliente.accion_registrar_venta_cliente("2025-01-01 00:00:00", id_producto, primer_cliente + i, 2)
+            inicio = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                pedido = Cliente.accion_facturar_carrito(primer_cliente + i)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            assert pedido is not None, f"no se facturó el cliente {primer_cliente + i}"
+        tiempos.sort()
+        return percentil(tiempos, 50)
+
+    con_triggers = facturar(1, 200)
+    Escritor.ejecutar(lambda cursor: [cursor.execute(f"DROP TRIGGER resumen_ventas_{t}") for t in ("ai", "ad", "au")])
+    sin_triggers = facturar(201, 200)
+    Db().iniciar_tablas()
+    print(f"  facturar 10 líneas: p50 {con_triggers:.2f} ms con triggers, {sin_triggers:.2f} ms sin triggers")
+
+    inicio = time.perf_counter()
+    Venta.reconstruir_resumenes()
+    reconstruir = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    diferencias = Venta.verificar_resumenes()
+    print(f"  reconstruir {reconstruir:.1f} s, verificar {time.perf_counter() - inicio:.1f} s, diferencias {diferencias}")
+
+
+def medir_archivo(ventas=1_000_000):
+    """
+    Archivado de ventas (`Venta.archivar_ventas`) sobre un libro de `ventas` ventas de tres años
+    (2022-2024), con corte el 1 de enero de 2024. Mide antes y después, en la base principal:
+    tamaño, `VACUUM`, facturar, ventas de la última semana, historial de un cliente y contar el
+    libro; y las consultas del historial que ahora cruzan los archivos.
+    """
+    ruta = base_temporal()
+    generar_productos(1000)
+    Carrito.RESPALDO = False
+    db = Db()
+    db.cursor.execute('''
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i + 1 < ?)
+        INSERT INTO Ventas (fecha, producto, cliente, cantidad, factura, precio, nombre_producto)
+        SELECT datetime('2022-01-01', '+' || (abs(random()) % 94608000) || ' seconds'),
+               (i % 5) * 200 + abs(random()) % 200 + 1, abs(random()) % 100000 + 1, abs(random()) % 6 + 1,
+               CAST(i / 5 AS TEXT), 300, 'Cerveza'
+        FROM n
+    ''', (ventas,))
+    # El registro de cambios del libro sintético no es parte de la base que se archiva
+    db.cursor.execute("DELETE FROM Cambios")
+    db.conexion.commit()
+    db.cerrar()
+    generar_clientes(200)
+
+    contador = itertools.count(1)
+
+    def facturar():
+        id_cliente = next(contador)
+        for id_producto in range(1, 6):
+            Cliente.accion_registrar_venta_cliente("2024-12-31 12:00:00", id_producto, id_cliente, 1)
+        with contextlib.redirect_stdout(io.StringIO()):
+            pedido = Cliente.accion_facturar_carrito(id_cliente)
+        assert pedido is not None, f"no se facturó el cliente {id_cliente}"
+
+    def contar():
+        conexion = Db()
+        conexion.cursor.execute("SELECT COUNT(*) FROM Ventas NOT INDEXED")
+        conexion.cursor.fetchone()
+        conexion.cerrar()
+
+    def vacuum():
+        conexion = sqlite3.connect(ruta)
+        conexion.execute("VACUUM")
+        conexion.close()
+
+    def medir(titulo):
+        inicio = time.perf_counter()
+        vacuum()
+        segundos_vacuum = time.perf_counter() - inicio
+        tamano = os.path.getsize(ruta) / 1e6
+        print(f"{titulo}: data.db {tamano:.0f} MB, VACUUM {segundos_vacuum:.2f} s")
+        mediciones = [
+            ("facturar 5 líneas", facturar, 50),
+            ("ventas de la última semana", lambda: Venta.ventas_entre("2024-12-24", "2024-12-31"), 20),
+            ("historial de un cliente", lambda: Cliente.accion_ver_historico_ventas_cliente(4242), 20),
+            ("recorrer Ventas (COUNT sin índice)", contar, 5),
+            ("ventas de una semana de 2022", lambda: Venta.ventas_entre("2022-03-01", "2022-03-07"), 20),
+        ]
+        for nombre, funcion, repeticiones in mediciones:
+            print(f"  {nombre:>36}: {cronometrar(funcion, repeticiones):.2f} ms")
+
+    medir(f"{ventas} ventas, antes de archivar")
+    with contextlib.redirect_stdout(io.StringIO()):
+        inicio = time.perf_counter()
+        archivadas = Venta.archivar_ventas("2024-01-01")
+        segundos = time.perf_counter() - inicio
+    print(f"archivadas {sum(archivadas.values())} ventas en {segundos:.1f} s: {archivadas}")
+    medir("después de archivar")
+    print(f"  resúmenes: {Venta.verificar_resumenes()}")
+
+
+def medir_sucursales(ventas=250_000, sucursales=8):
+    """
+    `reportes.generar_reporte_sucursales` con 1, 2, 4... hasta `sucursales` sucursales de `ventas`
+    ventas cada una (copias de la misma base), leyendo todas a la vez y de a una (`hilos=1`).
+    Comprueba que el consolidado sume lo mismo que los reportes de cada sucursal.
+    """
+    ruta = base_temporal()
+    generar_productos(1000)
+    db = Db()
+    db.cursor.execute('''
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i + 1 < ?)
+        INSERT INTO Ventas (fecha, producto, cliente, cantidad, factura, precio, nombre_producto)
+        SELECT datetime('2024-01-01', '+' || (abs(random()) % 63072000) || ' seconds'),
+               (i % 5) * 200 + abs(random()) % 200 + 1, abs(random()) % 100000 + 1, abs(random()) % 6 + 1,
+               CAST(i / 5 AS TEXT), 300, NULL
+        FROM n
+    ''', (ventas,))
+    db.conexion.commit()
+    db.cerrar()
+
+    rutas = {}
+    for i in range(sucursales):
+        rutas[f"s{i}"] = os.path.join(os.path.dirname(ruta), f"sucursal{i}.db")
+        conexion = sqlite3.connect(ruta)
+        destino = sqlite3.connect(rutas[f"s{i}"])
+        conexion.backup(destino)
+        destino.close()
+        conexion.close()
+
+    reportes._columnas_leidas.clear()
+    inicio = time.perf_counter()
+    totales = reportes.generar_reporte()["totales"]
+    print(f"{ventas} ventas por sucursal, {os.cpu_count()} CPU; generar_reporte de una sucursal: {time.perf_counter() - inicio:.2f} s")
+
+    cantidad = 1
+    while cantidad <= sucursales:
+        elegidas = dict(list(rutas.items())[:cantidad])
+        tiempos = []
+        for hilos in (None, 1):
+            inicio = time.perf_counter()
+            reporte = reportes.generar_reporte_sucursales(sucursales=elegidas, hilos=hilos)
+            tiempos.append(time.perf_counter() - inicio)
+        cuadra = all(reporte["totales"][clave] == totales[clave] * cantidad for clave in totales)
+        print(f"  {cantidad:>3} sucursales: en paralelo {tiempos[0]:.2f} s ({tiempos[0] / cantidad:.2f} s por sucursal), "
+              f"de a una {tiempos[1]:.2f} s; totales {'cuadran' if cuadra else 'NO cuadran'}")
+        cantidad *= 2
+
+
+def medir_cambios(ventas=1_000_000, facturas_del_dia=1000):
+    """
+    Registro de cambios (`Cambios`) sobre un libro de `ventas` ventas: cuánto cuestan sus triggers
+    al facturar, y la exportación incremental de las `facturas_del_dia` facturas (10 líneas cada
+    una) contra volcar la tabla Ventas completa en JSONL.
+    """
+    base_temporal()
+    generar_productos(1000)
+    Carrito.RESPALDO = False
+    db = Db()
+    inicio = time.perf_counter()
+    db.cursor.execute('''
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i + 1 < ?)
+        INSERT INTO Ventas (fecha, producto, cliente, cantidad, factura, precio, nombre_producto)
+        SELECT datetime('2024-01-01', '+' || (abs(random()) % 63072000) || ' seconds'),
+               (i % 5) * 200 + abs(random()) % 200 + 1, abs(random()) % 100000 + 1, abs(random()) % 6 + 1,
+               CAST(i / 5 AS TEXT), 300, NULL
+        FROM n
+    ''', (ventas,))
+    db.conexion.commit()
+    print(f"{ventas} ventas insertadas con los triggers de resumen y de cambios en {time.perf_counter() - inicio:.1f} s")
+    db.cerrar()
+    generar_clientes(facturas_del_dia + 200)
+    db = Db()
+    db.cursor.execute("DELETE FROM Cambios")
+    db.conexion.commit()
+    db.cerrar()
+    Cambios.registrar_consumidor("contabilidad")
+
+    def facturar(primer_cliente, cantidad_facturas):
+        tiempos = []
+        for i in range(cantidad_facturas):
+            for id_producto in range(1, 11):
+                Cliente.accion_registrar_venta_cliente("2025-01-01 00:00:00", id_producto, primer_cliente + i, 2)
+            inicio = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                pedido = Cliente.accion_facturar_carrito(primer_cliente + i)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            assert pedido is not None, f"no se facturó el cliente {primer_cliente + i}"
+        tiempos.sort()
+        return percentil(tiempos, 50)
+
+    # Sin los triggers de cambios primero (se vuelven a crear con iniciar_tablas)
+    Escritor.ejecutar(lambda cursor: [
+        cursor.execute(f"DROP TRIGGER cambios_{tabla.lower()}_{operacion}") for tabla in TABLAS_CAMBIOS for operacion in ("ai", "au", "ad")
+    ])
+    sin_triggers = facturar(1, 200)
+    Db().iniciar_tablas()
+    con_triggers = facturar(201, facturas_del_dia)
+    print(f"  facturar 10 líneas: p50 {con_triggers:.2f} ms con el registro de cambios, {sin_triggers:.2f} ms sin él")
+
+    inicio = time.perf_counter()
+    exportados = Cambios.exportar("contabilidad", io.StringIO())
+    incremental = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    db = Db()
+    db.cursor.execute("SELECT * FROM Ventas")
+    columnas = [descripcion[0] for descripcion in db.cursor.description]
+    volcado = io.StringIO()
+    filas = 0
+    for fila in db.cursor:
+        volcado.write(json.dumps(dict(zip(columnas, fila)), ensure_ascii=False) + "\n")
+        filas += 1
+    db.cerrar()
+    completo = time.perf_counter() - inicio
+    print(f"  exportación incremental: {exportados} cambios en {incremental * 1000:.0f} ms; "
+          f"volcado completo de Ventas: {filas} filas en {completo:.1f} s")
+    print(f"  después de exportar: {Cambios.consumidores()}, {len(Cambios.leer(0))} cambios guardados")
+
+
+def medir_exportacion(ventas=10_000_000):
+    """
+    `exportacion.exportar` de un libro de `ventas` ventas a un archivo en cada formato, con y sin
+    gzip: filas por segundo, tamaño del archivo y memoria máxima del proceso después de cada
+    exportación (si la exportación es por bloques, no crece con las filas).
+    """
+    ruta = base_temporal()
+    generar_productos(1000)
+    # Sin el registro de cambios del libro sintético (los triggers se vuelven a crear con iniciar_tablas)
+    Escritor.ejecutar(lambda cursor: [
+        cursor.execute(f"DROP TRIGGER cambios_{tabla.lower()}_{operacion}") for tabla in TABLAS_CAMBIOS for operacion in ("ai", "au", "ad")
+    ])
+    db = Db()
+    inicio = time.perf_counter()
+    db.cursor.execute('''
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i + 1 < ?)
+        INSERT INTO Ventas (fecha, producto, cliente, cantidad, factura, precio, nombre_producto)
+        SELECT datetime('2024-01-01', '+' || (abs(random()) % 63072000) || ' seconds'),
+               (i % 5) * 200 + abs(random()) % 200 + 1, abs(random()) % 100000 + 1, abs(random()) % 6 + 1,
+               CAST(i / 5 AS TEXT), 300, 'Cerveza ' || (i % 5 * 200)
+        FROM n
+    ''', (ventas,))
+    db.conexion.commit()
+    db.cerrar()
+    Db().iniciar_tablas()
+    print(f"{ventas} ventas generadas en {time.perf_counter() - inicio:.0f} s, data.db {os.path.getsize(ruta) / 1e6:.0f} MB")
+
+    print(f"  memoria máxima antes de exportar: {memoria_maxima()}")
+    destino = os.path.join(os.path.dirname(ruta), "exportacion")
+    for formato in exportacion.FORMATOS:
+        for comprimir in (False, True):
+            inicio = time.perf_counter()
+            filas = exportacion.exportar("ventas", destino, formato, comprimir=comprimir)
+            segundos = time.perf_counter() - inicio
+            nombre = formato + (" + gzip" if comprimir else "")
+            print(f"  {nombre:>17}: {filas / segundos / 1e6:.2f} M filas/s ({segundos:.0f} s), "
+                  f"{os.path.getsize(destino) / 1e6:.0f} MB, memoria máxima {memoria_maxima()}")
+            os.remove(destino)
+
+
+def medir_ingesta(ventas=1_000_000):
+    """
+    `ingesta.ingerir` de un archivo JSONL de `ventas` ventas de un punto de venta externo (tickets
+    de 5 líneas, productos con stock): filas por segundo, la misma ingesta repetida (todo
+    duplicado), y el costo por venta con lotes de 1 contra lotes de 1000 y contra registrar y
+    facturar carrito por carrito.
+    """
+    ruta = base_temporal()
+    generar_productos(1000)
+    generar_clientes(10_000)
+    Carrito.RESPALDO = False
+    db = Db()
+    db.cursor.execute("INSERT INTO Stock (producto, cantidad, minimo) SELECT noIdProducto, 1000000000, 0 FROM productos")
+    db.conexion.commit()
+    db.cerrar()
+
+    def escribir_archivo(nombre, cantidad, inicio=0):
+        aleatorio = random.Random(2006 + inicio)
+        archivo = os.path.join(os.path.dirname(ruta), nombre)
+        with open(archivo, "w", encoding="utf-8") as salida:
+            for i in range(inicio, inicio + cantidad):
+                ticket = i // 5
+                salida.write(json.dumps({
+                    "clave": f"barra-{i}",
+                    "fecha": f"2025-03-{ticket % 28 + 1:02d} {ticket % 24:02d}:{i % 60:02d}:00",
+                    "producto": (i % 5) * 200 + aleatorio.randint(1, 200),
+                    "cliente": aleatorio.randint(1, 10_000),
+                    "cantidad": aleatorio.randint(1, 6),
+                    "ticket": str(ticket),
+                }) + "\n")
+        return archivo
+
+    archivo = escribir_archivo("ventas.jsonl", ventas)
+    print(f"{ventas} ventas en JSONL: {os.path.getsize(archivo) / 1e6:.0f} MB")
+    for titulo in ("primera ingesta", "misma ingesta repetida"):
+        informe = ingesta.ingerir(archivo)
+        print(f"  {titulo}: {informe['filas_por_segundo'] / 1e3:.0f} mil filas/s ({informe['segundos']:.1f} s), "
+              f"{informe['insertadas']} insertadas, {informe['duplicadas']} duplicadas, {informe['rechazadas']} rechazadas, "
+              f"lectura esperando a la escritura {informe['espera_cola']:.1f} s, memoria máxima {memoria_maxima()}")
+
+    muestra = 5000
+    for tamano_lote in (1, 1000):
+        archivo = escribir_archivo(f"lote{tamano_lote}.jsonl", muestra, ventas + tamano_lote * muestra)
+        informe = ingesta.ingerir(archivo, tamano_lote=tamano_lote)
+        assert informe["insertadas"] == muestra, informe["rechazos"][:3]
+        print(f"  lotes de {tamano_lote}: {informe['segundos'] / muestra * 1e6:.0f} µs por venta")
+
+    # Lo que habría que hacer sin ingesta: cada ticket a un carrito y facturarlo
+    inicio = time.perf_counter()
+    for ticket in range(muestra // 5):
+        id_cliente = ticket % 10_000 + 1
+        for linea in range(5):
+            Cliente.accion_registrar_venta_cliente("2025-03-01 00:00:00", linea * 200 + 1, id_cliente, 1)
+        with contextlib.redirect_stdout(io.StringIO()):
+            pedido = Cliente.accion_facturar_carrito(id_cliente)
+        assert pedido is not None, f"no se facturó el cliente {id_cliente}"
+    print(f"  registrar y facturar carrito por carrito: {(time.perf_counter() - inicio) / muestra * 1e6:.0f} µs por venta")
+
+
+def medir_respaldo(ventas=1_000_000):
+    """
+    Respaldo en línea (`respaldos.respaldar`) de un libro de `ventas` ventas mientras el programa
+    consulta historiales de clientes y registra ventas con el `Escritor`: latencia de esas
+    operaciones sin respaldo, con el respaldo en un solo paso y por pasos con pausa, y lo que
+    tarda y ocupa cada respaldo. Al final restaura un respaldo anterior a un archivado de ventas
+    y comprueba que el historial y los resúmenes no cuentan dos veces las ventas archivadas.
+    """
+    ruta = base_temporal()
+    generar_productos(1000)
+    Carrito.RESPALDO = False
+    db = Db()
+    db.cursor.execute('''
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i + 1 < ?)
+        INSERT INTO Ventas (fecha, producto, cliente, cantidad, factura, precio, nombre_producto)
+        SELECT datetime('2024-01-01', '+' || (abs(random()) % 63072000) || ' seconds'),
+               (i % 5) * 200 + abs(random()) % 200 + 1, abs(random()) % 100000 + 1, abs(random()) % 6 + 1,
+               CAST(i / 5 AS TEXT), 300, 'Cerveza'
+        FROM n
+    ''', (ventas,))
+    db.cursor.execute("DELETE FROM Cambios")
+    db.conexion.commit()
+    db.cerrar()
+    generar_clientes(200)
+    inicio = time.perf_counter()
+    shutil.copyfile(ruta, ruta + ".copia")
+    print(f"{ventas} ventas, data.db {os.path.getsize(ruta) / 1e6:.0f} MB; "
+          f"copiar el archivo con el programa cerrado: {time.perf_counter() - inicio:.2f} s")
+    os.remove(ruta + ".copia")
+
+    contador = itertools.count(1)
+
+    def primer_plano(termino):
+        lecturas, escrituras = [], []
+        while not termino():
+            i = next(contador)
+            inicio = time.perf_counter()
+            Cliente.accion_ver_historico_ventas_cliente(i % 200 + 1)
+            lecturas.append((time.perf_counter() - inicio) * 1000)
+            inicio = time.perf_counter()
+            Escritor.ejecutar(insertar_venta, 1_000_000 + i, i % 1000 + 1)
+            escrituras.append((time.perf_counter() - inicio) * 1000)
+        lecturas.sort()
+        escrituras.sort()
+        return (f"historial p50 {percentil(lecturas, 50):.2f} ms p99 {percentil(lecturas, 99):.2f} ms, "
+                f"venta p50 {percentil(escrituras, 50):.2f} ms p99 {percentil(escrituras, 99):.2f} ms")
+
+    fin = time.perf_counter() + 3
+    print(f"  {'sin respaldo':>28}: {primer_plano(lambda: time.perf_counter() > fin)}")
+    for titulo, paginas, pausa, comprimir in [
+        ("respaldo en un paso", -1, 0, False),
+        ("por pasos de 256 páginas", respaldos.PAGINAS_POR_PASO, respaldos.PAUSA_PASO_S, False),
+        ("por pasos y gzip", respaldos.PAGINAS_POR_PASO, respaldos.PAUSA_PASO_S, True),
+    ]:
+        resultado = {}
+        hilo = threading.Thread(target=lambda: resultado.update(respaldos.respaldar(comprimir, None, paginas, pausa)))
+        hilo.start()
+        latencias = primer_plano(lambda: not hilo.is_alive())
+        hilo.join()
+        assert not respaldos.verificar(resultado["archivo"]), resultado["archivo"]
+        print(f"  {titulo:>28}: {latencias}; respaldo {resultado['segundos']:.2f} s, "
+              f"{resultado['pasos']} pasos, {resultado['bytes'] / 1e6:.0f} MB")
+
+    def historial():
+        db = Db()
+        db.cursor.execute(f"SELECT COUNT(*) FROM {db.tabla_ventas_historicas()}")
+        total = db.cursor.fetchone()[0]
+        db.cerrar()
+        return total
+
+    antes = historial()
+    resultado = respaldos.respaldar(conservar=None, paginas=-1, pausa=0)
+    archivadas = sum(Venta.archivar_ventas("2024-02-01").values())
+    inicio = time.perf_counter()
+    respaldos.restaurar(resultado["archivo"])
+    segundos = time.perf_counter() - inicio
+    despues = historial()
+    diferencias = Venta.verificar_resumenes()
+    print(f"  {'restaurar tras archivar':>28}: {archivadas} ventas archivadas después del respaldo; "
+          f"historial {antes} antes y {despues} después de restaurar ({segundos:.2f} s), resúmenes distintos {diferencias}")
+    assert despues == antes and not any(diferencias.values()), (antes, despues, diferencias)
+
+
+# Escalas de `medir_modelo`: clientes, productos y líneas de venta
+ESCALAS_MODELO = {
+    "pequena": (1_000, 100, 10_000),
+    "mediana": (10_000, 500, 100_000),
+    "grande": (100_000, 1_000, 1_000_000),
+}
+
+# Segundos que se repite cada operación, repartidos en rondas que recorren todas las operaciones:
+# así una racha lenta de la máquina afecta a todas por igual y no solo a las que medía en ese momento
+SEGUNDOS_POR_OPERACION = 1.0
+RONDAS = 5
+# Tope de repeticiones por ronda: las escrituras agregan a lo sumo estas filas, sin importar la máquina
+REPETICIONES_POR_RONDA = 500
+
+# Una operación es una regresión si su mediana crece más de esta fracción sobre la línea base...
+TOLERANCIA_REGRESION = 0.25
+# ... y más de estos milisegundos (por debajo domina el ruido de medición)
+MINIMO_REGRESION_MS = 0.05
+
+
+def operaciones_modelo(clientes, productos, aleatorio):
+    """
+    Operaciones públicas de `poo.py` que mide `medir_modelo`, como `(nombre, funcion, preparar)`.
+    `preparar` (o `None`) retorna los argumentos de `funcion` y no entra en el tiempo medido.
+    Las escrituras se pueden repetir sin cambiar el tamaño de la base más que unas filas.
+
+    No se miden `Factura.generar_factura_pdf`, `Factura.abrir_factura_pdf` ni `Correo.enviar_correo`
+    (dependen de wkhtmltopdf, del visor de PDF y del servidor SMTP), ni `Venta.archivar_ventas`
+    (vacía el libro que miden las demás).
+    """
+    db = Db()
+    db.cursor.execute("SELECT factura FROM Ventas WHERE noIdVentas % 997 = 0 LIMIT 100")
+    facturas = [fila[0] for fila in db.cursor.fetchall()]
+    db.cerrar()
+    pedido = Venta.obtener_factura(facturas[0])
+    cliente = lambda: aleatorio.randint(1, clientes)
+    producto = lambda: aleatorio.randint(1, productos)
+    nuevos = itertools.count()
+    semana = lambda: ("2025-03-01", "2025-03-07")
+
+    def carrito(lineas=3):
+        id_cliente = cliente()
+        Cliente.reiniciar_carrito(id_cliente)
+        for id_producto in aleatorio.sample(range(1, productos + 1), lineas):
+            Cliente.accion_registrar_venta_cliente("2025-06-01 12:00:00", id_producto, id_cliente, 2)
+        return (id_cliente,)
+
+    def linea_carrito():
+        id_cliente = cliente()
+        Cliente.accion_registrar_venta_cliente("2025-06-01 12:00:00", producto(), id_cliente, 1)
+        return (Carrito.obtener().ver(id_cliente)[-1]["id"],)
+
+    def cliente_nuevo():
+        i = next(nuevos)
+        return {"nombre": "Ana", "apellido": "Rojas", "direccion": "Calle 1 # 2 - 3",
+                "telefono": 3100000000 + i, "correo": f"nueva{i}@mail.com"}
+
+    def producto_nuevo():
+        return {"nombre": f"Nueva {next(nuevos)}", "medida": "330 ml", "fecha_vencimiento": "2027-01-01",
+                "precio_produccion": 100, "precio_venta": 200}
+
+    return [
+        ("normalizar_fecha_hora", normalizar_fecha_hora, lambda: ("01/06/2025 12:30",)),
+        ("rango_fechas", rango_fechas, semana),
+        ("Db.verificar_conexion", lambda: Db().verificar_conexion(), None),
+        ("Db.tabla_ventas_historicas", lambda: Db().tabla_ventas_historicas(), None),
+        ("Db.iniciar_tablas", lambda: Db().iniciar_tablas(), None),
+        ("Escritor.ejecutar (tarea vacía)", Escritor.ejecutar, lambda: (lambda cursor: None,)),
+        ("Producto.listar_objetos", Producto.listar_objetos, None),
+        ("Producto.obtener_producto_detalle", Producto.obtener_producto_detalle, lambda: (producto(),)),
+        ("Producto.buscar_producto", Producto.buscar_producto, lambda: (producto(),)),
+        ("Producto.crear_objeto", lambda datos: Producto.crear_objeto(**datos), lambda: (producto_nuevo(),)),
+        ("Producto.actualizar_nombre_producto", Producto.actualizar_nombre_producto, lambda: (1, "Lager 0")),
+        ("Producto.agregar_stock", Producto.agregar_stock, lambda: (producto(), 1)),
+        ("Producto.agregar_lote", Producto.agregar_lote, lambda: (producto(), 1, "2027-01-01")),
+        ("Producto.obtener_stock", Producto.obtener_stock, lambda: (producto(),)),
+        ("Producto.productos_bajo_stock", Producto.productos_bajo_stock, None),
+        ("Producto.lotes_por_vencer", Producto.lotes_por_vencer, lambda: (30,)),
+        ("Producto.retirar_vencidos", Producto.retirar_vencidos, None),
+        ("Producto.ventas_periodo", Producto.ventas_periodo, lambda: (producto(), "2025-03-01", "2025-03-31")),
+        ("Cliente.listar_objetos", Cliente.listar_objetos, None),
+        ("Cliente.crear_objeto", lambda datos: Cliente.crear_objeto(**datos), lambda: (cliente_nuevo(),)),
+        ("Cliente.buscar_clientes", Cliente.buscar_clientes, lambda: (aleatorio.choice(NOMBRES)[:3],)),
+        ("Cliente.accion_cliente_detalle", Cliente.accion_cliente_detalle, lambda: (cliente(),)),
+        ("Cliente.accion_cliente_cambiar_direccion", Cliente.accion_cliente_cambiar_direccion,
+         lambda: (cliente(), "Calle 10 # 20 - 30")),
+        ("Cliente.total_comprado", Cliente.total_comprado, lambda: (cliente(),)),
+        ("Cliente.accion_ver_historico_ventas_cliente", Cliente.accion_ver_historico_ventas_cliente, lambda: (cliente(),)),
+        ("Cliente.accion_registrar_venta_cliente", Cliente.accion_registrar_venta_cliente,
+         lambda: ("2025-06-01 12:00:00", producto(), cliente(), 1)),
+        ("Cliente.accion_registrar_ventas_cliente", Cliente.accion_registrar_ventas_cliente,
+         lambda: ("2025-06-01 12:00:00", cliente(), [(producto(), 1), (producto(), 2)])),
+        ("Cliente.verificar_venta_existente", Cliente.verificar_venta_existente, lambda: (cliente(), producto())),
+        ("Cliente.accion_ver_carrito_cliente", Cliente.accion_ver_carrito_cliente, carrito),
+        ("Cliente.clientes_con_carrito", Cliente.clientes_con_carrito, None),
+        ("Cliente.obtener_data_factura", Cliente.obtener_data_factura, carrito),
+        ("Cliente.accion_facturar_carrito (3 líneas)", Cliente.accion_facturar_carrito, carrito),
+        ("Cliente.reiniciar_carrito", Cliente.reiniciar_carrito, carrito),
+        ("Venta.accion_borrar_venta", Venta.accion_borrar_venta, linea_carrito),
+        ("Venta.ventas_entre (una semana)", Venta.ventas_entre, semana),
+        ("Venta.obtener_factura", Venta.obtener_factura, lambda: (aleatorio.choice(facturas),)),
+        ("Venta.verificar_resumenes", Venta.verificar_resumenes, None),
+        ("Venta.reconstruir_resumenes", Venta.reconstruir_resumenes, None),
+        ("Cambios.leer (1000 cambios)", Cambios.leer, lambda: (0, 1000)),
+        ("Cambios.consumidores", Cambios.consumidores, None),
+        ("Factura.generar_factura_html", Factura.generar_factura_html, lambda: (pedido,)),
+        ("Correo.generar_correo_html", Correo.generar_correo_html, lambda: (pedido,)),
+    ]
+
+
+def tomar_tiempos(funcion, preparar=None, segundos=SEGUNDOS_POR_OPERACION / RONDAS, maximo=REPETICIONES_POR_RONDA):
+    """
+    Ejecuta `funcion(*preparar())` durante `segundos` (al menos una vez y a lo sumo `maximo`).
+    Retorna los tiempos en milisegundos, ordenados.
+    """
+    tiempos = []
+    limite = time.perf_counter() + segundos
+    while not tiempos or (time.perf_counter() < limite and len(tiempos) < maximo):
+        argumentos = preparar() if preparar else ()
+        inicio = time.perf_counter()
+        funcion(*argumentos)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return tiempos
+
+
+def comparar_modelo(resultados, linea_base, tolerancia=TOLERANCIA_REGRESION, minimo_ms=MINIMO_REGRESION_MS):
+    """
+    Compara la mejor ronda (`mejor_ronda_ms`, la mediana de la ronda más rápida: la menos afectada
+    por el resto de la máquina) de `resultados` con la de `linea_base` (mismo formato que escribe
+    `medir_modelo`), escala por escala. Imprime cada operación más lenta o más rápida que la
+    tolerancia y retorna las regresiones como `(escala, operacion, base_ms, nueva_ms)`.
+    Una operación que falla (`error`) o que está en la línea base y ya no se mide también es una
+    regresión, con `nueva_ms` en `None`.
+    """
+    regresiones = []
+    for escala, datos in resultados["escalas"].items():
+        if escala not in linea_base.get("escalas", {}):
+            continue
+        base = linea_base["escalas"][escala].get("operaciones", {})
+        for operacion in sorted(base.keys() - datos["operaciones"].keys()):
+            regresiones.append((escala, operacion, base[operacion].get("mejor_ronda_ms"), None))
+            print(f"  REGRESIÓN {escala:>8} {operacion:<45} está en la línea base y ya no se mide")
+        for operacion, medicion in datos["operaciones"].items():
+            anterior = base.get(operacion, {}).get("mejor_ronda_ms")
+            nueva = medicion.get("mejor_ronda_ms")
+            if "error" in medicion:
+                regresiones.append((escala, operacion, anterior, None))
+                ya_fallaba = " (ya fallaba en la línea base)" if "error" in base.get(operacion, {}) else ""
+                print(f"  REGRESIÓN {escala:>8} {operacion:<45} falla: {medicion['error']}{ya_fallaba}")
+                continue
+            if anterior is None:
+                continue  # Operación nueva, o que fallaba en la línea base
+            if nueva > anterior * (1 + tolerancia) and nueva - anterior > minimo_ms:
+                regresiones.append((escala, operacion, anterior, nueva))
+                print(f"  REGRESIÓN {escala:>8} {operacion:<45} {anterior:10.3f} ms -> {nueva:10.3f} ms (x{nueva / anterior:.2f})")
+            elif nueva < anterior / (1 + tolerancia) and anterior - nueva > minimo_ms:
+                print(f"  mejora    {escala:>8} {operacion:<45} {anterior:10.3f} ms -> {nueva:10.3f} ms (x{nueva / anterior:.2f})")
+    print(f"{len(regresiones)} regresiones (tolerancia {tolerancia:.0%} y {minimo_ms} ms)")
+    return regresiones
+
+
+def medir_modelo(escalas="pequena,mediana", resultados="resultados_modelo.json", linea_base=None):
+    """
+    Mide cada operación pública del modelo (`operaciones_modelo`) en bases sintéticas de las
+    `escalas` de `ESCALAS_MODELO` (separadas por comas, por ejemplo `pequena,mediana,grande`)
+    y escribe mediana, p90, mínimo, mejor ronda y repeticiones de cada una en el JSON `resultados`.
+    Con `linea_base` (un JSON de una ejecución anterior) compara y retorna las regresiones;
+    el proceso termina con código 1 si hay alguna.
+    """
+    raiz = os.path.dirname(os.path.abspath(__file__))
+    Factura.path_plantilla_factura = os.path.join(raiz, Factura.path_plantilla_factura)
+    Correo.path_plantilla_correo = os.path.join(raiz, Correo.path_plantilla_correo)
+    Carrito.RESPALDO = False
+    informe = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "plataforma": platform.platform(),
+        "escalas": {},
+    }
+    for escala in escalas.split(","):
+        clientes, productos, ventas = ESCALAS_MODELO[escala]
+        base_temporal()
+        inicio = time.perf_counter()
+        generar_datos(clientes, productos, ventas)
+        print(f"escala {escala}: {clientes} clientes, {productos} productos, {ventas} líneas de venta "
+              f"(generadas en {time.perf_counter() - inicio:.1f} s)")
+        lista = operaciones_modelo(clientes, productos, random.Random(2006))
+        operaciones = {}
+        rondas = {nombre: [] for nombre, _, _ in lista}
+        with contextlib.redirect_stdout(io.StringIO()):
+            for ronda in range(RONDAS + 1):
+                for nombre, funcion, preparar in lista:
+                    if nombre in operaciones:
+                        continue
+                    try:
+                        # La ronda 0 solo calienta (cachés de SQLite, plantillas, primera conexión)
+                        tiempos = tomar_tiempos(funcion, preparar, 0 if ronda == 0 else SEGUNDOS_POR_OPERACION / RONDAS)
+                    except Exception as e:
+                        operaciones[nombre] = {"error": f"{type(e).__name__}: {e}"}
+                        continue
+                    if ronda:
+                        rondas[nombre].append(tiempos)
+        for nombre, _, _ in lista:
+            if nombre in operaciones:
+                print(f"  {nombre:<45} error: {operaciones[nombre]['error']}")
+                continue
+            tiempos = sorted(itertools.chain.from_iterable(rondas[nombre]))
+            operaciones[nombre] = {
+                "mediana_ms": round(percentil(tiempos, 50), 4),
+                "p90_ms": round(percentil(tiempos, 90), 4),
+                "minimo_ms": round(tiempos[0], 4),
+                "mejor_ronda_ms": round(min(percentil(ronda, 50) for ronda in rondas[nombre]), 4),
+                "repeticiones": len(tiempos),
+            }
+            print(f"  {nombre:<45} mediana {operaciones[nombre]['mediana_ms']:10.3f} ms  "
+                  f"p90 {operaciones[nombre]['p90_ms']:10.3f} ms  mejor ronda {operaciones[nombre]['mejor_ronda_ms']:10.3f} ms  "
+                  f"({len(tiempos)})")
+        informe["escalas"][escala] = {"clientes": clientes, "productos": productos, "ventas": ventas, "operaciones": operaciones}
+
+    with open(resultados, "w", encoding="utf-8") as archivo:
+        json.dump(informe, archivo, ensure_ascii=False, indent=2)
+    print(f"resultados en {resultados}")
+    if linea_base:
+        with open(linea_base, encoding="utf-8") as archivo:
+            return comparar_modelo(informe, json.load(archivo))
+    return []
+
+
+def medir_trazas(cobros=500):
+    """
+    Costo de las trazas (`trazas.py`) en `cobros` cobros de 5 líneas (facturar el carrito y
+    generar el HTML de la factura y del correo, sin wkhtmltopdf ni SMTP): p50 por cobro sin
+    trazas, con trazas, con tracemalloc y con cProfile, y el tiempo por etapa que muestran.
+    """
+    ruta = base_temporal()
+    generar_datos(10_000, 500, 100_000)
+    raiz = os.path.dirname(os.path.abspath(__file__))
+    Factura.path_plantilla_factura = os.path.join(raiz, Factura.path_plantilla_factura)
+    Correo.path_plantilla_correo = os.path.join(raiz, Correo.path_plantilla_correo)
+    Carrito.RESPALDO = False
+    contador = itertools.count(1)
+
+    def cobrar():
+        id_cliente = next(contador)
+        for id_producto in range(1, 6):
+            Cliente.accion_registrar_venta_cliente("2025-06-01 12:00:00", id_producto, id_cliente, 1)
+        inicio = time.perf_counter()
+        with trazas.tramo("checkout", perfilar=True, cliente=id_cliente):
+            with contextlib.redirect_stdout(io.StringIO()):
+                pedido = Cliente.accion_facturar_carrito(id_cliente)
+            Factura.generar_factura_html(pedido)
+            Correo.generar_correo_html(pedido)
+        return (time.perf_counter() - inicio) * 1000
+
+    directorio = os.path.dirname(ruta)
+    base = None
+    for titulo, activar, perfil in [
+        ("sin trazas", False, ()),
+        ("trazas", True, ()),
+        ("trazas + tracemalloc", True, ("tracemalloc",)),
+        ("trazas + cProfile", True, ("cprofile",)),
+    ]:
+        trazas.limpiar()
+        if activar:
+            trazas.activar(os.path.join(directorio, "traza.json"), perfil, os.path.join(directorio, "perfiles"))
+        tiempos = sorted(cobrar() for _ in range(cobros))
+        if activar:
+            trazas.desactivar()
+        p50 = percentil(tiempos, 50)
+        base = base or p50
+        print(f"  {titulo:>22}: cobro p50 {p50:.3f} ms, p99 {percentil(tiempos, 99):.3f} ms (x{p50 / base:.2f})")
+        if titulo == "trazas":
+            etapas = trazas.resumen()
+            archivo = trazas.guardar()
+            print(f"    {len(trazas.eventos())} tramos en {archivo} ({os.path.getsize(archivo) / 1e3:.0f} KB); por cobro:")
+            for nombre, total in etapas.items():
+                print(f"    {nombre:>34}: {total['total_ms'] / cobros:.3f} ms (máximo {total['maximo_ms']:.3f} ms)")
+
+
+def filas_sinteticas(filas, semilla=2006):
+    """
+    `filas` clientes, productos y ventas como llegan de un CSV (todo texto), con un valor no válido
+    en una de cada 100 filas. Retorna `(clientes, productos, ventas, filas con error)`.
+    """
+    aleatorio = random.Random(semilla)
+    clientes, productos, ventas = [], [], []
+    malas = set()
+    for i in range(filas):
+        nombre = aleatorio.choice(NOMBRES)
+        clientes.append({
+            "nombre": nombre,
+            "apellido": aleatorio.choice(APELLIDOS),
+            "direccion": f"Calle {i % 200} # {i % 97}-{i % 50}",
+            "telefono": str(3_000_000_000 + i),
+            "correo": f"{nombre.lower()}.{i}@{aleatorio.choice(DOMINIOS)}",
+        })
+        productos.append({
+            "nombre": f"Cerveza {i}",
+            "medida": f"{aleatorio.choice((330, 500, 1000))} ml" if i % 3 else "500",
+            "fecha_vencimiento": f"{i % 28 + 1:02d}/{i % 12 + 1:02d}/2026",
+            "precio_produccion": str(aleatorio.randint(1000, 5000)),
+            "precio_venta": str(aleatorio.randint(5000, 15000)),
+        })
+        ventas.append({
+            "clave": f"barra-{i}",
+            "fecha": f"2025-03-{i % 28 + 1:02d} {i % 24:02d}:{i % 60:02d}:00",
+            "producto": str(aleatorio.randint(1, 1000)),
+            "cliente": str(aleatorio.randint(1, 10_000)),
+            "cantidad": str(aleatorio.randint(1, 6)),
+            "precio": "",
+        })
+        if i % 100 == 99:
+            malas.add(i + 1)
+            clientes[-1]["correo" if i % 200 == 99 else "telefono"] = "no es válido"
+            productos[-1]["fecha_vencimiento" if i % 200 == 99 else "medida"] = "31/02/2026"
+            ventas[-1]["cantidad" if i % 200 == 99 else "fecha"] = "0"
+    return clientes, productos, ventas, malas
+
+
+def medir_validacion(filas=1_000_000):
+    """
+    Validación de `filas` clientes, productos y ventas con los esquemas de `verificacion.py`: filas
+    por segundo con `validar_filas` y con `validar_columnas`, contra la validación anterior de la
+    importación (las funciones de un campo con `re.fullmatch` de texto y `strptime`, hasta el
+    primer error de cada fila).
+    """
+    def cliente_anterior(fila):
+        if not re.fullmatch(r"[a-zA-Z0-9]+", str(fila.get("nombre", ""))):
+            return "nombre"
+        if not re.fullmatch(r"[a-zA-Z0-9]+", str(fila.get("apellido", ""))):
+            return "apellido"
+        if not fila.get("direccion"):
+            return "direccion"
+        if not re.fullmatch(r"\d+", str(fila.get("telefono", ""))):
+            return "telefono"
+        if not re.fullmatch(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}", str(fila.get("correo", ""))):
+            return "correo"
+        return None
+
+    def producto_anterior(fila):
+        if not fila.get("nombre"):
+            return "nombre"
+        medida = str(fila.get("medida", ""))
+        if not (re.fullmatch(r"\d+ (ml|g)", medida) or re.fullmatch(r"\d+", medida)):
+            return "medida"
+        for formato in ("%d/%m/%Y", "%Y-%m-%d"):
+            try:
+                datetime.strptime(str(fila.get("fecha_vencimiento", "")), formato)
+                break
+            except ValueError:
+                pass
+        else:
+            return "fecha_vencimiento"
+        try:
+            float(fila.get("precio_produccion"))
+            float(fila.get("precio_venta"))
+        except (TypeError, ValueError):
+            return "precios"
+        return None
+
+    inicio = time.perf_counter()
+    clientes, productos, ventas, malas = filas_sinteticas(filas)
+    print(f"{filas} filas de clientes, productos y ventas ({len(malas)} con errores), generadas en "
+          f"{time.perf_counter() - inicio:.1f} s")
+
+    for esquema, lote, anterior in [
+        (verificacion.ESQUEMA_CLIENTE, clientes, cliente_anterior),
+        (verificacion.ESQUEMA_PRODUCTO, productos, producto_anterior),
+        (verificacion.ESQUEMA_VENTA, ventas, None),
+    ]:
+        columnas = {campo.nombre: [fila[campo.nombre] for fila in lote] for campo in esquema.campos}
+        pruebas = [
+            ("validar_filas", lambda: esquema.validar_filas(lote)),
+            ("validar_columnas", lambda: esquema.validar_columnas(columnas)),
+        ]
+        if anterior is not None:
+            pruebas.insert(0, ("anterior, campo por campo", lambda: {
+                numero: motivo for numero, motivo in enumerate(map(anterior, lote), start=1) if motivo
+            }))
+        print(f"  {esquema.nombre}:")
+        base = None
+        for titulo, funcion in pruebas:
+            inicio = time.perf_counter()
+            errores = funcion()
+            segundos = time.perf_counter() - inicio
+            assert set(errores) == malas, f"{titulo}: {len(set(errores) ^ malas)} filas distintas"
+            base = base or segundos
+            print(f"    {titulo:>26}: {filas / segundos / 1e3:,.0f} mil filas/s ({segundos:.2f} s, x{base / segundos:.1f})")
+        del columnas
+
+
+MEDICIONES = {
+    "busqueda": medir_busqueda_clientes,
+    "importacion": reporte_importacion,
+    "primera_ventana": medir_primera_ventana,
+    "ventanas": medir_ventanas,
+    "servidor": medir_servidor,
+    "escritores": medir_escritores,
+    "carrito": medir_carrito,
+    "factura": medir_factura,
+    "stock": medir_stock,
+    "vencimiento": medir_vencimiento,
+    "fechas": medir_fechas,
+    "reportes": medir_reportes,
+    "resumenes": medir_resumenes,
+    "archivo": medir_archivo,
+    "sucursales": medir_sucursales,
+    "cambios": medir_cambios,
+    "exportacion": medir_exportacion,
+    "ingesta": medir_ingesta,
+    "respaldo": medir_respaldo,
+    "modelo": medir_modelo,
+    "trazas": medir_trazas,
+    "validacion": medir_validacion,
+}
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in MEDICIONES:
+        print(f"Uso: python benchmarks.py <{'|'.join(MEDICIONES)}> [argumentos]")
+        sys.exit(2)
+    # Las mediciones que comparan contra una línea base retornan las regresiones
+    regresiones = MEDICIONES[sys.argv[1]](*(int(arg) if arg.isdigit() else arg for arg in sys.argv[2:]))
+    sys.exit(1 if regresiones else 0)
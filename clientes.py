@@ -5,16 +5,20 @@ import os
 import tkinter as tk
 from datetime import datetime
 from tkinter import messagebox
-from poo import Cliente, Factura, Correo, Venta
-from verificacion import fecha_valida, es_alfa_numerico, formato_peso_volumen, es_entero_no_negativo, es_correo
+from poo import Cliente, Factura, Correo, Venta, Carrito, CarritosOcupados, EventosCarrito, StockInsuficiente
+from monitor import Boton
+from trazas import tramo
+from verificacion import fecha_valida, es_alfa_numerico, formato_peso_volumen, es_entero_no_negativo, es_entero_positivo, es_correo
 
 
-class VentanaMainClientes(tk.Tk):
-    def __init__(self, func_regresar):
-        super().__init__()
+class VentanaMainClientes(tk.Frame):
+    # Título y tamaño que aplica la ventana principal al mostrar esta vista
+    titulo = "Clientes"
+    tamano = "300x250"
+
+    def __init__(self, master, func_regresar):
+        super().__init__(master)
         self.func_regresar = func_regresar
-        self.title("Clientes")
-        self.geometry("300x250")
         self.config(bg="white")  # Fondo blanco
         
         # Configuración de los botones
@@ -25,9 +29,9 @@ class VentanaMainClientes(tk.Tk):
 
     def regresar(self):
         """
-        Función para regresar a la ventana anterior.
+        Función para regresar a la ventana anterior. La vista no se destruye, queda guardada
+        para mostrarla de nuevo sin reconstruirla.
         """
-        self.destroy()
         self.func_regresar()
 
 
@@ -36,15 +40,15 @@ class VentanaMainClientes(tk.Tk):
         Configura los botones para las acciones en la ventana de clientes.
         """
         # Botón para regresar al menú principal
-        btn_regresar = tk.Button(self, text="Regresar", command=self.regresar, bg="yellow", fg="black")
+        btn_regresar = Boton(self, text="Regresar", command=self.regresar, bg="yellow", fg="black")
         btn_regresar.pack(pady=20, fill="x")
 
         # Botón para ver la lista de clientes
-        lista_de_clientes = tk.Button(self, text="Ver Lista de Clientes", command=mostrar_clientes, bg="yellow", fg="black")
+        lista_de_clientes = Boton(self, text="Ver Lista de Clientes", command=mostrar_clientes, bg="yellow", fg="black")
         lista_de_clientes.pack(pady=5, fill="x")
 
         # Botón para crear un nuevo cliente
-        btn_crear_cliente = tk.Button(self, text="Crear Cliente Nuevo", command=registrar_cliente, bg="yellow", fg="black")
+        btn_crear_cliente = Boton(self, text="Crear Cliente Nuevo", command=registrar_cliente, bg="yellow", fg="black")
         btn_crear_cliente.pack(pady=5, fill="x")
 
     def _mensaje_informativo(self):
@@ -71,7 +75,7 @@ def boton_ver_detalle(id_cliente):
     # Crear la ventana emergente para mostrar los detalles del cliente
     ventana_detalle = tk.Toplevel()
     ventana_detalle.title(f"Detalles del Cliente - ID: {id_cliente}")
-    ventana_detalle.geometry("350x300")
+    ventana_detalle.geometry("350x340")
 
     # Mostrar los detalles del cliente en etiquetas
     tk.Label(ventana_detalle, text=f"ID Cliente: {cliente[0]}", font=("Arial", 12)).pack(pady=5)
@@ -80,12 +84,13 @@ def boton_ver_detalle(id_cliente):
     tk.Label(ventana_detalle, text=f"Teléfono: {cliente[4]}", font=("Arial", 12)).pack(pady=5)
     tk.Label(ventana_detalle, text=f"Correo: {cliente[5]}", font=("Arial", 12)).pack(pady=5)
 
+    total = Cliente.total_comprado(id_cliente)
+    tk.Label(ventana_detalle, text=f"Total comprado: ${total['gasto']} ({total['unidades']} unidades)", font=("Arial", 12)).pack(pady=5)
+
     # Botón para cerrar la ventana de detalles
-    btn_cerrar = tk.Button(ventana_detalle, text="Cerrar", command=ventana_detalle.destroy)
+    btn_cerrar = Boton(ventana_detalle, text="Cerrar", command=ventana_detalle.destroy)
     btn_cerrar.pack(pady=10)
 
-    ventana_detalle.mainloop()
-
 def boton_cambiar_direccion(id_cliente):
     """
     Permite cambiar la dirección de un cliente.
@@ -115,13 +120,23 @@ def boton_cambiar_direccion(id_cliente):
         messagebox.showinfo("Éxito", "Dirección actualizada correctamente.")
         ventana_cambiar_direccion.destroy()
 
-    btn_actualizar = tk.Button(ventana_cambiar_direccion, text="Actualizar Dirección", command=actualizar_direccion)
+    btn_actualizar = Boton(ventana_cambiar_direccion, text="Actualizar Dirección", command=actualizar_direccion)
     btn_actualizar.pack(pady=20)
 
-    btn_cerrar = tk.Button(ventana_cambiar_direccion, text="Cerrar", command=ventana_cambiar_direccion.destroy)
+    btn_cerrar = Boton(ventana_cambiar_direccion, text="Cerrar", command=ventana_cambiar_direccion.destroy)
     btn_cerrar.pack(pady=5)
 
-    ventana_cambiar_direccion.mainloop()
+def carritos_disponibles():
+    """
+    Abre los carritos (`Carrito.obtener`). Si otro programa los tiene abiertos muestra el aviso y
+    retorna False; así cada botón del carrito avisa en vez de fallar en silencio.
+    """
+    try:
+        Carrito.obtener()
+        return True
+    except CarritosOcupados as e:
+        messagebox.showwarning("Carritos en uso", f"{e}\nEn esta ventana no se pueden usar los carritos.")
+        return False
 
 def boton_registrar_venta(id_cliente):
     """
@@ -130,6 +145,8 @@ def boton_registrar_venta(id_cliente):
     Parámetros:
     - id_cliente (int): ID del cliente para el cual se registra la venta.
     """
+    if not carritos_disponibles():
+        return
     ventana_toplevel = tk.Toplevel()
     ventana_toplevel.title("Registrar Venta")
     ventana_toplevel.geometry("400x300")
@@ -161,19 +178,15 @@ def boton_registrar_venta(id_cliente):
             return
         
         cantidad_str = entry_cantidad.get()
-        if not cantidad_str.isdigit():
-            messagebox.showerror("Error", "La cantidad debe ser un número válido")
+        if not es_entero_positivo(cantidad_str):
+            messagebox.showerror("Error", "La cantidad debe ser un número mayor que cero")
             return
 
         producto_id = int(producto_id)
         cantidad = int(cantidad_str)
         fecha_venta = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-        if Cliente.verificar_venta_existente(id_cliente, producto_id):
-            messagebox.showwarning("Advertencia", " Este producto ya existe, \n para cambiar la cantidad de este producto, \n borre el producto anterior y registrelo con la nueva cantidad.\n NO SE REGISTRO EL PRODUCTO")    
-            return
-
-        # Insertar en la base de datos
+        # Insertar en la base de datos (si el producto ya está en el carrito se suma la cantidad)
         if Cliente.accion_registrar_venta_cliente(fecha_venta, producto_id, id_cliente, cantidad):
             messagebox.showinfo("", "Venta Registrada correctamente")
         else:
@@ -181,18 +194,27 @@ def boton_registrar_venta(id_cliente):
         ventana_toplevel.destroy()        
 
     # Botón para registrar la venta
-    btn_registrar = tk.Button(ventana_toplevel, text="Registrar Venta", command=registrar_venta)
+    btn_registrar = Boton(ventana_toplevel, text="Registrar Venta", command=registrar_venta)
     btn_registrar.pack(pady=20)
 
-    ventana_toplevel.mainloop()
-
 def boton_ver_historico_ventas(id_cliente):
     """
-    Muestra el historial de ventas de un cliente.
+    Muestra el carrito de un cliente y lo mantiene actualizado.
+
+    La ventana se suscribe a `EventosCarrito`: al agregar, borrar o reiniciar líneas se
+    agrega, quita o actualiza solo la fila afectada y el total, sin recargar el carrito.
 
     Parámetros:
     - id_cliente (int): ID del cliente cuyo historial de ventas se desea ver.
     """
+    if not carritos_disponibles():
+        return
+    ventas = Cliente.accion_ver_carrito_cliente(id_cliente)
+
+    if not ventas:
+        messagebox.showinfo("Sin Ventas", "Este cliente no tiene productos en el carrito.")
+        return
+
     ventana_toplevel = tk.Toplevel()
     ventana_toplevel.title("Carrito de Ventas")
     ventana_toplevel.geometry("600x400")
@@ -201,6 +223,10 @@ def boton_ver_historico_ventas(id_cliente):
     label_cliente = tk.Label(ventana_toplevel, text=f"Carrito del Cliente ID: {id_cliente}")
     label_cliente.pack(pady=10)
 
+    # Total acumulado del carrito
+    label_total = tk.Label(ventana_toplevel, font=("Arial", 11, "bold"))
+    label_total.pack(pady=5)
+
     # Crear un canvas y un frame para los botones
     canvas = tk.Canvas(ventana_toplevel)
     canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -209,23 +235,34 @@ def boton_ver_historico_ventas(id_cliente):
     canvas.configure(yscrollcommand=scroll_y.set)
     scroll_y.pack(side=tk.RIGHT, fill="y")
     canvas.create_window((0, 0), window=frame, anchor="nw")
-    
-    ventas = Cliente.accion_ver_historico_ventas_cliente(id_cliente)
 
-    if not ventas:
-        messagebox.showinfo("Sin Ventas", "Este cliente no tiene productos en el carrito.")
-        ventana_toplevel.destroy()
-        return
+    # Filas visibles por ID de venta: {id: (frame, label, cantidad, precio)}
+    filas = {}
+    totales = {"unidades": 0, "valor": 0}
+
+    def mostrar_total():
+        label_total.config(text=f"Total: {totales['unidades']} unidades | ${totales['valor']}")
+
+    def ajustar_scroll():
+        frame.update_idletasks()
+        canvas.config(scrollregion=canvas.bbox("all"))
+
+    def texto_venta(linea):
+        return f"Venta ID: {linea['id']} | Fecha: {linea['fecha']} | Producto ID: {linea['producto']} | Cantidad: {linea['cantidad']}"
+
+    def agregar_fila(linea):
+        """
+        Agrega la fila de una venta, o la actualiza si ya se muestra.
+        """
+        if linea["id"] in filas:
+            quitar_fila(linea["id"])
 
-    for venta in ventas:
-        noIdVentas, fecha, producto_id, cantidad = venta[0], venta[1], venta[2], venta[3]
-        
         # Crear un frame para cada venta
         venta_frame = tk.Frame(frame)
         venta_frame.pack(fill="x", pady=5)
 
         # Mostrar la venta con fecha y producto
-        label_venta = tk.Label(venta_frame, text=f"Venta ID: {noIdVentas} | Fecha: {fecha} | Producto ID: {producto_id} | Cantidad: {cantidad}")
+        label_venta = tk.Label(venta_frame, text=texto_venta(linea))
         label_venta.pack(side=tk.LEFT)
 
         # Crear un frame para los botones de cada venta
@@ -233,42 +270,103 @@ def boton_ver_historico_ventas(id_cliente):
         botones_frame.pack(side=tk.LEFT, padx=10)
 
         # Botón para borrar la venta
-        btn_borrar_venta = tk.Button(botones_frame, text="Borrar Producto", command=lambda id_venta=noIdVentas: boton_borrar_venta(id_venta))
+        btn_borrar_venta = Boton(botones_frame, text="Borrar Producto", command=lambda id_venta=linea["id"]: boton_borrar_venta(id_venta))
         btn_borrar_venta.pack(side=tk.LEFT, padx=5)
 
-    # Actualizar el tamaño del canvas
-    frame.update_idletasks()
-    canvas.config(scrollregion=canvas.bbox("all"))
-    
-    ventana_toplevel.mainloop()
+        filas[linea["id"]] = (venta_frame, label_venta, linea["cantidad"], linea["precio"])
+        totales["unidades"] += linea["cantidad"]
+        totales["valor"] += linea["cantidad"] * linea["precio"]
 
-def boton_facturar(id_cliente):
-    """
-    Genera los datos necesarios para facturar las ventas de un cliente.
+    def quitar_fila(id_venta):
+        fila = filas.pop(id_venta, None)
+        if fila is None:
+            return
+        venta_frame, _, cantidad, precio = fila
+        venta_frame.destroy()
+        totales["unidades"] -= cantidad
+        totales["valor"] -= cantidad * precio
 
-    Parámetros:
-    - id_cliente (int): ID del cliente cuyas ventas se desean facturar.
+    def aplicar_evento(tipo, datos):
+        """
+        Aplica un cambio publicado por el modelo como una diferencia sobre la vista.
+        """
+        if tipo == "agregar":
+            agregar_fila(datos)
+        elif tipo == "borrar":
+            quitar_fila(datos)
+        elif tipo == "reiniciar":
+            for id_venta in list(filas):
+                quitar_fila(id_venta)
+        mostrar_total()
+        ajustar_scroll()
+
+    def al_cerrar(evento):
+        # <Destroy> también se dispara por cada widget hijo
+        if evento.widget is ventana_toplevel:
+            EventosCarrito.desuscribir(id_cliente, aplicar_evento)
+
+    for venta in ventas:
+        noIdVentas, fecha, producto_id, cantidad, precio = venta
+        agregar_fila({"id": noIdVentas, "fecha": fecha, "producto": producto_id, "cantidad": cantidad, "precio": precio})
+
+    mostrar_total()
+    ajustar_scroll()
+
+    EventosCarrito.suscribir(id_cliente, aplicar_evento)
+    ventana_toplevel.bind("<Destroy>", al_cerrar)
+
+def cobrar(id_cliente):
     """
-    dicc = Cliente.obtener_data_factura(id_cliente)
+    Etapas del cobro (facturar, PDF, visor y correo) sin diálogos. Retorna los avisos para el
+    usuario como `(función de messagebox, título, mensaje)`, en orden.
+    """
+    # Registra la venta: el carrito pasa al libro de ventas con el número de factura
+    try:
+        dicc = Cliente.accion_facturar_carrito(id_cliente)
+    except StockInsuficiente as e:
+        return [(messagebox.showerror, "Stock insuficiente", f"{e}\nNo se registró la venta, el carrito no cambió.")]
+    if dicc is None:
+        return [(messagebox.showerror, "Error", "El carrito está vacío o no se pudo registrar la venta.")]
+    avisos = []
+    if dicc["stock_bajo"]:
+        avisos.append((messagebox.showwarning, "Stock bajo", f"Quedaron con stock bajo los productos: {dicc['stock_bajo']}"))
     correo = dicc["cliente"]["correo"]
     try:
         print(dicc)
         path = Factura.generar_factura_pdf(dicc)
         path = os.path.join(os.getcwd(), path) # Incluye el path completo
-        messagebox.showinfo("Exito", f"Factura guardada en {path}")
         Factura.abrir_factura_pdf(path) # Abre la factura generada
-        messagebox.showinfo("Exito", f"Factura guardada en {path}")
+        avisos.append((messagebox.showinfo, "Exito", f"Factura guardada en {path}"))
         print()
     except Exception as e:
         print(e)
-        messagebox.showerror("Error", f"Sucedio la siguiente excepcion {e}")
+        avisos.append((messagebox.showerror, "Error", f"Sucedio la siguiente excepcion {e}"))
 
     try:
         Correo.enviar_correo(pedido=dicc)
-        messagebox.showinfo("Exito", f"Exito enviando a {correo}")
+        avisos.append((messagebox.showinfo, "Exito", f"Exito enviando a {correo}"))
     except Exception as e:
         print(e)
-        messagebox.showerror("Error", f"Sucedio la siguiente excepcion {e}")
+        avisos.append((messagebox.showerror, "Error", f"Sucedio la siguiente excepcion {e}"))
+    return avisos
+
+def boton_facturar(id_cliente):
+    """
+    Genera los datos necesarios para facturar las ventas de un cliente.
+
+    Parámetros:
+    - id_cliente (int): ID del cliente cuyas ventas se desean facturar.
+
+    Con las trazas activas (ver `trazas.py`) las etapas del cobro (`cobrar`) son el tramo
+    `checkout`; los diálogos se muestran al terminar el tramo, así el tiempo que el usuario
+    tarda en cerrarlos no entra en el tramo ni en su perfil.
+    """
+    if not carritos_disponibles():
+        return
+    with tramo("checkout", perfilar=True, cliente=id_cliente):
+        avisos = cobrar(id_cliente)
+    for mostrar, titulo, mensaje in avisos:
+        mostrar(titulo, mensaje)
 
 def boton_borrar_venta(id_venta):
     """
@@ -277,6 +375,8 @@ def boton_borrar_venta(id_venta):
     Parámetros:
     - id_venta (int): ID de la venta que se desea borrar.
     """
+    if not carritos_disponibles():
+        return
     confirmacion = messagebox.askyesno("Confirmar", "¿Estás seguro de que deseas borrar este producto del carrito?")
     if not confirmacion:
         return  
@@ -285,16 +385,24 @@ def boton_borrar_venta(id_venta):
         ret = Venta.accion_borrar_venta(id_venta)
 
         if ret:
-            messagebox.showinfo("Éxito", f"Venta con ID: {id_venta} eliminada correctamente, recargue la pagina para ver los cambios.")
+            messagebox.showinfo("Éxito", f"Venta con ID: {id_venta} eliminada correctamente.")
         else:
             messagebox.showwarning("No encontrado", f"No se encontró una venta con ID: {id_venta}.")
 
     except Exception as e:
         messagebox.showerror("Error", f"Error al borrar la venta: {e}")
 
+# Espera entre la última tecla y la búsqueda, y cantidad de resultados mostrados
+ESPERA_BUSQUEDA_MS = 250
+LIMITE_BUSQUEDA = 50
+
 def mostrar_clientes():
     """
     Muestra una lista de todos los clientes registrados en la base de datos.
+
+    Incluye un cuadro de búsqueda: mientras se escribe se muestran los clientes que coinciden
+    por prefijo en nombre, apellido, correo, teléfono o dirección (`Cliente.buscar_clientes`).
+    La búsqueda se lanza `ESPERA_BUSQUEDA_MS` después de la última tecla para no consultar en cada pulsación.
     """
     ventana_toplevel = tk.Toplevel()
     ventana_toplevel.title("Listado de Clientes")
@@ -311,6 +419,20 @@ def mostrar_clientes():
         ventana_toplevel.destroy()
         return
 
+    # Cuadro de búsqueda
+    frame_busqueda = tk.Frame(ventana_toplevel)
+    frame_busqueda.pack(fill="x", padx=10)
+    tk.Label(frame_busqueda, text="Buscar:").pack(side=tk.LEFT)
+    texto_busqueda = tk.StringVar()
+    entry_busqueda = tk.Entry(frame_busqueda, textvariable=texto_busqueda, width=50)
+    entry_busqueda.pack(side=tk.LEFT, padx=5)
+    label_resultados = tk.Label(frame_busqueda, text="")
+    label_resultados.pack(side=tk.LEFT, padx=5)
+
+    # Botón para cerrar la ventana emergente
+    btn_cerrar = Boton(ventana_toplevel, text="Cerrar", command=ventana_toplevel.destroy)
+    btn_cerrar.pack(side=tk.BOTTOM, pady=10)
+
     # Crear un área de desplazamiento para visualizar los clientes
     canvas = tk.Canvas(ventana_toplevel)
     canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -320,57 +442,86 @@ def mostrar_clientes():
     scroll_y.pack(side=tk.RIGHT, fill="y")
     canvas.create_window((0, 0), window=frame, anchor="nw")
 
-    # Agregar cada cliente a la lista
-    for cliente in clientes:
-        id_cliente, nombre, apellido = cliente[0], cliente[1], cliente[2]
-        
-        # Crear un frame para cada cliente
-        cliente_frame = tk.Frame(frame)
-        cliente_frame.pack(fill="x", pady=5)
+    def pintar_clientes(lista):
+        """
+        Reemplaza las filas visibles por los clientes de `lista`.
+        """
+        for hijo in frame.winfo_children():
+            hijo.destroy()
 
-        # Etiqueta con la información del cliente
-        label_cliente = tk.Label(cliente_frame, text=f"ID: {id_cliente} | Nombre: {nombre} {apellido}", width=40, anchor="w")
-        label_cliente.pack(side=tk.LEFT)
+        # Agregar cada cliente a la lista
+        for cliente in lista:
+            id_cliente, nombre, apellido = cliente[0], cliente[1], cliente[2]
 
-        # Crear un frame para los botones horizontales
-        botones_frame = tk.Frame(cliente_frame)
-        botones_frame.pack(side=tk.LEFT, padx=10)
+            # Crear un frame para cada cliente
+            cliente_frame = tk.Frame(frame)
+            cliente_frame.pack(fill="x", pady=5)
 
-        # Botón para ver los detalles del cliente
-        btn_ver_detalle = tk.Button(botones_frame, text="Ver Detalles", command=lambda id_cliente=id_cliente: boton_ver_detalle(id_cliente))
-        btn_ver_detalle.pack(side=tk.LEFT, padx=5)
+            # Etiqueta con la información del cliente
+            label_cliente = tk.Label(cliente_frame, text=f"ID: {id_cliente} | Nombre: {nombre} {apellido}", width=40, anchor="w")
+            label_cliente.pack(side=tk.LEFT)
 
-        # Botón para cambiar la dirección del cliente
-        btn_cambiar_direccion = tk.Button(botones_frame, text="Cambiar Dirección", command=lambda id_cliente=id_cliente: boton_cambiar_direccion(id_cliente))
-        btn_cambiar_direccion.pack(side=tk.LEFT, padx=5)
+            # Crear un frame para los botones horizontales
+            botones_frame = tk.Frame(cliente_frame)
+            botones_frame.pack(side=tk.LEFT, padx=10)
 
-        # Botón para registrar una venta del cliente
-        btn_registrar_venta = tk.Button(botones_frame, text="Agregar Producto Carrito", command=lambda id_cliente=id_cliente: boton_registrar_venta(id_cliente))
-        btn_registrar_venta.pack(side=tk.LEFT, padx=5)
+            # Botón para ver los detalles del cliente
+            btn_ver_detalle = Boton(botones_frame, text="Ver Detalles", command=lambda id_cliente=id_cliente: boton_ver_detalle(id_cliente))
+            btn_ver_detalle.pack(side=tk.LEFT, padx=5)
 
-        # Botón para ver el histórico de ventas
-        btn_ver_historico = tk.Button(botones_frame, text="Ver Carrito", command=lambda id_cliente=id_cliente: boton_ver_historico_ventas(id_cliente))
-        btn_ver_historico.pack(side=tk.LEFT, padx=5)
+            # Botón para cambiar la dirección del cliente
+            btn_cambiar_direccion = Boton(botones_frame, text="Cambiar Dirección", command=lambda id_cliente=id_cliente: boton_cambiar_direccion(id_cliente))
+            btn_cambiar_direccion.pack(side=tk.LEFT, padx=5)
 
-        # Botón para facturar el carrito
-        btn_ver_historico = tk.Button(botones_frame, text="Facturar Carrito", command=lambda id_cliente=id_cliente: boton_facturar(id_cliente))
-        btn_ver_historico.pack(side=tk.LEFT, padx=5)
+            # Botón para registrar una venta del cliente
+            btn_registrar_venta = Boton(botones_frame, text="Agregar Producto Carrito", command=lambda id_cliente=id_cliente: boton_registrar_venta(id_cliente))
+            btn_registrar_venta.pack(side=tk.LEFT, padx=5)
 
-        # Botón para facturar el carrito
-        btn_borrar_carrito = tk.Button(botones_frame, text="Reiniciar Carrito", command=lambda id_cliente=id_cliente: reiniciar_carrito(id_cliente))
-        btn_borrar_carrito.pack(side=tk.LEFT, padx=5)
+            # Botón para ver el histórico de ventas
+            btn_ver_historico = Boton(botones_frame, text="Ver Carrito", command=lambda id_cliente=id_cliente: boton_ver_historico_ventas(id_cliente))
+            btn_ver_historico.pack(side=tk.LEFT, padx=5)
 
-    # Botón para cerrar la ventana emergente
-    btn_cerrar = tk.Button(ventana_toplevel, text="Cerrar", command=ventana_toplevel.destroy)
-    btn_cerrar.pack(pady=10)
+            # Botón para facturar el carrito
+            btn_ver_historico = Boton(botones_frame, text="Facturar Carrito", command=lambda id_cliente=id_cliente: boton_facturar(id_cliente))
+            btn_ver_historico.pack(side=tk.LEFT, padx=5)
+
+            # Botón para facturar el carrito
+            btn_borrar_carrito = Boton(botones_frame, text="Reiniciar Carrito", command=lambda id_cliente=id_cliente: reiniciar_carrito(id_cliente))
+            btn_borrar_carrito.pack(side=tk.LEFT, padx=5)
+
+        frame.update_idletasks()
+        canvas.config(scrollregion=canvas.bbox("all"))
+        canvas.yview_moveto(0)
 
-    ventana_toplevel.mainloop()
+    busqueda_pendiente = {"id": None}
+
+    def buscar():
+        busqueda_pendiente["id"] = None
+        texto = texto_busqueda.get().strip()
+        if not texto:
+            pintar_clientes(clientes)
+            label_resultados.config(text="")
+            return
+        resultados = Cliente.buscar_clientes(texto, LIMITE_BUSQUEDA)
+        pintar_clientes(resultados)
+        label_resultados.config(text=f"{len(resultados)} coincidencias" if resultados else "Sin coincidencias")
+
+    def al_escribir(*_):
+        # Reinicia la espera con cada tecla, solo se busca cuando el usuario deja de escribir
+        if busqueda_pendiente["id"] is not None:
+            ventana_toplevel.after_cancel(busqueda_pendiente["id"])
+        busqueda_pendiente["id"] = ventana_toplevel.after(ESPERA_BUSQUEDA_MS, buscar)
+
+    texto_busqueda.trace_add("write", al_escribir)
+    pintar_clientes(clientes)
+    entry_busqueda.focus_set()
 
 def reiniciar_carrito(id_cliente):
     """
     Accion del boton para reiniciar el carrito
     """
-    
+    if not carritos_disponibles():
+        return
     res = Cliente.reiniciar_carrito(id_cliente)
     if res:
         messagebox.showinfo("Exito", "Se reinicio el carrito del cliente")
@@ -467,7 +618,5 @@ def registrar_cliente():
 
 
     # Botón para registrar al cliente
-    btn_registrar = tk.Button(ventana_toplevel, text="Registrar Cliente", command=registrar)
+    btn_registrar = Boton(ventana_toplevel, text="Registrar Cliente", command=registrar)
     btn_registrar.pack(pady=20)
-
-    ventana_toplevel.mainloop()
\ No newline at end of file
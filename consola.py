@@ -0,0 +1,619 @@
+# Módulo: `consola.py`
+# Descripción: Interfaz de línea de comandos sobre el modelo (`poo.py`) para usar el programa sin
+# ventanas: desde scripts, cron o un servidor. Nunca importa `tkinter` ni `Pillow`.
+#
+# Uso:
+#   python -m consola [--db RUTA] <comando> [opciones]
+#
+# Comandos:
+#   importar {clientes,productos} ARCHIVO     Registra filas de un CSV (con encabezado), JSON o JSONL ("-" = entrada estándar)
+#   listar {clientes,productos,carrito,ventas} Lista o exporta en JSON, JSONL o CSV
+#                                             (ventas de un --cliente o entre --desde y --hasta)
+#   registrar-venta                           Agrega uno o varios productos al carrito de un cliente
+#   facturar (--cliente ID | --todos)         Registra la venta, genera la factura PDF y envía el correo
+#   reenviar-correo --factura NUMERO          Vuelve a enviar el correo de una factura registrada
+#   stock (agregar | bajo | por-vencer)       Suma unidades (o un lote con --vencimiento), lista el
+#                                             stock bajo o los lotes que vencen en --dias días
+#   reporte [--desde] [--hasta] [--top N]     Ingresos, unidades y margen por día, producto y cliente
+#           [--sucursales]                    (JSON, o CSV con --formato csv); consolidado de las sucursales
+#   sucursales (registrar | quitar | listar)  Bases `data.db` de otras sucursales para el reporte consolidado
+#   exportar {ventas,facturas,clientes,productos}  Exportación completa por bloques a CSV, JSONL o columnar
+#            [--formato] [--gzip] [--desde] [--hasta] [--cliente] [--salida ARCHIVO]
+#   ingerir ARCHIVO [--formato] [--origen]    Ventas de un punto de venta externo (JSONL o CSV), sin duplicar
+#           [--lote N] [--cola N]             las claves ya ingeridas; informe de filas por segundo y rechazos
+#   validar {clientes,productos,ventas} ARCHIVO  Valida un archivo de importar o de ingerir sin registrar
+#                                             nada; errores por fila y campo (un CSV se valida por columnas)
+#   respaldo (crear | listar | verificar       Respaldos de la base con el programa abierto (`<base>.respaldos/`):
+#             | restaurar | programar)        [--gzip] [--conservar N], verificar o restaurar un --archivo,
+#                                             o respaldar cada --cada minutos hasta Ctrl+C
+#   cambios exportar --consumidor NOMBRE      Cambios de clientes, productos y ventas que el consumidor no ha
+#                                             recibido, en JSONL; también registrar, quitar, consumidores,
+#                                             leer [--desde N] y compactar [--dias N]
+#   resumenes (reconstruir | verificar        Tablas de resumen de ventas: recalcularlas, compararlas
+#              | cliente | producto)          con el libro, o consultar un --cliente o un --producto
+#   archivar [--antes-de FECHA] [--compactar] Pasa las ventas anteriores a la fecha a archivos por año
+#                                             (`<base>.ventas-<año>.db`); sin fecha retoma el pendiente
+#
+# Los carritos abiertos se guardan en `<base>.carritos.json` entre una ejecución y otra (ver `poo.Carrito`).
+#
+# La salida es JSON en la salida estándar y los errores van a la salida de error.
+# Códigos de salida: 0 éxito, 1 error de la operación (o filas rechazadas), 2 uso incorrecto.
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+from datetime import datetime
+
+from poo import Db, Cliente, Producto, Venta, Correo, Factura, StockInsuficiente, Cambios, CarritosOcupados
+from trazas import tramo
+from verificacion import ESQUEMAS, es_alfa_numerico, lista_errores
+
+EXITO = 0
+ERROR = 1
+
+# Salida estándar real. Mientras corre un comando, los `print` del modelo se desvían a la
+# salida de error para no mezclarse con el JSON (ver `main`).
+salida = sys.stdout
+
+
+def escribir_json(datos):
+    json.dump(datos, salida, ensure_ascii=False, default=str)
+    salida.write("\n")
+
+
+def error(mensaje):
+    """
+    Escribe el error como JSON en la salida de error y retorna el código de salida.
+    """
+    json.dump({"error": mensaje}, sys.stderr, ensure_ascii=False)
+    sys.stderr.write("\n")
+    return ERROR
+
+
+def leer_filas(ruta):
+    """
+    Lee un archivo de entrada y retorna una lista de diccionarios.
+    Acepta CSV con encabezado, un arreglo JSON o JSONL (un objeto por línea).
+    """
+    archivo = sys.stdin if ruta == "-" else open(ruta, encoding="utf-8", newline="")
+    with archivo:
+        contenido = archivo.read()
+
+    texto = contenido.lstrip()
+    if texto.startswith("["):
+        return json.loads(texto)
+    if texto.startswith("{"):
+        return [json.loads(linea) for linea in texto.splitlines() if linea.strip()]
+
+    import csv
+    import io
+
+    return list(csv.DictReader(io.StringIO(contenido)))
+
+
+def leer_columnas(ruta):
+    """
+    Lee un CSV con encabezado por columnas. Retorna `({campo: lista de valores}, cantidad de filas)`;
+    a una fila corta le faltan (`None`) los últimos valores.
+    """
+    import csv
+    import itertools
+
+    with open(ruta, encoding="utf-8", newline="") as archivo:
+        lector = csv.reader(archivo)
+        encabezado = next(lector, [])
+        filas = list(lector)
+    columnas = itertools.zip_longest(*filas) if filas else ([] for _ in encabezado)
+    return dict(zip(encabezado, map(list, columnas))), len(filas)
+
+
+def convertir_producto(fila):
+    """
+    Convierte una fila de producto ya validada con `ESQUEMA_PRODUCTO` a los tipos que espera
+    `Producto.crear_objeto`.
+    """
+    texto_fecha = str(fila["fecha_vencimiento"])
+    for formato in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            fecha_vencimiento = datetime.strptime(texto_fecha, formato).date()
+            break
+        except ValueError:
+            pass
+
+    return {
+        "nombre": fila["nombre"],
+        "medida": fila["medida"],
+        "fecha_vencimiento": fecha_vencimiento,
+        "precio_produccion": int(fila["precio_produccion"]),
+        "precio_venta": int(fila["precio_venta"]),
+    }
+
+
+def comando_importar(args):
+    try:
+        filas = leer_filas(args.archivo)
+    except (OSError, ValueError) as e:
+        return error(f"No se pudo leer {args.archivo}: {e}")
+
+    # Las mismas validaciones que los formularios de registro, para todo el archivo de una vez
+    errores = ESQUEMAS[args.tipo].validar_filas(filas)
+    crear = Cliente.crear_objeto if args.tipo == "clientes" else Producto.crear_objeto
+    importados = 0
+    rechazados = []
+    for numero, fila in enumerate(filas, start=1):
+        campos = errores.get(numero)
+        if campos:
+            rechazados.append({"fila": numero, "error": next(iter(campos.values())), "campos": campos})
+            continue
+        if crear(**(fila if args.tipo == "clientes" else convertir_producto(fila))):
+            importados += 1
+        else:
+            rechazados.append({"fila": numero, "error": "Error insertando en la base de datos."})
+
+    escribir_json({"importados": importados, "rechazados": rechazados})
+    return ERROR if rechazados else EXITO
+
+
+CAMPOS_CLIENTE = ["id", "nombre", "apellido", "direccion", "telefono", "correo"]
+CAMPOS_CARRITO = ["id", "fecha", "producto", "cantidad", "precio"]
+CAMPOS_VENTA = ["id", "fecha", "producto", "cantidad", "factura", "precio", "nombre_producto"]
+
+
+def comando_listar(args):
+    if args.tipo == "clientes":
+        registros = [dict(zip(CAMPOS_CLIENTE, cliente)) for cliente in Cliente.listar_objetos()]
+    elif args.tipo == "productos":
+        registros = Producto.listar_objetos()
+        if registros is None:
+            return error("No se pudieron leer los productos.")
+    elif args.tipo == "ventas" and (args.desde or args.hasta):
+        if not (args.desde and args.hasta):
+            return error("Indique --desde y --hasta.")
+        ventas = Venta.ventas_entre(args.desde, args.hasta)
+        if ventas is None:
+            return error("Fechas no válidas: use AAAA-MM-DD [HH:MM:SS] o DD/MM/AAAA.")
+        registros = [dict(zip(CAMPOS_VENTA + ["cliente"], venta)) for venta in ventas]
+        if args.cliente is not None:
+            registros = [registro for registro in registros if registro["cliente"] == args.cliente]
+    elif args.cliente is None:
+        return error(f"Para listar {args.tipo} indique --cliente.")
+    elif args.tipo == "carrito":
+        registros = [dict(zip(CAMPOS_CARRITO, linea)) for linea in Cliente.accion_ver_carrito_cliente(args.cliente)]
+    else:
+        registros = [dict(zip(CAMPOS_VENTA, venta)) for venta in Cliente.accion_ver_historico_ventas_cliente(args.cliente)]
+
+    if args.formato == "json":
+        escribir_json(registros)
+    elif args.formato == "jsonl":
+        for registro in registros:
+            escribir_json(registro)
+    else:
+        import csv
+
+        if registros:
+            escritor = csv.DictWriter(salida, fieldnames=list(registros[0]))
+            escritor.writeheader()
+            escritor.writerows(registros)
+    return EXITO
+
+
+def comando_registrar_venta(args):
+    if len(args.producto) != len(args.cantidad):
+        return error("Indique una --cantidad por cada --producto.")
+    if any(cantidad <= 0 for cantidad in args.cantidad):
+        return error("La cantidad debe ser mayor que cero.")
+    if Cliente.accion_cliente_detalle(args.cliente) is None:
+        return error(f"No existe el cliente {args.cliente}.")
+    for producto in args.producto:
+        if Producto.obtener_producto_detalle(producto) is None:
+            return error(f"No existe el producto {producto}.")
+
+    # Todas las líneas de una vez (`Carrito.agregar_varios`): si una falla no se agrega ninguna; un producto que ya estaba en el carrito suma la cantidad
+    fecha_venta = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    lineas = Cliente.accion_registrar_ventas_cliente(fecha_venta, args.cliente, list(zip(args.producto, args.cantidad)))
+    if lineas is None:
+        return error("Error registrando la venta.")
+    escribir_json({"cliente": args.cliente, "carrito": lineas})
+    return EXITO
+
+
+def facturar_cliente(id_cliente, enviar):
+    """
+    Registra la venta del carrito de un cliente, genera la factura PDF y, si `enviar`, el correo.
+    Retorna un diccionario con el resultado, con la clave `error` si algo falló.
+    Con las trazas activas (ver `trazas.py`) cada cliente es un tramo `checkout`.
+    """
+    with tramo("checkout", perfilar=True, cliente=id_cliente):
+        if Cliente.accion_cliente_detalle(id_cliente) is None:
+            return {"cliente": id_cliente, "error": "Cliente no encontrado."}
+        try:
+            pedido = Cliente.accion_facturar_carrito(id_cliente)
+        except StockInsuficiente as e:
+            return {"cliente": id_cliente, "error": str(e)}
+        if pedido is None:
+            return {"cliente": id_cliente, "error": "El carrito está vacío."}
+
+        # La venta ya quedó registrada: si falla el PDF o el correo se puede repetir con la factura
+        resultado = {"cliente": id_cliente, "no_factura": pedido["no_factura"], "precio_total": pedido["precio_total"],
+                     "stock_bajo": pedido["stock_bajo"]}
+
+        try:
+            resultado["pdf"] = Factura.generar_factura_pdf(pedido)
+        except Exception as e:
+            resultado["error"] = f"No se pudo generar el PDF: {e}"
+            return resultado
+
+        if enviar:
+            resultado["correo_enviado"] = Correo.enviar_correo(pedido)
+            if not resultado["correo_enviado"]:
+                resultado["error"] = f"No se pudo enviar el correo a {pedido['cliente']['correo']}."
+        return resultado
+
+
+def comando_facturar(args):
+    clientes = Cliente.clientes_con_carrito() if args.todos else [args.cliente]
+    resultados = [facturar_cliente(id_cliente, not args.sin_correo) for id_cliente in clientes]
+    escribir_json(resultados)
+    return ERROR if any("error" in resultado for resultado in resultados) else EXITO
+
+
+def comando_reenviar_correo(args):
+    pedido = Venta.obtener_factura(args.factura)
+    if pedido is None:
+        return error(f"No existe la factura {args.factura}.")
+    if "cliente" not in pedido:
+        return error(f"El cliente de la factura {args.factura} ya no existe.")
+    if not Correo.enviar_correo(pedido):
+        return error(f"No se pudo enviar el correo a {pedido['cliente']['correo']}.")
+    escribir_json({"cliente": pedido["cliente"]["id_cliente"], "no_factura": pedido["no_factura"], "correo": pedido["cliente"]["correo"]})
+    return EXITO
+
+
+def comando_stock(args):
+    if args.accion == "bajo":
+        escribir_json(Producto.productos_bajo_stock())
+        return EXITO
+    if args.accion == "por-vencer":
+        escribir_json(Producto.lotes_por_vencer(args.dias))
+        return EXITO
+
+    if args.producto is None or args.cantidad is None:
+        return error("Para agregar stock indique --producto y --cantidad.")
+    if Producto.obtener_producto_detalle(args.producto) is None:
+        return error(f"No existe el producto {args.producto}.")
+
+    if args.vencimiento:
+        lote = Producto.agregar_lote(args.producto, args.cantidad, args.vencimiento, args.minimo)
+        if lote is None:
+            return error("No se pudo registrar el lote: revise la fecha (DD/MM/AAAA o AAAA-MM-DD) y la cantidad.")
+        escribir_json({"producto": args.producto, "lote": lote, "cantidad": Producto.obtener_stock(args.producto)[0]})
+        return EXITO
+
+    stock = Producto.agregar_stock(args.producto, args.cantidad, args.minimo)
+    if stock is None:
+        return error("No se pudo actualizar el stock (¿quedaría negativo?).")
+    escribir_json({"producto": args.producto, "cantidad": stock})
+    return EXITO
+
+
+def comando_reporte(args):
+    from reportes import generar_reporte, escribir_csv
+
+    if args.sucursales:
+        from reportes import generar_reporte_sucursales
+
+        if not Db.sucursales():
+            return error("No hay sucursales registradas: use 'sucursales registrar'.")
+        reporte = generar_reporte_sucursales(args.desde, args.hasta, args.top)
+    else:
+        reporte = generar_reporte(args.desde, args.hasta, args.top)
+    if reporte is None:
+        return error("Fechas no válidas (use AAAA-MM-DD [HH:MM:SS] o DD/MM/AAAA) o no se pudo leer una sucursal.")
+    if args.formato == "csv":
+        escribir_csv(reporte, salida)
+    else:
+        escribir_json(reporte)
+    return EXITO
+
+
+def comando_sucursales(args):
+    if args.accion == "registrar":
+        if not (args.nombre and args.ruta):
+            return error("Indique --nombre y --ruta.")
+        if not es_alfa_numerico(args.nombre):
+            return error("El nombre de la sucursal debe tener solo letras y números.")
+        if not Db.registrar_sucursal(args.nombre, args.ruta):
+            return error(f"No se pudo registrar la sucursal '{args.nombre}'.")
+    elif args.accion == "quitar":
+        if not args.nombre:
+            return error("Indique --nombre.")
+        if not Db.quitar_sucursal(args.nombre):
+            return error(f"La sucursal '{args.nombre}' no está registrada.")
+    escribir_json(Db.sucursales())
+    return EXITO
+
+
+def comando_exportar(args):
+    from exportacion import exportar
+
+    try:
+        if args.salida:
+            filas = exportar(args.fuente, args.salida, args.formato, args.desde, args.hasta, args.cliente, args.gzip)
+            escribir_json({"filas": filas, "archivo": args.salida})
+        else:
+            salida.flush()
+            exportar(args.fuente, salida.buffer, args.formato, args.desde, args.hasta, args.cliente, args.gzip)
+    except ValueError as e:
+        return error(str(e))
+    return EXITO
+
+
+def comando_ingerir(args):
+    from ingesta import ingerir
+
+    try:
+        informe = ingerir(args.archivo, args.formato, args.origen, args.lote, args.cola)
+    except OSError as e:
+        return error(f"No se pudo leer {args.archivo}: {e}")
+    escribir_json(informe)
+    return ERROR if informe["rechazadas"] else EXITO
+
+
+def comando_validar(args):
+    esquema = ESQUEMAS[args.tipo]
+    try:
+        if args.archivo.lower().endswith(".csv"):
+            columnas, total = leer_columnas(args.archivo)
+            errores = esquema.validar_columnas(columnas)
+        else:
+            filas = leer_filas(args.archivo)
+            total = len(filas)
+            errores = esquema.validar_filas(filas)
+    except (OSError, ValueError) as e:
+        return error(f"No se pudo leer {args.archivo}: {e}")
+    escribir_json({"filas": total, "validas": total - len(errores), "errores": lista_errores(errores)})
+    return ERROR if errores else EXITO
+
+
+def comando_respaldo(args):
+    import respaldos
+
+    if args.accion == "crear":
+        respaldo = respaldos.respaldar(args.gzip, args.conservar)
+        if respaldo is None:
+            return error("No se pudo crear el respaldo.")
+        escribir_json(respaldo)
+        return EXITO
+    if args.accion == "listar":
+        escribir_json(respaldos.respaldos())
+        return EXITO
+    if args.accion == "verificar":
+        archivos = [args.archivo] if args.archivo else [respaldo["archivo"] for respaldo in respaldos.respaldos()]
+        problemas = {archivo: respaldos.verificar(archivo) for archivo in archivos}
+        escribir_json(problemas)
+        return ERROR if any(problemas.values()) else EXITO
+    if args.accion == "restaurar":
+        if not args.archivo:
+            return error("Indique --archivo.")
+        anterior = respaldos.restaurar(args.archivo)
+        if anterior is None:
+            return error(f"No se restauró {args.archivo}.")
+        escribir_json({"restaurado": args.archivo, "respaldo_anterior": anterior})
+        return EXITO
+
+    if not args.cada or args.cada <= 0:
+        return error("Indique --cada MINUTOS.")
+    detener = respaldos.programar(args.cada, args.gzip, args.conservar)
+    try:
+        detener.wait()
+    except KeyboardInterrupt:
+        detener.set()
+    return EXITO
+
+
+def comando_cambios(args):
+    if args.accion == "consumidores":
+        escribir_json(Cambios.consumidores())
+        return EXITO
+    if args.accion == "leer":
+        for cambio in Cambios.leer(args.desde, args.limite or Cambios.LIMITE_LECTURA):
+            escribir_json(cambio)
+        return EXITO
+    if args.accion == "compactar":
+        borrados = Cambios.compactar(args.dias)
+        if borrados is None:
+            return error("No se pudo compactar el registro de cambios.")
+        escribir_json(borrados)
+        return EXITO
+
+    if not args.consumidor:
+        return error("Indique --consumidor.")
+    if args.accion == "registrar":
+        ultimo = Cambios.registrar_consumidor(args.consumidor)
+        if ultimo is None:
+            return error(f"No se pudo registrar el consumidor '{args.consumidor}'.")
+        escribir_json({"consumidor": args.consumidor, "ultimo": ultimo})
+        return EXITO
+    if args.accion == "quitar":
+        if not Cambios.quitar_consumidor(args.consumidor):
+            return error(f"El consumidor '{args.consumidor}' no está registrado.")
+        escribir_json({"consumidor": args.consumidor, "quitado": True})
+        return EXITO
+
+    if Cambios.exportar(args.consumidor, salida, args.limite) is None:
+        return error(f"El consumidor '{args.consumidor}' no está registrado o perdió cambios: exporte todo y regístrelo de nuevo.")
+    return EXITO
+
+
+def comando_resumenes(args):
+    if args.accion == "reconstruir":
+        if not Venta.reconstruir_resumenes():
+            return error("No se pudieron reconstruir los resúmenes.")
+        escribir_json({"reconstruidos": True, "diferencias": Venta.verificar_resumenes()})
+        return EXITO
+    if args.accion == "verificar":
+        diferencias = Venta.verificar_resumenes()
+        escribir_json({"consistentes": not any(diferencias.values()), "diferencias": diferencias})
+        return ERROR if any(diferencias.values()) else EXITO
+    if args.accion == "cliente":
+        if args.cliente is None:
+            return error("Indique --cliente.")
+        escribir_json(dict(Cliente.total_comprado(args.cliente), cliente=args.cliente))
+        return EXITO
+
+    if args.producto is None or not (args.desde and args.hasta):
+        return error("Indique --producto, --desde y --hasta.")
+    ventas = Producto.ventas_periodo(args.producto, args.desde, args.hasta)
+    if ventas is None:
+        return error("Fechas no válidas: use AAAA-MM-DD o DD/MM/AAAA.")
+    escribir_json(dict(ventas, producto=args.producto))
+    return EXITO
+
+
+def comando_archivar(args):
+    archivadas = Venta.archivar_ventas(args.antes_de, args.lote, args.compactar)
+    if archivadas is None:
+        return error("No se pudo archivar: revise la fecha (AAAA-MM-DD o DD/MM/AAAA) o vuelva a ejecutar para retomar.")
+    escribir_json({"archivadas": archivadas, "archivos": [ruta for _, ruta in Db.archivos_ventas()]})
+    return EXITO
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(prog="python -m consola", description="Cervecería artesanal sin interfaz gráfica.")
+    parser.add_argument("--db", help="Archivo de base de datos (por defecto data.db).")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    importar = subcomandos.add_parser("importar", help="Registrar clientes o productos desde un archivo.")
+    importar.add_argument("tipo", choices=["clientes", "productos"])
+    importar.add_argument("archivo", help="CSV con encabezado, JSON o JSONL. '-' para la entrada estándar.")
+    importar.set_defaults(funcion=comando_importar)
+
+    listar = subcomandos.add_parser("listar", help="Listar o exportar registros.")
+    listar.add_argument("tipo", choices=["clientes", "productos", "carrito", "ventas"])
+    listar.add_argument("--cliente", type=int, help="Cliente del carrito o de las ventas.")
+    listar.add_argument("--formato", choices=["json", "jsonl", "csv"], default="json")
+    listar.add_argument("--desde", help="Ventas desde esta fecha (incluida).")
+    listar.add_argument("--hasta", help="Ventas hasta esta fecha (un día sin hora se incluye completo).")
+    listar.set_defaults(funcion=comando_listar)
+
+    registrar = subcomandos.add_parser("registrar-venta", help="Agregar productos al carrito de un cliente.")
+    registrar.add_argument("--cliente", type=int, required=True)
+    registrar.add_argument("--producto", type=int, action="append", required=True, help="Repetible, en pareja con --cantidad.")
+    registrar.add_argument("--cantidad", type=int, action="append", required=True)
+    registrar.set_defaults(funcion=comando_registrar_venta)
+
+    facturar = subcomandos.add_parser("facturar", help="Registrar la venta, generar la factura PDF y enviar el correo.")
+    grupo = facturar.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--cliente", type=int)
+    grupo.add_argument("--todos", action="store_true", help="Todos los clientes con productos en el carrito.")
+    facturar.add_argument("--sin-correo", action="store_true", help="Solo generar el PDF.")
+    facturar.set_defaults(funcion=comando_facturar)
+
+    reenviar = subcomandos.add_parser("reenviar-correo", help="Volver a enviar el correo de una factura.")
+    reenviar.add_argument("--factura", required=True, help="Número de factura.")
+    reenviar.set_defaults(funcion=comando_reenviar_correo)
+
+    stock = subcomandos.add_parser("stock", help="Inventario de productos.")
+    stock.add_argument("accion", choices=["agregar", "bajo", "por-vencer"])
+    stock.add_argument("--producto", type=int)
+    stock.add_argument("--cantidad", type=int, help="Unidades que entran (negativo para un ajuste).")
+    stock.add_argument("--minimo", type=int, help="Nivel de stock bajo.")
+    stock.add_argument("--vencimiento", help="Registrar las unidades como un lote con esta fecha de vencimiento.")
+    stock.add_argument("--dias", type=int, default=30, help="Ventana de 'por-vencer' (por defecto 30).")
+    stock.set_defaults(funcion=comando_stock)
+
+    reporte = subcomandos.add_parser("reporte", help="Reporte de ventas facturadas.")
+    reporte.add_argument("--desde", help="Ventas desde esta fecha (incluida).")
+    reporte.add_argument("--hasta", help="Ventas hasta esta fecha (un día sin hora se incluye completo).")
+    reporte.add_argument("--top", type=int, default=10, help="Productos y clientes en los tops (por defecto 10).")
+    reporte.add_argument("--formato", choices=["json", "csv"], default="json")
+    reporte.add_argument("--sucursales", action="store_true", help="Consolidar las sucursales registradas.")
+    reporte.set_defaults(funcion=comando_reporte)
+
+    sucursales = subcomandos.add_parser("sucursales", help="Sucursales del reporte consolidado.")
+    sucursales.add_argument("accion", choices=["registrar", "quitar", "listar"])
+    sucursales.add_argument("--nombre", help="Nombre de la sucursal (prefijo de sus ids en el consolidado).")
+    sucursales.add_argument("--ruta", help="Archivo data.db de la sucursal.")
+    sucursales.set_defaults(funcion=comando_sucursales)
+
+    exportar = subcomandos.add_parser("exportar", help="Exportar una tabla completa por bloques.")
+    exportar.add_argument("fuente", choices=["ventas", "facturas", "clientes", "productos"])
+    exportar.add_argument("--formato", choices=["csv", "jsonl", "columnar"], default="csv")
+    exportar.add_argument("--gzip", action="store_true", help="Comprimir con gzip.")
+    exportar.add_argument("--desde", help="Ventas o facturas desde esta fecha (incluida).")
+    exportar.add_argument("--hasta", help="Ventas o facturas hasta esta fecha (un día sin hora se incluye completo).")
+    exportar.add_argument("--cliente", type=int, help="Solo las filas de este cliente.")
+    exportar.add_argument("--salida", help="Archivo a crear (por defecto la salida estándar).")
+    exportar.set_defaults(funcion=comando_exportar)
+
+    ingerir = subcomandos.add_parser("ingerir", help="Ingerir ventas de un punto de venta externo.")
+    ingerir.add_argument("archivo", help="JSONL o CSV con encabezado. '-' para la entrada estándar.")
+    ingerir.add_argument("--formato", choices=["jsonl", "csv"], help="Por defecto según la extensión.")
+    ingerir.add_argument("--origen", default="POS", help="Prefijo de los números de factura (por defecto POS).")
+    ingerir.add_argument("--lote", type=int, default=1000, help="Ventas por transacción (por defecto 1000).")
+    ingerir.add_argument("--cola", type=int, default=8, help="Lotes en espera antes de frenar la lectura (por defecto 8).")
+    ingerir.set_defaults(funcion=comando_ingerir)
+
+    validar = subcomandos.add_parser("validar", help="Validar un archivo de clientes, productos o ventas sin registrarlo.")
+    validar.add_argument("tipo", choices=["clientes", "productos", "ventas"])
+    validar.add_argument("archivo", help="CSV con encabezado, JSON o JSONL. '-' para la entrada estándar.")
+    validar.set_defaults(funcion=comando_validar)
+
+    respaldo = subcomandos.add_parser("respaldo", help="Respaldos de la base con el programa abierto.")
+    respaldo.add_argument("accion", choices=["crear", "listar", "verificar", "restaurar", "programar"])
+    respaldo.add_argument("--archivo", help="Respaldo a verificar o restaurar (por defecto 'verificar' revisa todos).")
+    respaldo.add_argument("--gzip", action="store_true", help="Comprimir con gzip.")
+    respaldo.add_argument("--conservar", type=int, default=7, help="Respaldos que se conservan (por defecto 7).")
+    respaldo.add_argument("--cada", type=float, help="'programar': minutos entre respaldos.")
+    respaldo.set_defaults(funcion=comando_respaldo)
+
+    cambios = subcomandos.add_parser("cambios", help="Registro de cambios para exportaciones incrementales.")
+    cambios.add_argument("accion", choices=["exportar", "registrar", "quitar", "consumidores", "leer", "compactar"])
+    cambios.add_argument("--consumidor", help="Nombre del sistema que recibe los cambios.")
+    cambios.add_argument("--desde", type=int, default=0, help="'leer': cambios posteriores a este número.")
+    cambios.add_argument("--limite", type=int, help="Máximo de cambios a exportar o leer.")
+    cambios.add_argument("--dias", type=int, help="'compactar': días que se guardan los cambios sin confirmar.")
+    cambios.set_defaults(funcion=comando_cambios)
+
+    resumenes = subcomandos.add_parser("resumenes", help="Tablas de resumen de ventas.")
+    resumenes.add_argument("accion", choices=["reconstruir", "verificar", "cliente", "producto"])
+    resumenes.add_argument("--cliente", type=int)
+    resumenes.add_argument("--producto", type=int)
+    resumenes.add_argument("--desde", help="Primer día (incluido).")
+    resumenes.add_argument("--hasta", help="Último día (incluido).")
+    resumenes.set_defaults(funcion=comando_resumenes)
+
+    archivar = subcomandos.add_parser("archivar", help="Archivar ventas antiguas en archivos por año.")
+    archivar.add_argument("--antes-de", help="Fecha de corte (excluida). Sin fecha se retoma el archivado pendiente.")
+    archivar.add_argument("--lote", type=int, default=10_000, help="Ventas por lote (por defecto 10000).")
+    archivar.add_argument("--compactar", action="store_true", help="Ejecutar VACUUM al terminar.")
+    archivar.set_defaults(funcion=comando_archivar)
+
+    return parser
+
+
+def main(argv=None):
+    global salida
+    args = crear_parser().parse_args(argv)
+    if args.db:
+        Db.ruta = args.db
+    salida = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        Db().iniciar_tablas()
+        try:
+            return args.funcion(args)
+        except CarritosOcupados as e:
+            return error(str(e))
+
+
+if __name__ == "__main__":
+    try:
+        codigo = main()
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # El siguiente comando de la tubería dejó de leer (por ejemplo `| head`), no es un error
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        codigo = EXITO
+    sys.exit(codigo)
@@ -0,0 +1,323 @@
+# Módulo: `exportacion.py`
+# Descripción: Exportación de ventas, facturas, clientes y productos a CSV, JSONL o un formato
+# binario por columnas, para la contabilidad u otros sistemas.
+# - Las filas se piden a SQLite por bloques (`fetchmany`) y cada bloque se escribe antes de pedir
+#   el siguiente: la memoria no depende de cuántas filas se exporten.
+# - Las ventas y facturas incluyen las archivadas (`Venta.archivar_ventas`); cada archivo se
+#   recorre por separado, sin ordenar ni agrupar todo el libro en memoria.
+# - Filtros por rango de fechas y por cliente, y compresión gzip opcional.
+# - El formato columnar se describe en `escribir_columnar` y se lee con `leer_columnar`.
+
+import csv
+import gzip
+import io
+import json
+import struct
+from array import array
+from itertools import accumulate
+
+from poo import Db, COLUMNAS_VENTAS, rango_fechas
+
+# Filas que se piden a SQLite en cada `fetchmany` (y filas por bloque del formato columnar)
+TAMANO_BLOQUE = 50_000
+
+FORMATOS = ("csv", "jsonl", "columnar")
+
+# Inicio de un archivo columnar y de un archivo gzip
+MAGIA_COLUMNAR = b"CVC1"
+MAGIA_GZIP = b"\x1f\x8b"
+
+# Por fuente: columnas, consulta (`{tabla}` es Ventas o un archivo de ventas, `{filtro}` las
+# condiciones), columna de fecha y columna de cliente para los filtros (`None` si no aplica)
+FUENTES = {
+    "ventas": (
+        COLUMNAS_VENTAS.split(", "),
+        f"SELECT {COLUMNAS_VENTAS} FROM {{tabla}} WHERE factura IS NOT NULL {{filtro}}",
+        "fecha", "cliente",
+    ),
+    # El índice (factura, producto) entrega las líneas agrupadas por factura, sin ordenar aparte
+    "facturas": (
+        ["factura", "fecha", "cliente", "lineas", "unidades", "total"],
+        '''SELECT factura, MIN(fecha), MIN(cliente), COUNT(*), SUM(cantidad), SUM(cantidad * IFNULL(precio, 0))
+           FROM {tabla} WHERE factura IS NOT NULL {filtro} GROUP BY factura''',
+        "fecha", "cliente",
+    ),
+    "clientes": (
+        ["noIdCliente", "nombre", "apellido", "direccion", "telefono", "correo"],
+        "SELECT noIdCliente, nombre, apellido, direccion, telefono, correo FROM Clientes WHERE 1 {filtro}",
+        None, "noIdCliente",
+    ),
+    "productos": (
+        ["noIdProducto", "NombreProducto", "medida", "Fechavencimiento", "PrecioProduccion", "PrecioVenta"],
+        "SELECT noIdProducto, NombreProducto, medida, Fechavencimiento, PrecioProduccion, PrecioVenta FROM productos WHERE 1 {filtro}",
+        None, None,
+    ),
+}
+
+
+def _tablas(db, fuente):
+    """
+    Retorna las tablas que se recorren para `fuente`: para ventas y facturas, los archivos de
+    ventas adjuntos (del más antiguo al más reciente) y al final `main.Ventas`.
+    """
+    if fuente not in ("ventas", "facturas"):
+        return [None]
+    db.tabla_ventas_historicas()
+    db.cursor.execute("PRAGMA database_list")
+    archivos = sorted(nombre for _, nombre, _ in db.cursor.fetchall() if nombre.startswith("ventas_"))
+    return [f"{archivo}.Ventas" for archivo in archivos] + ["main.Ventas"]
+
+
+def bloques(fuente, desde=None, hasta=None, cliente=None, tamano_bloque=TAMANO_BLOQUE):
+    """
+    ## Función: `bloques`
+    Lee una fuente por bloques, todo dentro de una transacción de lectura (una misma foto de la
+    base aunque se siga vendiendo).
+
+    ### Parámetros:
+    - `fuente` (str): `ventas`, `facturas`, `clientes` o `productos`.
+    - `desde`, `hasta` (opcionales): Rango de fechas, como en `Venta.ventas_entre`. Solo ventas y facturas.
+    - `cliente` (int, opcional): Solo las filas de ese cliente.
+
+    ### Retorna:
+    - Generador de listas de tuplas, de hasta `tamano_bloque` filas cada una.
+
+    ### Excepciones:
+    - `ValueError`: Fuente desconocida, fechas no válidas o un filtro que la fuente no tiene.
+    """
+    if fuente not in FUENTES:
+        raise ValueError(f"Fuente desconocida: {fuente}")
+    _, sql, columna_fecha, columna_cliente = FUENTES[fuente]
+    condiciones, parametros = [], []
+    if desde or hasta:
+        if columna_fecha is None:
+            raise ValueError(f"La fuente {fuente} no se filtra por fecha")
+        rango = rango_fechas(desde or "1900-01-01", hasta or "9000-01-01")
+        if rango is None:
+            raise ValueError("Fechas no válidas: use AAAA-MM-DD [HH:MM:SS] o DD/MM/AAAA")
+        condiciones.append(f"{columna_fecha} >= ? AND {columna_fecha} < ?")
+        parametros.extend(rango)
+    if cliente is not None:
+        if columna_cliente is None:
+            raise ValueError(f"La fuente {fuente} no se filtra por cliente")
+        condiciones.append(f"{columna_cliente} = ?")
+        parametros.append(cliente)
+    filtro = "".join(f" AND {condicion}" for condicion in condiciones)
+
+    db = Db()
+    try:
+        tablas = _tablas(db, fuente)
+        db.cursor.execute("BEGIN")
+        for tabla in tablas:
+            db.cursor.execute(sql.format(tabla=tabla, filtro=filtro), parametros)
+            while True:
+                bloque = db.cursor.fetchmany(tamano_bloque)
+                if not bloque:
+                    break
+                yield bloque
+    finally:
+        db.cerrar()
+
+
+def escribir_csv(columnas, bloques_filas, binario):
+    """
+    Escribe los bloques como CSV con encabezado en `binario` (archivo binario, UTF-8).
+    """
+    texto = io.TextIOWrapper(binario, encoding="utf-8", newline="", write_through=False)
+    escritor = csv.writer(texto)
+    escritor.writerow(columnas)
+    filas = 0
+    for bloque in bloques_filas:
+        escritor.writerows(bloque)
+        filas += len(bloque)
+    texto.flush()
+    texto.detach()  # El archivo binario lo cierra quien lo abrió
+    return filas
+
+
+def escribir_jsonl(columnas, bloques_filas, binario):
+    """
+    Escribe los bloques en `binario` como JSONL: un objeto `{columna: valor}` por línea.
+    """
+    codificar = json.JSONEncoder(ensure_ascii=False, check_circular=False).encode
+    filas = 0
+    for bloque in bloques_filas:
+        binario.write("".join([codificar(dict(zip(columnas, fila))) + "\n" for fila in bloque]).encode("utf-8"))
+        filas += len(bloque)
+    return filas
+
+
+def _columna_binaria(valores):
+    """
+    Codifica una columna de un bloque: retorna `(código, nulos, datos)`. El código es el tipo de
+    `array` de los números (el entero más angosto que alcanza: `b`, `h`, `i` o `q`; `d` para reales)
+    o `s` para texto (también las columnas con tipos mezclados, por ejemplo teléfonos guardados
+    como número y como texto). El texto que se repite mucho (nombres de producto, números de
+    factura) se guarda como diccionario, código `D`: los valores distintos una vez y un índice por fila.
+    """
+    nulos = b""
+    tipos = set(map(type, valores))
+    if type(None) in tipos:
+        nulos = bytes(valor is None for valor in valores)
+        tipos.discard(type(None))
+    if tipos <= {int}:
+        enteros = [0 if valor is None else valor for valor in valores] if nulos else valores
+        minimo, maximo = (min(enteros), max(enteros)) if enteros else (0, 0)
+        for codigo, limite in (("b", 1 << 7), ("h", 1 << 15), ("i", 1 << 31), ("q", 1 << 63)):
+            if -limite <= minimo and maximo < limite:
+                return codigo, nulos, array(codigo, enteros).tobytes()
+    if tipos <= {int, float}:
+        return "d", nulos, array("d", (0.0 if valor is None else valor for valor in valores)).tobytes()
+
+    unicos = dict.fromkeys(valores)
+    if len(unicos) * 2 <= len(valores):
+        numero = {valor: i for i, valor in enumerate(unicos)}
+        codigo, _, indices = _columna_binaria(list(map(numero.__getitem__, valores)))
+        return "D", nulos, struct.pack("<Ic", len(unicos), codigo.encode()) + _textos(unicos) + indices
+    return "s", nulos, _textos(valores)
+
+
+def _textos(valores):
+    """
+    Codifica textos como `len(valores) + 1` posiciones `uint32` seguidas del UTF-8 de todos.
+    """
+    textos = [(b"" if valor is None else valor.encode("utf-8") if type(valor) is str else str(valor).encode("utf-8"))
+              for valor in valores]
+    posiciones = array("I", accumulate(map(len, textos), initial=0))
+    return posiciones.tobytes() + b"".join(textos)
+
+
+def _leer_textos(datos, cantidad):
+    """
+    Decodifica `cantidad` textos de `_textos`. Retorna `(textos, bytes usados)`.
+    """
+    posiciones = array("I")
+    posiciones.frombytes(datos[:4 * (cantidad + 1)])
+    inicio = 4 * (cantidad + 1)
+    texto = datos[inicio:inicio + posiciones[-1]]
+    return [texto[posiciones[i]:posiciones[i + 1]].decode("utf-8") for i in range(cantidad)], inicio + posiciones[-1]
+
+
+def escribir_columnar(columnas, bloques_filas, binario):
+    """
+    ## Función: `escribir_columnar`
+    Escribe los bloques en `binario` en el formato columnar de la cervecería, más pequeño que CSV
+    y que se lee por columnas sin interpretar texto.
+
+    ### Formato (enteros little-endian):
+    - `CVC1`, largo del encabezado (`uint32`) y el encabezado en JSON: `{"columnas": [...]}`.
+    - Por cada bloque: cantidad de filas (`uint32`) y, por cada columna, código de tipo (1 byte,
+      ver `_columna_binaria`), 1 si tiene nulos, largo de los datos (`uint32`), la máscara de
+      nulos (un byte por fila, solo si tiene) y los datos: los números como arreglo del tipo, el
+      texto como `filas + 1` posiciones `uint32` seguidas del UTF-8 de todas las filas, y el
+      diccionario como cantidad de valores (`uint32`), código del índice (1 byte), los valores
+      (como el texto) y el índice de cada fila.
+    - Un bloque de 0 filas marca el final.
+    """
+    encabezado = json.dumps({"columnas": columnas}, ensure_ascii=False).encode("utf-8")
+    binario.write(MAGIA_COLUMNAR + struct.pack("<I", len(encabezado)) + encabezado)
+    filas = 0
+    for bloque in bloques_filas:
+        partes = [struct.pack("<I", len(bloque))]
+        for valores in zip(*bloque):
+            codigo, nulos, datos = _columna_binaria(valores)
+            partes.append(struct.pack("<cBI", codigo.encode(), 1 if nulos else 0, len(datos)))
+            partes.append(nulos)
+            partes.append(datos)
+        binario.write(b"".join(partes))
+        filas += len(bloque)
+    binario.write(struct.pack("<I", 0))
+    return filas
+
+
+def leer_columnar(binario):
+    """
+    ## Función: `leer_columnar`
+    Lee un archivo de `escribir_columnar` (comprimido con gzip o no) abierto en binario.
+
+    ### Retorna:
+    - Generador de bloques `{columna: lista de valores}`, con `None` en los nulos.
+
+    ### Excepciones:
+    - `ValueError`: El archivo no tiene el formato columnar.
+    """
+    inicio = binario.peek(2)[:2] if hasattr(binario, "peek") else b""
+    if inicio == MAGIA_GZIP:
+        binario = gzip.GzipFile(fileobj=binario, mode="rb")
+    if binario.read(4) != MAGIA_COLUMNAR:
+        raise ValueError("No es un archivo columnar de la cervecería")
+    largo, = struct.unpack("<I", binario.read(4))
+    columnas = json.loads(binario.read(largo))["columnas"]
+    while True:
+        filas, = struct.unpack("<I", binario.read(4))
+        if filas == 0:
+            return
+        bloque = {}
+        for columna in columnas:
+            codigo, con_nulos, largo = struct.unpack("<cBI", binario.read(6))
+            codigo = codigo.decode()
+            nulos = binario.read(filas) if con_nulos else None
+            datos = binario.read(largo)
+            if codigo == "s":
+                valores, _ = _leer_textos(datos, filas)
+            elif codigo == "D":
+                cantidad, codigo_indices = struct.unpack("<Ic", datos[:5])
+                unicos, usados = _leer_textos(datos[5:], cantidad)
+                indices = array(codigo_indices.decode())
+                indices.frombytes(datos[5 + usados:])
+                valores = list(map(unicos.__getitem__, indices))
+            else:
+                numeros = array(codigo)
+                numeros.frombytes(datos)
+                valores = numeros.tolist()
+            if nulos is not None:
+                valores = [None if nulo else valor for valor, nulo in zip(valores, nulos)]
+            bloque[columna] = valores
+        yield bloque
+
+
+ESCRITORES = {"csv": escribir_csv, "jsonl": escribir_jsonl, "columnar": escribir_columnar}
+
+
+def exportar(fuente, archivo, formato="csv", desde=None, hasta=None, cliente=None, comprimir=False,
+             tamano_bloque=TAMANO_BLOQUE):
+    """
+    ## Función: `exportar`
+    Exporta una fuente (ver `bloques`) a un archivo, por bloques.
+
+    ### Parámetros:
+    - `fuente` (str): `ventas`, `facturas`, `clientes` o `productos`.
+    - `archivo`: Ruta del archivo a crear, o un archivo binario abierto (por ejemplo `sys.stdout.buffer`).
+    - `formato` (str): `csv`, `jsonl` o `columnar`.
+    - `desde`, `hasta`, `cliente` (opcionales): Filtros, como en `bloques`.
+    - `comprimir` (bool): Comprimir con gzip.
+
+    ### Retorna:
+    - Cantidad de filas exportadas.
+
+    ### Excepciones:
+    - `ValueError`: Formato o fuente desconocidos, o filtros no válidos (antes de crear el archivo).
+    """
+    if formato not in ESCRITORES:
+        raise ValueError(f"Formato desconocido: {formato}")
+    filas = bloques(fuente, desde, hasta, cliente, tamano_bloque)
+    primero = next(filas, None)  # Valida los filtros antes de crear el archivo
+
+    def todos():
+        if primero is not None:
+            yield primero
+            yield from filas
+
+    propio = isinstance(archivo, (str, bytes)) or hasattr(archivo, "__fspath__")
+    destino = open(archivo, "wb") if propio else archivo
+    comprimido = gzip.GzipFile(fileobj=destino, mode="wb", compresslevel=6) if comprimir else None
+    try:
+        return ESCRITORES[formato](FUENTES[fuente][0], todos(), comprimido or destino)
+    finally:
+        filas.close()
+        if comprimido is not None:
+            comprimido.close()  # Escribe el final del gzip, no cierra `destino`
+        if propio:
+            destino.close()
+        else:
+            destino.flush()
@@ -0,0 +1,268 @@
+# Módulo: `ingesta.py`
+# Descripción: Ingesta de ventas desde archivos de puntos de venta externos (por ejemplo las barras
+# de un festival), en JSONL o CSV, sin digitarlas una por una en la ventana de ventas.
+# - El archivo se lee registro por registro; cada uno se valida con `verificacion.ESQUEMA_VENTA` (las
+#   mismas reglas de `consola validar ventas`) y sus ids de producto y cliente se resuelven con
+#   diccionarios en memoria (por id, nombre del producto o correo del cliente).
+# - Cada registro trae una clave de idempotencia (`clave`) que se guarda en **VentasIngeridas**:
+#   volver a ingerir un archivo, o uno que se solapa con otro, no duplica ventas.
+# - Un hilo lee y valida, otro escribe lotes, cada uno en una transacción del `Escritor`. Entre
+#   los dos hay una cola acotada: si la base va más lenta que la lectura, la lectura espera en vez
+#   de acumular el archivo en memoria.
+# - El informe trae filas por segundo y los rechazos con su línea y motivo.
+#
+# Campos de cada registro:
+#   clave     Texto único por línea de venta en el origen (obligatorio).
+#   fecha     Fecha y hora de la venta, en cualquier formato de `normalizar_fecha_hora`.
+#   producto  Id o nombre exacto del producto.
+#   cliente   Id o correo del cliente.
+#   cantidad  Unidades (entero positivo).
+#   precio    Precio unitario (opcional; por defecto el precio de venta actual).
+#   ticket    Las líneas con el mismo ticket forman una factura (opcional; sin ticket cada línea
+#             es su propia factura). La factura se numera `<origen>-<ticket o clave>`.
+
+import csv
+import json
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+from poo import Db, Escritor, Producto, StockInsuficiente, normalizar_fecha_hora
+from verificacion import ESQUEMA_VENTA
+
+# Registros por transacción de escritura
+TAMANO_LOTE = 1000
+
+# Lotes validados que esperan a ser escritos
+TAMANO_COLA = 8
+
+# Rechazos que se detallan en el informe (se cuentan todos)
+MAXIMO_RECHAZOS = 1000
+
+ORIGEN_POR_DEFECTO = "POS"
+
+
+def _registros(archivo, formato):
+    """
+    Genera `(número de línea, registro)` de un archivo JSONL o CSV con encabezado. Una línea JSON
+    que no se puede leer se genera como `(número, None)`.
+    """
+    if formato == "csv":
+        lector = csv.DictReader(archivo)
+        for registro in lector:
+            yield lector.line_num, registro
+        return
+    for numero, linea in enumerate(archivo, start=1):
+        if not linea.strip():
+            continue
+        try:
+            registro = json.loads(linea)
+        except ValueError:
+            registro = None
+        yield numero, registro if isinstance(registro, dict) else None
+
+
+def _entero(valor):
+    """
+    Convierte un entero de JSON o de CSV (texto). Retorna `None` si no es un entero.
+    """
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, int):
+        return valor
+    if isinstance(valor, float):
+        return int(valor) if valor.is_integer() else None
+    texto = str(valor).strip()
+    return int(texto) if texto.lstrip("-").isdigit() else None
+
+
+class Busqueda:
+    """
+    Ids de productos y clientes en memoria, para resolver cada registro sin consultar la base.
+    """
+
+    def __init__(self):
+        db = Db()
+        db.cursor.execute("SELECT noIdProducto, NombreProducto, PrecioVenta FROM productos")
+        self.productos = {}
+        self.productos_por_nombre = {}
+        for id_producto, nombre, precio in db.cursor.fetchall():
+            self.productos[id_producto] = (nombre, precio)
+            self.productos_por_nombre.setdefault(nombre.casefold(), id_producto)
+        db.cursor.execute("SELECT noIdCliente, correo FROM Clientes")
+        self.clientes = set()
+        self.clientes_por_correo = {}
+        for id_cliente, correo in db.cursor.fetchall():
+            self.clientes.add(id_cliente)
+            self.clientes_por_correo.setdefault(str(correo).strip().casefold(), id_cliente)
+        db.cerrar()
+
+    def producto(self, valor):
+        id_producto = _entero(valor)
+        if id_producto is None:
+            id_producto = self.productos_por_nombre.get(str(valor).strip().casefold())
+        return id_producto if id_producto in self.productos else None
+
+    def cliente(self, valor):
+        id_cliente = _entero(valor)
+        if id_cliente is None:
+            id_cliente = self.clientes_por_correo.get(str(valor).strip().casefold())
+        return id_cliente if id_cliente in self.clientes else None
+
+
+def convertir(registro, busqueda, origen=ORIGEN_POR_DEFECTO):
+    """
+    ## Función: `convertir`
+    Valida un registro con `ESQUEMA_VENTA`, resuelve su producto y su cliente y lo convierte en una
+    fila para `escribir_lote`.
+
+    ### Retorna:
+    - `(fila, None)` con `fila = (clave, fecha, producto, cliente, cantidad, precio, nombre_producto, factura)`,
+      o `(None, motivo)` si el registro no es válido.
+    """
+    if registro is None:
+        return None, "La línea no es un objeto JSON."
+    errores = ESQUEMA_VENTA.validar(registro)
+    if errores:
+        return None, next(iter(errores.values()))
+    producto = busqueda.producto(registro["producto"])
+    if producto is None:
+        return None, f"Producto desconocido: {registro['producto']!r}."
+    cliente = busqueda.cliente(registro["cliente"])
+    if cliente is None:
+        return None, f"Cliente desconocido: {registro['cliente']!r}."
+    clave = str(registro["clave"]).strip()
+    fecha = normalizar_fecha_hora(registro["fecha"])
+    nombre, precio = busqueda.productos[producto]
+    if registro.get("precio") not in (None, ""):
+        precio = int(registro["precio"])
+    ticket = str(registro.get("ticket") or "").strip()
+    return (clave, fecha, producto, cliente, int(registro["cantidad"]), precio, nombre, f"{origen}-{ticket or clave}"), None
+
+
+def escribir_lote(cursor, lote):
+    """
+    Escribe un lote dentro de la transacción del `Escritor`. Cada fila va en su propio `SAVEPOINT`:
+    una fila duplicada o sin stock no deshace las demás.
+
+    ### Retorna:
+    - Lista con el resultado de cada fila: `None` si se insertó, `"duplicada"` si su clave ya se
+      había ingerido, o el motivo del rechazo.
+    """
+    resultados = []
+    for clave, fecha, producto, cliente, cantidad, precio, nombre, factura in lote:
+        cursor.execute("SELECT 1 FROM VentasIngeridas WHERE clave = ?", (clave,))
+        if cursor.fetchone() is not None:
+            resultados.append("duplicada")
+            continue
+        cursor.execute("SAVEPOINT fila")
+        try:
+            Producto._descontar_stock(cursor, producto, cantidad)
+            cursor.execute('''
+                INSERT INTO Ventas (fecha, producto, cliente, cantidad, factura, precio, nombre_producto)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (fecha, producto, cliente, cantidad, factura, precio, nombre))
+            cursor.execute("INSERT INTO VentasIngeridas (clave, venta) VALUES (?, ?)", (clave, cursor.lastrowid))
+            resultados.append(None)
+        except StockInsuficiente as e:
+            cursor.execute("ROLLBACK TO fila")
+            resultados.append(f"Stock insuficiente del producto {e.producto}: hay {e.disponible}, se piden {e.pedido}.")
+        except sqlite3.IntegrityError:
+            cursor.execute("ROLLBACK TO fila")
+            resultados.append(f"La factura {factura} ya tiene una línea del producto {producto}.")
+        cursor.execute("RELEASE fila")
+    return resultados
+
+
+def ingerir(archivo, formato=None, origen=ORIGEN_POR_DEFECTO, tamano_lote=TAMANO_LOTE, tamano_cola=TAMANO_COLA):
+    """
+    ## Función: `ingerir`
+    Ingresa al libro de ventas las ventas de un archivo de un punto de venta externo.
+
+    ### Parámetros:
+    - `archivo` (str o archivo de texto): Ruta del archivo (`-` para la entrada estándar) o archivo abierto.
+    - `formato` (str, opcional): `jsonl` o `csv`; por defecto según la extensión (`jsonl` si no es `.csv`).
+    - `origen` (str): Prefijo de los números de factura.
+    - `tamano_lote` (int): Registros por transacción.
+    - `tamano_cola` (int): Lotes que pueden esperar a ser escritos antes de que la lectura se detenga.
+
+    ### Comportamiento:
+    1. Carga los ids de productos y clientes en memoria (`Busqueda`).
+    2. Este hilo lee, valida y arma lotes; otro hilo los escribe con `escribir_lote`, cada uno en
+       una transacción del `Escritor` (descuenta el stock, inserta en **Ventas** y guarda la clave).
+    3. Un lote que falla completo (por ejemplo por el disco) rechaza sus filas; volver a ingerir
+       el archivo solo agrega lo que falta.
+
+    ### Retorna:
+    - Diccionario con `leidas`, `insertadas`, `duplicadas`, `rechazadas`, `rechazos` (hasta
+      `MAXIMO_RECHAZOS`: `linea`, `clave` y `error`), `segundos`, `filas_por_segundo` y
+      `espera_cola` (segundos que la lectura esperó a la escritura).
+    """
+    if formato is None:
+        formato = "csv" if isinstance(archivo, str) and archivo.lower().endswith(".csv") else "jsonl"
+    informe = {"leidas": 0, "insertadas": 0, "duplicadas": 0, "rechazadas": 0, "rechazos": []}
+    # Los dos hilos rechazan filas
+    candado = threading.Lock()
+
+    def rechazar(numero, clave, motivo):
+        with candado:
+            informe["rechazadas"] += 1
+            if len(informe["rechazos"]) < MAXIMO_RECHAZOS:
+                informe["rechazos"].append({"linea": numero, "clave": clave, "error": motivo})
+
+    cola = queue.Queue(maxsize=tamano_cola)
+
+    def escribir():
+        while True:
+            lote = cola.get()
+            if lote is None:
+                return
+            try:
+                resultados = Escritor.ejecutar(escribir_lote, [fila for _, fila in lote])
+            except Exception as e:
+                resultados = [f"Error al guardar el lote: {e}"] * len(lote)
+            for (numero, fila), resultado in zip(lote, resultados):
+                if resultado is None:
+                    informe["insertadas"] += 1
+                elif resultado == "duplicada":
+                    informe["duplicadas"] += 1
+                else:
+                    rechazar(numero, fila[0], resultado)
+
+    inicio = time.perf_counter()
+    propio = isinstance(archivo, str)
+    entrada = (sys.stdin if archivo == "-" else open(archivo, encoding="utf-8", newline="")) if propio else archivo
+    busqueda = Busqueda()
+    escritor = threading.Thread(target=escribir, name="ingesta-escritor", daemon=True)
+    escritor.start()
+    espera = 0.0
+    try:
+        lote = []
+        for numero, registro in _registros(entrada, formato):
+            informe["leidas"] += 1
+            fila, motivo = convertir(registro, busqueda, origen)
+            if fila is None:
+                rechazar(numero, (registro or {}).get("clave"), motivo)
+                continue
+            lote.append((numero, fila))
+            if len(lote) >= tamano_lote:
+                antes = time.perf_counter()
+                cola.put(lote)
+                espera += time.perf_counter() - antes
+                lote = []
+        if lote:
+            cola.put(lote)
+    finally:
+        cola.put(None)
+        escritor.join()
+        if propio and entrada is not sys.stdin:
+            entrada.close()
+
+    informe["rechazos"].sort(key=lambda rechazo: rechazo["linea"])
+    segundos = time.perf_counter() - inicio
+    informe["segundos"] = round(segundos, 3)
+    informe["filas_por_segundo"] = round(informe["leidas"] / segundos) if segundos else 0
+    informe["espera_cola"] = round(espera, 3)
+    return informe
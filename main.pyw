@@ -4,10 +4,11 @@
 # **Ventas** y **Facturación**. Utiliza la librería `tkinter` para la interfaz gráfica y `Pillow` para manejar imágenes.
 
 import tkinter as tk
-from tkinter import PhotoImage
-from PIL import Image, ImageTk
-from productos import VentanaMainProductos
-from clientes import VentanaMainClientes
+from poo import Db, Carrito, CarritosOcupados
+from monitor import Boton, Monitor
+
+# Pillow y los módulos de Productos y Clientes se importan al usarlos por primera vez
+# (ver `cargar_logo` y `Aplicacion.crear_vista`) para que la ventana principal aparezca antes.
 
 """
 Para iniciar el programa
@@ -72,93 +73,199 @@ LINK DEL REPOSITORIO:  https://github.com/sammp2006/POOCerveceria2
 """
 
 
-def iniciar_programa():
+# Logo ya decodificado y redimensionado, se decodifica una sola vez por ejecución
+_logo_cache = None
+
+def cargar_logo():
+    """
+    Retorna el logo (`./static/logo.png`) redimensionado a 100x100 como imagen de Pillow.
+
+    La imagen se decodifica solo la primera vez. Lo que se guarda es la imagen de Pillow
+    y no la `PhotoImage`, porque esta pertenece a la ventana `tk.Tk` que la creó.
+    """
+    global _logo_cache
+    if _logo_cache is None:
+        from PIL import Image
+
+        with Image.open("./static/logo.png") as logo_imagen:
+            _logo_cache = logo_imagen.resize((100, 100))
+    return _logo_cache
+
+def mostrar_reportes():
+    """
+    Abre la ventana de reportes de ventas. El módulo `reportes` (y NumPy) se importa al usarla.
+    """
+    from reportes import mostrar_reporte
+
+    mostrar_reporte()
+
+class VistaPrincipal(tk.Frame):
     """
-    Inicia la interfaz gráfica principal del programa.
+    Menú principal con el logo y los botones para entrar a cada módulo.
 
     Comportamiento:
-    1. Crea una ventana principal con fondo amarillo claro (`#FFEC99`).
+    1. Fondo amarillo claro (`#FFEC99`).
     2. Muestra un mensaje de bienvenida.
     3. Intenta cargar y mostrar el logo de la cervecería desde la ruta `./static/logo.png`.
     4. Si el logo no se puede cargar, muestra un mensaje de error en la consola.
-    5. Crea botones para acceder a los módulos de **Productos**, **Clientes**, **Ventas** y **Facturación**.
+    5. Crea botones para acceder a los módulos de **Productos** y **Clientes** (+ Ventas y Facturación)
+       y a los **Reportes de Ventas**.
     6. Muestra una nota informativa sobre cómo registrar ventas y facturar.
     7. Incluye un botón para cerrar la aplicación.
     """
-    # Configuración de la ventana principal
-    ventana = tk.Tk()
-    ventana.title("Programa Principal")
-    ventana.geometry("400x400")
-    ventana.config(bg="#FFEC99")
+    titulo = "Programa Principal"
+    tamano = "400x440"
 
-    # Mensaje de bienvenida
-    bienvenida = tk.Label(ventana, text="Bienvenido a la cerveceria artesanal", font=("Helvetica", 16), bg="#FFEC99", fg="black")
-    bienvenida.pack(pady=10)
+    def __init__(self, master, func_abrir_seccion):
+        super().__init__(master, bg="#FFEC99")
 
-    # Carga del logo
-    try:
-        logo_imagen = Image.open("./static/logo.png")
-        logo_imagen = logo_imagen.resize((100, 100))
-        logo_imagen_tk = ImageTk.PhotoImage(logo_imagen)
-
-        canvas = tk.Canvas(ventana, width=120, height=120, bg="#FFEC99", bd=0, highlightthickness=2)
-        canvas.create_rectangle(0, 0, 120, 120, outline="black", width=4)
-        canvas.create_image(60, 60, image=logo_imagen_tk)
-        canvas.pack(pady=10)
-    except Exception as e:
-        print(f"Error al cargar el logo: {e}")
-
-    # Función para abrir secciones
-    def abrir_seccion(seccion):
+        # Mensaje de bienvenida
+        bienvenida = tk.Label(self, text="Bienvenido a la cerveceria artesanal", font=("Helvetica", 16), bg="#FFEC99", fg="black")
+        bienvenida.pack(pady=10)
+
+        # Carga del logo
+        try:
+            from PIL import ImageTk
+
+            self.logo_imagen_tk = ImageTk.PhotoImage(cargar_logo(), master=self)  # Se guarda para que el recolector de basura no la borre
+
+            canvas = tk.Canvas(self, width=120, height=120, bg="#FFEC99", bd=0, highlightthickness=2)
+            canvas.create_rectangle(0, 0, 120, 120, outline="black", width=4)
+            canvas.create_image(60, 60, image=self.logo_imagen_tk)
+            canvas.pack(pady=10)
+        except Exception as e:
+            print(f"Error al cargar el logo: {e}")
+
+        # Botones para acceder a los módulos
+        boton_productos = Boton(self, text="Modulo de Productos", command=lambda: func_abrir_seccion("Productos"), bg="yellow", fg="black", relief="solid", bd=2)
+        boton_productos.pack(pady=5, fill="x")
+
+        boton_clientes = Boton(self, text="Modulo de Clientes (+ Ventas y Facturacion)", command=lambda: func_abrir_seccion("Clientes"), bg="yellow", fg="black", relief="solid", bd=2)
+        boton_clientes.pack(pady=5, fill="x")
+
+        boton_reportes = Boton(self, text="Reportes de Ventas", command=mostrar_reportes, bg="yellow", fg="black", relief="solid", bd=2)
+        boton_reportes.pack(pady=5, fill="x")
+
+        # Nota informativa
+        nota_pie_pagina = tk.Label(self, text="Para registrar una venta o facturarla \n primero seleccione el cliente en cuestion", relief="solid", bd=2)
+        nota_pie_pagina.pack(pady=5, fill="x")
+
+        # Botón para cerrar la aplicación
+        boton_cerrar = Boton(self, text="Cerrar", command=master.destroy, bg="red", fg="black", relief="solid", bd=2)
+        boton_cerrar.pack(pady=10, fill="x")
+
+class Aplicacion(tk.Tk):
+    """
+    Ventana única del programa. Cada módulo es un `tk.Frame` (vista) que se construye la
+    primera vez que se abre y queda guardado; navegar solo oculta la vista actual y muestra
+    la otra, sin crear un nuevo intérprete de Tcl ni reconstruir widgets.
+
+    Incluye el menú "Depuración" con el reporte de latencias de `Monitor` y el latido que
+    mide el retraso del ciclo de eventos.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.vistas = {}
+        self.vista_actual = None
+        self._configurar_menu()
+        Monitor.iniciar_latido(self)
+        self.abrir_seccion("Principal")
+
+    def _configurar_menu(self):
+        """
+        Barra de menú con las herramientas de depuración.
+        """
+        barra_menu = tk.Menu(self)
+        menu_depuracion = tk.Menu(barra_menu, tearoff=0)
+        menu_depuracion.add_command(label="Reporte de latencias", command=Monitor.mostrar_reporte)
+        barra_menu.add_cascade(label="Depuración", menu=menu_depuracion)
+        self.config(menu=barra_menu)
+
+    def crear_vista(self, seccion):
+        """
+        Construye la vista de `seccion`. Los módulos se importan aquí para no cargarlos
+        hasta que el usuario entra a ellos.
+        """
+        if seccion == "Principal":
+            return VistaPrincipal(self, self.abrir_seccion)
+        if seccion == "Productos":
+            from productos import VentanaMainProductos
+
+            return VentanaMainProductos(self, lambda: self.abrir_seccion("Principal"))
+        if seccion == "Clientes":
+            from clientes import VentanaMainClientes
+
+            return VentanaMainClientes(self, lambda: self.abrir_seccion("Principal"))
+        return None
+
+    def abrir_seccion(self, seccion):
         """
-        Redirige al módulo correspondiente según la sección seleccionada por el usuario.
+        Muestra la vista de la sección seleccionada por el usuario.
 
         Parámetros:
-        - seccion (str): Nombre de la sección a la que se desea acceder. Puede ser:
-          - "Productos": Abre el módulo de productos.
-          - "Clientes": Abre el módulo de clientes.
-          - "Facturacion": Abre el módulo de facturación.
-          - "Ventas": Abre el módulo de ventas.
+        - seccion (str): "Principal", "Productos" o "Clientes".
 
         Comportamiento:
-        1. Cierra la ventana actual.
-        2. Llama a la función correspondiente para abrir el módulo seleccionado.
+        1. Construye la vista si es la primera vez que se abre, si no reutiliza la guardada.
+        2. Oculta la vista actual y muestra la nueva con su título y tamaño.
         3. Si la sección no es válida, muestra un mensaje de error en la consola.
         """
-        ventana.destroy()
-        if seccion == "Productos":
-            ventana_productos = VentanaMainProductos(iniciar_programa)
-            ventana_productos.mainloop()
-        elif seccion == "Clientes":
-            ventana_clientes = VentanaMainClientes(iniciar_programa)
-            ventana_clientes.mainloop()
-            # main_clientes(iniciar_programa)
+        vista = self.vistas.get(seccion)
+        if vista is None:
+            vista = self.crear_vista(seccion)
+            if vista is None:
+                print(f"Sección no válida: {seccion}")
+                return
+            self.vistas[seccion] = vista
+
+        if self.vista_actual is not None:
+            self.vista_actual.pack_forget()
+        vista.pack(fill="both", expand=True)
+        self.vista_actual = vista
+
+        self.title(vista.titulo)
+        self.geometry(vista.tamano)
+        self.config(bg=vista.cget("bg"))
         print(f"Abrir {seccion}")
 
-    # Botones para acceder a los módulos
-    boton_productos = tk.Button(ventana, text="Modulo de Productos", command=lambda: abrir_seccion("Productos"), bg="yellow", fg="black", relief="solid", bd=2)
-    boton_productos.pack(pady=5, fill="x")
-
-    boton_clientes = tk.Button(ventana, text="Modulo de Clientes (+ Ventas y Facturacion)", command=lambda: abrir_seccion("Clientes"), bg="yellow", fg="black", relief="solid", bd=2)
-    boton_clientes.pack(pady=5, fill="x")
+def crear_ventana_principal():
+    """
+    Construye la aplicación con el menú principal visible, sin iniciar el ciclo de eventos.
+    Se separa de `iniciar_programa` para poder medir cuánto tarda en aparecer la primera ventana.
+    """
+    return Aplicacion()
 
-    # Nota informativa
-    nota_pie_pagina = tk.Label(ventana, text="Para registrar una venta o facturarla \n primero seleccione el cliente en cuestion", relief="solid", bd=2)
-    nota_pie_pagina.pack(pady=5, fill="x")
+def iniciar_programa():
+    """
+    Inicia la interfaz gráfica principal del programa (ver `Aplicacion`).
+    """
+    ventana = crear_ventana_principal()
+    # Los carritos se abren apenas aparece la ventana, para avisar ya si otro programa los tiene
+    ventana.after_idle(abrir_carritos, ventana)
+    ventana.mainloop()
 
-    # Botón para cerrar la aplicación
-    boton_cerrar = tk.Button(ventana, text="Cerrar", command=ventana.destroy, bg="red", fg="black", relief="solid", bd=2)
-    boton_cerrar.pack(pady=10, fill="x")
+def abrir_carritos(ventana):
+    """
+    Abre los carritos de la base (`Carrito.obtener`). Si otro programa los tiene abiertos, avisa que
+    en esta ventana no se podrán usar.
+    """
+    try:
+        Carrito.obtener()
+    except CarritosOcupados as e:
+        from tkinter import messagebox
 
-    ventana.mainloop()
+        messagebox.showwarning("Carritos en uso", f"{e}\nEn esta ventana no se podrán usar los carritos.", parent=ventana)
 
 def run():
     """
     Ejecuta el programa principal llamando a `iniciar_programa()`.
 
     Comportamiento:
-    1. Llama a la función `iniciar_programa()` para iniciar la interfaz gráfica.
+    1. Crea las tablas e índices que falten en la base de datos (`Db.iniciar_tablas`).
+    2. Llama a la función `iniciar_programa()` para iniciar la interfaz gráfica.
     """
+    Db().iniciar_tablas()
     iniciar_programa()
 
 if __name__ == "__main__":
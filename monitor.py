@@ -0,0 +1,226 @@
+# Módulo: `monitor.py`
+# Descripción: Instrumentación de la interfaz para diagnosticar "el programa se congela".
+# - Mide el tiempo de cada acción de botón (`Boton` reemplaza a `tk.Button`).
+# - Mide el retraso del ciclo de eventos de Tk con un latido periódico (`after`).
+# - Si una acción bloquea la interfaz más que el umbral, imprime una muestra de la pila del hilo
+#   principal tomada mientras la acción sigue ejecutándose. Las acciones que abren un diálogo
+#   modal (messagebox) no cuentan como bloqueo: el ciclo de eventos sigue corriendo mientras
+#   el usuario lee el mensaje, y eso se detecta porque el latido sigue llegando.
+# - Genera un reporte con histogramas, disponible en el menú "Depuración" y al cerrar el programa.
+
+import atexit
+import os
+import sys
+import threading
+import time
+import traceback
+import tkinter as tk
+from collections import deque
+
+# Acciones que bloquean la interfaz más que esto se registran con su pila (en milisegundos)
+UMBRAL_LENTO_MS = int(os.environ.get("CERVECERIA_UMBRAL_LENTO_MS", 200))
+
+# Cada cuánto se programa el latido del ciclo de eventos (en milisegundos)
+INTERVALO_LATIDO_MS = 100
+
+# Límites superiores de cada barra del histograma (en milisegundos)
+LIMITES_HISTOGRAMA = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, float("inf")]
+
+
+class Estadistica:
+    """
+    Acumula tiempos en milisegundos: histograma por rangos, conteo, máximo y las últimas
+    muestras para calcular percentiles sin guardar todo el historial.
+    """
+
+    def __init__(self):
+        self.histograma = [0] * len(LIMITES_HISTOGRAMA)
+        self.cantidad = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.muestras = deque(maxlen=1000)
+
+    def agregar(self, ms):
+        for i, limite in enumerate(LIMITES_HISTOGRAMA):
+            if ms <= limite:
+                self.histograma[i] += 1
+                break
+        self.cantidad += 1
+        self.total += ms
+        self.maximo = max(self.maximo, ms)
+        self.muestras.append(ms)
+
+    def percentil(self, p):
+        if not self.muestras:
+            return 0.0
+        ordenadas = sorted(self.muestras)
+        return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p / 100))]
+
+    def resumen(self):
+        promedio = self.total / self.cantidad if self.cantidad else 0.0
+        return f"n={self.cantidad} prom={promedio:.1f} p50={self.percentil(50):.1f} p95={self.percentil(95):.1f} máx={self.maximo:.1f} ms"
+
+    def barras(self, ancho=30):
+        """
+        Histograma en texto, una línea por rango con al menos una muestra.
+        """
+        lineas = []
+        mayor = max(self.histograma) or 1
+        anterior = 0
+        for limite, cantidad in zip(LIMITES_HISTOGRAMA, self.histograma):
+            if cantidad:
+                rango = f"{anterior:g}-{limite:g}" if limite != float("inf") else f">{anterior:g}"
+                lineas.append(f"    {rango:>11} ms | {'#' * max(1, cantidad * ancho // mayor)} {cantidad}")
+            anterior = limite
+        return lineas
+
+
+class Monitor:
+    """
+    Registro global de latencias de la interfaz. Todo se guarda en atributos de clase para
+    que cualquier módulo pueda instrumentar sin pasar objetos.
+    """
+
+    acciones: dict = {}
+    retraso_ciclo = Estadistica()
+    lentas: list = []
+
+    # Acción en curso (nombre, inicio) que revisa el vigilante para tomar la muestra de pila
+    _en_curso = None
+    _ultimo_latido = None
+    _muestreada = False
+    _hilo_principal = threading.main_thread().ident
+    _vigilante = None
+
+    @classmethod
+    def medir(cls, funcion, nombre):
+        """
+        Envuelve `funcion` para registrar cuánto tarda cada llamada bajo `nombre`.
+        """
+        def envoltura(*args, **kwargs):
+            # Acciones anidadas (un botón que llama a otro) se miden solo en la externa
+            if cls._en_curso is not None:
+                return funcion(*args, **kwargs)
+
+            cls._iniciar_vigilante()
+            latidos_antes = cls.retraso_ciclo.cantidad
+            inicio = time.perf_counter()
+            cls._en_curso = (nombre, inicio)
+            cls._muestreada = False
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                cls._en_curso = None
+                ms = (time.perf_counter() - inicio) * 1000
+                cls.acciones.setdefault(nombre, Estadistica()).agregar(ms)
+                # Si hubo latidos durante la acción, el tiempo fue de espera en un diálogo, no bloqueo
+                bloqueo = cls.retraso_ciclo.cantidad == latidos_antes
+                if ms > UMBRAL_LENTO_MS and bloqueo:
+                    cls.lentas.append((nombre, ms))
+                    print(f"[monitor] Acción lenta '{nombre}': {ms:.0f} ms")
+
+        return envoltura
+
+    @classmethod
+    def _iniciar_vigilante(cls):
+        """
+        Hilo que revisa la acción en curso y, cuando supera el umbral, imprime la pila del hilo
+        principal en ese momento (dónde está atascada la acción).
+        """
+        if cls._vigilante is not None:
+            return
+
+        def vigilar():
+            while True:
+                time.sleep(UMBRAL_LENTO_MS / 4000)
+                en_curso = cls._en_curso
+                if en_curso is None or cls._muestreada:
+                    continue
+                nombre, inicio = en_curso
+                ahora = time.perf_counter()
+                ultimo_latido = cls._ultimo_latido
+                # Sin latidos recientes el ciclo de eventos está detenido dentro de la acción
+                bloqueado = ultimo_latido is None or (ahora - max(ultimo_latido, inicio)) * 1000 > UMBRAL_LENTO_MS
+                if (ahora - inicio) * 1000 > UMBRAL_LENTO_MS and bloqueado:
+                    cls._muestreada = True
+                    marco = sys._current_frames().get(cls._hilo_principal)
+                    if marco is not None:
+                        pila = "".join(traceback.format_stack(marco))
+                        print(f"[monitor] '{nombre}' supera {UMBRAL_LENTO_MS} ms, pila del hilo principal:\n{pila}")
+
+        cls._vigilante = threading.Thread(target=vigilar, name="monitor-vigilante", daemon=True)
+        cls._vigilante.start()
+
+    @classmethod
+    def iniciar_latido(cls, raiz):
+        """
+        Programa un latido cada `INTERVALO_LATIDO_MS` en el ciclo de eventos de `raiz`.
+        La diferencia entre cuándo debía ejecutarse y cuándo se ejecutó es el retraso del
+        ciclo: el tiempo que la interfaz estuvo sin responder.
+        """
+        def latido(esperado):
+            ahora = time.perf_counter()
+            cls._ultimo_latido = ahora
+            cls.retraso_ciclo.agregar(max(0.0, (ahora - esperado) * 1000))
+            raiz.after(INTERVALO_LATIDO_MS, latido, time.perf_counter() + INTERVALO_LATIDO_MS / 1000)
+
+        raiz.after(INTERVALO_LATIDO_MS, latido, time.perf_counter() + INTERVALO_LATIDO_MS / 1000)
+
+    @classmethod
+    def reporte(cls):
+        """
+        Retorna el reporte de latencias en texto: retraso del ciclo de eventos, cada acción
+        ordenada de la más lenta a la más rápida y las acciones que superaron el umbral.
+        """
+        lineas = ["=== Reporte de latencias de la interfaz ===", ""]
+        lineas.append(f"Retraso del ciclo de eventos: {cls.retraso_ciclo.resumen()}")
+        lineas.extend(cls.retraso_ciclo.barras())
+        lineas.append("")
+
+        for nombre, estadistica in sorted(cls.acciones.items(), key=lambda item: item[1].maximo, reverse=True):
+            lineas.append(f"{nombre}: {estadistica.resumen()}")
+            lineas.extend(estadistica.barras())
+
+        if cls.lentas:
+            lineas.append("")
+            lineas.append(f"Acciones que bloquearon la interfaz más de {UMBRAL_LENTO_MS} ms: {len(cls.lentas)}")
+            for nombre, ms in cls.lentas[-20:]:
+                lineas.append(f"    {nombre}: {ms:.0f} ms")
+        return "\n".join(lineas)
+
+    @classmethod
+    def mostrar_reporte(cls):
+        """
+        Muestra el reporte en una ventana emergente.
+        """
+        ventana_toplevel = tk.Toplevel()
+        ventana_toplevel.title("Reporte de latencias")
+        ventana_toplevel.geometry("700x500")
+
+        texto = tk.Text(ventana_toplevel, font=("Courier", 10))
+        texto.insert("1.0", cls.reporte())
+        texto.config(state="disabled")
+        texto.pack(fill="both", expand=True)
+
+
+class Boton(tk.Button):
+    """
+    `tk.Button` cuyo `command` se mide con `Monitor`. La acción se registra con el texto
+    del botón como nombre.
+    """
+
+    def __init__(self, master=None, **kwargs):
+        if kwargs.get("command") is not None:
+            kwargs["command"] = Monitor.medir(kwargs["command"], kwargs.get("text", "Botón"))
+        super().__init__(master, **kwargs)
+
+
+def imprimir_reporte_al_salir():
+    """
+    Imprime el reporte en la consola al terminar el programa, si se midió alguna acción.
+    """
+    if Monitor.acciones or Monitor.retraso_ciclo.cantidad:
+        print(Monitor.reporte())
+
+
+atexit.register(imprimir_reporte_al_salir)
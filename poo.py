@@ -1,31 +1,370 @@
 import sqlite3
-from datetime import datetime
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
-import pdfkit
-import uuid
+from datetime import datetime, date, timedelta
 import os
-import platform
-import subprocess
+import glob
+import json
+import atexit
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from trazas import tramo, trazado
+
+# smtplib, email, pdfkit, uuid, platform y subprocess solo se usan al facturar o enviar correos,
+# se importan dentro de cada método para que abrir el programa no pague su costo.
+
+def normalizar_fecha(valor):
+    """
+    Convierte una fecha a texto ISO `AAAA-MM-DD`, el formato en que se guardan las fechas para
+    que se ordenen y comparen bien en SQL (y usen los índices). Acepta `date`/`datetime`,
+    `AAAA-MM-DD`, `DD/MM/AAAA` y `AAAA-MM-DD HH:MM:SS`. Retorna `None` si no la reconoce.
+    """
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    texto = str(valor).strip()
+    for formato in ("%Y-%m-%d", "%d/%m/%Y", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return datetime.strptime(texto, formato).date().isoformat()
+        except ValueError:
+            pass
+    return None
+
+def normalizar_fecha_hora(valor):
+    """
+    Como `normalizar_fecha`, pero con hora: texto ISO `AAAA-MM-DD HH:MM:SS` (el formato de fecha
+    y hora de SQLite). Acepta además `DD/MM/AAAA [HH:MM[:SS]]`. Una fecha sin hora toma las 00:00:00.
+    Retorna `None` si no la reconoce.
+    """
+    if isinstance(valor, datetime):
+        return valor.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(valor, date):
+        return f"{valor.isoformat()} 00:00:00"
+    texto = str(valor).strip()
+    try:
+        return datetime.fromisoformat(texto).strftime("%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        pass
+    for formato in ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(texto, formato).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            pass
+    return None
+
+def rango_fechas(desde, hasta):
+    """
+    Convierte `desde` y `hasta` en los límites `(inicio, fin)` de `inicio <= fecha < fin` sobre
+    fechas ISO con hora. Si `hasta` es una fecha sin hora, `fin` es el día siguiente para incluir
+    ese día completo. Retorna `None` si alguna de las fechas no es válida.
+    """
+    inicio = normalizar_fecha_hora(desde)
+    fin = normalizar_fecha_hora(hasta)
+    if inicio is None or fin is None:
+        return None
+    solo_fecha = not isinstance(hasta, datetime) and (isinstance(hasta, date) or ":" not in str(hasta))
+    if solo_fecha:
+        fin = normalizar_fecha_hora(datetime.strptime(fin, "%Y-%m-%d %H:%M:%S") + timedelta(days=1))
+    return inicio, fin
+
+# Columnas de Ventas en orden, iguales en `data.db` y en los archivos de ventas (ver `Venta.archivar_ventas`)
+COLUMNAS_VENTAS = "noIdVentas, fecha, producto, cliente, cantidad, factura, precio, nombre_producto"
+
+# Agrupaciones del libro de ventas que guardan las tablas de resumen (ver `Db.iniciar_tablas`, punto 7).
+# `{tabla}` es `Ventas` o la vista `VentasHistoricas` (ver `Db.tabla_ventas_historicas`)
+SQL_RESUMEN_PRODUCTO_DIA = '''
+    SELECT producto, substr(fecha, 1, 10), SUM(cantidad), SUM(cantidad * IFNULL(precio, 0))
+    FROM {tabla} WHERE factura IS NOT NULL GROUP BY producto, substr(fecha, 1, 10)
+'''
+SQL_RESUMEN_CLIENTE = '''
+    SELECT cliente, SUM(cantidad), SUM(cantidad * IFNULL(precio, 0))
+    FROM {tabla} WHERE factura IS NOT NULL GROUP BY cliente
+'''
+
+# Tablas que registran sus cambios en **Cambios**: `{tabla: (clave, columnas)}` (ver `Db.iniciar_tablas`, punto 8)
+TABLAS_CAMBIOS = {
+    "Clientes": ("noIdCliente", ("nombre", "apellido", "direccion", "telefono", "correo")),
+    "productos": ("noIdProducto", ("NombreProducto", "medida", "Fechavencimiento", "PrecioProduccion", "PrecioVenta")),
+    "Ventas": ("noIdVentas", ("fecha", "producto", "cliente", "cantidad", "factura", "precio", "nombre_producto")),
+}
+
+def sql_triggers_cambios(tabla):
+    """
+    Retorna el SQL que (re)crea los triggers de `tabla` que registran en **Cambios** cada alta
+    (`I`, con todas las columnas), modificación (`U`, solo las columnas que cambiaron) y baja
+    (`D`, sin columnas) como JSON. Una modificación que no cambia nada no se registra.
+    """
+    clave, columnas = TABLAS_CAMBIOS[tabla]
+    nuevas = ", ".join(f"'{columna}', new.{columna}" for columna in columnas)
+    distintas = " OR ".join(f"old.{columna} IS NOT new.{columna}" for columna in columnas)
+    cambiadas = " UNION ALL ".join(
+        f"SELECT '{columna}' AS columna, new.{columna} AS valor WHERE old.{columna} IS NOT new.{columna}" for columna in columnas
+    )
+    alta, modificacion, baja = "", f"WHEN {distintas}", ""
+    if tabla == "Ventas":
+        # Solo el libro facturado: las filas sin factura son carritos de versiones anteriores, y las
+        # ventas que borra el archivado siguen existiendo en su archivo (ver `Venta.archivar_ventas`)
+        alta = "WHEN new.factura IS NOT NULL"
+        modificacion = f"WHEN (old.factura IS NOT NULL OR new.factura IS NOT NULL) AND ({distintas})"
+        baja = "WHEN old.factura IS NOT NULL AND IFNULL((SELECT valor FROM Parametros WHERE nombre = 'archivando'), 0) = 0"
+    nombre = f"cambios_{tabla.lower()}"
+    return f'''
+        DROP TRIGGER IF EXISTS {nombre}_ai;
+        CREATE TRIGGER {nombre}_ai AFTER INSERT ON {tabla} {alta} BEGIN
+            INSERT INTO Cambios (tabla, operacion, fila, datos) VALUES ('{tabla}', 'I', new.{clave}, json_object({nuevas}));
+        END;
+        DROP TRIGGER IF EXISTS {nombre}_au;
+        CREATE TRIGGER {nombre}_au AFTER UPDATE ON {tabla} {modificacion} BEGIN
+            INSERT INTO Cambios (tabla, operacion, fila, datos)
+            VALUES ('{tabla}', 'U', new.{clave}, (SELECT json_group_object(columna, valor) FROM ({cambiadas})));
+        END;
+        DROP TRIGGER IF EXISTS {nombre}_ad;
+        CREATE TRIGGER {nombre}_ad AFTER DELETE ON {tabla} {baja} BEGIN
+            INSERT INTO Cambios (tabla, operacion, fila) VALUES ('{tabla}', 'D', old.{clave});
+        END;
+    '''
+
+# Separa la sucursal del id en los ids de varias sucursales: `"centro:42"` (ver `Db.sucursales`)
+SEPARADOR_SUCURSAL = ":"
+
+def id_sucursal(sucursal, id):
+    """
+    Retorna el id de un cliente o producto con el nombre de su sucursal: `"centro:42"`. Los ids de
+    cada `data.db` se repiten entre sucursales, así se distinguen en los reportes consolidados.
+    """
+    return f"{sucursal}{SEPARADOR_SUCURSAL}{id}"
+
+def separar_id_sucursal(texto):
+    """
+    Separa un id de `id_sucursal` en `(sucursal, id)`. Retorna `None` si no tiene ese formato.
+    """
+    sucursal, separador, id = str(texto).rpartition(SEPARADOR_SUCURSAL)
+    if not sucursal or not separador or not id.isdigit():
+        return None
+    return sucursal, int(id)
+
+def reconstruir_resumenes(cursor):
+    """
+    Recalcula las tablas de resumen con `cursor`, que escribe en la base principal: las ventas de
+    `data.db` más las de cada archivo de ventas. Los archivos se leen con su propia conexión porque
+    no se puede adjuntar una base dentro de la transacción del escritor.
+    """
+    cursor.execute("DELETE FROM ResumenProductoDia")
+    cursor.execute("DELETE FROM ResumenCliente")
+    cursor.execute("INSERT INTO ResumenProductoDia (producto, dia, unidades, ingreso) " + SQL_RESUMEN_PRODUCTO_DIA.format(tabla="Ventas"))
+    cursor.execute("INSERT INTO ResumenCliente (cliente, unidades, gasto) " + SQL_RESUMEN_CLIENTE.format(tabla="Ventas"))
+    for _, ruta in Db.archivos_ventas():
+        archivo = sqlite3.connect(ruta)
+        por_dia = archivo.execute(SQL_RESUMEN_PRODUCTO_DIA.format(tabla="Ventas")).fetchall()
+        por_cliente = archivo.execute(SQL_RESUMEN_CLIENTE.format(tabla="Ventas")).fetchall()
+        archivo.close()
+        cursor.executemany('''
+            INSERT INTO ResumenProductoDia (producto, dia, unidades, ingreso) VALUES (?, ?, ?, ?)
+            ON CONFLICT (producto, dia) DO UPDATE SET unidades = unidades + excluded.unidades, ingreso = ingreso + excluded.ingreso
+        ''', por_dia)
+        cursor.executemany('''
+            INSERT INTO ResumenCliente (cliente, unidades, gasto) VALUES (?, ?, ?)
+            ON CONFLICT (cliente) DO UPDATE SET unidades = unidades + excluded.unidades, gasto = gasto + excluded.gasto
+        ''', por_cliente)
 
 class Db:
-    def __init__(self):
+    # Archivo de la base de datos, se puede cambiar para pruebas y mediciones
+    ruta = "data.db"
+
+    def __init__(self, ruta=None):
         """
         Abre una conexión a la base de datos e inicia el objeto de conexión y cursor.
 
         ### Parámetros:
-        - No recibe parámetros.
+        - `ruta` (opcional): Archivo de otra base de datos, por ejemplo el de una sucursal.
 
         ### Comportamiento:
-        1. Conecta a la base de datos `data.db`.
+        1. Conecta a la base de datos `ruta` o `Db.ruta` (por defecto `data.db`).
         2. Inicia el atributo de conexión y cursor.
         """
-        self.conexion = sqlite3.connect("data.db")
+        self.ruta = ruta or Db.ruta
+        self.conexion = sqlite3.connect(self.ruta)
         self.cursor = self.conexion.cursor()
 
+    @staticmethod
+    def ruta_archivo_ventas(anio, ruta=None):
+        """
+        Retorna la ruta del archivo con las ventas archivadas del año `anio`: `<base>.ventas-<año>.db`
+        junto a `ruta` o `Db.ruta` (ver `Venta.archivar_ventas`).
+        """
+        return f"{os.path.splitext(ruta or Db.ruta)[0]}.ventas-{anio}.db"
+
+    @staticmethod
+    def archivos_ventas(ruta=None):
+        """
+        Retorna `[(año, ruta)]` de los archivos de ventas de `ruta` o `Db.ruta`, del año más antiguo al más reciente.
+        """
+        patron = glob.escape(os.path.splitext(ruta or Db.ruta)[0]) + ".ventas-[0-9][0-9][0-9][0-9].db"
+        return sorted((int(archivo[-7:-3]), archivo) for archivo in glob.glob(patron))
+
+    @staticmethod
+    def ruta_sucursales():
+        """
+        Retorna la ruta del registro de sucursales de `Db.ruta`: `<base>.sucursales.json`.
+        """
+        return os.path.splitext(Db.ruta)[0] + ".sucursales.json"
+
+    @staticmethod
+    def sucursales():
+        """
+        Retorna las sucursales registradas: `{nombre: ruta de su data.db}`, en el orden en que se registraron.
+        """
+        try:
+            with open(Db.ruta_sucursales(), encoding="utf-8") as archivo:
+                return json.load(archivo)
+        except FileNotFoundError:
+            return {}
+
+    @staticmethod
+    def registrar_sucursal(nombre, ruta):
+        """
+        ## Función: `registrar_sucursal`
+        Agrega (o cambia la ruta de) una sucursal en el registro de `Db.ruta`.
+
+        ### Parámetros:
+        - `nombre` (str): Nombre de la sucursal, sin `SEPARADOR_SUCURSAL`. Es el prefijo de sus ids
+          en los reportes consolidados (ver `id_sucursal`).
+        - `ruta` (str): Archivo `data.db` de la sucursal. Se guarda como ruta absoluta.
+
+        ### Retorna:
+        - `True` si se registró, `False` si el nombre no es válido o el archivo no es una base de la cervecería.
+        """
+        if not nombre or SEPARADOR_SUCURSAL in nombre:
+            print(f"Nombre de sucursal no válido: '{nombre}'")
+            return False
+        ruta = os.path.abspath(ruta)
+        try:
+            conexion = sqlite3.connect(f"file:{ruta}?mode=ro", uri=True)
+            conexion.execute("SELECT 1 FROM Ventas, ResumenProductoDia LIMIT 1")
+            conexion.close()
+        except sqlite3.Error as e:
+            print(f"No se pudo abrir la base de la sucursal {ruta}: {e}")
+            return False
+
+        sucursales = Db.sucursales()
+        sucursales[nombre] = ruta
+        Db._guardar_sucursales(sucursales)
+        return True
+
+    @staticmethod
+    def quitar_sucursal(nombre):
+        """
+        Quita una sucursal del registro (no borra su base). Retorna `False` si no estaba registrada.
+        """
+        sucursales = Db.sucursales()
+        if sucursales.pop(nombre, None) is None:
+            return False
+        Db._guardar_sucursales(sucursales)
+        return True
+
+    @staticmethod
+    def _guardar_sucursales(sucursales):
+        """
+        Escribe el registro de sucursales (archivo temporal y reemplazo atómico): quien lo lea al
+        mismo tiempo, o después de un corte, ve el registro anterior o el nuevo, nunca uno a medias.
+        """
+        temporal = Db.ruta_sucursales() + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            json.dump(sucursales, archivo, ensure_ascii=False, indent=2)
+        os.replace(temporal, Db.ruta_sucursales())
+
+    @staticmethod
+    def en_sucursales(funcion, *args, sucursales=None, hilos=None):
+        """
+        ## Función: `en_sucursales`
+        Ejecuta una lectura en la base de cada sucursal, en paralelo.
+
+        ### Parámetros:
+        - `funcion`: Se llama como `funcion(cursor, tabla_ventas, *args)` con un cursor de la base de
+          la sucursal y el nombre de su tabla de ventas con historial (ver `tabla_ventas_historicas`).
+        - `sucursales` (opcional): `{nombre: ruta}`; por defecto las registradas (`Db.sucursales`).
+        - `hilos` (opcional): Máximo de sucursales leídas a la vez; por defecto todas.
+
+        ### Comportamiento:
+        1. Cada sucursal se lee en un hilo con su propia conexión y dentro de una transacción, así
+           sus consultas ven una misma foto de la base aunque la sucursal siga vendiendo.
+        2. SQLite suelta el GIL mientras ejecuta la consulta: las sucursales se leen en paralelo
+           (y conviene que `funcion` agrupe en SQL y retorne pocas filas).
+
+        ### Retorna:
+        - `{nombre: resultado de funcion}` en el orden de las sucursales, o `None` si alguna falló
+          (un consolidado sin una sucursal no cuadra).
+        """
+        if sucursales is None:
+            sucursales = Db.sucursales()
+        if not sucursales:
+            return {}
+
+        def leer(ruta):
+            db = Db(ruta)
+            try:
+                tabla = db.tabla_ventas_historicas()
+                db.cursor.execute("BEGIN")
+                return funcion(db.cursor, tabla, *args)
+            finally:
+                db.cerrar()
+
+        with ThreadPoolExecutor(max_workers=hilos or len(sucursales), thread_name_prefix="sucursal") as hilos_lectura:
+            futuros = {nombre: hilos_lectura.submit(leer, ruta) for nombre, ruta in sucursales.items()}
+        resultados = {}
+        for nombre, futuro in futuros.items():
+            try:
+                resultados[nombre] = futuro.result()
+            except (sqlite3.Error, OSError) as e:
+                print(f"No se pudo leer la sucursal '{nombre}' ({sucursales[nombre]}): {e}")
+                return None
+        return resultados
+
+    @staticmethod
+    def consultar_sucursales(sql, parametros=(), sucursales=None, hilos=None):
+        """
+        Ejecuta la consulta `sql` en cada sucursal (ver `en_sucursales`). `{ventas}` en `sql` se
+        reemplaza por la tabla de ventas con historial de cada una.
+
+        ### Retorna:
+        - `[(sucursal, fila)]` con las filas de todas las sucursales, o `None` si alguna falló.
+        """
+        def consultar(cursor, tabla):
+            cursor.execute(sql.replace("{ventas}", tabla), parametros)
+            return cursor.fetchall()
+
+        resultados = Db.en_sucursales(consultar, sucursales=sucursales, hilos=hilos)
+        if resultados is None:
+            return None
+        return [(nombre, fila) for nombre, filas in resultados.items() for fila in filas]
+
+    def tabla_ventas_historicas(self):
+        """
+        Adjunta a esta conexión los archivos de ventas y crea la vista temporal **VentasHistoricas**:
+        las ventas de `data.db` más las archivadas, con las columnas de **Ventas**. SQLite lleva los
+        filtros de la consulta a cada parte de la vista, así se usan los índices de cada archivo.
+
+        ### Retorna:
+        - El nombre de la tabla que deben consultar las lecturas del historial: `"VentasHistoricas"`,
+          o `"Ventas"` si no hay archivos (no se adjunta nada).
+        """
+        archivos = Db.archivos_ventas(self.ruta)
+        if not archivos:
+            return "Ventas"
+        limite = self.conexion.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        if len(archivos) > limite:
+            print(f"Hay {len(archivos)} archivos de ventas y SQLite adjunta hasta {limite}: se omiten los más antiguos")
+            archivos = archivos[-limite:]
+        partes = [f"SELECT {COLUMNAS_VENTAS} FROM main.Ventas"]
+        for anio, ruta in archivos:
+            self.cursor.execute(f"ATTACH DATABASE ? AS ventas_{anio}", (ruta,))
+            partes.append(f"SELECT {COLUMNAS_VENTAS} FROM ventas_{anio}.Ventas")
+        self.cursor.execute(f"CREATE TEMP VIEW VentasHistoricas AS {' UNION ALL '.join(partes)}")
+        return "VentasHistoricas"
+
     def cerrar(self):
         """
         Cerrar la conexion de la base de datos
@@ -43,7 +382,7 @@ class Db:
         except (sqlite3.ProgrammingError, sqlite3.DatabaseError) as e:
             # Si ocurre un error, se reabre la conexión
             print("Conexión cerrada o no disponible. Reabriendo...")
-            self.conexion = sqlite3.connect("data.db")
+            self.conexion = sqlite3.connect(self.ruta)
             self.cursor = self.conexion.cursor()
 
 
@@ -55,22 +394,22 @@ class Db:
         self.cursor.execute(sql)
         self.conexion.commit()
 
-    @staticmethod
     def iniciar_tablas(self):
         """
-        ## Función: `crear_base_de_datos`
-        Crea las tablas necesarias en la base de datos si no existen.
+        ## Función: `iniciar_tablas`
+        Crea las tablas necesarias en la base de datos si no existen. Se llama al iniciar
+        el programa con `Db().iniciar_tablas()`.
 
         ### Parámetros:
-        - `conexion`: Objeto de conexión a la base de datos.
-        - `cursor`: Objeto cursor para ejecutar consultas SQL.
+        - No recibe parámetros, usa la conexión y el cursor del objeto.
 
         ### Comportamiento:
         1. Crea la tabla **Productos** con las siguientes columnas:
         - `noIdProducto` (clave primaria, autoincremental).
         - `NombreProducto` (texto, no nulo).
         - `medida` (texto, no nulo).
-        - `Fechavencimiento` (fecha, no nulo).
+        - `Fechavencimiento` (fecha ISO `AAAA-MM-DD`, no nulo). Las fechas guardadas en otro
+          formato por versiones anteriores se convierten una sola vez (`user_version` 3).
         - `PrecioProduccion` (entero, no nulo).
         - `PrecioVenta` (entero, no nulo).
 
@@ -84,12 +423,68 @@ class Db:
 
         3. Crea la tabla **Ventas** con las siguientes columnas:
         - `noIdVentas` (clave primaria, autoincremental).
-        - `fecha` (fecha y hora).
+        - `fecha` (fecha y hora ISO `AAAA-MM-DD HH:MM:SS`, con índice para consultar por rango).
         - `producto` (entero, clave foránea que referencia a `Productos`).
         - `cliente` (entero, clave foránea que referencia a `Clientes`).
         - `cantidad` (entero).
-
-        4. Guarda los cambios y cierra la conexión.
+        - `factura` (texto, número de factura de la venta).
+        - `precio` (entero, precio unitario al momento de la venta).
+        - `nombre_producto` (texto, nombre del producto al momento de la venta).
+
+        **Ventas** es el libro de ventas facturadas: solo se insertan filas al facturar
+        (`Cliente.accion_facturar_carrito`). Los carritos abiertos viven en `Carrito`.
+        Las bases anteriores sin estas columnas se actualizan con `ALTER TABLE` y las ventas ya
+        registradas toman el precio y el nombre actual del producto.
+
+        4. Crea el índice de texto completo **ClientesBusqueda** (FTS5) sobre nombre, apellido,
+        correo, teléfono y dirección de **Clientes**, con triggers que lo mantienen sincronizado.
+        Si el índice es nuevo se llena con los clientes existentes.
+
+        5. Crea la tabla **Stock** (inventario por producto):
+        - `producto` (clave primaria, referencia a `Productos`).
+        - `cantidad` (entero, nunca negativo).
+        - `minimo` (entero, por debajo o igual a este valor el producto tiene stock bajo).
+
+        Un producto sin fila en **Stock** no controla inventario (se puede vender sin límite).
+
+        6. Crea la tabla **Lotes** (unidades de un producto con la misma fecha de vencimiento):
+        - `noIdLote` (clave primaria, autoincremental).
+        - `producto` (referencia a `Productos`).
+        - `vencimiento` (fecha ISO `AAAA-MM-DD`).
+        - `cantidad` (entero, unidades que quedan del lote, nunca negativo).
+
+        Las unidades de los lotes también cuentan en **Stock**; al vender se descuentan primero
+        de los lotes que vencen antes (FEFO).
+
+        7. Crea las tablas de resumen de **Ventas** facturadas, mantenidas por triggers al
+        insertar, modificar o borrar ventas:
+        - **ResumenProductoDia**: `unidades` e `ingreso` por `producto` y `dia` (`AAAA-MM-DD`).
+        - **ResumenCliente**: `unidades` y `gasto` total por `cliente`.
+
+        Si las tablas son nuevas se llenan con las ventas existentes (`reconstruir_resumenes`).
+        Las ventas que se pasan a un archivo (`Venta.archivar_ventas`) siguen contando: mientras
+        el archivado borra de **Ventas**, el parámetro `archivando` de **Parametros** vale 1 y el
+        trigger de borrado no resta.
+
+        8. Crea el registro de cambios **Cambios** (ver `Cambios`), que llenan los triggers de
+        **Clientes**, **Productos** y **Ventas** (`sql_triggers_cambios`):
+        - `noIdCambio` (clave primaria, autoincremental: el orden de los cambios, nunca se reutiliza).
+        - `tabla`, `operacion` (`I`, `U` o `D`) y `fila` (clave de la fila que cambió).
+        - `datos` (JSON con las columnas nuevas o cambiadas).
+        - `fecha` (fecha y hora UTC del cambio).
+
+        Y **ConsumidoresCambios**: el último cambio confirmado (`ultimo`) por cada `nombre` de consumidor.
+
+        9. Crea **VentasIngeridas**, las claves de idempotencia de las ventas ingeridas desde
+        puntos de venta externos (`ingesta.ingerir`):
+        - `clave` (texto, clave primaria: la misma venta no se ingiere dos veces).
+        - `venta` (entero, `noIdVentas` de la venta insertada).
+
+        10. Guarda los cambios y cierra la conexión.
+
+        Lo que no se puede crear con `IF NOT EXISTS` (cambios de datos, triggers que se reemplazan)
+        va en pasos numerados por `PRAGMA user_version` que se aplican una sola vez por base: con la
+        base al día, iniciar solo lee el esquema y no escribe.
         """
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS productos (
@@ -119,15 +514,687 @@ class Db:
                 producto INTEGER,
                 cliente INTEGER,
                 cantidad INTEGER,
+                factura TEXT,
+                precio INTEGER,
+                nombre_producto TEXT,
                 FOREIGN KEY (producto) REFERENCES Productos(noIdProducto),
                 FOREIGN KEY (cliente) REFERENCES Clientes(noIdCliente)
             )
         ''')
+        self.agregar_columna("Ventas", "factura", "TEXT")
+        self.agregar_columna("Ventas", "precio", "INTEGER")
+        if self.agregar_columna("Ventas", "nombre_producto", "TEXT"):
+            # Facturas, historial y reportes leen solo Ventas, sin cruzar con productos
+            self.cursor.execute('''
+                UPDATE Ventas SET
+                    precio = IFNULL(precio, (SELECT PrecioVenta FROM productos WHERE noIdProducto = Ventas.producto)),
+                    nombre_producto = (SELECT NombreProducto FROM productos WHERE noIdProducto = Ventas.producto)
+            ''')
+
+        # Una línea por producto en cada factura, y el historial de un cliente en orden.
+        # Las filas sin factura son carritos de versiones anteriores, `Carrito` las recoge al iniciar.
+        self.cursor.executescript('''
+            DROP INDEX IF EXISTS ventas_cliente_producto;
+            CREATE UNIQUE INDEX IF NOT EXISTS ventas_factura_producto ON Ventas(factura, producto);
+            CREATE INDEX IF NOT EXISTS ventas_cliente ON Ventas(cliente, noIdVentas);
+            CREATE INDEX IF NOT EXISTS ventas_fecha ON Ventas(fecha);
+        ''')
+
+        # Migraciones que recorren tablas grandes: se hacen una sola vez por base (PRAGMA user_version)
+        self.cursor.execute("PRAGMA user_version")
+        version = self.cursor.fetchone()[0]
+        if version < 1:
+            # Versión 1: fechas de Ventas en ISO, para que se ordenen y comparen bien como texto.
+            # El formato DD/MM/AAAA [HH:MM:SS] se reordena en SQL; el resto se convierte en Python
+            self.cursor.executescript('''
+                UPDATE Ventas SET fecha = substr(fecha, 7, 4) || '-' || substr(fecha, 4, 2) || '-' || substr(fecha, 1, 2) || ' ' || substr(fecha, 12, 8)
+                WHERE fecha GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9]';
+                UPDATE Ventas SET fecha = substr(fecha, 7, 4) || '-' || substr(fecha, 4, 2) || '-' || substr(fecha, 1, 2) || ' 00:00:00'
+                WHERE fecha GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]';
+            ''')
+            self.cursor.execute('''
+                SELECT noIdVentas, fecha FROM Ventas
+                WHERE fecha NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9]'
+            ''')
+            for id_venta, fecha in self.cursor.fetchall():
+                fecha_iso = normalizar_fecha_hora(fecha)
+                if fecha_iso is None:
+                    print(f"Fecha no reconocida en la venta {id_venta}: {fecha}")
+                    continue
+                self.cursor.execute("UPDATE Ventas SET fecha = ? WHERE noIdVentas = ?", (fecha_iso, id_venta))
+            self.cursor.execute("PRAGMA user_version = 1")
+
+        # El índice sobre `cantidad - minimo` permite listar el stock bajo sin recorrer la tabla
+        self.cursor.executescript('''
+            CREATE TABLE IF NOT EXISTS Stock (
+                producto INTEGER PRIMARY KEY,
+                cantidad INTEGER NOT NULL CHECK (cantidad >= 0),
+                minimo INTEGER NOT NULL DEFAULT 0,
+                FOREIGN KEY (producto) REFERENCES Productos(noIdProducto)
+            );
+            CREATE INDEX IF NOT EXISTS stock_faltante ON Stock(cantidad - minimo);
+        ''')
+
+        # Lotes por vencer: índice parcial con solo los lotes que tienen unidades, y el orden FEFO por producto
+        self.cursor.executescript('''
+            CREATE TABLE IF NOT EXISTS Lotes (
+                noIdLote INTEGER PRIMARY KEY AUTOINCREMENT,
+                producto INTEGER NOT NULL,
+                vencimiento TEXT NOT NULL,
+                cantidad INTEGER NOT NULL CHECK (cantidad >= 0),
+                FOREIGN KEY (producto) REFERENCES Productos(noIdProducto)
+            );
+            CREATE INDEX IF NOT EXISTS lotes_vencimiento ON Lotes(vencimiento) WHERE cantidad > 0;
+            CREATE INDEX IF NOT EXISTS lotes_producto ON Lotes(producto, vencimiento);
+            CREATE INDEX IF NOT EXISTS productos_vencimiento ON productos(Fechavencimiento);
+        ''')
+
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'ClientesBusqueda'")
+        indice_nuevo = self.cursor.fetchone() is None
+
+        # Tabla de contenido externo: el texto vive en Clientes, FTS5 solo guarda el índice
+        self.cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS ClientesBusqueda USING fts5(
+                nombre, apellido, correo, telefono, direccion,
+                content='Clientes', content_rowid='noIdCliente',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        ''')
+
+        self.cursor.executescript('''
+            CREATE TRIGGER IF NOT EXISTS clientes_busqueda_ai AFTER INSERT ON Clientes BEGIN
+                INSERT INTO ClientesBusqueda(rowid, nombre, apellido, correo, telefono, direccion)
+                VALUES (new.noIdCliente, new.nombre, new.apellido, new.correo, new.telefono, new.direccion);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS clientes_busqueda_ad AFTER DELETE ON Clientes BEGIN
+                INSERT INTO ClientesBusqueda(ClientesBusqueda, rowid, nombre, apellido, correo, telefono, direccion)
+                VALUES ('delete', old.noIdCliente, old.nombre, old.apellido, old.correo, old.telefono, old.direccion);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS clientes_busqueda_au AFTER UPDATE ON Clientes BEGIN
+                INSERT INTO ClientesBusqueda(ClientesBusqueda, rowid, nombre, apellido, correo, telefono, direccion)
+                VALUES ('delete', old.noIdCliente, old.nombre, old.apellido, old.correo, old.telefono, old.direccion);
+                INSERT INTO ClientesBusqueda(rowid, nombre, apellido, correo, telefono, direccion)
+                VALUES (new.noIdCliente, new.nombre, new.apellido, new.correo, new.telefono, new.direccion);
+            END;
+        ''')
+
+        if indice_nuevo:
+            self.cursor.execute("INSERT INTO ClientesBusqueda(ClientesBusqueda) VALUES ('rebuild')")
+
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'ResumenCliente'")
+        resumenes_nuevos = self.cursor.fetchone() is None
+
+        # Resúmenes de las ventas facturadas: consultar el total de un cliente o las ventas de un
+        # producto en un mes lee unas pocas filas en vez de recorrer el libro.
+        # Las filas que quedan en cero al borrar ventas se conservan (no cambian ningún total).
+        self.cursor.executescript('''
+            CREATE TABLE IF NOT EXISTS ResumenProductoDia (
+                producto INTEGER NOT NULL,
+                dia TEXT NOT NULL,
+                unidades INTEGER NOT NULL,
+                ingreso INTEGER NOT NULL,
+                PRIMARY KEY (producto, dia)
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS ResumenCliente (
+                cliente INTEGER PRIMARY KEY,
+                unidades INTEGER NOT NULL,
+                gasto INTEGER NOT NULL
+            );
+
+            CREATE TRIGGER IF NOT EXISTS resumen_ventas_ai AFTER INSERT ON Ventas WHEN new.factura IS NOT NULL BEGIN
+                INSERT INTO ResumenProductoDia (producto, dia, unidades, ingreso)
+                VALUES (new.producto, substr(new.fecha, 1, 10), new.cantidad, new.cantidad * IFNULL(new.precio, 0))
+                ON CONFLICT (producto, dia) DO UPDATE SET
+                    unidades = unidades + excluded.unidades, ingreso = ingreso + excluded.ingreso;
+                INSERT INTO ResumenCliente (cliente, unidades, gasto)
+                VALUES (new.cliente, new.cantidad, new.cantidad * IFNULL(new.precio, 0))
+                ON CONFLICT (cliente) DO UPDATE SET
+                    unidades = unidades + excluded.unidades, gasto = gasto + excluded.gasto;
+            END;
+
+            CREATE TABLE IF NOT EXISTS Parametros (
+                nombre TEXT PRIMARY KEY,
+                valor
+            );
+
+            CREATE TRIGGER IF NOT EXISTS resumen_ventas_au AFTER UPDATE OF fecha, producto, cliente, cantidad, factura, precio ON Ventas BEGIN
+                UPDATE ResumenProductoDia SET unidades = unidades - old.cantidad, ingreso = ingreso - old.cantidad * IFNULL(old.precio, 0)
+                WHERE producto = old.producto AND dia = substr(old.fecha, 1, 10) AND old.factura IS NOT NULL;
+                UPDATE ResumenCliente SET unidades = unidades - old.cantidad, gasto = gasto - old.cantidad * IFNULL(old.precio, 0)
+                WHERE cliente = old.cliente AND old.factura IS NOT NULL;
+                INSERT INTO ResumenProductoDia (producto, dia, unidades, ingreso)
+                SELECT new.producto, substr(new.fecha, 1, 10), new.cantidad, new.cantidad * IFNULL(new.precio, 0)
+                WHERE new.factura IS NOT NULL
+                ON CONFLICT (producto, dia) DO UPDATE SET
+                    unidades = unidades + excluded.unidades, ingreso = ingreso + excluded.ingreso;
+                INSERT INTO ResumenCliente (cliente, unidades, gasto)
+                SELECT new.cliente, new.cantidad, new.cantidad * IFNULL(new.precio, 0)
+                WHERE new.factura IS NOT NULL
+                ON CONFLICT (cliente) DO UPDATE SET
+                    unidades = unidades + excluded.unidades, gasto = gasto + excluded.gasto;
+            END;
+        ''')
+
+        if resumenes_nuevos:
+            reconstruir_resumenes(self.cursor)
+
+        # Registro de cambios para los sistemas que necesitan solo lo nuevo (por ejemplo la contabilidad)
+        self.cursor.executescript('''
+            CREATE TABLE IF NOT EXISTS Cambios (
+                noIdCambio INTEGER PRIMARY KEY AUTOINCREMENT,
+                tabla TEXT NOT NULL,
+                operacion TEXT NOT NULL,
+                fila INTEGER NOT NULL,
+                datos TEXT,
+                fecha TEXT NOT NULL DEFAULT (datetime('now'))
+            );
+
+            CREATE TABLE IF NOT EXISTS ConsumidoresCambios (
+                nombre TEXT PRIMARY KEY,
+                ultimo INTEGER NOT NULL,
+                fecha TEXT
+            );
+        ''')
+
+        # Ventas ingeridas de puntos de venta externos (ver ingesta.py)
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS VentasIngeridas (
+                clave TEXT PRIMARY KEY,
+                venta INTEGER NOT NULL
+            ) WITHOUT ROWID
+        ''')
+
+        if version < 2:
+            # Versión 2: triggers que se reemplazan (no bastan con `IF NOT EXISTS`): el de borrado de
+            # los resúmenes, que en bases anteriores no miraba `archivando`, y los del registro de cambios.
+            # Con la base al día el inicio no escribe nada y no espera a otro programa que esté escribiendo
+            self.cursor.executescript('''
+                BEGIN;
+                INSERT OR IGNORE INTO Parametros (nombre, valor) VALUES ('archivando', 0);
+
+                DROP TRIGGER IF EXISTS resumen_ventas_ad;
+                CREATE TRIGGER resumen_ventas_ad AFTER DELETE ON Ventas
+                WHEN old.factura IS NOT NULL AND IFNULL((SELECT valor FROM Parametros WHERE nombre = 'archivando'), 0) = 0 BEGIN
+                    UPDATE ResumenProductoDia SET unidades = unidades - old.cantidad, ingreso = ingreso - old.cantidad * IFNULL(old.precio, 0)
+                    WHERE producto = old.producto AND dia = substr(old.fecha, 1, 10);
+                    UPDATE ResumenCliente SET unidades = unidades - old.cantidad, gasto = gasto - old.cantidad * IFNULL(old.precio, 0)
+                    WHERE cliente = old.cliente;
+                END;
+            ''' + "".join(sql_triggers_cambios(tabla) for tabla in TABLAS_CAMBIOS) + '''
+                PRAGMA user_version = 2;
+                COMMIT;
+            ''')
+
+        if version < 3:
+            # Versión 3: fechas de vencimiento guardadas en otro formato (por ejemplo DD/MM/AAAA) pasan
+            # a ISO. Las que no se reconocen se informan esta vez y quedan como están
+            self.cursor.execute('''
+                SELECT noIdProducto, Fechavencimiento FROM productos
+                WHERE Fechavencimiento NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+            ''')
+            for id_producto, fecha in self.cursor.fetchall():
+                fecha_iso = normalizar_fecha(fecha)
+                if fecha_iso is None:
+                    print(f"Fecha de vencimiento no reconocida en el producto {id_producto}: {fecha}")
+                    continue
+                self.cursor.execute("UPDATE productos SET Fechavencimiento = ? WHERE noIdProducto = ?", (fecha_iso, id_producto))
+            self.cursor.execute("PRAGMA user_version = 3")
+
         self.conexion.commit()
 
         self.cerrar()
         return
 
+    def agregar_columna(self, tabla, columna, tipo):
+        """
+        Agrega `columna` a `tabla` si todavía no existe (migración de bases anteriores).
+        Retorna `True` si la columna se agregó.
+        """
+        self.cursor.execute(f"PRAGMA table_info({tabla})")
+        if columna in [fila[1] for fila in self.cursor.fetchall()]:
+            return False
+        self.cursor.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna} {tipo}")
+        return True
+
+class Escritor:
+    """
+    Hilo único que ejecuta todas las escrituras del modelo sobre una base de datos.
+
+    Los métodos de `Cliente`, `Producto` y `Venta` no abren su propia conexión para escribir:
+    envían una función a la cola del escritor y esperan su `Future`. El hilo toma las escrituras
+    que llegan dentro de `VENTANA_MS` y las confirma en una sola transacción (group commit), con
+    un solo fsync para todo el grupo y sin competir por el bloqueo de SQLite (`SQLITE_BUSY`).
+    Si el grupo anterior tuvo una sola escritura no hay concurrencia y no se espera la ventana.
+
+    Cada escritura corre dentro de su propio `SAVEPOINT`: si falla, solo se deshace esa escritura
+    y su `Future` recibe la excepción; las demás del grupo se confirman normalmente.
+    """
+
+    # Tiempo que se espera por más escrituras antes de confirmar el grupo (en milisegundos)
+    VENTANA_MS = 1
+
+    # Máximo de escrituras por transacción
+    MAXIMO_GRUPO = 500
+
+    # Un escritor por archivo de base de datos
+    _escritores: dict = {}
+    _candado = threading.Lock()
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.cola = queue.Queue()
+        self.hilo = threading.Thread(target=self._ciclo, name=f"escritor-{os.path.basename(ruta)}", daemon=True)
+        self.hilo.start()
+
+    @classmethod
+    def obtener(cls):
+        """
+        Retorna el escritor de `Db.ruta`, creándolo la primera vez.
+        """
+        with cls._candado:
+            escritor = cls._escritores.get(Db.ruta)
+            if escritor is None:
+                escritor = cls._escritores[Db.ruta] = Escritor(Db.ruta)
+            return escritor
+
+    @classmethod
+    def enviar(cls, funcion, *args) -> Future:
+        """
+        Encola `funcion(cursor, *args)` para el hilo escritor y retorna un `Future` con lo que
+        retorne la función (o la excepción que lance) una vez confirmada la transacción.
+        """
+        futuro = Future()
+        cls.obtener().cola.put((funcion, args, futuro))
+        return futuro
+
+    @classmethod
+    def ejecutar(cls, funcion, *args):
+        """
+        Igual que `enviar`, pero espera el resultado. Lanza la excepción de la escritura si falló.
+        """
+        return cls.enviar(funcion, *args).result()
+
+    def _ciclo(self):
+        # Transacciones manuales (isolation_level=None) para controlar BEGIN/SAVEPOINT/COMMIT
+        conexion = sqlite3.connect(self.ruta, isolation_level=None, timeout=30)
+        conexion.execute("PRAGMA journal_mode=WAL")  # Los lectores no bloquean al escritor ni al revés
+        cursor = conexion.cursor()
+        esperar = False
+
+        while True:
+            grupo = [self.cola.get()]
+            limite = time.perf_counter() + (self.VENTANA_MS / 1000 if esperar else 0)
+            while len(grupo) < self.MAXIMO_GRUPO:
+                restante = limite - time.perf_counter()
+                try:
+                    grupo.append(self.cola.get(timeout=restante) if restante > 0 else self.cola.get_nowait())
+                except queue.Empty:
+                    break
+            esperar = len(grupo) > 1
+
+            resultados = []
+            with tramo("Escritor.transaccion", tareas=len(grupo)):
+                try:
+                    cursor.execute("BEGIN IMMEDIATE")
+                    for funcion, args, futuro in grupo:
+                        cursor.execute("SAVEPOINT escritura")
+                        try:
+                            resultados.append((futuro, funcion(cursor, *args), None))
+                            cursor.execute("RELEASE escritura")
+                        except Exception as e:
+                            cursor.execute("ROLLBACK TO escritura")
+                            cursor.execute("RELEASE escritura")
+                            resultados.append((futuro, None, e))
+                    cursor.execute("COMMIT")
+                except Exception as e:
+                    # Falló la transacción completa (por ejemplo el disco): nadie del grupo quedó guardado
+                    if conexion.in_transaction:
+                        cursor.execute("ROLLBACK")
+                    resultados = [(futuro, None, e) for _, _, futuro in grupo]
+
+            for futuro, resultado, error in resultados:
+                if error is None:
+                    futuro.set_result(resultado)
+                else:
+                    futuro.set_exception(error)
+
+class EventosCarrito:
+    """
+    Publicador de cambios del carrito (patrón observador).
+
+    Los métodos del modelo que escriben en el carrito publican un evento por cada cambio
+    y las ventanas abiertas se suscriben por cliente para aplicarlo como una diferencia,
+    sin volver a consultar la base de datos.
+
+    ### Eventos:
+    - `"agregar"`: `datos` es un diccionario con la línea (`id`, `fecha`, `producto`, `nombre`, `cantidad`, `precio`).
+    - `"borrar"`: `datos` es el ID de la línea eliminada.
+    - `"reiniciar"`: el carrito quedó vacío, `datos` es `None`.
+    """
+
+    _suscriptores: dict = {}
+
+    @classmethod
+    def suscribir(cls, id_cliente, funcion):
+        """
+        Registra `funcion(tipo, datos)` para recibir los cambios del carrito de `id_cliente`.
+        """
+        cls._suscriptores.setdefault(id_cliente, []).append(funcion)
+
+    @classmethod
+    def desuscribir(cls, id_cliente, funcion):
+        """
+        Deja de enviar eventos a `funcion`. No falla si no estaba suscrita.
+        """
+        funciones = cls._suscriptores.get(id_cliente, [])
+        if funcion in funciones:
+            funciones.remove(funcion)
+        if not funciones:
+            cls._suscriptores.pop(id_cliente, None)
+
+    @classmethod
+    def publicar(cls, id_cliente, tipo, datos=None):
+        """
+        Envía el evento a todos los suscriptores del cliente. Un suscriptor que falla
+        no impide que los demás reciban el evento.
+        """
+        for funcion in list(cls._suscriptores.get(id_cliente, [])):
+            try:
+                funcion(tipo, datos)
+            except Exception as e:
+                print(f"Error aplicando evento '{tipo}' del carrito: {e}")
+
+class CarritosOcupados(Exception):
+    """
+    Otro programa tiene abiertos los carritos de la misma base (ver `Carrito`).
+    """
+
+    def __init__(self, ruta):
+        super().__init__(f"Los carritos de {ruta} están abiertos en otro programa: use ese programa o `servidor.py`.")
+        self.ruta = ruta
+
+
+def bloquear_archivo(ruta):
+    """
+    Abre `ruta` y toma un candado exclusivo del sistema operativo sin esperar. Retorna el archivo
+    abierto (el candado dura mientras siga abierto, como máximo hasta que termine el proceso) o
+    `None` si otro proceso ya lo tiene.
+    """
+    archivo = open(ruta, "a+b")
+    try:
+        if os.name == "nt":
+            import msvcrt
+
+            archivo.seek(0)
+            msvcrt.locking(archivo.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        archivo.close()
+        return None
+    return archivo
+
+
+class Carrito:
+    """
+    Carritos abiertos de los clientes, en memoria.
+
+    Agregar, quitar o reiniciar líneas no escribe en la base de datos: solo cambia un
+    diccionario protegido por un candado. Al facturar, `tomar` entrega las líneas y las saca
+    del carrito, y `Cliente.accion_facturar_carrito` las guarda en **Ventas** en una sola
+    transacción.
+
+    Para no perder los carritos si el programa se cierra, se guarda una copia en
+    `<base>.carritos.json` como máximo cada `INTERVALO_RESPALDO_S` segundos y al salir.
+    Con `RESPALDO = False` los carritos solo viven en memoria.
+
+    Hay un carrito por archivo de base de datos (`Carrito.obtener()` usa `Db.ruta`). Dos programas
+    abiertos a la vez no comparten carritos (para eso está `servidor.py`), y si los dos los abrieran
+    cada uno sobrescribiría el respaldo del otro: el primer programa que abre los carritos de una
+    base toma un candado exclusivo sobre `<base>.carritos.lock` hasta que termina, y en otro
+    programa `Carrito.obtener()` lanza `CarritosOcupados`.
+    """
+
+    RESPALDO = True
+    INTERVALO_RESPALDO_S = 1.0
+
+    _carritos: dict = {}
+    _candado_registro = threading.Lock()
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.ruta_respaldo = os.path.splitext(ruta)[0] + ".carritos.json"
+        self.candado = threading.Lock()
+        # {id_cliente: {producto: linea}} con linea = {"id", "fecha", "producto", "nombre", "cantidad", "precio"}.
+        # El nombre y el precio se fijan al agregar el producto: un cambio de precio no afecta carritos abiertos.
+        self.lineas = {}
+        # {id_linea: (id_cliente, producto)} para quitar una línea por su ID
+        self.ubicacion = {}
+        self.siguiente_id = itertools.count(1)
+        self.temporizador = None
+        self.lector = threading.local()
+
+        self.bloqueo = None
+        if self.RESPALDO:
+            self.bloqueo = bloquear_archivo(os.path.splitext(ruta)[0] + ".carritos.lock")
+            if self.bloqueo is None:
+                raise CarritosOcupados(ruta)
+
+        self._cargar_respaldo()
+        self._recoger_carritos_anteriores()
+
+    @classmethod
+    def obtener(cls):
+        """
+        Retorna el carrito de `Db.ruta`, creándolo (y recuperando su respaldo) la primera vez.
+        Lanza `CarritosOcupados` si otro programa tiene abiertos los carritos de esa base.
+        """
+        with cls._candado_registro:
+            carrito = cls._carritos.get(Db.ruta)
+            if carrito is None:
+                carrito = cls._carritos[Db.ruta] = Carrito(Db.ruta)
+            return carrito
+
+    def _conexion_lectura(self):
+        # Una conexión de solo lectura por hilo para consultar precios sin abrir una cada vez
+        conexion = getattr(self.lector, "conexion", None)
+        if conexion is None:
+            conexion = self.lector.conexion = sqlite3.connect(self.ruta)
+        return conexion
+
+    def _cargar_respaldo(self):
+        if not self.RESPALDO or not os.path.exists(self.ruta_respaldo):
+            return
+        try:
+            with open(self.ruta_respaldo, encoding="utf-8") as archivo:
+                respaldo = json.load(archivo)
+        except (OSError, ValueError) as e:
+            print(f"No se pudo leer el respaldo de carritos {self.ruta_respaldo}: {e}")
+            return
+
+        for id_cliente, lineas in respaldo.get("carritos", {}).items():
+            for linea in lineas:
+                if "nombre" not in linea:
+                    # Respaldo de una versión que no guardaba el nombre
+                    fila = self._producto(linea["producto"])
+                    linea["nombre"] = fila[0] if fila else None
+                self._poner(int(id_cliente), linea)
+        self.siguiente_id = itertools.count(max(respaldo.get("siguiente_id", 1), max(self.ubicacion, default=0) + 1))
+
+    def _recoger_carritos_anteriores(self):
+        """
+        Las versiones anteriores guardaban el carrito como filas de **Ventas** sin factura.
+        Se pasan a memoria, se respaldan y se borran del libro de ventas.
+        """
+        conexion = self._conexion_lectura()
+        try:
+            filas = conexion.execute('''
+                SELECT V.noIdVentas, V.fecha, V.producto, V.cliente, V.cantidad, IFNULL(P.PrecioVenta, 0), P.NombreProducto
+                FROM Ventas V
+                LEFT JOIN productos P ON P.noIdProducto = V.producto
+                WHERE V.factura IS NULL
+            ''').fetchall()
+        except sqlite3.OperationalError:
+            return  # Base sin tablas o sin migrar todavía (`Db().iniciar_tablas()` no se ha llamado)
+        if not filas:
+            return
+
+        for _, fecha, producto, id_cliente, cantidad, precio, nombre in filas:
+            linea = self.lineas.get(id_cliente, {}).get(producto)
+            if linea:
+                linea["cantidad"] += cantidad
+            else:
+                self._poner(id_cliente, {"id": next(self.siguiente_id), "fecha": fecha, "producto": producto,
+                                         "nombre": nombre, "cantidad": cantidad, "precio": precio})
+        self.respaldar()
+
+        def borrar(cursor, ids):
+            cursor.executemany("DELETE FROM Ventas WHERE noIdVentas = ? AND factura IS NULL", ids)
+
+        Escritor.ejecutar(borrar, [(fila[0],) for fila in filas])
+
+    def _producto(self, producto):
+        """
+        Retorna `(NombreProducto, PrecioVenta)` del producto o `None` si no existe.
+        """
+        return self._conexion_lectura().execute(
+            "SELECT NombreProducto, PrecioVenta FROM productos WHERE noIdProducto = ?", (producto,)
+        ).fetchone()
+
+    def _poner(self, id_cliente, linea):
+        self.lineas.setdefault(id_cliente, {})[linea["producto"]] = linea
+        self.ubicacion[linea["id"]] = (id_cliente, linea["producto"])
+
+    def _cambio(self):
+        """
+        Programa el respaldo en disco si no hay uno pendiente. Se llama con el candado tomado.
+        """
+        if self.RESPALDO and self.temporizador is None:
+            self.temporizador = threading.Timer(self.INTERVALO_RESPALDO_S, self.respaldar)
+            self.temporizador.daemon = True
+            self.temporizador.start()
+
+    def respaldar(self):
+        """
+        Escribe todos los carritos en `ruta_respaldo` (archivo temporal y reemplazo atómico).
+        """
+        if not self.RESPALDO:
+            return
+        with self.candado:
+            self.temporizador = None
+            respaldo = {
+                "siguiente_id": max(self.ubicacion, default=0) + 1,
+                "carritos": {id_cliente: list(lineas.values()) for id_cliente, lineas in self.lineas.items()},
+            }
+        temporal = self.ruta_respaldo + ".tmp"
+        try:
+            with open(temporal, "w", encoding="utf-8") as archivo:
+                json.dump(respaldo, archivo, ensure_ascii=False)
+            os.replace(temporal, self.ruta_respaldo)
+        except OSError as e:
+            print(f"No se pudo respaldar los carritos en {self.ruta_respaldo}: {e}")
+
+    def agregar(self, id_cliente, producto, cantidad, fecha):
+        """
+        Agrega `cantidad` del producto al carrito, o la suma si el producto ya está.
+        Retorna la línea resultante (una copia). Si el producto no existe la línea queda sin
+        nombre y con precio 0, y no se factura. Lanza `ValueError` si `cantidad` no es positiva.
+        """
+        return self.agregar_varios(id_cliente, [(producto, cantidad)], fecha)[0]
+
+    def agregar_varios(self, id_cliente, lineas, fecha):
+        """
+        Agrega varios pares `(producto, cantidad)` al carrito de una vez: primero consulta todos los
+        productos y después aplica todas las líneas con el candado tomado, así otro hilo nunca ve
+        solo una parte. Retorna la línea resultante de cada par (copias, en el mismo orden). Lanza
+        `ValueError`, sin agregar nada, si alguna cantidad no es positiva.
+        """
+        for _, cantidad in lineas:
+            if cantidad <= 0:
+                raise ValueError(f"La cantidad debe ser mayor que cero: {cantidad}.")
+        filas = {producto: self._producto(producto) for producto, _ in lineas}
+        fecha = normalizar_fecha_hora(fecha) or fecha
+        resultado = []
+        with self.candado:
+            for producto, cantidad in lineas:
+                linea = self.lineas.get(id_cliente, {}).get(producto)
+                if linea:
+                    linea["cantidad"] += cantidad
+                else:
+                    fila = filas[producto]
+                    linea = {"id": next(self.siguiente_id), "fecha": fecha, "producto": producto,
+                             "nombre": fila[0] if fila else None, "cantidad": cantidad, "precio": fila[1] if fila else 0}
+                    self._poner(id_cliente, linea)
+                resultado.append(dict(linea))
+            self._cambio()
+        return resultado
+
+    def quitar(self, id_linea):
+        """
+        Quita una línea por su ID. Retorna el cliente dueño del carrito o `None` si no existe.
+        """
+        with self.candado:
+            ubicacion = self.ubicacion.pop(id_linea, None)
+            if ubicacion is None:
+                return None
+            id_cliente, producto = ubicacion
+            del self.lineas[id_cliente][producto]
+            if not self.lineas[id_cliente]:
+                del self.lineas[id_cliente]
+            self._cambio()
+            return id_cliente
+
+    def tomar(self, id_cliente):
+        """
+        Saca y retorna todas las líneas del carrito del cliente (para facturarlas).
+        """
+        with self.candado:
+            lineas = list(self.lineas.pop(id_cliente, {}).values())
+            for linea in lineas:
+                del self.ubicacion[linea["id"]]
+            self._cambio()
+            return lineas
+
+    def devolver(self, id_cliente, lineas):
+        """
+        Vuelve a poner líneas tomadas con `tomar` (la factura no se pudo guardar).
+        Las cantidades se suman a lo que se haya agregado mientras tanto.
+        """
+        with self.candado:
+            for linea in lineas:
+                actual = self.lineas.get(id_cliente, {}).get(linea["producto"])
+                if actual:
+                    actual["cantidad"] += linea["cantidad"]
+                else:
+                    self._poner(id_cliente, linea)
+            self._cambio()
+
+    def ver(self, id_cliente):
+        """
+        Retorna copias de las líneas del carrito del cliente, en el orden en que se agregaron.
+        """
+        with self.candado:
+            return sorted((dict(linea) for linea in self.lineas.get(id_cliente, {}).values()), key=lambda l: l["id"])
+
+    def clientes(self):
+        """
+        Retorna los IDs de los clientes con al menos una línea en el carrito.
+        """
+        with self.candado:
+            return sorted(self.lineas)
+
+@atexit.register
+def _respaldar_carritos_al_salir():
+    for carrito in list(Carrito._carritos.values()):
+        if carrito.temporizador is not None:
+            carrito.temporizador.cancel()
+            carrito.respaldar()
+
 class Objeto:
     """
     Clase generica para implementar los metodos de crear y listar, es clase
@@ -159,6 +1226,17 @@ class Objeto:
 
 
     
+class StockInsuficiente(Exception):
+    """
+    No hay unidades suficientes de un producto para la venta. La venta no se registró.
+    """
+
+    def __init__(self, producto, disponible, pedido):
+        super().__init__(f"Stock insuficiente del producto {producto}: hay {disponible}, se piden {pedido}.")
+        self.producto = producto
+        self.disponible = disponible
+        self.pedido = pedido
+
 class Producto(Objeto):
     def __init__(self, id):
         super().__init__()
@@ -190,18 +1268,247 @@ class Producto(Objeto):
         Retorna:
         - True si la actualización fue exitosa, False en caso contrario.
         """
+        def escribir(cursor):
+            cursor.execute("UPDATE productos SET NombreProducto = ? WHERE noIdProducto = ?", (nuevo_nombre, id_producto))
+            return cursor.rowcount > 0  # Retorna True si se actualizó algún registro
+
         try:
-            db = Db()
-            db.verificar_conexion()
-            db.cursor.execute("UPDATE productos SET NombreProducto = ? WHERE noIdProducto = ?", (nuevo_nombre, id_producto))
-            db.conexion.commit()
-            exito = db.cursor.rowcount > 0  # Retorna True si se actualizó algún registro
-            db.cerrar()
-            return exito
+            return Escritor.ejecutar(escribir)
         except Exception as e:
             print(f"Error al actualizar el nombre del producto: {e}")
             return False
 
+    @staticmethod
+    def agregar_stock(id_producto, cantidad, minimo=None):
+        """
+        ## Función: `agregar_stock`
+        Suma `cantidad` unidades al inventario de un producto (negativa para un ajuste).
+        La primera vez crea la fila en **Stock** y el producto empieza a controlar inventario.
+
+        ### Parámetros:
+        - `id_producto` (int): ID del producto.
+        - `cantidad` (int): Unidades que entran.
+        - `minimo` (int, opcional): Nuevo nivel de stock bajo. Si no se pasa se conserva.
+
+        ### Retorna:
+        - `int`: Unidades disponibles después del cambio, o `None` si ocurrió un error
+          (por ejemplo, un ajuste que dejaría el inventario en negativo).
+        """
+        def escribir(cursor):
+            cursor.execute('''
+                INSERT INTO Stock (producto, cantidad, minimo) VALUES (?, ?, IFNULL(?, 0))
+                ON CONFLICT (producto) DO UPDATE SET
+                    cantidad = cantidad + excluded.cantidad,
+                    minimo = IFNULL(?, minimo)
+                RETURNING cantidad
+            ''', (id_producto, cantidad, minimo, minimo))
+            return cursor.fetchone()[0]
+
+        try:
+            return Escritor.ejecutar(escribir)
+        except Exception as e:
+            print(f"Error al actualizar el stock del producto {id_producto}: {e}")
+            return None
+
+    @staticmethod
+    def ventas_periodo(id_producto, desde, hasta):
+        """
+        ## Función: `ventas_periodo`
+        Unidades e ingreso de un producto entre dos días, incluidos los dos. Lee la tabla de
+        resumen **ResumenProductoDia** (una fila por día con ventas), no el libro de ventas.
+
+        ### Parámetros:
+        - `id_producto` (int): ID del producto.
+        - `desde`, `hasta` (date o str): Primer y último día (`AAAA-MM-DD` o `DD/MM/AAAA`).
+
+        ### Retorna:
+        - Diccionario `{"unidades", "ingreso"}`, o `None` si alguna fecha no es válida.
+        """
+        inicio, fin = normalizar_fecha(desde), normalizar_fecha(hasta)
+        if inicio is None or fin is None:
+            return None
+        db = Db()
+        db.cursor.execute('''
+            SELECT IFNULL(SUM(unidades), 0), IFNULL(SUM(ingreso), 0) FROM ResumenProductoDia
+            WHERE producto = ? AND dia BETWEEN ? AND ?
+        ''', (id_producto, inicio, fin))
+        unidades, ingreso = db.cursor.fetchone()
+        db.cerrar()
+        return {"unidades": unidades, "ingreso": ingreso}
+
+    @staticmethod
+    def obtener_stock(id_producto):
+        """
+        Retorna `(cantidad, minimo)` del producto o `None` si no controla inventario.
+        """
+        db = Db()
+        db.cursor.execute("SELECT cantidad, minimo FROM Stock WHERE producto = ?", (id_producto,))
+        stock = db.cursor.fetchone()
+        db.cerrar()
+        return stock
+
+    @staticmethod
+    def productos_bajo_stock():
+        """
+        ## Función: `productos_bajo_stock`
+        Devuelve los productos con stock en o por debajo de su mínimo, del más faltante al menos.
+        Usa el índice `stock_faltante`.
+
+        ### Retorna:
+        - Lista de diccionarios `{"id", "nombre", "cantidad", "minimo"}`.
+        """
+        db = Db()
+        db.cursor.execute('''
+            SELECT S.producto, P.NombreProducto, S.cantidad, S.minimo
+            FROM Stock S
+            LEFT JOIN productos P ON P.noIdProducto = S.producto
+            WHERE S.cantidad - S.minimo <= 0
+            ORDER BY S.cantidad - S.minimo
+        ''')
+        productos = [dict(zip(["id", "nombre", "cantidad", "minimo"], fila)) for fila in db.cursor.fetchall()]
+        db.cerrar()
+        return productos
+
+    @staticmethod
+    def agregar_lote(id_producto, cantidad, vencimiento, minimo=None):
+        """
+        ## Función: `agregar_lote`
+        Registra la entrada de un lote: `cantidad` unidades que vencen en `vencimiento`.
+        Las unidades se suman también a **Stock**, en la misma transacción.
+
+        ### Parámetros:
+        - `id_producto` (int): ID del producto.
+        - `cantidad` (int): Unidades del lote (mayor que cero).
+        - `vencimiento` (str o date): Fecha de vencimiento (ver `normalizar_fecha`).
+        - `minimo` (int, opcional): Nuevo nivel de stock bajo.
+
+        ### Retorna:
+        - `int`: ID del lote, o `None` si la fecha o la cantidad no son válidas o hubo un error.
+        """
+        vencimiento = normalizar_fecha(vencimiento)
+        if vencimiento is None or cantidad <= 0:
+            return None
+
+        def escribir(cursor):
+            cursor.execute("INSERT INTO Lotes (producto, vencimiento, cantidad) VALUES (?, ?, ?)",
+                           (id_producto, vencimiento, cantidad))
+            id_lote = cursor.lastrowid
+            cursor.execute('''
+                INSERT INTO Stock (producto, cantidad, minimo) VALUES (?, ?, IFNULL(?, 0))
+                ON CONFLICT (producto) DO UPDATE SET
+                    cantidad = cantidad + excluded.cantidad,
+                    minimo = IFNULL(?, minimo)
+            ''', (id_producto, cantidad, minimo, minimo))
+            return id_lote
+
+        try:
+            return Escritor.ejecutar(escribir)
+        except Exception as e:
+            print(f"Error al registrar el lote del producto {id_producto}: {e}")
+            return None
+
+    @staticmethod
+    def lotes_por_vencer(dias, hoy=None):
+        """
+        ## Función: `lotes_por_vencer`
+        Devuelve los lotes con unidades que vencen desde `hoy` hasta dentro de `dias` días,
+        del que vence primero al último. Es un recorrido por rango del índice `lotes_vencimiento`.
+
+        ### Parámetros:
+        - `dias` (int): Tamaño de la ventana en días.
+        - `hoy` (date, opcional): Fecha de inicio. Por defecto la fecha actual.
+
+        ### Retorna:
+        - Lista de diccionarios `{"lote", "producto", "nombre", "vencimiento", "cantidad"}`.
+        """
+        hoy = hoy or date.today()
+        db = Db()
+        db.cursor.execute('''
+            SELECT L.noIdLote, L.producto, P.NombreProducto, L.vencimiento, L.cantidad
+            FROM Lotes L
+            LEFT JOIN productos P ON P.noIdProducto = L.producto
+            WHERE L.cantidad > 0 AND L.vencimiento BETWEEN ? AND ?
+            ORDER BY L.vencimiento
+        ''', (hoy.isoformat(), (hoy + timedelta(days=dias)).isoformat()))
+        lotes = [dict(zip(["lote", "producto", "nombre", "vencimiento", "cantidad"], fila)) for fila in db.cursor.fetchall()]
+        db.cerrar()
+        return lotes
+
+    @staticmethod
+    def _descontar_stock(cursor, id_producto, cantidad):
+        """
+        Descuenta `cantidad` del inventario dentro de la transacción del `Escritor`, con una sola
+        sentencia condicional: si no alcanza no cambia nada y se lanza `StockInsuficiente`.
+        Si el producto tiene lotes, las unidades salen de los que vencen primero (FEFO), sin
+        tocar los vencidos; las que no cubran los lotes salen de las unidades sin lote.
+        Retorna `True` si el producto quedó con stock bajo. Lanza `ValueError` si `cantidad` no es
+        positiva (una cantidad negativa sumaría unidades en vez de descontarlas).
+        """
+        if cantidad <= 0:
+            raise ValueError(f"La cantidad a descontar debe ser mayor que cero: {cantidad}.")
+        cursor.execute('''
+            UPDATE Stock SET cantidad = cantidad - ?
+            WHERE producto = ? AND cantidad >= ?
+            RETURNING cantidad, minimo
+        ''', (cantidad, id_producto, cantidad))
+        fila = cursor.fetchone()
+        if fila is None:
+            cursor.execute("SELECT cantidad FROM Stock WHERE producto = ?", (id_producto,))
+            disponible = cursor.fetchone()
+            if disponible is None:
+                return False  # El producto no controla inventario
+            raise StockInsuficiente(id_producto, disponible[0], cantidad)
+
+        restante, minimo = fila
+        hoy = date.today().isoformat()
+        cursor.execute('''
+            SELECT noIdLote, cantidad, vencimiento FROM Lotes
+            WHERE producto = ? AND cantidad > 0
+            ORDER BY vencimiento, noIdLote
+        ''', (id_producto,))
+        lotes = cursor.fetchall()
+        if not lotes:
+            return restante <= minimo
+
+        # Unidades sin lote = stock antes de la venta - unidades en lotes
+        sin_lote = restante + cantidad - sum(lote[1] for lote in lotes)
+        por_asignar = cantidad
+        for id_lote, unidades, vencimiento in lotes:
+            if por_asignar == 0:
+                break
+            if vencimiento < hoy:
+                continue
+            tomadas = min(unidades, por_asignar)
+            cursor.execute("UPDATE Lotes SET cantidad = cantidad - ? WHERE noIdLote = ?", (tomadas, id_lote))
+            por_asignar -= tomadas
+
+        if por_asignar > sin_lote:
+            vendibles = cantidad - por_asignar + max(sin_lote, 0)
+            raise StockInsuficiente(id_producto, vendibles, cantidad)
+        return restante <= minimo
+
+    @staticmethod
+    def retirar_vencidos(hoy=None):
+        """
+        Da de baja las unidades de los lotes vencidos: las quita del lote y de **Stock**.
+        Retorna la cantidad de unidades retiradas.
+        """
+        hoy = (hoy or date.today()).isoformat()
+
+        def escribir(cursor):
+            cursor.execute("SELECT noIdLote, producto, cantidad FROM Lotes WHERE cantidad > 0 AND vencimiento < ?", (hoy,))
+            vencidos = cursor.fetchall()
+            for id_lote, id_producto, unidades in vencidos:
+                cursor.execute("UPDATE Lotes SET cantidad = 0 WHERE noIdLote = ?", (id_lote,))
+                cursor.execute("UPDATE Stock SET cantidad = MAX(cantidad - ?, 0) WHERE producto = ?", (unidades, id_producto))
+            return sum(fila[2] for fila in vencidos)
+
+        try:
+            return Escritor.ejecutar(escribir)
+        except Exception as e:
+            print(f"Error al retirar lotes vencidos: {e}")
+            return 0
+
     @staticmethod
     def listar_objetos(*args, **kwargs):
         """
@@ -246,11 +1553,12 @@ class Producto(Objeto):
         Retornar objeto producto
         """
         db = Db()
-        db.cursor.execute("SELECT * FROM productos WHERE id = ?", (id,))
+        db.cursor.execute("SELECT noIdProducto FROM productos WHERE noIdProducto = ?", (id,))
         tupla = db.cursor.fetchone()
-        
+        db.cerrar()
+
         if tupla:  # Si el producto existe en la base de datos
-            return Producto(*tupla)
+            return Producto(tupla[0])
         return None  # Si no se encontró el producto
 
     @staticmethod
@@ -262,13 +1570,13 @@ class Producto(Objeto):
         ### Parámetros:
         - `nombre` (str): Nombre del producto.
         - `medida` (str): Medida del producto (ejemplo: litros, mililitros).
-        - `fecha_vencimiento` (str): Fecha de vencimiento del producto.
+        - `fecha_vencimiento` (str o date): Fecha de vencimiento del producto (ver `normalizar_fecha`).
         - `precio_produccion` (int): Precio de producción del producto.
         - `precio_venta` (int): Precio de venta del producto.
 
         ### Comportamiento:
         1. Abre una conexión a la base de datos.
-        2. Inserta el producto en la tabla **Productos**.
+        2. Inserta el producto en la tabla **Productos** a través del `Escritor`.
         3. Guarda los cambios y cierra la conexión.
         4. Devuelve `True` si la operación fue exitosa, de lo contrario, devuelve `False`.
         """
@@ -283,15 +1591,18 @@ class Producto(Objeto):
         if not nombre or not medida or not fecha_vencimiento or not precio_produccion or not precio_venta:
             return False
 
-        db = Db()
-        try:
-            db.cursor.execute('''
+        fecha_vencimiento = normalizar_fecha(fecha_vencimiento)
+        if fecha_vencimiento is None:
+            return False
+
+        def escribir(cursor):
+            cursor.execute('''
                     INSERT INTO productos (NombreProducto, medida, Fechavencimiento, PrecioProduccion, PrecioVenta)
                     VALUES(?, ?, ?, ?, ?)
                 ''', (nombre, medida, fecha_vencimiento, precio_produccion, precio_venta))
 
-            db.conexion.commit()
-            db.cerrar()
+        try:
+            Escritor.ejecutar(escribir)
             return True
         except Exception as e:
             print(e)
@@ -350,19 +1661,55 @@ class Cliente(Objeto):
             if not nombre or not apellido or not direccion or not telefono or not correo:
                 return False
 
-            db = Db()
-            db.cursor.execute('''
-                INSERT INTO Clientes (nombre, apellido, direccion, telefono, correo)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (nombre, apellido, direccion, telefono, correo))
+            def escribir(cursor):
+                cursor.execute('''
+                    INSERT INTO Clientes (nombre, apellido, direccion, telefono, correo)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (nombre, apellido, direccion, telefono, correo))
+
+            Escritor.ejecutar(escribir)
+            return True
+        except Exception as e:
+            print(e)
+            return False
+
+
+    @staticmethod
+    def buscar_clientes(texto, limite=20):
+        """
+        ## Función: `buscar_clientes`
+        Búsqueda por prefijo sobre nombre, apellido, correo, teléfono y dirección usando el
+        índice FTS5 **ClientesBusqueda**.
+
+        ### Parámetros:
+        - `texto` (str): Lo escrito por el usuario. Cada palabra se busca como prefijo y
+          deben aparecer todas (por ejemplo `"san mor"` encuentra a Samuel Moreno).
+        - `limite` (int): Cantidad máxima de resultados.
+
+        ### Retorna:
+        - Lista de tuplas con el mismo formato de `listar_objetos`, en orden de ID. No se
+          ordena por relevancia (`rank`) porque obliga a puntuar todas las coincidencias y
+          con prefijos cortos en tablas grandes deja de responder en milisegundos.
+          Si `texto` no tiene palabras devuelve una lista vacía.
+        """
+        palabras = texto.replace('"', " ").split()
+        if not palabras:
+            return []
 
-            db.conexion.commit()
-            db.conexion.close()
-            return True
-        except Exception as e:
-            print(e)
-            return False
+        # Cada palabra entre comillas para que FTS5 no interprete operadores (AND, OR, -, :)
+        consulta = " ".join(f'"{palabra}"*' for palabra in palabras)
 
+        db = Db()
+        db.cursor.execute('''
+            SELECT C.noIdCliente, C.nombre, C.apellido, C.direccion, C.telefono, C.correo
+            FROM ClientesBusqueda B
+            JOIN Clientes C ON C.noIdCliente = B.rowid
+            WHERE ClientesBusqueda MATCH ?
+            LIMIT ?
+        ''', (consulta, limite))
+        clientes = db.cursor.fetchall()
+        db.cerrar()
+        return clientes
 
     @staticmethod
     def accion_cliente_detalle(id_cliente):
@@ -400,72 +1747,118 @@ class Cliente(Objeto):
         2. Ejecuta una consulta para actualizar la dirección del cliente.
         3. Guarda los cambios y cierra la conexión.
         """
+        def escribir(cursor):
+            cursor.execute("UPDATE Clientes SET direccion = ? WHERE noIdCliente = ?", (nueva_direccion, id_cliente))
+
+        Escritor.ejecutar(escribir)
+
+    @staticmethod
+    def total_comprado(id_cliente):
+        """
+        ## Función: `total_comprado`
+        Unidades y gasto total de las compras facturadas de un cliente, leídos de la tabla de
+        resumen **ResumenCliente** (una fila por cliente).
+
+        ### Retorna:
+        - Diccionario `{"unidades", "gasto"}` (en cero si el cliente no tiene compras).
+        """
         db = Db()
-        db.cursor.execute("UPDATE Clientes SET direccion = ? WHERE noIdCliente = ?", (nueva_direccion, id_cliente))
-        db.conexion.commit()
+        db.cursor.execute("SELECT unidades, gasto FROM ResumenCliente WHERE cliente = ?", (id_cliente,))
+        fila = db.cursor.fetchone() or (0, 0)
         db.cerrar()
+        return {"unidades": fila[0], "gasto": fila[1]}
 
     @staticmethod
     def accion_ver_historico_ventas_cliente(id_cliente):
         """
         ## Función: `accion_ver_historico_ventas_cliente`
-        Devuelve el historial de ventas de un cliente.
+        Devuelve el historial de ventas facturadas de un cliente.
 
         ### Parámetros:
         - `id_cliente` (int): ID del cliente cuyo historial de ventas se desea obtener.
 
         ### Comportamiento:
         1. Abre una conexión a la base de datos.
-        2. Ejecuta una consulta para obtener las ventas del cliente.
-        3. Devuelve una lista de tuplas, donde cada tupla contiene los detalles de una venta.
+        2. Lee las líneas del libro de ventas (**Ventas** y las ventas archivadas) del cliente,
+           de la más antigua a la más reciente.
+        3. Devuelve una lista de tuplas `(noIdVentas, fecha, producto, cantidad, factura, precio, nombre_producto)`.
         4. Cierra la conexión.
         """     
         db = Db()
-        db.cursor.execute('''
-            SELECT V.noIdVentas, V.fecha, V.producto, V.cantidad
-            FROM Ventas V
+        tabla = db.tabla_ventas_historicas()
+        db.cursor.execute(f'''
+            SELECT V.noIdVentas, V.fecha, V.producto, V.cantidad, V.factura, V.precio, V.nombre_producto
+            FROM {tabla} V
             WHERE V.cliente = ?
+            ORDER BY V.noIdVentas
         ''', (id_cliente,))
         ventas_cliente = db.cursor.fetchall()
         db.cerrar()
         return ventas_cliente
 
     @staticmethod
-    def reiniciar_carrito(id_cliente):
+    def accion_ver_carrito_cliente(id_cliente):
         """
-        Borrar todas las ventas del cliente
+        ## Función: `accion_ver_carrito_cliente`
+        Devuelve las líneas del carrito abierto de un cliente (ver `Carrito`).
+
+        ### Parámetros:
+        - `id_cliente` (int): ID del cliente.
+
+        ### Retorna:
+        - Lista de tuplas `(id, fecha, producto, cantidad, precio)`. El precio es el del producto
+          al agregarlo al carrito, 0 si el producto no existe.
         """
-        db = Db()
+        return [
+            (linea["id"], linea["fecha"], linea["producto"], linea["cantidad"], linea["precio"])
+            for linea in Carrito.obtener().ver(id_cliente)
+        ]
 
-        try:
-            db.cursor.execute('''
-                DELETE FROM Ventas
-                WHERE cliente = ?
-            ''', (id_cliente,))
+    @staticmethod
+    def clientes_con_carrito():
+        """
+        Devuelve los IDs de los clientes que tienen al menos un producto en el carrito.
+        """
+        return Carrito.obtener().clientes()
 
-            db.conexion.commit()  # Confirmar los cambios
+    @staticmethod
+    def reiniciar_carrito(id_cliente):
+        """
+        Vaciar el carrito del cliente
+        """
+        try:
+            Carrito.obtener().tomar(id_cliente)
 
+            EventosCarrito.publicar(id_cliente, "reiniciar")
             return True
         except Exception as e:
             return False
 
     @staticmethod
-    def obtener_data_factura(id_cliente):
+    @trazado()
+    def obtener_data_factura(id_cliente, lineas=None):
         """
         ## Función: `obtener_data_factura`
-        Genera los datos necesarios para facturar las ventas de un cliente.
+        Genera los datos necesarios para facturar el carrito de un cliente.
 
         ### Parámetros:
         - `id_cliente` (int): ID del cliente cuyas ventas se desean facturar.
+        - `lineas` (list, opcional): Líneas a facturar. Por defecto las del carrito abierto.
 
         ### Comportamiento:
         1. Abre una conexión a la base de datos.
-        2. Obtiene los datos del cliente y sus ventas.
+        2. Obtiene los datos del cliente. El nombre y el precio de cada producto vienen en las
+           líneas del carrito (fijados al agregarlo), no se consulta **Productos**.
         3. Calcula el precio total de las ventas.
         4. Genera un número de factura único.
         5. Devuelve un diccionario con los datos de facturación.
         6. Cierra la conexión.
+
+        No guarda nada: para registrar la venta se usa `accion_facturar_carrito`.
         """
+        if lineas is None:
+            lineas = Carrito.obtener().ver(id_cliente)
+
         db = Db()
         # Inicializamos el diccionario que tendrá toda la información
         dicc = {}
@@ -487,40 +1880,28 @@ class Cliente(Objeto):
                 "correo": cliente_data[4]
             }
         
-        # 2. Obtener las ventas del cliente
-        db.cursor.execute('''
-            SELECT V.noIdVentas, V.fecha, V.producto, V.cantidad
-            FROM Ventas V
-            WHERE V.cliente = ?
-        ''', (id_cliente,))
-        ventas_cliente = db.cursor.fetchall()
-
+        # 2. Recorrer las líneas del carrito
         productos = {}
         precio_total = 0
 
-        for venta in ventas_cliente:
-            noIdVentas, fecha, id_producto, cantidad = venta
-
-            db.cursor.execute('''
-                SELECT NombreProducto, PrecioVenta
-                FROM Productos
-                WHERE noIdProducto = ?
-            ''', (id_producto,))
-            producto_data = db.cursor.fetchone()
-
-            if producto_data:
-                nombre_producto, precio_venta = producto_data
-                precio_venta_total = precio_venta * cantidad
-
-                productos[id_producto] = {
-                    "nombre": nombre_producto,
-                    "precio": precio_venta,
-                    "fecha_venta": fecha,
-                    "cantidad": cantidad,
-                    "total": precio_venta_total
-                }
+        for linea in lineas:
+            # Producto que no existía al agregarlo al carrito
+            if linea["nombre"] is None:
+                continue
+
+            precio_venta_total = linea["precio"] * linea["cantidad"]
+
+            productos[linea["producto"]] = {
+                "nombre": linea["nombre"],
+                "precio": linea["precio"],
+                "fecha_venta": linea["fecha"],
+                "cantidad": linea["cantidad"],
+                "total": precio_venta_total
+            }
+
+            precio_total += precio_venta_total
 
-                precio_total += precio_venta_total
+        import uuid
 
         no_factura = f"{datetime.now().strftime('%Y%m%d%H%M%S')}{id_cliente}{str(uuid.uuid4().int)[:10]}"
 
@@ -532,67 +1913,146 @@ class Cliente(Objeto):
 
         return dicc
 
+    @staticmethod
+    @trazado()
+    def accion_facturar_carrito(id_cliente):
+        """
+        ## Función: `accion_facturar_carrito`
+        Cierra la venta: pasa el carrito del cliente al libro de ventas.
+
+        ### Parámetros:
+        - `id_cliente` (int): ID del cliente.
+
+        ### Comportamiento:
+        1. Saca las líneas del carrito (`Carrito.tomar`), así nadie las factura dos veces.
+        2. Arma el pedido con `obtener_data_factura` (precios fijados en el carrito).
+        3. Descuenta el inventario de cada producto e inserta todas las líneas en **Ventas** con el
+           número de factura, el precio y el nombre del producto, en una sola transacción del `Escritor`.
+        4. Si algo falla, devuelve las líneas al carrito.
+        5. Publica el evento `"reiniciar"`: el carrito quedó vacío.
+
+        ### Retorna:
+        - `dict`: El pedido facturado (mismo formato que `obtener_data_factura`) con la clave
+          `stock_bajo` (IDs de productos que quedaron en o bajo su mínimo), o `None` si el
+          cliente no existe, el carrito está vacío o no se pudo guardar.
+
+        ### Excepciones:
+        - `StockInsuficiente`: Algún producto no tiene unidades suficientes. El carrito queda igual.
+        """
+        carrito = Carrito.obtener()
+        lineas = carrito.tomar(id_cliente)
+        if not lineas:
+            return None
+
+        pedido = Cliente.obtener_data_factura(id_cliente, lineas)
+        if "cliente" not in pedido or not pedido["productos"]:
+            carrito.devolver(id_cliente, lineas)
+            return None
+
+        fecha_venta = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        def escribir(cursor):
+            stock_bajo = [
+                id_producto for id_producto, producto in pedido["productos"].items()
+                if Producto._descontar_stock(cursor, id_producto, producto["cantidad"])
+            ]
+            cursor.executemany('''
+                INSERT INTO Ventas (fecha, producto, cliente, cantidad, factura, precio, nombre_producto)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (fecha_venta, id_producto, id_cliente, producto["cantidad"], pedido["no_factura"], producto["precio"], producto["nombre"])
+                for id_producto, producto in pedido["productos"].items()
+            ])
+            return stock_bajo
+
+        try:
+            with tramo("Escritor.ejecutar", lineas=len(lineas)):
+                pedido["stock_bajo"] = Escritor.ejecutar(escribir)
+        except StockInsuficiente:
+            carrito.devolver(id_cliente, lineas)
+            raise
+        except Exception as e:
+            print(f"Error al guardar la factura {pedido['no_factura']}: {e}")
+            carrito.devolver(id_cliente, lineas)
+            return None
+
+        if pedido["stock_bajo"]:
+            print(f"Productos con stock bajo: {pedido['stock_bajo']}")
+        EventosCarrito.publicar(id_cliente, "reiniciar")
+        return pedido
+
     @staticmethod
     def verificar_venta_existente(cliente_id, producto_id):
         """
-        Verifica si ya existe una venta registrada para el mismo cliente y producto.
+        Verifica si el producto ya está en el carrito del cliente.
 
         ### Parámetros:
         - `cliente_id` (int): ID del cliente.
         - `producto_id` (int): ID del producto.
 
         ### Retorno:
-        - `True` si existe una venta registrada con ese cliente y producto, de lo contrario `False`.
+        - `True` si el carrito del cliente tiene una línea con ese producto, de lo contrario `False`.
         """
-        try:
-            db = Db()
-            db.cursor.execute('''
-                SELECT COUNT(*) FROM Ventas 
-                WHERE cliente = ? AND producto = ?
-            ''', (cliente_id, producto_id))
-            resultado = db.cursor.fetchone()
-
-            db.cerrar()
-            
-            # Si el conteo es mayor que 0, significa que ya existe una venta con este cliente y producto.
-            return resultado[0] > 0
-        
-        except Exception as e:
-            print(f"Error al verificar la venta existente: {e}")
-            return False
+        return any(linea["producto"] == producto_id for linea in Carrito.obtener().ver(cliente_id))
 
     @staticmethod
     def accion_registrar_venta_cliente(fecha_venta, producto_id, id_cliente, cantidad):
         """
         ## Función: `accion_registrar_venta_cliente`
-        Registra una venta para un cliente.
+        Agrega un producto al carrito de un cliente.
 
         ### Parámetros:
-        - `fecha_venta` (str): Fecha y hora de la venta.
-        - `producto_id` (int): ID del producto vendido.
-        - `id_cliente` (int): ID del cliente que realizó la compra.
-        - `cantidad` (int): Cantidad de productos vendidos.
+        - `fecha_venta` (str): Fecha y hora en que se agrega el producto.
+        - `producto_id` (int): ID del producto.
+        - `id_cliente` (int): ID del cliente.
+        - `cantidad` (int): Cantidad de productos.
 
         ### Comportamiento:
-        1. Abre una conexión a la base de datos.
-        2. Inserta la venta en la tabla **Ventas**.
-        3. Guarda los cambios y cierra la conexión.
-        4. Devuelve `True` si la operación fue exitosa, de lo contrario, devuelve `False`.
+        1. Agrega la línea al `Carrito` en memoria, o suma `cantidad` si el producto ya está.
+        2. Publica el evento `"agregar"` con la línea resultante (cantidad total).
+        3. Devuelve `True` si la operación fue exitosa, de lo contrario, devuelve `False`.
         """
         try:
-            db = Db()
-            db.cursor.execute('''
-                INSERT INTO Ventas (fecha, producto, cliente, cantidad)
-                VALUES (?, ?, ?, ?)
-            ''', (fecha_venta, producto_id, id_cliente, cantidad))
-            db.conexion.commit()
-
-            db.cerrar()
+            linea = Carrito.obtener().agregar(id_cliente, producto_id, cantidad, fecha_venta)
+            EventosCarrito.publicar(id_cliente, "agregar", linea)
             return True
         
         except:
             return False
 
+    @staticmethod
+    def accion_registrar_ventas_cliente(fecha_venta, id_cliente, lineas):
+        """
+        ## Función: `accion_registrar_ventas_cliente`
+        Agrega varios productos al carrito de un cliente.
+
+        ### Parámetros:
+        - `fecha_venta` (str): Fecha y hora en que se agregan los productos.
+        - `id_cliente` (int): ID del cliente.
+        - `lineas` (list): Pares `(producto_id, cantidad)`. Un producto repetido suma sus cantidades.
+
+        ### Comportamiento:
+        1. Agrega todas las líneas al `Carrito` de una vez (`Carrito.agregar_varios`): si una falla
+           no se agrega ninguna.
+        2. Publica un evento `"agregar"` por cada línea resultante.
+
+        ### Retorna:
+        - `list`: Las líneas del carrito resultantes, o `None` si ocurrió un error.
+        """
+        carrito = Carrito.obtener()
+        if any(cantidad <= 0 for _, cantidad in lineas):
+            print("Error al registrar las ventas: las cantidades deben ser mayores que cero.")
+            return None
+        try:
+            resultado = carrito.agregar_varios(id_cliente, lineas, fecha_venta)
+        except Exception as e:
+            print(f"Error al registrar las ventas: {e}")
+            return None
+
+        for linea in resultado:
+            EventosCarrito.publicar(id_cliente, "agregar", linea)
+        return resultado
+
 
 class Venta(Objeto):
     def __init__(self):
@@ -602,37 +2062,517 @@ class Venta(Objeto):
     def obtener_objeto_venta(id_venta):
         pass
 
+    @staticmethod
+    def reconstruir_resumenes():
+        """
+        ## Función: `reconstruir_resumenes`
+        Vuelve a calcular **ResumenProductoDia** y **ResumenCliente** desde el libro de ventas
+        (incluidas las ventas archivadas), en una sola transacción del escritor (las ventas
+        nuevas esperan a que termine).
+
+        ### Retorna:
+        - `True` si se reconstruyeron, `False` si ocurrió un error.
+        """
+        try:
+            Escritor.ejecutar(reconstruir_resumenes)
+            return True
+        except Exception as e:
+            print(f"Error al reconstruir los resúmenes de ventas: {e}")
+            return False
+
+    @staticmethod
+    def archivar_ventas(antes_de=None, tamano_lote=10_000, compactar=False):
+        """
+        ## Función: `archivar_ventas`
+        Pasa las ventas facturadas anteriores a `antes_de` de `data.db` a archivos por año
+        (`Db.ruta_archivo_ventas`), para que la base principal, sus índices y sus copias sigan
+        pequeños. Las lecturas del historial las siguen viendo (`Db.tabla_ventas_historicas`)
+        y los resúmenes no cambian.
+
+        ### Parámetros:
+        - `antes_de` (date, datetime o str, opcional): Fecha de corte (excluida). Sin fecha se
+          retoma el último archivado que no terminó.
+        - `tamano_lote` (int): Ventas por lote.
+        - `compactar` (bool): Ejecutar `VACUUM` al final para devolver el espacio al disco.
+
+        ### Comportamiento:
+        1. Guarda el corte en **Parametros** (`archivo_pendiente`) para poder retomarlo.
+        2. Por cada lote, de las ventas más antiguas a las más recientes:
+           - Copia las filas al archivo de su año (`INSERT OR IGNORE`: repetir un lote no duplica).
+           - Las borra de **Ventas** en una tarea del `Escritor`, con `archivando` en 1 para que
+             el trigger de los resúmenes no las reste.
+           Si el proceso se interrumpe entre los dos pasos, volver a ejecutarlo termina el lote.
+        3. Borra `archivo_pendiente` y, si se pidió, compacta la base.
+
+        ### Retorna:
+        - Diccionario `{año: ventas archivadas}`, o `None` si la fecha no es válida.
+        """
+        db = Db()
+        if antes_de is None:
+            db.cursor.execute("SELECT valor FROM Parametros WHERE nombre = 'archivo_pendiente'")
+            fila = db.cursor.fetchone()
+            corte = fila[0] if fila else None
+            if corte is None:
+                db.cerrar()
+                return {}
+        else:
+            corte = normalizar_fecha_hora(antes_de)
+            if corte is None:
+                db.cerrar()
+                return None
+
+        def marcar_pendiente(cursor, valor):
+            cursor.execute("INSERT OR REPLACE INTO Parametros (nombre, valor) VALUES ('archivo_pendiente', ?)", (valor,))
+
+        def borrar(cursor, ids):
+            cursor.execute("UPDATE Parametros SET valor = 1 WHERE nombre = 'archivando'")
+            cursor.executemany("DELETE FROM Ventas WHERE noIdVentas = ?", ids)
+            cursor.execute("UPDATE Parametros SET valor = 0 WHERE nombre = 'archivando'")
+
+        Escritor.ejecutar(marcar_pendiente, corte)
+        archivadas = {}
+        preparados = set()
+        marcadores = ", ".join("?" * len(COLUMNAS_VENTAS.split(", ")))
+        try:
+            while True:
+                db.cursor.execute(f'''
+                    SELECT {COLUMNAS_VENTAS} FROM Ventas
+                    WHERE fecha < ? AND fecha GLOB '[0-9][0-9][0-9][0-9]-*' AND factura IS NOT NULL
+                    ORDER BY fecha LIMIT ?
+                ''', (corte, tamano_lote))
+                filas = db.cursor.fetchall()
+                if not filas:
+                    break
+
+                por_anio = {}
+                for fila in filas:
+                    por_anio.setdefault(int(fila[1][:4]), []).append(fila)
+                for anio, filas_anio in por_anio.items():
+                    archivo = sqlite3.connect(Db.ruta_archivo_ventas(anio))
+                    if anio not in preparados:
+                        archivo.executescript('''
+                            CREATE TABLE IF NOT EXISTS Ventas (
+                                noIdVentas INTEGER PRIMARY KEY,
+                                fecha DATETIME,
+                                producto INTEGER,
+                                cliente INTEGER,
+                                cantidad INTEGER,
+                                factura TEXT,
+                                precio INTEGER,
+                                nombre_producto TEXT
+                            );
+                            CREATE UNIQUE INDEX IF NOT EXISTS ventas_factura_producto ON Ventas(factura, producto);
+                            CREATE INDEX IF NOT EXISTS ventas_cliente ON Ventas(cliente, noIdVentas);
+                            CREATE INDEX IF NOT EXISTS ventas_fecha ON Ventas(fecha);
+                        ''')
+                        preparados.add(anio)
+                    archivo.executemany(f"INSERT OR IGNORE INTO Ventas ({COLUMNAS_VENTAS}) VALUES ({marcadores})", filas_anio)
+                    archivo.commit()
+                    archivo.close()
+                    archivadas[anio] = archivadas.get(anio, 0) + len(filas_anio)
+
+                Escritor.ejecutar(borrar, [(fila[0],) for fila in filas])
+        except Exception as e:
+            print(f"Error al archivar ventas (se puede retomar): {e}")
+            return None
+        finally:
+            db.cerrar()
+
+        Escritor.ejecutar(marcar_pendiente, None)
+        if compactar:
+            try:
+                conexion = sqlite3.connect(Db.ruta, timeout=30)
+                conexion.execute("VACUUM")
+                conexion.close()
+            except sqlite3.Error as e:
+                print(f"No se pudo compactar la base de datos: {e}")
+        return archivadas
+
+    @staticmethod
+    def verificar_resumenes():
+        """
+        ## Función: `verificar_resumenes`
+        Compara las tablas de resumen con lo que resulta de agrupar el libro de ventas, incluidas
+        las ventas archivadas. Las filas en cero (quedan al borrar ventas) no cuentan como diferencia.
+
+        ### Retorna:
+        - Diccionario `{tabla: filas distintas}`; todo en cero si los resúmenes están al día.
+        """
+        db = Db()
+        tabla = db.tabla_ventas_historicas()
+        distinto_de_cero = " HAVING SUM(cantidad) != 0 OR SUM(cantidad * IFNULL(precio, 0)) != 0"
+        consultas = {
+            "ResumenProductoDia": (
+                "SELECT producto, dia, unidades, ingreso FROM ResumenProductoDia WHERE unidades != 0 OR ingreso != 0",
+                SQL_RESUMEN_PRODUCTO_DIA.format(tabla=tabla) + distinto_de_cero,
+            ),
+            "ResumenCliente": (
+                "SELECT cliente, unidades, gasto FROM ResumenCliente WHERE unidades != 0 OR gasto != 0",
+                SQL_RESUMEN_CLIENTE.format(tabla=tabla) + distinto_de_cero,
+            ),
+        }
+        db.cursor.execute("BEGIN")  # Las dos lecturas ven los mismos datos
+        diferencias = {}
+        for tabla, (resumen, calculado) in consultas.items():
+            db.cursor.execute(f"SELECT COUNT(*) FROM ({resumen} EXCEPT {calculado})")
+            sobrantes = db.cursor.fetchone()[0]
+            db.cursor.execute(f"SELECT COUNT(*) FROM ({calculado} EXCEPT {resumen})")
+            diferencias[tabla] = sobrantes + db.cursor.fetchone()[0]
+        db.cerrar()
+        return diferencias
+
+    @staticmethod
+    def ventas_entre(desde, hasta):
+        """
+        ## Función: `ventas_entre`
+        Devuelve las ventas facturadas con `desde <= fecha < hasta`, en orden de fecha, incluidas
+        las archivadas. Es un recorrido por rango del índice `ventas_fecha` (el de cada archivo),
+        no lee el resto del libro.
+
+        ### Parámetros:
+        - `desde` (date, datetime o str): Inicio del rango (incluido).
+        - `hasta` (date, datetime o str): Fin del rango (excluido). Si es una fecha sin hora,
+          el rango incluye ese día completo.
+
+        ### Retorna:
+        - Lista de tuplas `(noIdVentas, fecha, producto, cantidad, factura, precio, nombre_producto, cliente)`,
+          o `None` si alguna de las fechas no es válida.
+        """
+        rango = rango_fechas(desde, hasta)
+        if rango is None:
+            return None
+
+        db = Db()
+        tabla = db.tabla_ventas_historicas()
+        db.cursor.execute(f'''
+            SELECT noIdVentas, fecha, producto, cantidad, factura, precio, nombre_producto, cliente
+            FROM {tabla}
+            WHERE fecha >= ? AND fecha < ? AND factura IS NOT NULL
+            ORDER BY fecha
+        ''', rango)
+        ventas = db.cursor.fetchall()
+        db.cerrar()
+        return ventas
+
+    @staticmethod
+    def obtener_factura(no_factura):
+        """
+        ## Función: `obtener_factura`
+        Arma el pedido de una factura ya registrada en el libro de ventas (o archivada), por
+        ejemplo para volver a generar el PDF o reenviar el correo.
+
+        ### Parámetros:
+        - `no_factura` (str): Número de factura.
+
+        ### Retorna:
+        - `dict`: Mismo formato que `Cliente.obtener_data_factura`, o `None` si la factura no existe.
+        """
+        db = Db()
+        tabla = db.tabla_ventas_historicas()
+        db.cursor.execute(f'''
+            SELECT cliente, fecha, producto, cantidad, precio, nombre_producto
+            FROM {tabla}
+            WHERE factura = ?
+        ''', (no_factura,))
+        lineas = db.cursor.fetchall()
+        if not lineas:
+            db.cerrar()
+            return None
+
+        db.cursor.execute("SELECT noIdCliente, nombre, apellido, direccion, telefono, correo FROM Clientes WHERE noIdCliente = ?", (lineas[0][0],))
+        cliente = db.cursor.fetchone()
+        db.cerrar()
+
+        productos = {
+            producto: {"nombre": nombre, "precio": precio, "fecha_venta": fecha, "cantidad": cantidad, "total": precio * cantidad}
+            for _, fecha, producto, cantidad, precio, nombre in lineas
+        }
+        pedido = {"no_factura": no_factura, "productos": productos,
+                  "precio_total": sum(producto["total"] for producto in productos.values())}
+
+        if cliente:
+            pedido["cliente"] = {
+                "id_cliente": cliente[0],
+                "nombre": cliente[1],
+                "apellido": cliente[2],
+                "direccion": cliente[3],
+                "telefono": cliente[4],
+                "correo": cliente[5]
+            }
+        return pedido
+
     @staticmethod
     def accion_borrar_venta(id_venta):
         """
         ## Función: `accion_borrar_venta`
-        Borra una venta específica.
+        Quita una línea del carrito.
 
         ### Parámetros:
-        - `id_venta` (int): ID de la venta que se desea borrar.
+        - `id_venta` (int): ID de la línea del carrito que se desea borrar.
 
         ### Comportamiento:
-        1. Abre una conexión a la base de datos.
-        2. Ejecuta una consulta para borrar la venta.
-        3. Guarda los cambios y cierra la conexión.
-        4. Devuelve `True` si la operación fue exitosa, de lo contrario, devuelve `False`.
+        1. Quita la línea del `Carrito` en memoria.
+        2. Publica el evento `"borrar"` en el carrito del cliente dueño de la línea.
+        3. Devuelve `True` si la operación fue exitosa, `False` si la línea no existe.
+
+        Las ventas facturadas no se borran: el libro de ventas solo recibe inserciones.
+        """
+        id_cliente = Carrito.obtener().quitar(id_venta)
+        if id_cliente is None:
+            return False
+
+        EventosCarrito.publicar(id_cliente, "borrar", id_venta)
+        return True
+
+class Cambios:
+    """
+    Registro de cambios (change data capture) de **Clientes**, **Productos** y **Ventas**.
+
+    Los triggers de `Db.iniciar_tablas` (punto 8) agregan cada cambio a **Cambios** dentro de la
+    transacción que lo produce, numerado en orden (`noIdCambio`). Un consumidor (por ejemplo la
+    contabilidad) se registra una vez, lee los cambios posteriores al último que confirmó y
+    confirma hasta donde procesó: si falla antes de confirmar, vuelve a recibir esos cambios.
+
+    El registro se mantiene acotado (`compactar`): se borran los cambios que ya confirmaron todos
+    los consumidores y los de más de `RETENCION_DIAS` días aunque alguno no los haya leído. Ese
+    consumidor se entera al leer (`pendientes` retorna `None`) y debe volver a exportar todo.
+    """
+
+    # Días que se guardan los cambios que algún consumidor no ha confirmado
+    RETENCION_DIAS = 30
+
+    # Cambios por lectura
+    LIMITE_LECTURA = 10_000
+
+    @staticmethod
+    def _leer(cursor, desde, limite):
+        cursor.execute(
+            "SELECT noIdCambio, tabla, operacion, fila, datos, fecha FROM Cambios WHERE noIdCambio > ? ORDER BY noIdCambio LIMIT ?",
+            (desde, limite),
+        )
+        return [
+            {"cambio": cambio, "tabla": tabla, "operacion": operacion, "fila": fila,
+             "datos": json.loads(datos) if datos is not None else None, "fecha": fecha}
+            for cambio, tabla, operacion, fila, datos, fecha in cursor.fetchall()
+        ]
+
+    @staticmethod
+    def leer(desde=0, limite=LIMITE_LECTURA):
+        """
+        Retorna hasta `limite` cambios posteriores al cambio `desde`, en orden, como diccionarios
+        con `cambio`, `tabla`, `operacion`, `fila`, `datos` y `fecha`. No usa ni mueve ningún consumidor.
+        """
+        db = Db()
+        cambios = Cambios._leer(db.cursor, desde, limite)
+        db.cerrar()
+        return cambios
+
+    @staticmethod
+    def registrar_consumidor(nombre):
+        """
+        ## Función: `registrar_consumidor`
+        Registra un consumidor de cambios. Empieza en el último cambio registrado: los datos
+        anteriores los toma de una exportación completa hecha después de registrarse (los
+        cambios que caigan entre las dos llegan repetidos, no se pierden).
+
+        ### Retorna:
+        - El último cambio confirmado del consumidor (si ya estaba registrado no se mueve), o
+          `None` si ocurrió un error.
+        """
+        def escribir(cursor):
+            cursor.execute('''
+                INSERT OR IGNORE INTO ConsumidoresCambios (nombre, ultimo, fecha)
+                VALUES (?, IFNULL((SELECT seq FROM sqlite_sequence WHERE name = 'Cambios'), 0), datetime('now'))
+            ''', (nombre,))
+            cursor.execute("SELECT ultimo FROM ConsumidoresCambios WHERE nombre = ?", (nombre,))
+            return cursor.fetchone()[0]
+
+        try:
+            return Escritor.ejecutar(escribir)
+        except Exception as e:
+            print(f"Error al registrar el consumidor de cambios '{nombre}': {e}")
+            return None
+
+    @staticmethod
+    def quitar_consumidor(nombre):
+        """
+        Quita un consumidor (sus cambios pendientes dejan de retener el registro). Retorna `False` si no existía.
+        """
+        def escribir(cursor):
+            cursor.execute("DELETE FROM ConsumidoresCambios WHERE nombre = ?", (nombre,))
+            return cursor.rowcount == 1
+
+        return Escritor.ejecutar(escribir)
+
+    @staticmethod
+    def consumidores():
+        """
+        Retorna los consumidores registrados: `nombre`, `ultimo` cambio confirmado, `fecha` de la
+        última confirmación (UTC) y `pendientes` (cambios registrados después de `ultimo`).
         """
         db = Db()
         db.cursor.execute('''
-            DELETE FROM Ventas WHERE noIdVentas = ?
-        ''', (id_venta,))
-        db.conexion.commit()
+            SELECT nombre, ultimo, fecha, IFNULL((SELECT seq FROM sqlite_sequence WHERE name = 'Cambios'), 0) - ultimo
+            FROM ConsumidoresCambios ORDER BY nombre
+        ''')
+        consumidores = [
+            {"nombre": nombre, "ultimo": ultimo, "fecha": fecha, "pendientes": pendientes}
+            for nombre, ultimo, fecha, pendientes in db.cursor.fetchall()
+        ]
         db.cerrar()
-        return True
+        return consumidores
+
+    @staticmethod
+    def pendientes(consumidor, limite=LIMITE_LECTURA):
+        """
+        ## Función: `pendientes`
+        Lee los cambios que `consumidor` todavía no confirmó (ver `confirmar`).
+
+        ### Retorna:
+        - Lista de hasta `limite` cambios, como en `leer` (vacía si está al día).
+        - `None` si el consumidor no está registrado o si el registro ya descartó por antigüedad
+          cambios que no había confirmado (debe volver a exportar todo y registrarse de nuevo).
+        """
+        db = Db()
+        db.cursor.execute("BEGIN")  # La posición y los cambios se leen de la misma foto
+        db.cursor.execute("SELECT ultimo FROM ConsumidoresCambios WHERE nombre = ?", (consumidor,))
+        fila = db.cursor.fetchone()
+        if fila is None:
+            db.cerrar()
+            print(f"El consumidor de cambios '{consumidor}' no está registrado")
+            return None
+        ultimo = fila[0]
+        db.cursor.execute("SELECT valor FROM Parametros WHERE nombre = 'cambios_descartados_hasta'")
+        descartados = db.cursor.fetchone()
+        if descartados is not None and ultimo < descartados[0]:
+            db.cerrar()
+            print(f"El consumidor de cambios '{consumidor}' perdió cambios descartados por antigüedad "
+                  f"(confirmó hasta {ultimo}, se descartó hasta {descartados[0]})")
+            return None
+        cambios = Cambios._leer(db.cursor, ultimo, limite)
+        db.cerrar()
+        return cambios
+
+    @staticmethod
+    def confirmar(consumidor, hasta):
+        """
+        Marca como procesados los cambios de `consumidor` hasta el número `hasta` (incluido).
+        La posición nunca retrocede ni pasa del último cambio registrado. Retorna `False` si el
+        consumidor no está registrado.
+        """
+        def escribir(cursor):
+            cursor.execute('''
+                UPDATE ConsumidoresCambios
+                SET ultimo = MAX(ultimo, MIN(?, IFNULL((SELECT seq FROM sqlite_sequence WHERE name = 'Cambios'), 0))),
+                    fecha = datetime('now')
+                WHERE nombre = ?
+            ''', (hasta, consumidor))
+            return cursor.rowcount == 1
+
+        return Escritor.ejecutar(escribir)
+
+    @staticmethod
+    def compactar(retencion_dias=None):
+        """
+        ## Función: `compactar`
+        Mantiene acotado el registro de cambios, en una tarea del `Escritor`.
+
+        ### Comportamiento:
+        1. Borra los cambios que ya confirmaron todos los consumidores registrados.
+        2. Borra los cambios de más de `retencion_dias` días (por defecto `RETENCION_DIAS`),
+           aunque algún consumidor no los haya confirmado, y guarda hasta qué cambio se
+           descartó en **Parametros** (`cambios_descartados_hasta`) para avisarle.
+
+        ### Retorna:
+        - Diccionario con los cambios borrados: `confirmados` y `vencidos`, o `None` si ocurrió un error.
+        """
+        dias = Cambios.RETENCION_DIAS if retencion_dias is None else retencion_dias
+
+        def escribir(cursor):
+            borrados = {"confirmados": 0, "vencidos": 0}
+            cursor.execute("SELECT MIN(ultimo) FROM ConsumidoresCambios")
+            confirmado = cursor.fetchone()[0]
+            if confirmado is not None:
+                cursor.execute("DELETE FROM Cambios WHERE noIdCambio <= ?", (confirmado,))
+                borrados["confirmados"] = cursor.rowcount
+
+            # Los cambios se numeran en orden de fecha: el primero que no venció marca el corte
+            cursor.execute(
+                "SELECT noIdCambio FROM Cambios WHERE fecha >= datetime('now', ?) ORDER BY noIdCambio LIMIT 1",
+                (f"-{dias} days",),
+            )
+            fila = cursor.fetchone()
+            if fila is None:
+                cursor.execute("SELECT IFNULL(MAX(noIdCambio), 0) + 1 FROM Cambios")
+                fila = cursor.fetchone()
+            cursor.execute("DELETE FROM Cambios WHERE noIdCambio < ?", (fila[0],))
+            borrados["vencidos"] = cursor.rowcount
+            if borrados["vencidos"]:
+                cursor.execute('''
+                    INSERT INTO Parametros (nombre, valor) VALUES ('cambios_descartados_hasta', ?)
+                    ON CONFLICT (nombre) DO UPDATE SET valor = MAX(valor, excluded.valor)
+                ''', (fila[0] - 1,))
+            return borrados
+
+        try:
+            return Escritor.ejecutar(escribir)
+        except Exception as e:
+            print(f"Error al compactar el registro de cambios: {e}")
+            return None
+
+    @staticmethod
+    def exportar(consumidor, archivo, maximo=None):
+        """
+        ## Función: `exportar`
+        Exportación incremental: escribe en `archivo` (texto abierto) los cambios pendientes de
+        `consumidor`, un JSON por línea, y los confirma.
+
+        ### Comportamiento:
+        1. Lee los pendientes por bloques de `LIMITE_LECTURA` (solo los cambios nuevos, nunca las tablas).
+        2. Confirma cada bloque después de escribirlo: si la exportación se corta, la siguiente
+           repite a lo sumo el último bloque.
+        3. Al terminar compacta el registro (`compactar`).
+
+        ### Retorna:
+        - Cantidad de cambios exportados (hasta `maximo`, si se indica), o `None` si el consumidor
+          no está registrado o perdió cambios (ver `pendientes`).
+        """
+        exportados = 0
+        while maximo is None or exportados < maximo:
+            limite = Cambios.LIMITE_LECTURA if maximo is None else min(Cambios.LIMITE_LECTURA, maximo - exportados)
+            cambios = Cambios.pendientes(consumidor, limite)
+            if cambios is None:
+                return None
+            if not cambios:
+                break
+            for cambio in cambios:
+                archivo.write(json.dumps(cambio, ensure_ascii=False) + "\n")
+            archivo.flush()
+            Cambios.confirmar(consumidor, cambios[-1]["cambio"])
+            exportados += len(cambios)
+        Cambios.compactar()
+        return exportados
+
 
 class Correo:
     
     path_plantilla_correo = "src/templates/mailtemplate.html"
 
-    with open(path_plantilla_correo, encoding='utf-8') as archivo_plantilla_correo:
-        plantilla_correo = archivo_plantilla_correo.read()
+    # Se lee del disco en el primer correo generado (ver `obtener_plantilla`)
+    plantilla_correo: str = None
+
+    @classmethod
+    def obtener_plantilla(cls) -> str:
+        """
+        Retorna la plantilla HTML del correo, leyéndola del disco solo la primera vez.
+        """
+        if cls.plantilla_correo is None:
+            with open(cls.path_plantilla_correo, encoding='utf-8') as archivo_plantilla_correo:
+                cls.plantilla_correo = archivo_plantilla_correo.read()
+        return cls.plantilla_correo
 
     @staticmethod
+    @trazado()
     def generar_correo_html(pedido: dict) -> str:
         """
         Genera el contenido HTML de un correo de confirmación de pedido.
@@ -647,7 +2587,7 @@ class Correo:
         ### Retorna:
         - `str`: HTML del correo con los datos insertados.
         """
-        correo_generado: str = Correo.plantilla_correo
+        correo_generado: str = Correo.obtener_plantilla()
 
         # Extraer datos del pedido
         productos: dict = pedido["productos"]
@@ -682,6 +2622,7 @@ class Correo:
         return correo_generado
 
     @staticmethod
+    @trazado()
     def enviar_correo(pedido: dict):
         """
         Envía un correo de confirmación del pedido al cliente.
@@ -693,7 +2634,12 @@ class Correo:
         1. Genera el contenido del correo a partir del pedido.
         2. Configura el servidor SMTP de Gmail.
         3. Intenta enviar el correo y maneja errores en caso de falla.
+        4. Devuelve `True` si el correo se envió, de lo contrario `False`.
         """
+        import smtplib
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
+
         atributos_cliente: dict = pedido["cliente"]
         no_pedido = pedido["no_factura"] 
         correo_cliente = [atributos_cliente["correo"]]
@@ -715,11 +2661,17 @@ class Correo:
         password = "ppxn mzfg iako hzbl"  
 
         try:
-            with smtplib.SMTP_SSL(smtp_server, smtp_port) as smtp:
-                smtp.login(correo_emisor, password)
-                smtp.sendmail(correo_emisor, correo_cliente, msg.as_string())
+            with tramo("Correo.smtp_conexion", servidor=smtp_server):
+                smtp = smtplib.SMTP_SSL(smtp_server, smtp_port)
+            with smtp:
+                with tramo("Correo.smtp_login"):
+                    smtp.login(correo_emisor, password)
+                with tramo("Correo.smtp_envio"):
+                    smtp.sendmail(correo_emisor, correo_cliente, msg.as_string())
+            return True
         except Exception as e:
             print(f"Error al enviar el correo: {e}")
+            return False
 
 class Factura:
     path_plantilla_factura = "src/templates/invoicetemplate.html"
@@ -727,11 +2679,21 @@ class Factura:
     # Path donde se guardan las facturas generadas
     path_facturas = "facturas"
 
-    # Lee el contenido de la plantilla
-    with open(path_plantilla_factura, encoding='utf-8') as archivo_factura:
-        plantilla_factura: str = archivo_factura.read()
+    # Contenido de la plantilla, se lee del disco en la primera factura (ver `obtener_plantilla`)
+    plantilla_factura: str = None
+
+    @classmethod
+    def obtener_plantilla(cls) -> str:
+        """
+        Retorna la plantilla HTML de la factura, leyéndola del disco solo la primera vez.
+        """
+        if cls.plantilla_factura is None:
+            with open(cls.path_plantilla_factura, encoding='utf-8') as archivo_factura:
+                cls.plantilla_factura = archivo_factura.read()
+        return cls.plantilla_factura
 
     @classmethod
+    @trazado()
     def generar_factura_html(cls, pedido: dict) -> str:
         """
         Genera el contenido HTML de una factura de compra.
@@ -746,7 +2708,7 @@ class Factura:
         ### Retorna:
         - `str`: HTML de la factura con los datos insertados.
         """
-        factura_generada: str = cls.plantilla_factura
+        factura_generada: str = cls.obtener_plantilla()
 
         # Extraer datos del pedido
         productos: dict = pedido["productos"]
@@ -777,6 +2739,7 @@ class Factura:
         return factura_generada
 
     @classmethod
+    @trazado()
     def generar_factura_pdf(cls, pedido: dict) -> str:
         """
         Genera un archivo PDF con la factura de un pedido.
@@ -787,13 +2750,17 @@ class Factura:
         ### Retorna:
         - `str`: Ruta del archivo PDF generado.
         """
+        import pdfkit
+
         no_factura: int = pedido["no_factura"] 
         html_factura: str = cls.generar_factura_html(pedido)
         path_pdf: str = f"{cls.path_facturas}/{no_factura}.pdf"
-        pdfkit.from_string(html_factura, path_pdf)    
+        with tramo("Factura.wkhtmltopdf", factura=no_factura):
+            pdfkit.from_string(html_factura, path_pdf)
         return path_pdf
 
     @staticmethod
+    @trazado()
     def abrir_factura_pdf(pdf_path: str):
         """
         Abre un archivo PDF de factura en el navegador, si no intenta abrirla en el explorador de archivos.
@@ -804,6 +2771,9 @@ class Factura:
         if not os.path.isfile(pdf_path):
             print(f"No se encontró el archivo: {pdf_path}")
             return
+
+        import platform
+        import subprocess
         
         sistema = platform.system()
         
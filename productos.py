@@ -3,20 +3,25 @@
 # Permite:
 # - **Ver la lista de productos** registrados en la base de datos.
 # - **Registrar nuevos productos** con detalles como nombre, medida, fecha de vencimiento, precio de producción y precio de venta.
+# - **Agregar stock** a un producto (opcionalmente como un lote con fecha de vencimiento),
+#   **ver los productos con stock bajo** y **los lotes por vencer**.
 # Utiliza `tkinter` para la interfaz gráfica y se conecta con la base de datos a través del módulo `sql.py`.
 
 import tkinter as tk
 from tkinter import messagebox
 from poo import Producto
+from verificacion import es_entero_no_negativo, ESQUEMA_PRODUCTO
+from monitor import Boton
 from datetime import datetime
-from verificacion import formato_peso_volumen 
 
-class VentanaMainProductos(tk.Tk):
-    def __init__(self, func_regresar):
-        super().__init__()  # Llamar al inicializador de la clase base Tk
+class VentanaMainProductos(tk.Frame):
+    # Título y tamaño que aplica la ventana principal al mostrar esta vista
+    titulo = "Productos"
+    tamano = "300x420"
+
+    def __init__(self, master, func_regresar):
+        super().__init__(master)  # Llamar al inicializador de la clase base Frame
         self.func_regresar = func_regresar
-        self.title("Productos")
-        self.geometry("300x250")
         self.config(bg="white")  # Fondo blanco
         
         # Configuración de los botones
@@ -27,26 +32,36 @@ class VentanaMainProductos(tk.Tk):
         Configura los botones para las acciones en la ventana de productos.
         """
         # Botón para regresar al menú principal
-        btn_regresar = tk.Button(self, text="Regresar", command=self.regresar, bg="yellow", fg="black")
+        btn_regresar = Boton(self, text="Regresar", command=self.regresar, bg="yellow", fg="black")
         btn_regresar.pack(pady=20, fill="x")
 
         # Botón para ver la lista de productos
-        btn_ver_productos = tk.Button(self, text="Ver Productos", command=mostrar_productos, bg="yellow", fg="black")
+        btn_ver_productos = Boton(self, text="Ver Productos", command=mostrar_productos, bg="yellow", fg="black")
         btn_ver_productos.pack(pady=5, fill="x")
         
         # Botón para agregar un nuevo producto
-        btn_agregar_producto = tk.Button(self, text="Agregar Producto", command=registrar_producto, bg="yellow", fg="black")
+        btn_agregar_producto = Boton(self, text="Agregar Producto", command=registrar_producto, bg="yellow", fg="black")
         btn_agregar_producto.pack(pady=5, fill="x")
         
         # Botón para actualizar el nombre de un producto
-        btn_actualizar_nombre = tk.Button(self, text="Actualizar Nombre", command=actualizar_nombre_producto_ui, bg="yellow", fg="black")
+        btn_actualizar_nombre = Boton(self, text="Actualizar Nombre", command=actualizar_nombre_producto_ui, bg="yellow", fg="black")
         btn_actualizar_nombre.pack(pady=5, fill="x")
+
+        # Botones de inventario
+        btn_agregar_stock = Boton(self, text="Agregar Stock", command=agregar_stock_ui, bg="yellow", fg="black")
+        btn_agregar_stock.pack(pady=5, fill="x")
+
+        btn_stock_bajo = Boton(self, text="Stock Bajo", command=mostrar_stock_bajo, bg="yellow", fg="black")
+        btn_stock_bajo.pack(pady=5, fill="x")
+
+        btn_por_vencer = Boton(self, text="Lotes por Vencer", command=mostrar_lotes_por_vencer, bg="yellow", fg="black")
+        btn_por_vencer.pack(pady=5, fill="x")
     
     def regresar(self):
         """
-        Función para regresar a la ventana anterior.
+        Función para regresar a la ventana anterior. La vista no se destruye, queda guardada
+        para mostrarla de nuevo sin reconstruirla.
         """
-        self.destroy()
         self.func_regresar()
 
 def mostrar_productos():
@@ -94,7 +109,7 @@ def mostrar_productos():
             for campo, valor in producto.items():
                 if campo == 'fecha_vencimiento' and isinstance(valor, str):
                     try:
-                        fecha_obj = datetime.strptime(valor, "%Y-%m-%d")  # Suponiendo que el formato de fecha es YYYY-MM-DD
+                        fecha_obj = datetime.strptime(valor, "%Y-%m-%d")  # Las fechas se guardan en ISO (ver poo.normalizar_fecha)
                         fecha_formateada = fecha_obj.strftime("%d/%m/%Y")  # Convertir a formato d/m/año
                         valor = fecha_formateada
                     except ValueError:
@@ -121,7 +136,7 @@ def registrar_producto():
        - **Fecha de Vencimiento** (formato: `dd/mm/aaaa`).
        - **Precio de Producción**.
        - **Precio de Venta**.
-    3. Valida los datos ingresados y los registra en la base de datos.
+    3. Valida los datos ingresados con `ESQUEMA_PRODUCTO` y los registra en la base de datos.
     4. Muestra un mensaje de éxito o error según el resultado.
     """
     # Crear una nueva ventana emergente para el registro de productos
@@ -147,7 +162,7 @@ def registrar_producto():
     entry_fecha_vencimiento = tk.Entry(ventana_toplevel)
     entry_fecha_vencimiento.pack(pady=5)
 
-    tk.Label(ventana_toplevel, text="** Escribir precio sin signos ni comas").pack(pady=10)
+    tk.Label(ventana_toplevel, text="** Escribir precio sin signos, puntos ni comas").pack(pady=10)
 
 
     tk.Label(ventana_toplevel, text="Precio de Producción:").pack(pady=5)
@@ -163,29 +178,25 @@ def registrar_producto():
 
     # Función para registrar el producto en la base de datos
     def registrar():
-        nombre = entry_nombre.get()
-        medida = entry_kilolitro.get()
-
-        if not formato_peso_volumen(medida):
-            messagebox.showerror("Error", "No se pudo insertar la medida, escribir en el siguiente formato: 100 ml o 500 o 300 g, por ejemplo")
-            return
-
-        precio_produccion = float(entry_precio_produccion.get())
-        precio_venta = float(entry_precio_venta.get())
-        str_fecha = entry_fecha_vencimiento.get()
-        try:
-            fecha_vencimiento = datetime.strptime(str_fecha, "%d/%m/%Y").date()
-        except Exception as e:
-            messagebox.showerror("Error", "No se pudo insertar la fecha de vencimiento, revise el formato (Dia/Mes/Año) y que la fecha sea valida")
-            ventana_toplevel.destroy()
-            return 
         producto_info = {
-            'nombre': nombre,
-            'medida': medida,
-            'fecha_vencimiento': fecha_vencimiento,
-            'precio_produccion': precio_produccion,
-            'precio_venta': precio_venta
+            'nombre': entry_nombre.get(),
+            'medida': entry_kilolitro.get(),
+            'fecha_vencimiento': entry_fecha_vencimiento.get(),
+            'precio_produccion': entry_precio_produccion.get(),
+            'precio_venta': entry_precio_venta.get()
         }
+        # Las mismas reglas que la importación y el servidor; la ventana queda abierta para corregir
+        errores = ESQUEMA_PRODUCTO.validar(producto_info)
+        if errores:
+            messagebox.showerror("Error", "\n".join(errores.values()))
+            return
+
+        # Los precios son enteros: con float() quedaban como REAL en las columnas de precio
+        producto_info['precio_produccion'] = int(producto_info['precio_produccion'])
+        producto_info['precio_venta'] = int(producto_info['precio_venta'])
+        str_fecha = producto_info['fecha_vencimiento']
+        formato = "%d/%m/%Y" if "/" in str_fecha else "%Y-%m-%d"
+        producto_info['fecha_vencimiento'] = datetime.strptime(str_fecha, formato).date()
 
         resultado = Producto.crear_objeto(**producto_info)
         if resultado:
@@ -195,7 +206,7 @@ def registrar_producto():
         ventana_toplevel.destroy()
 
     # Botón para registrar el producto
-    btn_registrar = tk.Button(ventana_toplevel, text="Registrar Producto", command=registrar)
+    btn_registrar = Boton(ventana_toplevel, text="Registrar Producto", command=registrar)
     btn_registrar.pack(pady=20)
     
 def actualizar_nombre_producto_ui():
@@ -233,5 +244,109 @@ def actualizar_nombre_producto_ui():
 
         ventana_toplevel.destroy()
 
-    btn_actualizar = tk.Button(ventana_toplevel, text="Actualizar", command=actualizar)
+    btn_actualizar = Boton(ventana_toplevel, text="Actualizar", command=actualizar)
     btn_actualizar.pack(pady=10)
+
+def agregar_stock_ui():
+    """
+    Muestra una ventana para sumar unidades al inventario de un producto.
+    ### Comportamiento:
+    1. Solicita el ID del producto, las unidades que entran y, opcionales, el mínimo de stock
+       y la fecha de vencimiento del lote.
+    2. Con fecha registra un lote (`Producto.agregar_lote`), sin fecha suma las unidades
+       sin lote (`Producto.agregar_stock`).
+    3. Muestra el stock resultante o un mensaje de error.
+    """
+    ventana_toplevel = tk.Toplevel()
+    ventana_toplevel.title("Agregar Stock")
+    ventana_toplevel.geometry("300x320")
+
+    tk.Label(ventana_toplevel, text="ID del Producto:").pack(pady=5)
+    entry_id_producto = tk.Entry(ventana_toplevel)
+    entry_id_producto.pack(pady=5)
+
+    tk.Label(ventana_toplevel, text="Unidades que entran:").pack(pady=5)
+    entry_cantidad = tk.Entry(ventana_toplevel)
+    entry_cantidad.pack(pady=5)
+
+    tk.Label(ventana_toplevel, text="Stock mínimo (vacío para no cambiarlo):").pack(pady=5)
+    entry_minimo = tk.Entry(ventana_toplevel)
+    entry_minimo.pack(pady=5)
+
+    tk.Label(ventana_toplevel, text="Vencimiento del lote (DD/MM/AAAA, opcional):").pack(pady=5)
+    entry_vencimiento = tk.Entry(ventana_toplevel)
+    entry_vencimiento.pack(pady=5)
+
+    def agregar():
+        id_producto = entry_id_producto.get().strip()
+        cantidad = entry_cantidad.get().strip()
+        minimo = entry_minimo.get().strip()
+        vencimiento = entry_vencimiento.get().strip()
+
+        if not id_producto.isdigit() or not es_entero_no_negativo(cantidad) or (minimo and not es_entero_no_negativo(minimo)):
+            messagebox.showerror("Error", "El ID, las unidades y el mínimo deben ser números enteros")
+            return
+        if Producto.obtener_producto_detalle(int(id_producto)) is None:
+            messagebox.showerror("Error", "No se encontró el producto")
+            return
+
+        minimo = int(minimo) if minimo else None
+        if vencimiento:
+            try:
+                fecha = datetime.strptime(vencimiento, "%d/%m/%Y").date()
+            except ValueError:
+                messagebox.showerror("Error", "La fecha de vencimiento debe tener el formato Dia/Mes/Año")
+                return
+            if Producto.agregar_lote(int(id_producto), int(cantidad), fecha, minimo) is None:
+                messagebox.showerror("Error", "No se pudo registrar el lote")
+                return
+            stock = Producto.obtener_stock(int(id_producto))[0]
+        else:
+            stock = Producto.agregar_stock(int(id_producto), int(cantidad), minimo)
+
+        if stock is None:
+            messagebox.showerror("Error", "No se pudo actualizar el stock")
+        else:
+            messagebox.showinfo("Éxito", f"Stock actual del producto: {stock}")
+        ventana_toplevel.destroy()
+
+    btn_agregar = Boton(ventana_toplevel, text="Agregar", command=agregar)
+    btn_agregar.pack(pady=10)
+
+def mostrar_stock_bajo():
+    """
+    Muestra los productos con stock en o por debajo de su mínimo.
+    """
+    productos = Producto.productos_bajo_stock()
+    if not productos:
+        messagebox.showinfo("Stock", "No hay productos con stock bajo.")
+        return
+
+    ventana_toplevel = tk.Toplevel()
+    ventana_toplevel.title("Stock Bajo")
+    ventana_toplevel.geometry("400x300")
+
+    for producto in productos:
+        texto = f"ID: {producto['id']} | {producto['nombre']} | Stock: {producto['cantidad']} (mínimo {producto['minimo']})"
+        tk.Label(ventana_toplevel, text=texto, anchor="w").pack(fill="x", padx=10, pady=2)
+
+# Ventana de días que muestra "Lotes por Vencer"
+DIAS_POR_VENCER = 30
+
+def mostrar_lotes_por_vencer():
+    """
+    Muestra los lotes con unidades que vencen en los próximos `DIAS_POR_VENCER` días.
+    """
+    lotes = Producto.lotes_por_vencer(DIAS_POR_VENCER)
+    if not lotes:
+        messagebox.showinfo("Lotes", f"No hay lotes que venzan en los próximos {DIAS_POR_VENCER} días.")
+        return
+
+    ventana_toplevel = tk.Toplevel()
+    ventana_toplevel.title("Lotes por Vencer")
+    ventana_toplevel.geometry("450x300")
+
+    for lote in lotes:
+        vencimiento = datetime.strptime(lote["vencimiento"], "%Y-%m-%d").strftime("%d/%m/%Y")
+        texto = f"Lote {lote['lote']} | {lote['nombre']} (ID {lote['producto']}) | Vence: {vencimiento} | Unidades: {lote['cantidad']}"
+        tk.Label(ventana_toplevel, text=texto, anchor="w").pack(fill="x", padx=10, pady=2)
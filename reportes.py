@@ -0,0 +1,528 @@
+# Módulo: `reportes.py`
+# Descripción: Reportes de ventas para la gerencia: unidades, ingresos y margen
+# (`PrecioVenta - PrecioProduccion`) por día, por producto y por cliente, y los productos y
+# clientes que más venden.
+# - Las ventas facturadas se leen de `Ventas` por bloques y se guardan por columnas en arreglos
+#   de NumPy. Si NumPy no está instalado se usan arreglos del módulo `array` (mismo resultado,
+#   más lento porque las agrupaciones se hacen fila por fila en Python).
+# - Las columnas leídas quedan en memoria: `Ventas` solo crece, así que el siguiente reporte lee
+#   únicamente las ventas nuevas (ver `cargar_ventas`).
+# - Con NumPy las agrupaciones, sumas y el top N se calculan sobre columnas completas.
+# - `mostrar_reporte` abre la ventana del reporte y `escribir_csv` lo exporta.
+# - `generar_reporte_sucursales` consolida el reporte de las sucursales registradas (`Db.sucursales`):
+#   cada sucursal agrupa sus ventas en SQL, en paralelo, y aquí solo se suman los resultados.
+#
+# `tkinter` se importa solo al abrir la ventana, así `consola.py` puede usar este módulo sin interfaz.
+
+import csv
+import heapq
+import threading
+from array import array
+from datetime import date, datetime, timezone
+from operator import mul
+
+from poo import Db, rango_fechas, id_sucursal
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Filas que se piden a SQLite en cada `fetchmany`
+TAMANO_BLOQUE = 100_000
+
+# Productos y clientes que aparecen en los tops
+TOP_POR_DEFECTO = 10
+
+# `dia` se guarda como días desde el 1 de enero de 1970; este es su ordinal en `date.fromordinal`
+ORDINAL_1970 = date(1970, 1, 1).toordinal()
+
+
+# Columnas base ya leídas de cada base de datos: `{Db.ruta: (último noIdVentas, columnas, con_numpy)}`.
+# `Ventas` es un libro de solo inserción, así que cada reporte lee solo las ventas nuevas; si el
+# conteo no cuadra (se borraron o archivaron ventas) se vuelve a leer todo.
+_columnas_leidas = {}
+_candado_columnas = threading.Lock()
+
+# Columnas base que se guardan: segundo (desde 1970), producto, cliente, cantidad y precio de venta
+COLUMNAS_BASE = ("segundo", "producto", "cliente", "cantidad", "precio")
+
+
+def _leer_columnas(cursor, tabla, despues_de, hasta_id, tamano_bloque):
+    """
+    Lee las ventas facturadas de `tabla` con `despues_de < noIdVentas <= hasta_id` en columnas base.
+    """
+    cursor.execute(f'''
+        SELECT CAST(round((julianday(fecha) - 2440587.5) * 86400) AS INTEGER), producto, cliente, cantidad, IFNULL(precio, 0)
+        FROM {tabla} WHERE noIdVentas > ? AND noIdVentas <= ? AND factura IS NOT NULL
+    ''', (despues_de, hasta_id))
+
+    if np is not None:
+        bloques = []
+        while True:
+            bloque = cursor.fetchmany(tamano_bloque)
+            if not bloque:
+                break
+            bloques.append(np.array(bloque, dtype=np.int64).reshape(-1, len(COLUMNAS_BASE)))
+        matriz = np.concatenate(bloques) if bloques else np.empty((0, len(COLUMNAS_BASE)), dtype=np.int64)
+        return {nombre: np.ascontiguousarray(matriz[:, i]) for i, nombre in enumerate(COLUMNAS_BASE)}
+
+    columnas = {nombre: array("q") for nombre in COLUMNAS_BASE}
+    while True:
+        bloque = cursor.fetchmany(tamano_bloque)
+        if not bloque:
+            break
+        for nombre, valores in zip(COLUMNAS_BASE, zip(*bloque)):
+            columnas[nombre].extend(valores)
+    return columnas
+
+
+def _unir(columnas, nuevas):
+    if np is not None:
+        return {nombre: np.concatenate((columnas[nombre], nuevas[nombre])) for nombre in COLUMNAS_BASE}
+    for nombre in COLUMNAS_BASE:
+        columnas[nombre].extend(nuevas[nombre])
+    return columnas
+
+
+def _segundo(fecha_iso):
+    return int(datetime.fromisoformat(fecha_iso).replace(tzinfo=timezone.utc).timestamp())
+
+
+def cargar_ventas(desde=None, hasta=None, tamano_bloque=TAMANO_BLOQUE):
+    """
+    ## Función: `cargar_ventas`
+    Retorna las ventas facturadas en columnas.
+
+    ### Parámetros:
+    - `desde`, `hasta` (opcionales): Rango de fechas, como en `Venta.ventas_entre`.
+    - `tamano_bloque` (int): Filas por lectura.
+
+    ### Comportamiento:
+    1. En una sola transacción cuenta las ventas facturadas (incluidas las archivadas, ver
+       `Db.tabla_ventas_historicas`) y lee solo las que tienen un
+       `noIdVentas` mayor que el último leído. Si el total no cuadra con lo guardado,
+       vuelve a leer todas.
+    2. Filtra el rango de fechas sobre las columnas (sin volver a consultar la base).
+    3. Calcula `dia`, `ingreso` (cantidad × precio de la venta) y `costo` (cantidad × precio
+       de producción actual del producto) sobre las columnas completas.
+
+    ### Retorna:
+    - Diccionario `{columna: arreglo}` con `dia` (días desde 1970), `producto`, `cliente`,
+      `cantidad`, `ingreso` y `costo`, o `None` si las fechas no son válidas.
+    """
+    rango = None
+    if desde or hasta:
+        rango = rango_fechas(desde or "1900-01-01", hasta or "9000-01-01")
+        if rango is None:
+            return None
+
+    with _candado_columnas:
+        db = Db()
+        tabla = db.tabla_ventas_historicas()
+        db.cursor.execute("BEGIN")
+        db.cursor.execute("SELECT noIdProducto, PrecioProduccion FROM productos")
+        precios_produccion = db.cursor.fetchall()
+        db.cursor.execute(f"SELECT COUNT(*) FROM {tabla} WHERE factura IS NOT NULL")
+        total = db.cursor.fetchone()[0]
+        db.cursor.execute(f"SELECT IFNULL(MAX(noIdVentas), 0) FROM {tabla}")
+        ultimo = db.cursor.fetchone()[0]
+
+        guardadas = _columnas_leidas.get(Db.ruta)
+        columnas = None
+        if guardadas is not None and guardadas[2] == (np is not None) and guardadas[0] <= ultimo:
+            nuevas = _leer_columnas(db.cursor, tabla, guardadas[0], ultimo, tamano_bloque)
+            if len(guardadas[1]["segundo"]) + len(nuevas["segundo"]) == total:
+                columnas = _unir(guardadas[1], nuevas)
+        if columnas is None:
+            columnas = _leer_columnas(db.cursor, tabla, 0, ultimo, tamano_bloque)
+        db.cerrar()
+        _columnas_leidas[Db.ruta] = (ultimo, columnas, np is not None)
+
+    segundo, producto, cliente, cantidad, precio = (columnas[nombre] for nombre in COLUMNAS_BASE)
+    if np is not None:
+        if rango is not None:
+            dentro = (segundo >= _segundo(rango[0])) & (segundo < _segundo(rango[1]))
+            segundo, producto, cliente, cantidad, precio = (columna[dentro] for columna in (segundo, producto, cliente, cantidad, precio))
+        maximo_id = max([fila[0] for fila in precios_produccion] + [int(producto.max()) if len(producto) else 0])
+        costos = np.zeros(maximo_id + 1, dtype=np.int64)
+        for id_producto, precio_produccion in precios_produccion:
+            costos[id_producto] = precio_produccion
+        dia = segundo // 86400
+        ingreso = cantidad * precio
+        costo = cantidad * costos[producto]
+    else:
+        if rango is not None:
+            inicio, fin = _segundo(rango[0]), _segundo(rango[1])
+            dentro = [i for i, valor in enumerate(segundo) if inicio <= valor < fin]
+            segundo, producto, cliente, cantidad, precio = (
+                array("q", (columna[i] for i in dentro)) for columna in (segundo, producto, cliente, cantidad, precio)
+            )
+        costos = dict(precios_produccion)
+        dia = array("q", (valor // 86400 for valor in segundo))
+        ingreso = array("q", map(mul, cantidad, precio))
+        costo = array("q", map(mul, cantidad, (costos.get(id_producto, 0) for id_producto in producto)))
+
+    return {"dia": dia, "producto": producto, "cliente": cliente, "cantidad": cantidad, "ingreso": ingreso, "costo": costo}
+
+
+def agrupar(claves, *valores):
+    """
+    ## Función: `agrupar`
+    Suma cada columna de `valores` por clave (un GROUP BY sobre columnas).
+
+    Con NumPy, si las claves son enteros en un rango pequeño (ids, días) se cuentan con
+    `bincount` directamente; si no, primero se numeran con `unique`.
+
+    ### Retorna:
+    - Tupla `(claves_unicas, [sumas de cada columna])`, con las claves en orden ascendente.
+    """
+    if np is not None:
+        if len(claves) == 0:
+            return np.empty(0, dtype=np.int64), [np.empty(0, dtype=np.int64) for _ in valores]
+        minimo = int(claves.min())
+        desplazadas = claves.astype(np.int64) - minimo
+        if int(desplazadas.max()) < max(len(claves), 1 << 16):
+            unicas = np.flatnonzero(np.bincount(desplazadas))
+            sumas = [np.bincount(desplazadas, weights=columna)[unicas] for columna in valores]
+            unicas = unicas + minimo
+        else:
+            unicas, inversa = np.unique(claves, return_inverse=True)
+            sumas = [np.bincount(inversa, weights=columna, minlength=len(unicas)) for columna in valores]
+        # `bincount` suma en float64: exacto para enteros menores que 2**53
+        return unicas, [np.rint(suma).astype(np.int64) for suma in sumas]
+
+    acumulado = {}
+    for clave, *fila in zip(claves, *valores):
+        sumas = acumulado.get(clave)
+        if sumas is None:
+            acumulado[clave] = fila
+        else:
+            for i, valor in enumerate(fila):
+                sumas[i] += valor
+    unicas = sorted(acumulado)
+    return unicas, [[acumulado[clave][i] for clave in unicas] for i in range(len(valores))]
+
+
+def mayores(valores, cantidad):
+    """
+    Retorna los índices de los `cantidad` mayores `valores`, de mayor a menor. Los empates se
+    desempatan por el índice menor, igual con NumPy que sin él.
+    """
+    if cantidad <= 0:
+        return []
+    if np is not None:
+        if len(valores) > cantidad:
+            # Todos los que igualan al `cantidad`-ésimo mayor, para desempatar como `heapq`
+            umbral = valores[np.argpartition(-valores, cantidad - 1)[cantidad - 1]]
+            candidatos = np.flatnonzero(valores >= umbral)
+        else:
+            candidatos = np.arange(len(valores))
+        return candidatos[np.argsort(-valores[candidatos], kind="stable")][:cantidad].tolist()
+    return heapq.nlargest(cantidad, range(len(valores)), key=valores.__getitem__)
+
+
+def _lista(columna):
+    return columna.tolist() if hasattr(columna, "tolist") else list(columna)
+
+
+def _nombres(tabla, columna_id, expresion, ids):
+    """
+    Retorna `{id: nombre}` para los `ids` dados (solo los del top, no toda la tabla).
+    """
+    if not ids:
+        return {}
+    db = Db()
+    db.cursor.execute(
+        f"SELECT {columna_id}, {expresion} FROM {tabla} WHERE {columna_id} IN ({', '.join('?' * len(ids))})", ids
+    )
+    nombres = dict(db.cursor.fetchall())
+    db.cerrar()
+    return nombres
+
+
+def generar_reporte(desde=None, hasta=None, top=TOP_POR_DEFECTO):
+    """
+    ## Función: `generar_reporte`
+    Calcula el reporte de ventas facturadas.
+
+    ### Parámetros:
+    - `desde`, `hasta` (opcionales): Rango de fechas, como en `Venta.ventas_entre`.
+    - `top` (int): Cuántos productos y clientes incluir en los tops.
+
+    ### Retorna:
+    - Diccionario con:
+      - `ventas`: filas leídas.
+      - `totales`: `unidades`, `ingreso`, `costo` y `margen`.
+      - `por_dia`, `por_producto`, `por_cliente`: listas de diccionarios con la clave
+        (`dia` ISO, `producto` o `cliente`), `unidades`, `ingreso` y `margen`.
+      - `top_productos`, `top_clientes`: los de mayor ingreso, con `nombre`.
+    - `None` si las fechas no son válidas.
+    """
+    columnas = cargar_ventas(desde, hasta)
+    if columnas is None:
+        return None
+    cantidad, ingreso, costo = columnas["cantidad"], columnas["ingreso"], columnas["costo"]
+    if np is not None:
+        margen = ingreso - costo
+    else:
+        margen = array("q", (a - b for a, b in zip(ingreso, costo)))
+
+    reporte = {
+        "ventas": len(cantidad),
+        "totales": {
+            "unidades": int(sum(cantidad) if np is None else cantidad.sum()),
+            "ingreso": int(sum(ingreso) if np is None else ingreso.sum()),
+            "costo": int(sum(costo) if np is None else costo.sum()),
+        },
+    }
+    reporte["totales"]["margen"] = reporte["totales"]["ingreso"] - reporte["totales"]["costo"]
+
+    for seccion, clave in (("por_dia", "dia"), ("por_producto", "producto"), ("por_cliente", "cliente")):
+        unicas, (unidades, ingresos, margenes) = agrupar(columnas[clave], cantidad, ingreso, margen)
+        claves = _lista(unicas)
+        if clave == "dia":
+            claves = [date.fromordinal(dia + ORDINAL_1970).isoformat() for dia in claves]
+        reporte[seccion] = [
+            {clave: valor, "unidades": u, "ingreso": i, "margen": m}
+            for valor, u, i, m in zip(claves, _lista(unidades), _lista(ingresos), _lista(margenes))
+        ]
+        if clave != "dia":
+            indices = mayores(ingresos if np is not None else _lista(ingresos), top)
+            filas = [reporte[seccion][i] for i in indices]
+            if clave == "producto":
+                nombres = _nombres("productos", "noIdProducto", "NombreProducto", [fila["producto"] for fila in filas])
+            else:
+                nombres = _nombres("Clientes", "noIdCliente", "nombre || ' ' || apellido", [fila["cliente"] for fila in filas])
+            reporte[f"top_{clave}s"] = [dict(fila, nombre=nombres.get(fila[clave])) for fila in filas]
+    return reporte
+
+
+# Agrupaciones que calcula cada sucursal para el reporte consolidado. El costo usa el precio de
+# producción actual de cada sucursal, igual que `cargar_ventas`.
+# Por día y por producto salen de `ResumenProductoDia` (incluye las ventas archivadas); `{filtro}`
+# es el rango en días enteros.
+SQL_SUCURSAL_POR_DIA = '''
+    SELECT r.dia, SUM(r.unidades), SUM(r.ingreso), SUM(r.unidades * IFNULL(p.PrecioProduccion, 0))
+    FROM ResumenProductoDia r LEFT JOIN productos p ON p.noIdProducto = r.producto
+    WHERE 1 {filtro} GROUP BY r.dia
+'''
+SQL_SUCURSAL_POR_PRODUCTO = '''
+    SELECT r.producto, MAX(p.NombreProducto), SUM(r.unidades), SUM(r.ingreso), SUM(r.unidades * IFNULL(p.PrecioProduccion, 0))
+    FROM ResumenProductoDia r LEFT JOIN productos p ON p.noIdProducto = r.producto
+    WHERE 1 {filtro} GROUP BY r.producto
+'''
+# Las mismas agrupaciones sobre el libro, para rangos con hora. `{tabla}` es la tabla de ventas con historial
+SQL_SUCURSAL_POR_DIA_LIBRO = '''
+    SELECT substr(v.fecha, 1, 10), SUM(v.cantidad), SUM(v.cantidad * IFNULL(v.precio, 0)),
+           SUM(v.cantidad * IFNULL(p.PrecioProduccion, 0))
+    FROM {tabla} v LEFT JOIN productos p ON p.noIdProducto = v.producto
+    WHERE v.factura IS NOT NULL {filtro} GROUP BY 1
+'''
+SQL_SUCURSAL_POR_PRODUCTO_LIBRO = '''
+    SELECT v.producto, MAX(p.NombreProducto), SUM(v.cantidad), SUM(v.cantidad * IFNULL(v.precio, 0)),
+           SUM(v.cantidad * IFNULL(p.PrecioProduccion, 0))
+    FROM {tabla} v LEFT JOIN productos p ON p.noIdProducto = v.producto
+    WHERE v.factura IS NOT NULL {filtro} GROUP BY v.producto
+'''
+# Por cliente siempre sale del libro (`ResumenCliente` no tiene fechas ni productos para el costo)
+SQL_SUCURSAL_POR_CLIENTE = '''
+    SELECT g.cliente, c.nombre || ' ' || c.apellido, g.ventas, g.unidades, g.ingreso, g.costo
+    FROM (
+        SELECT v.cliente, COUNT(*) AS ventas, SUM(v.cantidad) AS unidades,
+               SUM(v.cantidad * IFNULL(v.precio, 0)) AS ingreso, SUM(v.cantidad * IFNULL(p.PrecioProduccion, 0)) AS costo
+        FROM {tabla} v LEFT JOIN productos p ON p.noIdProducto = v.producto
+        WHERE v.factura IS NOT NULL {filtro} GROUP BY v.cliente
+    ) g LEFT JOIN Clientes c ON c.noIdCliente = g.cliente
+    ORDER BY g.cliente
+'''
+
+
+def _agrupar_sucursal(cursor, tabla, rango):
+    """
+    Agrupa las ventas de una sucursal por día, producto y cliente (ver `Db.en_sucursales`).
+    """
+    filtro, parametros = "", ()
+    if rango is not None:
+        filtro, parametros = "AND v.fecha >= ? AND v.fecha < ?", rango
+    if rango is None or all(limite.endswith(" 00:00:00") for limite in rango):
+        filtro_dias = "AND r.dia >= ? AND r.dia < ?" if rango is not None else ""
+        consultas = ((SQL_SUCURSAL_POR_DIA, filtro_dias, tuple(limite[:10] for limite in parametros)),
+                     (SQL_SUCURSAL_POR_PRODUCTO, filtro_dias, tuple(limite[:10] for limite in parametros)))
+    else:
+        consultas = ((SQL_SUCURSAL_POR_DIA_LIBRO, filtro, parametros), (SQL_SUCURSAL_POR_PRODUCTO_LIBRO, filtro, parametros))
+
+    resultado = {}
+    for seccion, (sql, filtro_seccion, parametros_seccion) in zip(
+        ("por_dia", "por_producto", "por_cliente"), consultas + ((SQL_SUCURSAL_POR_CLIENTE, filtro, parametros),)
+    ):
+        cursor.execute(sql.format(tabla=tabla, filtro=filtro_seccion), parametros_seccion)
+        resultado[seccion] = cursor.fetchall()
+    return resultado
+
+
+def generar_reporte_sucursales(desde=None, hasta=None, top=TOP_POR_DEFECTO, sucursales=None, hilos=None):
+    """
+    ## Función: `generar_reporte_sucursales`
+    Calcula el reporte consolidado de varias sucursales, cada una con su propio `data.db`.
+
+    ### Parámetros:
+    - `desde`, `hasta` (opcionales): Rango de fechas, como en `Venta.ventas_entre`.
+    - `top` (int): Cuántos productos y clientes incluir en los tops.
+    - `sucursales` (opcional): `{nombre: ruta}`; por defecto las registradas (`Db.sucursales`).
+    - `hilos` (opcional): Máximo de sucursales leídas a la vez (ver `Db.en_sucursales`).
+
+    ### Comportamiento:
+    1. Cada sucursal agrupa sus ventas facturadas (incluidas las archivadas) por día, producto y
+       cliente en SQL, en paralelo. Solo viajan los grupos, así el tiempo crece con las ventas de
+       cada sucursal y no con su combinación. Por día y por producto se usan sus tablas de resumen
+       si el rango es de días enteros.
+    2. Los días se suman entre sucursales. Los productos y clientes no: sus ids se repiten entre
+       sucursales y se muestran como `id_sucursal` (`"centro:42"`).
+
+    ### Retorna:
+    - El mismo diccionario que `generar_reporte` (con `nombre` también en `por_producto` y
+      `por_cliente`) más `sucursales`: los totales de cada una.
+    - `None` si las fechas no son válidas o alguna sucursal no se pudo leer.
+    """
+    rango = None
+    if desde or hasta:
+        rango = rango_fechas(desde or "1900-01-01", hasta or "9000-01-01")
+        if rango is None:
+            return None
+    resultados = Db.en_sucursales(_agrupar_sucursal, rango, sucursales=sucursales, hilos=hilos)
+    if resultados is None:
+        return None
+
+    por_dia = {}
+    reporte = {"ventas": 0, "sucursales": [], "por_producto": [], "por_cliente": []}
+    for sucursal, resultado in resultados.items():
+        totales = {"sucursal": sucursal, "ventas": sum(fila[2] for fila in resultado["por_cliente"]), "unidades": 0, "ingreso": 0, "costo": 0}
+        for dia, unidades, ingreso, costo in resultado["por_dia"]:
+            acumulado = por_dia.setdefault(dia, [0, 0, 0])
+            acumulado[0] += unidades
+            acumulado[1] += ingreso
+            acumulado[2] += ingreso - costo
+            totales["unidades"] += unidades
+            totales["ingreso"] += ingreso
+            totales["costo"] += costo
+        totales["margen"] = totales["ingreso"] - totales["costo"]
+        reporte["sucursales"].append(totales)
+        reporte["ventas"] += totales["ventas"]
+        for seccion, clave in (("por_producto", "producto"), ("por_cliente", "cliente")):
+            reporte[seccion].extend(
+                {clave: id_sucursal(sucursal, fila[0]), "nombre": fila[1], "unidades": fila[-3], "ingreso": fila[-2], "margen": fila[-2] - fila[-1]}
+                for fila in resultado[seccion]
+            )
+
+    reporte["totales"] = {
+        clave: sum(totales[clave] for totales in reporte["sucursales"]) for clave in ("unidades", "ingreso", "costo", "margen")
+    }
+    reporte["por_dia"] = [
+        {"dia": dia, "unidades": unidades, "ingreso": ingreso, "margen": margen}
+        for dia, (unidades, ingreso, margen) in sorted(por_dia.items())
+    ]
+    for seccion, clave in (("por_producto", "producto"), ("por_cliente", "cliente")):
+        filas = reporte[seccion]
+        reporte[f"top_{clave}s"] = [filas[i] for i in heapq.nlargest(top, range(len(filas)), key=lambda i: filas[i]["ingreso"])]
+    return reporte
+
+
+def escribir_csv(reporte, archivo):
+    """
+    Escribe el reporte en `archivo` (un archivo de texto abierto) como CSV de una sola tabla:
+    `seccion, clave, nombre, unidades, ingreso, margen`. La sección `totales` va primero.
+    """
+    escritor = csv.writer(archivo)
+    escritor.writerow(["seccion", "clave", "nombre", "unidades", "ingreso", "margen"])
+    totales = reporte["totales"]
+    escritor.writerow(["totales", "", "", totales["unidades"], totales["ingreso"], totales["margen"]])
+    for fila in reporte.get("sucursales", []):
+        escritor.writerow(["sucursales", fila["sucursal"], "", fila["unidades"], fila["ingreso"], fila["margen"]])
+    for seccion, clave in (("top_productos", "producto"), ("top_clientes", "cliente"),
+                           ("por_dia", "dia"), ("por_producto", "producto"), ("por_cliente", "cliente")):
+        for fila in reporte[seccion]:
+            escritor.writerow([seccion, fila[clave], fila.get("nombre", ""), fila["unidades"], fila["ingreso"], fila["margen"]])
+
+
+def texto_reporte(reporte, dias=31):
+    """
+    Retorna el reporte en texto para la ventana: totales, tops y los últimos `dias` días.
+    """
+    totales = reporte["totales"]
+    lineas = [
+        f"Ventas: {reporte['ventas']}   Unidades: {totales['unidades']}",
+        f"Ingreso: ${totales['ingreso']:,}   Costo: ${totales['costo']:,}   Margen: ${totales['margen']:,}",
+        "",
+    ]
+    if "sucursales" in reporte:
+        lineas.append("=== Sucursales ===")
+        for fila in reporte["sucursales"]:
+            lineas.append(f"{fila['sucursal'][:12]:<12} {fila['ventas']:>10} ventas {fila['unidades']:>10} u  ${fila['ingreso']:>14,}  margen ${fila['margen']:>14,}")
+        lineas.append("")
+    for seccion, titulo, clave in (("top_productos", "Productos", "producto"), ("top_clientes", "Clientes", "cliente")):
+        lineas.append(f"=== {titulo} con más ingreso ===")
+        for fila in reporte[seccion]:
+            lineas.append(f"{fila[clave]:>8}  {str(fila['nombre'])[:28]:<28} {fila['unidades']:>10} u  ${fila['ingreso']:>14,}  margen ${fila['margen']:>14,}")
+        lineas.append("")
+    lineas.append(f"=== Por día (últimos {dias}) ===")
+    for fila in reporte["por_dia"][-dias:]:
+        lineas.append(f"{fila['dia']}  {fila['unidades']:>10} u  ${fila['ingreso']:>14,}  margen ${fila['margen']:>14,}")
+    return "\n".join(lineas)
+
+
+def mostrar_reporte():
+    """
+    ## Función: `mostrar_reporte`
+    Muestra la ventana de reportes de ventas.
+
+    ### Comportamiento:
+    1. Pide un rango de fechas opcional (`DD/MM/AAAA`; vacío para todas las ventas).
+    2. "Generar" calcula el reporte y lo muestra en texto.
+    3. "Exportar CSV" guarda el último reporte generado en el archivo que elija el usuario.
+    """
+    import tkinter as tk
+    from tkinter import filedialog, messagebox
+    from monitor import Boton
+
+    ventana_toplevel = tk.Toplevel()
+    ventana_toplevel.title("Reportes de Ventas")
+    ventana_toplevel.geometry("800x550")
+
+    filtros = tk.Frame(ventana_toplevel)
+    filtros.pack(fill="x", padx=10, pady=5)
+    tk.Label(filtros, text="Desde (DD/MM/AAAA):").pack(side="left")
+    entry_desde = tk.Entry(filtros, width=12)
+    entry_desde.pack(side="left", padx=5)
+    tk.Label(filtros, text="Hasta:").pack(side="left")
+    entry_hasta = tk.Entry(filtros, width=12)
+    entry_hasta.pack(side="left", padx=5)
+
+    texto = tk.Text(ventana_toplevel, font=("Courier", 10))
+    ultimo = {}
+
+    def generar():
+        reporte = generar_reporte(entry_desde.get().strip() or None, entry_hasta.get().strip() or None)
+        if reporte is None:
+            messagebox.showerror("Error", "Las fechas deben tener el formato Dia/Mes/Año")
+            return
+        ultimo["reporte"] = reporte
+        texto.config(state="normal")
+        texto.delete("1.0", "end")
+        texto.insert("1.0", texto_reporte(reporte))
+        texto.config(state="disabled")
+
+    def exportar():
+        if "reporte" not in ultimo:
+            messagebox.showinfo("Reportes", "Primero genere el reporte.")
+            return
+        ruta = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV", "*.csv")])
+        if ruta:
+            with open(ruta, "w", encoding="utf-8", newline="") as archivo:
+                escribir_csv(ultimo["reporte"], archivo)
+            messagebox.showinfo("Reportes", f"Reporte guardado en {ruta}")
+
+    Boton(filtros, text="Generar", command=generar, bg="yellow", fg="black").pack(side="left", padx=5)
+    Boton(filtros, text="Exportar CSV", command=exportar, bg="yellow", fg="black").pack(side="left", padx=5)
+    texto.pack(fill="both", expand=True, padx=10, pady=5)
+    generar()
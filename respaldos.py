@@ -0,0 +1,326 @@
+# Módulo: `respaldos.py`
+# Descripción: Respaldos de la base de datos (`data.db`) con el programa abierto.
+# - Usa la API de respaldo en línea de SQLite por pasos de `PAGINAS_POR_PASO` páginas, con una
+#   pausa entre pasos para que las consultas y ventas del programa no esperen al respaldo.
+# - El respaldo lee una sola instantánea (una transacción de lectura abierta en modo WAL): las
+#   ventas que se registran mientras tanto no lo reinician y no quedan a medias en la copia.
+# - Cada respaldo va a `<base>.respaldos/<base>-AAAAMMDD-HHMMSS-uuuuuu.db` (o `.db.gz` si se
+#   comprime), con su suma SHA-256 al lado (`.sha256`, el formato de `sha256sum`). Se conservan
+#   los `CONSERVAR` más recientes.
+# - `restaurar` verifica la suma y la integridad del respaldo, respalda la base actual y copia el
+#   respaldo sobre ella, también con el programa abierto.
+#
+# Solo se respalda la base principal: los archivos de ventas por año (`<base>.ventas-<año>.db`)
+# ya no cambian después de archivar y se copian aparte. Por eso, al restaurar un respaldo anterior
+# a un archivado, `restaurar` quita de **Ventas** las ventas que ya están en esos archivos.
+
+import glob
+import gzip
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from poo import Db
+
+# Páginas copiadas por paso (256 páginas de 4 KB = 1 MB)
+PAGINAS_POR_PASO = 256
+
+# Pausa entre pasos, en segundos
+PAUSA_PASO_S = 0.002
+
+# Respaldos que se conservan al rotar
+CONSERVAR = 7
+
+SUFIJO_SUMA = ".sha256"
+
+
+def directorio_respaldos(ruta=None):
+    """
+    Directorio de los respaldos de la base `ruta` (por defecto `Db.ruta`): `<base>.respaldos`.
+    """
+    return os.path.splitext(ruta or Db.ruta)[0] + ".respaldos"
+
+
+def suma_archivo(archivo):
+    """
+    Suma SHA-256 (hexadecimal) de un archivo, leído por bloques.
+    """
+    suma = hashlib.sha256()
+    with open(archivo, "rb") as entrada:
+        for bloque in iter(lambda: entrada.read(1 << 20), b""):
+            suma.update(bloque)
+    return suma.hexdigest()
+
+
+def respaldos(ruta=None):
+    """
+    ## Función: `respaldos`
+    Lista los respaldos de la base, del más reciente al más antiguo.
+
+    ### Retorna:
+    - Lista de diccionarios con `archivo`, `bytes`, `comprimido` y `fecha` (modificación del archivo).
+    """
+    base = os.path.basename(os.path.splitext(ruta or Db.ruta)[0])
+    archivos = glob.glob(os.path.join(glob.escape(directorio_respaldos(ruta)), f"{glob.escape(base)}-*.db*"))
+    lista = []
+    for archivo in sorted((a for a in archivos if a.endswith((".db", ".db.gz"))), reverse=True):
+        lista.append({
+            "archivo": archivo,
+            "bytes": os.path.getsize(archivo),
+            "comprimido": archivo.endswith(".gz"),
+            "fecha": datetime.fromtimestamp(os.path.getmtime(archivo)).strftime("%Y-%m-%d %H:%M:%S"),
+        })
+    return lista
+
+
+def rotar(conservar=CONSERVAR, ruta=None):
+    """
+    Borra los respaldos más antiguos (y sus sumas) dejando los `conservar` más recientes.
+    Retorna la lista de archivos borrados.
+    """
+    borrados = []
+    for respaldo in respaldos(ruta)[conservar:]:
+        for archivo in (respaldo["archivo"], respaldo["archivo"] + SUFIJO_SUMA):
+            if os.path.exists(archivo):
+                os.remove(archivo)
+        borrados.append(respaldo["archivo"])
+    return borrados
+
+
+def _copiar_en_linea(origen, destino, paginas, pausa):
+    """
+    Copia la base `origen` en el archivo `destino` con la API de respaldo de SQLite, `paginas`
+    páginas por paso. Retorna la cantidad de pasos.
+    """
+    fuente = sqlite3.connect(origen, isolation_level=None, timeout=30)
+    copia = sqlite3.connect(destino, isolation_level=None)
+    pasos = 0
+
+    def progreso(estado, restantes, total):
+        nonlocal pasos
+        pasos += 1
+        if restantes and pausa:
+            time.sleep(pausa)
+
+    try:
+        # Instantánea de lectura: sin ella, cada escritura del programa entre dos pasos reinicia el respaldo
+        fuente.execute("BEGIN")
+        fuente.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        fuente.backup(copia, pages=paginas, progress=progreso)
+        fuente.execute("ROLLBACK")
+        # El respaldo queda en un solo archivo, sin -wal ni -shm
+        copia.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        copia.close()
+        fuente.close()
+    return pasos
+
+
+def respaldar(comprimir=False, conservar=CONSERVAR, paginas=PAGINAS_POR_PASO, pausa=PAUSA_PASO_S, ruta=None):
+    """
+    ## Función: `respaldar`
+    Respalda la base con el programa abierto.
+
+    ### Parámetros:
+    - `comprimir` (bool): Guardar el respaldo con gzip.
+    - `conservar` (int o None): Respaldos que se conservan después de este (`None` no rota).
+    - `paginas` (int): Páginas por paso (`-1` copia todo en un paso, sin pausas).
+    - `pausa` (float): Segundos de pausa entre pasos.
+    - `ruta` (str, opcional): Base a respaldar (por defecto `Db.ruta`).
+
+    ### Comportamiento:
+    1. Copia la base en un archivo temporal del directorio de respaldos (`_copiar_en_linea`).
+    2. Si se pide, lo comprime; escribe la suma SHA-256 y le da el nombre final.
+    3. Borra los respaldos que pasan de `conservar`.
+
+    ### Retorna:
+    - Diccionario con `archivo`, `bytes`, `sha256`, `pasos`, `segundos` y `borrados`, o `None` si hubo un error.
+    """
+    ruta = ruta or Db.ruta
+    directorio = directorio_respaldos(ruta)
+    base = os.path.basename(os.path.splitext(ruta)[0])
+    archivo = os.path.join(directorio, f"{base}-{datetime.now():%Y%m%d-%H%M%S-%f}.db" + (".gz" if comprimir else ""))
+    temporal = None
+    inicio = time.perf_counter()
+    try:
+        os.makedirs(directorio, exist_ok=True)
+        # Un temporal propio por respaldo: uno programado, uno manual y el de `restaurar` pueden coincidir
+        descriptor, temporal = tempfile.mkstemp(prefix=f"{base}.", suffix=".respaldando", dir=directorio)
+        os.close(descriptor)
+        pasos = _copiar_en_linea(ruta, temporal, paginas, pausa)
+        if comprimir:
+            with open(temporal, "rb") as entrada, gzip.open(temporal + ".gz", "wb", compresslevel=6) as salida:
+                shutil.copyfileobj(entrada, salida, 1 << 20)
+            os.replace(temporal + ".gz", temporal)
+        suma = suma_archivo(temporal)
+        with open(archivo + SUFIJO_SUMA, "w", encoding="utf-8") as salida:
+            salida.write(f"{suma}  {os.path.basename(archivo)}\n")
+        os.replace(temporal, archivo)
+    except (OSError, sqlite3.Error) as e:
+        print(f"No se pudo respaldar {ruta}: {e}")
+        for resto in (temporal, temporal and temporal + ".gz"):
+            if resto and os.path.exists(resto):
+                os.remove(resto)
+        return None
+
+    return {
+        "archivo": archivo,
+        "bytes": os.path.getsize(archivo),
+        "sha256": suma,
+        "pasos": pasos,
+        "segundos": round(time.perf_counter() - inicio, 3),
+        "borrados": rotar(conservar, ruta) if conservar is not None else [],
+    }
+
+
+def _descomprimir(archivo, destino):
+    with gzip.open(archivo, "rb") as entrada, open(destino, "wb") as salida:
+        shutil.copyfileobj(entrada, salida, 1 << 20)
+
+
+def _integridad(archivo):
+    """
+    Resultado de `PRAGMA integrity_check` sobre un respaldo sin comprimir (`"ok"` si está bien).
+    """
+    conexion = sqlite3.connect(f"file:{archivo}?mode=ro", uri=True)
+    try:
+        return "; ".join(fila[0] for fila in conexion.execute("PRAGMA integrity_check"))
+    finally:
+        conexion.close()
+
+
+def verificar(archivo):
+    """
+    ## Función: `verificar`
+    Comprueba un respaldo: su suma SHA-256 contra la guardada y la integridad de la base que contiene.
+
+    ### Retorna:
+    - Lista de problemas encontrados (vacía si el respaldo está bien).
+    """
+    try:
+        with open(archivo + SUFIJO_SUMA, encoding="utf-8") as entrada:
+            esperada = entrada.read().split()[0]
+    except (OSError, IndexError):
+        return [f"Falta la suma de {archivo}."]
+    try:
+        if suma_archivo(archivo) != esperada:
+            return [f"La suma de {archivo} no coincide: el archivo cambió o está dañado."]
+        if not archivo.endswith(".gz"):
+            integridad = _integridad(archivo)
+        else:
+            with tempfile.TemporaryDirectory(prefix="respaldo_") as directorio:
+                _descomprimir(archivo, os.path.join(directorio, "respaldo.db"))
+                integridad = _integridad(os.path.join(directorio, "respaldo.db"))
+    except (OSError, EOFError, sqlite3.Error) as e:
+        return [f"No se pudo leer {archivo}: {e}"]
+    return [] if integridad == "ok" else [f"La base de {archivo} no está íntegra: {integridad}"]
+
+
+def _quitar_archivadas(ruta):
+    """
+    Borra de **Ventas** de `ruta` las ventas que ya están en un archivo de ventas (vuelven con un
+    respaldo anterior al archivado y el historial las contaría dos veces). Se borran con
+    `archivando` en 1, como en `Venta.archivar_ventas`: los resúmenes ya las cuentan una vez.
+    Retorna la cantidad de ventas borradas.
+    """
+    conexion = sqlite3.connect(ruta, isolation_level=None, timeout=30)
+    borradas = 0
+    try:
+        # Una transacción por archivo: SQLite no separa una base adjunta en medio de una transacción
+        for _, archivo in Db.archivos_ventas(ruta):
+            conexion.execute("ATTACH DATABASE ? AS archivo", (archivo,))
+            conexion.execute("BEGIN IMMEDIATE")
+            conexion.execute("UPDATE Parametros SET valor = 1 WHERE nombre = 'archivando'")
+            borradas += conexion.execute('''
+                DELETE FROM main.Ventas AS venta WHERE EXISTS (
+                    SELECT 1 FROM archivo.Ventas AS archivada
+                    WHERE archivada.noIdVentas = venta.noIdVentas
+                      AND archivada.factura = venta.factura AND archivada.producto = venta.producto
+                )
+            ''').rowcount
+            conexion.execute("UPDATE Parametros SET valor = 0 WHERE nombre = 'archivando'")
+            conexion.execute("COMMIT")
+            conexion.execute("DETACH DATABASE archivo")
+    except sqlite3.Error:
+        if conexion.in_transaction:
+            conexion.execute("ROLLBACK")
+        raise
+    finally:
+        conexion.close()
+    return borradas
+
+
+def restaurar(archivo, ruta=None):
+    """
+    ## Función: `restaurar`
+    Reemplaza el contenido de la base por el de un respaldo, con el programa abierto.
+
+    ### Comportamiento:
+    1. Verifica el respaldo (`verificar`); si tiene problemas no toca la base.
+    2. Respalda la base actual (sin rotar, para no borrar el respaldo que se restaura).
+    3. Copia el respaldo sobre la base con la API de respaldo de SQLite, en un solo paso: las demás
+       conexiones esperan a que termine y después ven la base restaurada completa.
+    4. Aplica las migraciones (`iniciar_tablas`) por si el respaldo es de una versión anterior.
+    5. Quita de **Ventas** las ventas que se archivaron después del respaldo (`_quitar_archivadas`).
+
+    ### Retorna:
+    - Ruta del respaldo de la base que había antes de restaurar, o `None` si no se restauró.
+    """
+    ruta = ruta or Db.ruta
+    problemas = verificar(archivo)
+    if problemas:
+        for problema in problemas:
+            print(problema)
+        return None
+    anterior = respaldar(conservar=None, ruta=ruta)
+    if anterior is None:
+        print("No se restauró: no se pudo respaldar la base actual.")
+        return None
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="respaldo_", dir=os.path.dirname(os.path.abspath(ruta))) as directorio:
+            origen = archivo
+            if archivo.endswith(".gz"):
+                origen = os.path.join(directorio, "respaldo.db")
+                _descomprimir(archivo, origen)
+            fuente = sqlite3.connect(f"file:{origen}?mode=ro", uri=True)
+            destino = sqlite3.connect(ruta, timeout=30)
+            try:
+                fuente.backup(destino)
+            finally:
+                destino.close()
+                fuente.close()
+    except (OSError, EOFError, sqlite3.Error) as e:
+        print(f"No se pudo restaurar {archivo}: {e}")
+        return None
+    Db(ruta).iniciar_tablas()
+    try:
+        _quitar_archivadas(ruta)
+    except sqlite3.Error as e:
+        print(f"No se pudieron quitar de {ruta} las ventas ya archivadas: {e}")
+        return None
+    return anterior["archivo"]
+
+
+def programar(cada_min, comprimir=False, conservar=CONSERVAR, ruta=None):
+    """
+    ## Función: `programar`
+    Respalda la base cada `cada_min` minutos en un hilo de fondo.
+
+    ### Retorna:
+    - `threading.Event`: al activarlo (`set()`) se detienen los respaldos.
+    """
+    ruta = ruta or Db.ruta
+    detener = threading.Event()
+
+    def ciclo():
+        while not detener.wait(cada_min * 60):
+            respaldar(comprimir, conservar, ruta=ruta)
+
+    threading.Thread(target=ciclo, name="respaldos", daemon=True).start()
+    return detener
@@ -0,0 +1,414 @@
+# Módulo: `servidor.py`
+# Descripción: Servicio HTTP/JSON local sobre el modelo (`poo.py`) para que varias cajas (terminales
+# de venta) trabajen contra la misma base de datos. Usa solo `asyncio` de la librería estándar:
+# - Conexiones persistentes (keep-alive) y peticiones en tubería (pipelining): las peticiones de una
+#   conexión se atienden en orden y las respuestas salen en el mismo orden.
+# - El trabajo con SQLite es bloqueante, se ejecuta en un grupo de hilos (`run_in_executor`) para
+#   que el ciclo de eventos siga atendiendo otras conexiones.
+# - Los carritos abiertos viven en la memoria de este proceso (`poo.Carrito`), así todas las cajas
+#   ven los mismos carritos.
+#
+# Uso:
+#   python servidor.py [--host 127.0.0.1] [--puerto 8080] [--db data.db] [--hilos 8] [--respaldo-cada MINUTOS]
+#
+# Rutas:
+#   GET    /clientes                       Lista de clientes
+#   GET    /clientes/buscar?q=texto        Búsqueda por prefijo (FTS5)
+#   POST   /clientes                       Crear cliente {nombre, apellido, direccion, telefono, correo}
+#   GET    /clientes/{id}                  Detalle de un cliente
+#   PUT    /clientes/{id}/direccion        Cambiar dirección {direccion}
+#   GET    /clientes/{id}/carrito          Líneas del carrito
+#   POST   /clientes/{id}/carrito          Agregar {producto, cantidad} o {lineas: [...]}; suma si ya está
+#   DELETE /clientes/{id}/carrito          Reiniciar carrito
+#   GET    /clientes/{id}/factura          Datos de factura del carrito (sin registrar la venta)
+#   POST   /clientes/{id}/factura          Facturar: pasa el carrito al libro de ventas
+#   GET    /clientes/{id}/ventas           Historial de ventas facturadas
+#   GET    /clientes/{id}/total            Unidades y gasto total del cliente (tabla de resumen)
+#   GET    /facturas/{numero}              Datos de una factura registrada
+#   GET    /ventas?desde=...&hasta=...     Ventas facturadas en un rango de fechas
+#   DELETE /ventas/{id}                    Borrar una línea del carrito
+#   GET    /productos                      Lista de productos
+#   POST   /productos                      Crear producto {nombre, medida, fecha_vencimiento, precio_produccion, precio_venta}
+#   GET    /productos/{id}                 Detalle de un producto
+#   PUT    /productos/{id}/nombre          Cambiar nombre {nombre}
+#   POST   /productos/{id}/stock           Sumar al inventario {cantidad, minimo?, vencimiento?}
+#   GET    /productos/stock-bajo           Productos en o bajo su stock mínimo
+#   GET    /productos/{id}/ventas?desde=&hasta=  Unidades e ingreso del producto entre dos días
+#   GET    /lotes/por-vencer?dias=30       Lotes que vencen en los próximos días
+
+import argparse
+import asyncio
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from poo import Db, Cliente, Producto, Venta, Carrito, CarritosOcupados, StockInsuficiente
+from verificacion import ESQUEMA_CLIENTE, ESQUEMA_PRODUCTO, lista_errores
+
+# Tamaño máximo aceptado para el cuerpo de una petición (en bytes)
+MAXIMO_CUERPO = 1024 * 1024
+
+ESTADOS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+CAMPOS_CLIENTE = ["id", "nombre", "apellido", "direccion", "telefono", "correo"]
+CAMPOS_CARRITO = ["id", "fecha", "producto", "cantidad", "precio"]
+
+
+class ErrorHttp(Exception):
+    def __init__(self, estado, mensaje, errores=None):
+        super().__init__(mensaje)
+        self.estado = estado
+        self.mensaje = mensaje
+        # Errores por campo (`verificacion.lista_errores`), van en la respuesta como "errores"
+        self.errores = errores
+
+
+def validar_cuerpo(esquema, cuerpo):
+    """
+    Aplica al cuerpo las validaciones de los formularios (`verificacion`). Lanza `ErrorHttp` 400
+    con el primer mensaje y la lista de errores por campo si el cuerpo no es válido.
+    """
+    errores = esquema.validar(cuerpo)
+    if errores:
+        raise ErrorHttp(400, next(iter(errores.values())), lista_errores({1: errores}))
+
+
+# Cada acción recibe (id de la ruta o None, parámetros de consulta, cuerpo JSON) y corre en un hilo
+# del grupo, nunca en el ciclo de eventos. Retorna (estado, datos).
+
+def listar_clientes(_, consulta, cuerpo):
+    return 200, [dict(zip(CAMPOS_CLIENTE, cliente)) for cliente in Cliente.listar_objetos()]
+
+def buscar_clientes(_, consulta, cuerpo):
+    texto = consulta.get("q", [""])[0]
+    try:
+        limite = int(consulta.get("limite", ["20"])[0])
+    except ValueError:
+        raise ErrorHttp(400, "'limite' debe ser un entero.")
+    return 200, [dict(zip(CAMPOS_CLIENTE, cliente)) for cliente in Cliente.buscar_clientes(texto, limite)]
+
+def crear_cliente(_, consulta, cuerpo):
+    validar_cuerpo(ESQUEMA_CLIENTE, cuerpo)
+    if not Cliente.crear_objeto(**cuerpo):
+        raise ErrorHttp(400, "Faltan datos del cliente o no se pudo insertar.")
+    return 201, {"creado": True}
+
+def detalle_cliente(id_cliente, consulta, cuerpo):
+    cliente = Cliente.accion_cliente_detalle(id_cliente)
+    if cliente is None:
+        raise ErrorHttp(404, f"No existe el cliente {id_cliente}.")
+    return 200, dict(zip(CAMPOS_CLIENTE, cliente))
+
+def cambiar_direccion(id_cliente, consulta, cuerpo):
+    if not cuerpo.get("direccion"):
+        raise ErrorHttp(400, "La dirección no puede estar vacía.")
+    Cliente.accion_cliente_cambiar_direccion(id_cliente, cuerpo["direccion"])
+    return 200, {"id": id_cliente, "direccion": cuerpo["direccion"]}
+
+def ver_carrito(id_cliente, consulta, cuerpo):
+    return 200, [dict(zip(CAMPOS_CARRITO, linea)) for linea in Cliente.accion_ver_carrito_cliente(id_cliente)]
+
+def agregar_al_carrito(id_cliente, consulta, cuerpo):
+    # Un producto ({"producto", "cantidad"}) o varios ({"lineas": [...]}), todos o ninguno (`Carrito.agregar_varios`)
+    try:
+        lineas = [(int(linea["producto"]), int(linea["cantidad"])) for linea in cuerpo.get("lineas", [cuerpo])]
+    except (KeyError, TypeError, ValueError, AttributeError):
+        raise ErrorHttp(400, "Se requieren 'producto' y 'cantidad' enteros.")
+    if not lineas or any(cantidad <= 0 for _, cantidad in lineas):
+        raise ErrorHttp(400, "La cantidad debe ser mayor que cero.")
+    fecha_venta = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    resultado = Cliente.accion_registrar_ventas_cliente(fecha_venta, id_cliente, lineas)
+    if resultado is None:
+        raise ErrorHttp(500, "Error registrando la venta.")
+    return 200, {"cliente": id_cliente, "carrito": resultado}
+
+def reiniciar_carrito(id_cliente, consulta, cuerpo):
+    if not Cliente.reiniciar_carrito(id_cliente):
+        raise ErrorHttp(500, "No se pudo reiniciar el carrito.")
+    return 200, {"cliente": id_cliente, "carrito": []}
+
+def datos_factura(id_cliente, consulta, cuerpo):
+    pedido = Cliente.obtener_data_factura(id_cliente)
+    if "cliente" not in pedido:
+        raise ErrorHttp(404, f"No existe el cliente {id_cliente}.")
+    return 200, pedido
+
+def facturar(id_cliente, consulta, cuerpo):
+    try:
+        pedido = Cliente.accion_facturar_carrito(id_cliente)
+    except StockInsuficiente as e:
+        raise ErrorHttp(409, str(e))
+    if pedido is None:
+        raise ErrorHttp(404, f"El cliente {id_cliente} no existe o su carrito está vacío.")
+    return 201, pedido
+
+def historial_ventas(id_cliente, consulta, cuerpo):
+    campos = ["id", "fecha", "producto", "cantidad", "factura", "precio", "nombre_producto"]
+    return 200, [dict(zip(campos, venta)) for venta in Cliente.accion_ver_historico_ventas_cliente(id_cliente)]
+
+def total_cliente(id_cliente, consulta, cuerpo):
+    return 200, Cliente.total_comprado(id_cliente)
+
+def ver_factura(no_factura, consulta, cuerpo):
+    pedido = Venta.obtener_factura(no_factura)
+    if pedido is None:
+        raise ErrorHttp(404, f"No existe la factura {no_factura}.")
+    return 200, pedido
+
+def ventas_entre(_, consulta, cuerpo):
+    if "desde" not in consulta or "hasta" not in consulta:
+        raise ErrorHttp(400, "Se requieren 'desde' y 'hasta'.")
+    ventas = Venta.ventas_entre(consulta["desde"][0], consulta["hasta"][0])
+    if ventas is None:
+        raise ErrorHttp(400, "Fechas no válidas: use AAAA-MM-DD [HH:MM:SS] o DD/MM/AAAA.")
+    campos = ["id", "fecha", "producto", "cantidad", "factura", "precio", "nombre_producto", "cliente"]
+    return 200, [dict(zip(campos, venta)) for venta in ventas]
+
+def borrar_venta(id_venta, consulta, cuerpo):
+    if not Venta.accion_borrar_venta(id_venta):
+        raise ErrorHttp(404, f"No existe la venta {id_venta}.")
+    return 200, {"borrada": id_venta}
+
+def listar_productos(_, consulta, cuerpo):
+    productos = Producto.listar_objetos()
+    if productos is None:
+        raise ErrorHttp(500, "No se pudieron leer los productos.")
+    return 200, productos
+
+def crear_producto(_, consulta, cuerpo):
+    validar_cuerpo(ESQUEMA_PRODUCTO, cuerpo)
+    if not Producto.crear_objeto(**cuerpo):
+        raise ErrorHttp(400, "Faltan datos del producto o no se pudo insertar.")
+    return 201, {"creado": True}
+
+def detalle_producto(id_producto, consulta, cuerpo):
+    producto = Producto.obtener_producto_detalle(id_producto)
+    if producto is None:
+        raise ErrorHttp(404, f"No existe el producto {id_producto}.")
+    return 200, dict(zip(["id", "nombre", "medida", "fecha_vencimiento", "precio_produccion", "precio_venta"], producto))
+
+def cambiar_nombre_producto(id_producto, consulta, cuerpo):
+    if not cuerpo.get("nombre"):
+        raise ErrorHttp(400, "El nombre no puede estar vacío.")
+    if not Producto.actualizar_nombre_producto(id_producto, cuerpo["nombre"]):
+        raise ErrorHttp(404, f"No existe el producto {id_producto}.")
+    return 200, {"id": id_producto, "nombre": cuerpo["nombre"]}
+
+def agregar_stock(id_producto, consulta, cuerpo):
+    try:
+        cantidad = int(cuerpo["cantidad"])
+        minimo = int(cuerpo["minimo"]) if cuerpo.get("minimo") is not None else None
+    except (KeyError, TypeError, ValueError):
+        raise ErrorHttp(400, "Se requiere 'cantidad' entera ('minimo' opcional).")
+    if Producto.obtener_producto_detalle(id_producto) is None:
+        raise ErrorHttp(404, f"No existe el producto {id_producto}.")
+    if cuerpo.get("vencimiento"):
+        lote = Producto.agregar_lote(id_producto, cantidad, cuerpo["vencimiento"], minimo)
+        if lote is None:
+            raise ErrorHttp(400, "Fecha de vencimiento o cantidad no válidas para el lote.")
+        return 201, {"producto": id_producto, "lote": lote, "cantidad": Producto.obtener_stock(id_producto)[0]}
+    stock = Producto.agregar_stock(id_producto, cantidad, minimo)
+    if stock is None:
+        raise ErrorHttp(409, "El stock quedaría negativo.")
+    return 200, {"producto": id_producto, "cantidad": stock}
+
+def ventas_producto(id_producto, consulta, cuerpo):
+    if "desde" not in consulta or "hasta" not in consulta:
+        raise ErrorHttp(400, "Se requieren 'desde' y 'hasta'.")
+    ventas = Producto.ventas_periodo(id_producto, consulta["desde"][0], consulta["hasta"][0])
+    if ventas is None:
+        raise ErrorHttp(400, "Fechas no válidas: use AAAA-MM-DD o DD/MM/AAAA.")
+    return 200, ventas
+
+def stock_bajo(_, consulta, cuerpo):
+    return 200, Producto.productos_bajo_stock()
+
+def lotes_por_vencer(_, consulta, cuerpo):
+    try:
+        dias = int(consulta.get("dias", ["30"])[0])
+    except ValueError:
+        raise ErrorHttp(400, "'dias' debe ser un entero.")
+    return 200, Producto.lotes_por_vencer(dias)
+
+
+# (método, expresión de la ruta, acción). El grupo (\d+) de la ruta es el id que recibe la acción
+# (como entero); un grupo `(?P<texto>...)` se entrega como texto (los números de factura de
+# `ingesta.py` no son solo dígitos).
+RUTAS = [
+    ("GET", r"/clientes", listar_clientes),
+    ("GET", r"/clientes/buscar", buscar_clientes),
+    ("POST", r"/clientes", crear_cliente),
+    ("GET", r"/clientes/(\d+)", detalle_cliente),
+    ("PUT", r"/clientes/(\d+)/direccion", cambiar_direccion),
+    ("GET", r"/clientes/(\d+)/carrito", ver_carrito),
+    ("POST", r"/clientes/(\d+)/carrito", agregar_al_carrito),
+    ("DELETE", r"/clientes/(\d+)/carrito", reiniciar_carrito),
+    ("GET", r"/clientes/(\d+)/factura", datos_factura),
+    ("POST", r"/clientes/(\d+)/factura", facturar),
+    ("GET", r"/clientes/(\d+)/ventas", historial_ventas),
+    ("GET", r"/clientes/(\d+)/total", total_cliente),
+    ("GET", r"/facturas/(?P<texto>[^/]+)", ver_factura),
+    ("GET", r"/ventas", ventas_entre),
+    ("DELETE", r"/ventas/(\d+)", borrar_venta),
+    ("GET", r"/productos", listar_productos),
+    ("POST", r"/productos", crear_producto),
+    ("GET", r"/productos/(\d+)", detalle_producto),
+    ("PUT", r"/productos/(\d+)/nombre", cambiar_nombre_producto),
+    ("POST", r"/productos/(\d+)/stock", agregar_stock),
+    ("GET", r"/productos/(\d+)/ventas", ventas_producto),
+    ("GET", r"/productos/stock-bajo", stock_bajo),
+    ("GET", r"/lotes/por-vencer", lotes_por_vencer),
+]
+RUTAS = [(metodo, re.compile(patron + "$"), accion) for metodo, patron, accion in RUTAS]
+
+
+def resolver(metodo, ruta):
+    """
+    Retorna `(accion, id)` para la petición o lanza `ErrorHttp` 404/405.
+    """
+    ruta_existe = False
+    for metodo_ruta, patron, accion in RUTAS:
+        coincidencia = patron.match(ruta)
+        if coincidencia:
+            ruta_existe = True
+            if metodo_ruta == metodo:
+                if not coincidencia.groups():
+                    return accion, None
+                if "texto" in coincidencia.groupdict():
+                    return accion, unquote(coincidencia.group("texto"))
+                return accion, int(coincidencia.group(1))
+    if ruta_existe:
+        raise ErrorHttp(405, f"Método {metodo} no permitido en {ruta}.")
+    raise ErrorHttp(404, f"No existe la ruta {ruta}.")
+
+
+def armar_respuesta(estado, datos, mantener_abierta):
+    cuerpo = json.dumps(datos, ensure_ascii=False, default=str).encode("utf-8")
+    encabezados = (
+        f"HTTP/1.1 {estado} {ESTADOS.get(estado, '')}\r\n"
+        f"Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(cuerpo)}\r\n"
+        f"Connection: {'keep-alive' if mantener_abierta else 'close'}\r\n\r\n"
+    )
+    return encabezados.encode("latin-1") + cuerpo
+
+
+class Servidor:
+    """
+    Servidor HTTP/1.1 mínimo. Cada conexión lee peticiones en un ciclo: las que el cliente envió en
+    tubería ya están en el búfer del `StreamReader` y se atienden una tras otra sin esperar la red.
+    """
+
+    def __init__(self, hilos=8):
+        self.ejecutor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="servidor-db")
+
+    async def atender(self, lector, escritor):
+        bucle = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    cabecera = await lector.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+                lineas = cabecera.decode("latin-1").split("\r\n")
+                try:
+                    metodo, objetivo, version = lineas[0].split(" ", 2)
+                except ValueError:
+                    escritor.write(armar_respuesta(400, {"error": "Línea de petición inválida."}, False))
+                    break
+
+                encabezados = {}
+                for linea in lineas[1:]:
+                    if ":" in linea:
+                        nombre, valor = linea.split(":", 1)
+                        encabezados[nombre.strip().lower()] = valor.strip()
+
+                conexion = encabezados.get("connection", "").lower()
+                mantener_abierta = conexion != "close" if version == "HTTP/1.1" else conexion == "keep-alive"
+
+                largo = encabezados.get("content-length", "") or "0"
+                if not (largo.isascii() and largo.isdigit()):
+                    escritor.write(armar_respuesta(400, {"error": "Content-Length inválido."}, False))
+                    break
+                largo = int(largo)
+                if largo > MAXIMO_CUERPO:
+                    escritor.write(armar_respuesta(413, {"error": "Cuerpo demasiado grande."}, False))
+                    break
+                datos = await lector.readexactly(largo) if largo else b""
+
+                estado, respuesta = await self.procesar(bucle, metodo, objetivo, datos)
+                escritor.write(armar_respuesta(estado, respuesta, mantener_abierta))
+                # drain() solo espera si el socket está saturado, las peticiones en tubería siguen sin pausa
+                await escritor.drain()
+                if not mantener_abierta:
+                    break
+        finally:
+            try:
+                await escritor.drain()
+                escritor.close()
+                await escritor.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def procesar(self, bucle, metodo, objetivo, datos):
+        """
+        Resuelve la ruta y ejecuta la acción en el grupo de hilos. Retorna `(estado, datos)`.
+        """
+        try:
+            partes = urlsplit(objetivo)
+            accion, id_ruta = resolver(metodo, partes.path.rstrip("/") or "/")
+            cuerpo = json.loads(datos) if datos else {}
+            if not isinstance(cuerpo, dict):
+                raise ErrorHttp(400, "El cuerpo debe ser un objeto JSON.")
+            return await bucle.run_in_executor(self.ejecutor, accion, id_ruta, parse_qs(partes.query), cuerpo)
+        except ErrorHttp as e:
+            if e.errores:
+                return e.estado, {"error": e.mensaje, "errores": e.errores}
+            return e.estado, {"error": e.mensaje}
+        except json.JSONDecodeError:
+            return 400, {"error": "El cuerpo no es JSON válido."}
+        except Exception as e:
+            return 500, {"error": str(e)}
+
+    async def iniciar(self, host, puerto):
+        """
+        Abre el socket y retorna el `asyncio.Server` sin bloquear.
+        """
+        return await asyncio.start_server(self.atender, host, puerto)
+
+
+async def servir(host, puerto, hilos):
+    servidor = await Servidor(hilos).iniciar(host, puerto)
+    print(f"Escuchando en http://{host}:{puerto}")
+    async with servidor:
+        await servidor.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON de la cervecería.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8080)
+    parser.add_argument("--db", help="Archivo de base de datos (por defecto data.db).")
+    parser.add_argument("--hilos", type=int, default=8, help="Hilos para el trabajo con SQLite.")
+    parser.add_argument("--respaldo-cada", type=float, help="Respaldar la base cada tantos minutos (ver respaldos.py).")
+    args = parser.parse_args()
+    if args.db:
+        Db.ruta = args.db
+    Db().iniciar_tablas()
+    try:
+        # El servidor es el dueño de los carritos de la base: las cajas los comparten a través de él
+        Carrito.obtener()
+    except CarritosOcupados as e:
+        parser.exit(1, f"{e}\n")
+    if args.respaldo_cada:
+        import respaldos
+
+        respaldos.programar(args.respaldo_cada)
+    try:
+        asyncio.run(servir(args.host, args.puerto, args.hilos))
+    except KeyboardInterrupt:
+        pass
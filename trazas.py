@@ -0,0 +1,253 @@
+# Módulo: `trazas.py`
+# Descripción: Tramos (spans) de tiempo para ver en qué etapa se va el tiempo de una operación,
+# por ejemplo al facturar: base de datos, plantilla, wkhtmltopdf, visor de PDF o SMTP.
+# - Desactivado no cuesta casi nada: `tramo` retorna siempre el mismo contexto vacío.
+# - Se activa con variables de entorno (o con `activar`):
+#     CERVECERIA_TRAZAS=archivo.json   Guarda los tramos al salir del programa en formato Chrome
+#                                      Trace (abrir en chrome://tracing o https://ui.perfetto.dev).
+#     CERVECERIA_PERFIL=cprofile,tracemalloc
+#                                      cprofile: perfil de funciones de cada tramo raíz
+#                                      (`perfilar=True`), en `<directorio>/<tramo>-<hora>.prof`
+#                                      (ver con `python -m pstats` o snakeviz).
+#                                      tracemalloc: memoria asignada en cada tramo, y el pico de los
+#                                      tramos raíz, en los argumentos del tramo.
+#     CERVECERIA_PERFILES=directorio   Directorio de los .prof (por defecto `perfiles`).
+# - Los tramos anidados en un mismo hilo se ven uno dentro de otro; los del `Escritor` aparecen
+#   en su propio hilo.
+
+import atexit
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+# Tramos terminados, como eventos de Chrome Trace (`list.append` es seguro entre hilos)
+_eventos = []
+
+# Nombre de cada hilo que registró tramos
+_hilos = {}
+
+# Inicio de las marcas de tiempo de la traza
+_origen = time.perf_counter_ns()
+
+# Contexto que retorna `tramo` cuando las trazas están desactivadas
+_NULO = contextlib.nullcontext()
+
+# Solo un perfil de cProfile a la vez (los tramos raíz de otros hilos se miden sin perfil)
+_perfilando = threading.Lock()
+
+activo = False
+archivo_trazas = None
+perfiles = set()
+directorio_perfiles = "perfiles"
+
+
+def activar(archivo=None, perfil=(), directorio=None):
+    """
+    ## Función: `activar`
+    Activa el registro de tramos (lo mismo que las variables de entorno).
+
+    ### Parámetros:
+    - `archivo` (str, opcional): Archivo JSON donde `guardar` escribe la traza al salir del programa.
+    - `perfil` (iterable): `"cprofile"` y/o `"tracemalloc"`.
+    - `directorio` (str, opcional): Directorio de los perfiles de cProfile.
+    """
+    global activo, archivo_trazas, perfiles, directorio_perfiles
+    activo = True
+    archivo_trazas = archivo or archivo_trazas
+    perfiles = {modo.strip().lower() for modo in perfil if modo.strip()}
+    directorio_perfiles = directorio or directorio_perfiles
+    if "tracemalloc" in perfiles:
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+
+def desactivar():
+    """
+    Deja de registrar tramos (los ya registrados se conservan hasta `limpiar`).
+    """
+    global activo
+    activo = False
+    if "tracemalloc" in perfiles:
+        import tracemalloc
+
+        tracemalloc.stop()
+
+
+class Tramo:
+    """
+    Un tramo en curso. Se usa con `with tramo(...)`, no se crea directamente.
+    """
+
+    __slots__ = ("nombre", "atributos", "perfilar", "inicio", "perfil", "memoria")
+
+    def __init__(self, nombre, atributos, perfilar):
+        self.nombre = nombre
+        self.atributos = atributos
+        self.perfilar = perfilar
+        self.perfil = None
+        self.memoria = None
+
+    def __enter__(self):
+        if "tracemalloc" in perfiles:
+            import tracemalloc
+
+            if self.perfilar:
+                tracemalloc.reset_peak()
+            self.memoria = tracemalloc.get_traced_memory()[0]
+        if self.perfilar and "cprofile" in perfiles and _perfilando.acquire(blocking=False):
+            import cProfile
+
+            self.perfil = cProfile.Profile()
+            self.perfil.enable()
+        self.inicio = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        fin = time.perf_counter_ns()
+        atributos = self.atributos
+        if tipo is not None:
+            atributos["error"] = f"{tipo.__name__}: {valor}"
+        if self.perfil is not None:
+            self.perfil.disable()
+            atributos["perfil"] = _guardar_perfil(self.perfil, self.nombre)
+            _perfilando.release()
+        if self.memoria is not None:
+            import tracemalloc
+
+            actual, pico = tracemalloc.get_traced_memory()
+            atributos["memoria_kb"] = round((actual - self.memoria) / 1024, 1)
+            if self.perfilar:
+                atributos["pico_kb"] = round(pico / 1024, 1)
+
+        hilo = threading.current_thread()
+        _hilos.setdefault(hilo.ident, hilo.name)
+        _eventos.append({
+            "name": self.nombre,
+            "cat": self.nombre.split(".")[0],
+            "ph": "X",
+            "ts": (self.inicio - _origen) / 1000,
+            "dur": (fin - self.inicio) / 1000,
+            "pid": os.getpid(),
+            "tid": hilo.ident,
+            "args": atributos,
+        })
+        return False
+
+
+def tramo(nombre, perfilar=False, **atributos):
+    """
+    ## Función: `tramo`
+    Mide el bloque `with tramo("etapa"):` como un tramo de la traza.
+
+    ### Parámetros:
+    - `nombre` (str): Nombre del tramo; lo que va antes del primer punto es su categoría.
+    - `perfilar` (bool): Tramo raíz: con `CERVECERIA_PERFIL=cprofile` guarda su perfil de funciones.
+    - `**atributos`: Datos que se muestran con el tramo (por ejemplo el cliente o la factura).
+    """
+    if not activo:
+        return _NULO
+    return Tramo(nombre, atributos, perfilar)
+
+
+def trazado(nombre=None, perfilar=False):
+    """
+    Decorador: cada llamada a la función es un tramo (por defecto con el nombre `Clase.funcion`).
+    """
+    def decorador(funcion):
+        etiqueta = nombre or funcion.__qualname__
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not activo:
+                return funcion(*args, **kwargs)
+            with Tramo(etiqueta, {}, perfilar):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def _guardar_perfil(perfil, nombre):
+    """
+    Escribe el perfil de cProfile de un tramo raíz. Retorna la ruta, o `None` si no se pudo escribir.
+    """
+    ruta = os.path.join(directorio_perfiles, f"{nombre}-{time.strftime('%Y%m%d-%H%M%S')}-{time.perf_counter_ns() % 1_000_000:06d}.prof")
+    try:
+        os.makedirs(directorio_perfiles, exist_ok=True)
+        perfil.dump_stats(ruta)
+    except OSError as e:
+        print(f"No se pudo guardar el perfil {ruta}: {e}")
+        return None
+    return ruta
+
+
+def eventos():
+    """
+    Retorna una copia de los tramos registrados (eventos `"ph": "X"` de Chrome Trace).
+    """
+    return list(_eventos)
+
+
+def limpiar():
+    """
+    Olvida los tramos registrados.
+    """
+    _eventos.clear()
+
+
+def resumen():
+    """
+    ## Función: `resumen`
+    Tiempo por nombre de tramo.
+
+    ### Retorna:
+    - Diccionario `{nombre: {"veces", "total_ms", "maximo_ms"}}`, del de más tiempo total al de menos.
+    """
+    totales = {}
+    for evento in list(_eventos):
+        total = totales.setdefault(evento["name"], {"veces": 0, "total_ms": 0.0, "maximo_ms": 0.0})
+        total["veces"] += 1
+        total["total_ms"] += evento["dur"] / 1000
+        total["maximo_ms"] = max(total["maximo_ms"], evento["dur"] / 1000)
+    return {
+        nombre: {"veces": total["veces"], "total_ms": round(total["total_ms"], 3), "maximo_ms": round(total["maximo_ms"], 3)}
+        for nombre, total in sorted(totales.items(), key=lambda par: -par[1]["total_ms"])
+    }
+
+
+def guardar(archivo=None):
+    """
+    ## Función: `guardar`
+    Escribe los tramos registrados en un archivo JSON de Chrome Trace (archivo temporal y
+    reemplazo atómico).
+
+    ### Retorna:
+    - Ruta del archivo, o `None` si no hay archivo configurado o no se pudo escribir.
+    """
+    archivo = archivo or archivo_trazas
+    if not archivo:
+        return None
+    pid = os.getpid()
+    nombres = [
+        {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": nombre}}
+        for tid, nombre in list(_hilos.items())
+    ]
+    temporal = archivo + ".tmp"
+    try:
+        with open(temporal, "w", encoding="utf-8") as salida:
+            json.dump({"traceEvents": nombres + list(_eventos), "displayTimeUnit": "ms"}, salida, ensure_ascii=False, default=str)
+        os.replace(temporal, archivo)
+    except OSError as e:
+        print(f"No se pudo guardar la traza {archivo}: {e}")
+        return None
+    return archivo
+
+
+if os.environ.get("CERVECERIA_TRAZAS") or os.environ.get("CERVECERIA_PERFIL"):
+    activar(os.environ.get("CERVECERIA_TRAZAS"), os.environ.get("CERVECERIA_PERFIL", "").split(","),
+            os.environ.get("CERVECERIA_PERFILES"))
+    atexit.register(guardar)
@@ -1,14 +1,73 @@
- 
-from datetime import datetime
+# Módulo: `verificacion.py`
+# Descripción: Validaciones de los datos que se digitan en las ventanas o se importan desde archivos.
+# - Funciones de un campo (`es_correo`, `fecha_valida`, ...) para los formularios de Tk.
+# - Esquemas de registro (`ESQUEMA_CLIENTE`, `ESQUEMA_PRODUCTO`, `ESQUEMA_VENTA`): validan un lote de
+#   filas completo (`validar_filas`) o las columnas de una importación (`validar_columnas`) y
+#   retornan los errores de cada fila y campo.
+# - Las expresiones regulares se compilan una sola vez al cargar el módulo; los casos comunes (solo
+#   dígitos, solo letras y números ASCII, fechas con dos dígitos) se resuelven sin pasar por `re`
+#   ni por `strptime`.
+
+from datetime import date, datetime
+from itertools import compress, count
+from operator import not_
 import re
 
+from poo import normalizar_fecha_hora
+
+_PESO_VOLUMEN = re.compile(r"\d+ (?:ml|g)")
+_CORREO = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+_FECHA = re.compile(r"([0-9]{2})/([0-9]{2})/([0-9]{4})")
+_FECHA_ISO = re.compile(r"([0-9]{4})-([0-9]{2})-([0-9]{2})")
+_FECHA_HORA_ISO = re.compile(r"([0-9]{4})-([0-9]{2})-([0-9]{2})[ T]([0-9]{2}):([0-9]{2}):([0-9]{2})")
+
 def fecha_valida(fecha: str) -> bool:
     """
     Funcion que verifica si la fecha ingresada como argumento es válida en el formato DD/MM/AAAA.
     Retorna True si la fecha es válida, False en caso contrario.
     """
+    partes = _FECHA.fullmatch(fecha) if type(fecha) is str else None
+    if partes is None:
+        # Día o mes de un dígito y demás variantes que acepta `strptime`
+        try:
+            datetime.strptime(fecha, "%d/%m/%Y")
+            return True
+        except (TypeError, ValueError):
+            return False
+    dia, mes, anio = partes.groups()
+    try:
+        date(int(anio), int(mes), int(dia))
+        return True
+    except ValueError:
+        return False
+
+def es_fecha(fecha) -> bool:
+    """
+    Verifica si la fecha está en el formato DD/MM/AAAA o AAAA-MM-DD (las fechas de vencimiento
+    que acepta la importación de productos).
+    """
+    if type(fecha) is not str:
+        return isinstance(fecha, date)
+    partes = _FECHA_ISO.fullmatch(fecha)
+    try:
+        if partes is not None:
+            date(*map(int, partes.groups()))
+        elif not fecha_valida(fecha):
+            datetime.strptime(fecha, "%Y-%m-%d")
+        return True
+    except ValueError:
+        return False
+
+def fecha_hora_valida(valor) -> bool:
+    """
+    Verifica si el valor es una fecha (con o sin hora) que reconoce `normalizar_fecha_hora`.
+    El formato de la base (AAAA-MM-DD HH:MM:SS) se revisa sin pasar por `normalizar_fecha_hora`.
+    """
+    partes = _FECHA_HORA_ISO.fullmatch(valor) if type(valor) is str else None
+    if partes is None:
+        return normalizar_fecha_hora(valor) is not None
     try:
-        datetime.strptime(fecha, "%d/%m/%Y")
+        datetime(*map(int, partes.groups()))
         return True
     except ValueError:
         return False
@@ -18,29 +77,187 @@ def es_alfa_numerico(cadena: str) -> bool:
     Verifica si un string contiene solo letras y números.
     Retorna True si contiene solo letras y números, False en caso contrario.
     """
-    return bool(re.fullmatch(r"[a-zA-Z0-9]+", cadena))
+    if type(cadena) is not str:
+        cadena = "" if cadena is None else str(cadena)
+    # Igual a [a-zA-Z0-9]+
+    return cadena.isascii() and cadena.isalnum()
 
 def formato_peso_volumen(cadena: str) -> bool:
     """
     Verifica si un string tiene el formato "<numero> ml" o "<numero> g" o "<numero>".
     Retorna True si tiene el formato correcto, False en caso contrario.
     """
+    if type(cadena) is int:
+        return cadena >= 0
     cadena = str(cadena)
-    return bool(re.fullmatch(r"\d+ (ml|g)", cadena)) or es_entero_no_negativo(cadena)
+    return cadena.isdecimal() or _PESO_VOLUMEN.fullmatch(cadena) is not None
 
 def es_entero_no_negativo(cadena: str) -> bool:
     """
     Verifica si un string representa un número entero no negativo.
     Retorna True si es un número entero no negativo, False en caso contrario.
     """
-    if isinstance(cadena, int):
-        return True
+    if isinstance(cadena, int) and not isinstance(cadena, bool):
+        return cadena >= 0
 
-    return bool(re.fullmatch(r"\d+", cadena))
+    # Igual a \d+
+    return type(cadena) is str and cadena.isdecimal()
+
+def es_entero_positivo(cadena) -> bool:
+    """
+    Verifica si un string o un entero representa un número entero mayor que cero.
+    """
+    if isinstance(cadena, int) and not isinstance(cadena, bool):
+        return cadena > 0
+    return type(cadena) is str and cadena.isdecimal() and int(cadena) > 0
 
 def es_correo(cadena: str) -> bool:
     """
     Verifica si un string tiene el formato de una dirección de correo electrónico válida.
     Retorna True si es un correo válido, False en caso contrario.
     """
-    return bool(re.fullmatch(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}", cadena))
\ No newline at end of file
+    return type(cadena) is str and "@" in cadena and _CORREO.fullmatch(cadena) is not None
+
+def es_texto(valor) -> bool:
+    """
+    Verifica si el valor tiene algo más que espacios (por ejemplo una clave, un id o un nombre).
+    """
+    return valor is not None and str(valor).strip() != ""
+
+def _presente(valor) -> bool:
+    return valor is not None and valor != ""
+
+
+class Campo:
+    """
+    Regla de un campo de un esquema: la función que verifica el valor y el mensaje si no es válido.
+    Un campo obligatorio falla si falta (`None` o texto vacío); uno opcional solo se verifica si viene.
+    """
+
+    __slots__ = ("nombre", "verificar", "mensaje", "obligatorio", "valido")
+
+    def __init__(self, nombre, verificar, mensaje, obligatorio=True):
+        self.nombre = nombre
+        self.verificar = verificar
+        self.mensaje = mensaje
+        self.obligatorio = obligatorio
+        # Una sola función por valor; las de este módulo ya rechazan `None` y el texto vacío
+        if verificar is None:
+            self.valido = _presente if obligatorio else lambda valor: True
+        elif obligatorio:
+            self.valido = verificar
+        else:
+            self.valido = lambda valor: valor is None or valor == "" or verificar(valor)
+
+
+class Esquema:
+    """
+    Campos de un registro (cliente, producto o venta) y sus reglas. Valida filas (diccionarios)
+    o columnas (`{campo: lista de valores}`); los campos que no están en el esquema se ignoran.
+    """
+
+    def __init__(self, nombre, *campos):
+        self.nombre = nombre
+        self.campos = campos
+
+    def validar(self, fila):
+        """
+        Errores de una fila: `{campo: mensaje}`, vacío si la fila es válida.
+        """
+        obtener = fila.get
+        return {campo.nombre: campo.mensaje for campo in self.campos if not campo.valido(obtener(campo.nombre))}
+
+    def validar_filas(self, filas, inicio=1):
+        """
+        ## Función: `validar_filas`
+        Valida un lote de filas completo, sin detenerse en la primera fila con errores.
+
+        ### Parámetros:
+        - `filas` (iterable de diccionarios): Filas a validar.
+        - `inicio` (int): Número de la primera fila (por ejemplo 2 si la fila 1 es el encabezado).
+
+        ### Retorna:
+        - Diccionario `{número de fila: {campo: mensaje}}` solo con las filas que tienen errores,
+          en el orden de las filas y de los campos del esquema.
+        """
+        campos = [(campo.nombre, campo.valido, campo.mensaje) for campo in self.campos]
+        errores = {}
+        for numero, fila in enumerate(filas, inicio):
+            obtener = fila.get
+            for nombre, valido, mensaje in campos:
+                if not valido(obtener(nombre)):
+                    errores.setdefault(numero, {})[nombre] = mensaje
+        return errores
+
+    def validar_columnas(self, columnas, inicio=1):
+        """
+        ## Función: `validar_columnas`
+        Valida una importación por columnas: cada regla recorre su columna completa de una vez,
+        sin armar un diccionario por fila.
+
+        ### Parámetros:
+        - `columnas` (dict): `{campo: secuencia de valores}`, todas del mismo largo. Una columna que
+          falta cuenta como vacía en todas las filas.
+        - `inicio` (int): Número de la primera fila.
+
+        ### Retorna:
+        - Lo mismo que `validar_filas`.
+        """
+        total = max(map(len, columnas.values()), default=0)
+        errores = {}
+        for campo in self.campos:
+            columna = columnas.get(campo.nombre)
+            if columna is None:
+                if not campo.obligatorio:
+                    continue
+                malas = range(inicio, inicio + total)
+            else:
+                malas = compress(count(inicio), map(not_, map(campo.valido, columna)))
+            for numero in malas:
+                errores.setdefault(numero, {})[campo.nombre] = campo.mensaje
+        return dict(sorted(errores.items()))
+
+
+def lista_errores(errores):
+    """
+    Convierte el resultado de `validar_filas` o `validar_columnas` en una lista de
+    `{"fila", "campo", "error"}` (por ejemplo para escribirla en JSON).
+    """
+    return [
+        {"fila": numero, "campo": campo, "error": mensaje}
+        for numero, campos in errores.items()
+        for campo, mensaje in campos.items()
+    ]
+
+
+ESQUEMA_CLIENTE = Esquema(
+    "clientes",
+    Campo("nombre", es_alfa_numerico, "El nombre debe ser alfanumérico."),
+    Campo("apellido", es_alfa_numerico, "El apellido debe ser alfanumérico."),
+    Campo("direccion", None, "La dirección no puede estar vacía."),
+    Campo("telefono", es_entero_no_negativo, "El teléfono debe ser un número válido."),
+    Campo("correo", es_correo, "El correo debe ser válido."),
+)
+
+ESQUEMA_PRODUCTO = Esquema(
+    "productos",
+    Campo("nombre", None, "El nombre no puede estar vacío."),
+    Campo("medida", formato_peso_volumen, "La medida debe tener el formato 100 ml, 500 g o 300."),
+    Campo("fecha_vencimiento", es_fecha, "La fecha de vencimiento debe ser DD/MM/AAAA o AAAA-MM-DD."),
+    Campo("precio_produccion", es_entero_no_negativo, "Los precios deben ser números enteros sin signos, puntos ni comas."),
+    Campo("precio_venta", es_entero_no_negativo, "Los precios deben ser números enteros sin signos, puntos ni comas."),
+)
+
+# Campos de los registros de `ingesta.py` (`ingesta.convertir` valida con este esquema); el producto
+# y el cliente (id, nombre o correo) se resuelven contra la base al ingerir
+ESQUEMA_VENTA = Esquema(
+    "ventas",
+    Campo("clave", es_texto, "Falta la clave de idempotencia (clave)."),
+    Campo("fecha", fecha_hora_valida, "La fecha no es válida."),
+    Campo("producto", es_texto, "Falta el producto."),
+    Campo("cliente", es_texto, "Falta el cliente."),
+    Campo("cantidad", es_entero_positivo, "La cantidad debe ser un entero positivo."),
+    Campo("precio", es_entero_no_negativo, "El precio debe ser un entero no negativo.", obligatorio=False),
+)
+
+ESQUEMAS = {esquema.nombre: esquema for esquema in (ESQUEMA_CLIENTE, ESQUEMA_PRODUCTO, ESQUEMA_VENTA)}